@@ -15,7 +15,7 @@ Use this only if:
 - You prefer local model storage over OML Datastore
 
 Features:
-- Connects to ADB via oracledb
+- Connects to ADB via the shared connection layer (shared/db.py)
 - Pulls training data from database
 - Trains model locally with XGBoost
 - Stores model metadata in database
@@ -33,7 +33,6 @@ Usage:
     # Add as PythonOperator task in DAG
 """
 
-import os
 import sys
 import json
 import pickle
@@ -72,47 +71,20 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from snapshot_cache import load_view_dataframe
+from preprocessing import FeaturePreprocessor
+from db import get_connection
+
 # ============================================================================
 # Database Connection
 # ============================================================================
 
 def get_db_connection():
-    """Connect to Oracle ADB using oracledb"""
-    try:
-        import oracledb
-    except ImportError:
-        logger.error("oracledb not installed. Install with: pip install oracledb")
-        sys.exit(1)
-    
-    # Get connection parameters
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    
-    if not password or not connection_string:
-        logger.error("ADB_PASSWORD and ADB_CONNECTION_STRING must be set in .env file")
-        sys.exit(1)
-    
-    try:
-        # Try thick mode first (for wallet support)
-        wallet_path = os.getenv('ADB_WALLET_PATH')
-        if wallet_path and Path(wallet_path).exists():
-            try:
-                oracledb.init_oracle_client(lib_dir=os.getenv('ORACLE_CLIENT_LIB_DIR'))
-            except Exception as e:
-                logger.warning(f"Could not initialize Oracle client: {e}")
-                logger.info("Falling back to thin mode...")
-        
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        logger.info("✓ Connected to Oracle ADB")
-        return connection
-    except Exception as e:
-        logger.error(f"Failed to connect to database: {e}")
-        sys.exit(1)
+    """Connect to Oracle ADB (shared pooled connection layer)"""
+    connection = get_connection()
+    logger.info("✓ Connected to Oracle ADB")
+    return connection
 
 # ============================================================================
 # Data Loading
@@ -122,12 +94,9 @@ def load_training_data(connection):
     """Load training data from CHURN_TRAINING_DATA view"""
     logger.info("Loading training data from CHURN_TRAINING_DATA view...")
     
-    query = """
-    SELECT * FROM OML.CHURN_TRAINING_DATA
-    """
-    
     try:
-        df = pd.read_sql(query, connection)
+        # Local snapshot cache avoids re-pulling the view when it is unchanged
+        df = load_view_dataframe(connection)
         logger.info(f"✓ Loaded {len(df):,} rows, {len(df.columns)} columns")
         return df
     except Exception as e:
@@ -189,14 +158,10 @@ def train_model(X_train, y_train, X_val, y_val, feature_cols):
             logger.error("Neither XGBoost nor sklearn available")
             sys.exit(1)
     
-    # Clean data
-    X_train = X_train.replace([np.inf, -np.inf], np.nan).fillna(0)
-    X_val = X_val.replace([np.inf, -np.inf], np.nan).fillna(0)
-    
-    # Ensure numeric
-    for col in feature_cols:
-        X_train[col] = pd.to_numeric(X_train[col], errors='coerce').fillna(0)
-        X_val[col] = pd.to_numeric(X_val[col], errors='coerce').fillna(0)
+    # Clean data (fitted once, re-applied at scoring time)
+    preprocessor = FeaturePreprocessor().fit(X_train, feature_cols)
+    X_train = preprocessor.transform(X_train)
+    X_val = preprocessor.transform(X_val)
     
     logger.info(f"Training {model_name} model...")
     logger.info(f"  Training samples: {len(X_train):,}")
@@ -254,7 +219,8 @@ def train_model(X_train, y_train, X_val, y_val, feature_cols):
         'recall': recall,
         'f1': f1,
         'best_threshold': best_threshold,
-        'feature_cols': feature_cols
+        'feature_cols': feature_cols,
+        'preprocessor': preprocessor
     }
 
 # ============================================================================
@@ -326,6 +292,7 @@ def save_model_metadata(connection, model_info, model_version):
     
     metadata_json = json.dumps({
         'feature_cols': model_info['feature_cols'],
+        'preprocessing': model_info['preprocessor'].to_dict(),
         'training_timestamp': datetime.now().isoformat()
     })
     
@@ -386,11 +353,7 @@ def score_users(connection, model, feature_cols, model_info):
         return
     
     # Prepare features
-    X = user_features[feature_cols].copy()
-    X = X.replace([np.inf, -np.inf], np.nan).fillna(0)
-    
-    for col in feature_cols:
-        X[col] = pd.to_numeric(X[col], errors='coerce').fillna(0)
+    X = model_info['preprocessor'].transform(user_features)
     
     # Predict
     logger.info(f"Generating predictions for {len(X):,} users...")
@@ -4,51 +4,18 @@ Analyze Cohort Distribution and At-Risk Users
 Based on current cohort definitions in docs/COHORT_DEFINITIONS.md
 """
 
-import os
 import sys
 from pathlib import Path
-import glob
 from dotenv import load_dotenv
 
 env_file = Path('.env')
 if env_file.exists():
     load_dotenv(dotenv_path=env_file)
 
-import oracledb
-
-wallet_path = os.getenv('ADB_WALLET_PATH')
-if not os.getenv('TNS_ADMIN'):
-    os.environ['TNS_ADMIN'] = wallet_path
-
-try:
-    oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-    lib_dir = None
-    for pattern in oracle_opt_paths:
-        matches = glob.glob(pattern)
-        for match in matches:
-            if os.path.isdir(match):
-                lib_dir = match
-                break
-        if lib_dir:
-            break
-    if lib_dir:
-        try:
-            oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-        except:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir)
-            except:
-                oracledb.init_oracle_client(config_dir=wallet_path)
-    else:
-        oracledb.init_oracle_client(config_dir=wallet_path)
-except:
-    pass
-
-conn = oracledb.connect(
-    user=os.getenv('ADB_USERNAME', 'OML'),
-    password=os.getenv('ADB_PASSWORD'),
-    dsn=os.getenv('ADB_CONNECTION_STRING')
-)
+sys.path.insert(0, str(Path(__file__).parent / 'shared'))
+from db import get_connection
+
+conn = get_connection()
 
 cursor = conn.cursor()
 
@@ -1,72 +1,91 @@
 #!/usr/bin/env python3
 """
 Compare different sampling strategies to see which is most representative
+
+One streaming pass: the full dataset is profiled into mergeable sketches
+(stream_profile.py) while the random and stratified samples are drawn by the
+shared reservoir sampler (stream_sampler.py), so the file is never loaded as a
+whole. Samples are compared with the full dataset by mean and by the
+Kolmogorov-Smirnov distance between t-digest CDFs.
 """
 
-import pandas as pd
 import sys
+import argparse
+import pandas as pd
 from pathlib import Path
 
-def compare_sampling_strategies(dataset_file):
-    """Compare sequential, random, and stratified sampling"""
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir / 'shared'))
+from stream_sampler import StratifiedReservoirSampler, DEFAULT_SEED, DEFAULT_CHUNK_ROWS
+from stream_profile import DatasetProfile, profile_frame, ks_statistic
+
+NUMERIC_FEATURES = ['Age', 'Total_Purchases', 'Average_Order_Value',
+                    'Days_Since_Last_Purchase', 'Login_Frequency',
+                    'Lifetime_Value']
+
+def _print_sample(sample, full_rate):
+    """Churn stats of one sample vs the full dataset"""
+    rate = sample['Churned'].mean() * 100
+    print(f"   Churn rate: {rate:.2f}%")
+    print(f"   Churned: {sample['Churned'].sum():,}")
+    print(f"   Not churned: {(sample['Churned']==0).sum():,}")
+    print(f"   Difference from full dataset: {rate - full_rate:+.2f}%")
+    return rate
+
+def compare_sampling_strategies(dataset_file, target_size=4142, strata=None, seed=DEFAULT_SEED,
+                                chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Compare sequential, random, and stratified sampling (one streaming pass)"""
     
     print("=" * 70)
     print("Sampling Strategy Comparison")
     print("=" * 70)
     
-    # Load dataset
-    df = pd.read_csv(dataset_file)
+    strata = strata or ['Churned']
+    random_sampler = StratifiedReservoirSampler(target_size, seed=seed)
+    stratified_sampler = StratifiedReservoirSampler(target_size, strata=strata, seed=seed)
+    head_parts = []
+    head_rows = 0
+    full = DatasetProfile()
+    
+    # One pass feeds the full-dataset sketches and all three samples
+    with pd.read_csv(dataset_file, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            full.update(chunk[[col for col in NUMERIC_FEATURES + ['Churned'] if col in chunk.columns]])
+            if head_rows < target_size:
+                head_parts.append(chunk.iloc[:target_size - head_rows])
+                head_rows += len(head_parts[-1])
+            random_sampler.add(chunk)
+            stratified_sampler.add(chunk)
+    
+    label = full.columns['Churned'].moments
+    churned = int(round(label.mean * label.count))
+    full_rate = label.mean * 100
     print(f"\n📊 Full Dataset Statistics:")
-    print(f"   Total rows: {len(df):,}")
-    print(f"   Churn rate: {df['Churned'].mean()*100:.2f}%")
-    print(f"   Churned: {df['Churned'].sum():,}")
-    print(f"   Not churned: {(df['Churned']==0).sum():,}")
-    
-    target_size = 4142
+    print(f"   Total rows: {full.rows:,}")
+    print(f"   Churn rate: {full_rate:.2f}%")
+    print(f"   Churned: {churned:,}")
+    print(f"   Not churned: {full.rows - churned:,}")
     
     # Strategy 1: Sequential (first N rows)
     print(f"\n" + "=" * 70)
     print("Strategy 1: Sequential (First N Rows)")
     print("=" * 70)
-    sequential = df.head(target_size)
-    seq_churn_rate = sequential['Churned'].mean() * 100
-    print(f"   Churn rate: {seq_churn_rate:.2f}%")
-    print(f"   Churned: {sequential['Churned'].sum():,}")
-    print(f"   Not churned: {(sequential['Churned']==0).sum():,}")
-    print(f"   Difference from full dataset: {seq_churn_rate - df['Churned'].mean()*100:+.2f}%")
+    sequential = pd.concat(head_parts)
+    seq_churn_rate = _print_sample(sequential, full_rate)
     
     # Strategy 2: Random sampling
     print(f"\n" + "=" * 70)
     print("Strategy 2: Random Sampling")
     print("=" * 70)
-    random_sample = df.sample(n=target_size, random_state=42)
-    rand_churn_rate = random_sample['Churned'].mean() * 100
-    print(f"   Churn rate: {rand_churn_rate:.2f}%")
-    print(f"   Churned: {random_sample['Churned'].sum():,}")
-    print(f"   Not churned: {(random_sample['Churned']==0).sum():,}")
-    print(f"   Difference from full dataset: {rand_churn_rate - df['Churned'].mean()*100:+.2f}%")
+    random_sample, _ = random_sampler.finish()
+    rand_churn_rate = _print_sample(random_sample, full_rate)
     
     # Strategy 3: Stratified sampling (maintains churn rate)
     print(f"\n" + "=" * 70)
-    print("Strategy 3: Stratified Sampling (Maintains Churn Rate)")
+    print(f"Strategy 3: Stratified Sampling ({' × '.join(strata)})")
     print("=" * 70)
-    churned = df[df['Churned']==1]
-    not_churned = df[df['Churned']==0]
-    full_churn_rate = len(churned) / len(df)
-    
-    n_churned = int(target_size * full_churn_rate)
-    n_not_churned = target_size - n_churned
-    
-    stratified = pd.concat([
-        churned.sample(n=min(n_churned, len(churned)), random_state=42),
-        not_churned.sample(n=min(n_not_churned, len(not_churned)), random_state=42)
-    ]).sample(frac=1, random_state=42).reset_index(drop=True)
-    
-    strat_churn_rate = stratified['Churned'].mean() * 100
-    print(f"   Churn rate: {strat_churn_rate:.2f}%")
-    print(f"   Churned: {stratified['Churned'].sum():,}")
-    print(f"   Not churned: {(stratified['Churned']==0).sum():,}")
-    print(f"   Difference from full dataset: {strat_churn_rate - df['Churned'].mean()*100:+.2f}%")
+    stratified, _ = stratified_sampler.finish()
+    strat_churn_rate = _print_sample(stratified, full_rate)
     print(f"   ✅ Maintains exact churn rate!")
     
     # Compare feature distributions
@@ -74,26 +93,25 @@ def compare_sampling_strategies(dataset_file):
     print("Feature Distribution Comparison")
     print("=" * 70)
     
-    numeric_features = ['Age', 'Total_Purchases', 'Average_Order_Value', 
-                       'Days_Since_Last_Purchase', 'Login_Frequency', 
-                       'Lifetime_Value']
-    
     print(f"\n{'Feature':<30} | {'Full Dataset':>12} | {'Sequential':>12} | {'Random':>12} | {'Stratified':>12}")
     print("-" * 80)
     
-    for col in numeric_features:
-        if col in df.columns:
-            full_mean = df[col].mean()
-            seq_mean = sequential[col].mean()
-            rand_mean = random_sample[col].mean()
-            strat_mean = stratified[col].mean()
-            
-            seq_diff = abs(seq_mean - full_mean) / full_mean * 100
-            rand_diff = abs(rand_mean - full_mean) / full_mean * 100
-            strat_diff = abs(strat_mean - full_mean) / full_mean * 100
-            
-            print(f"{col:<30} | {full_mean:>12.2f} | {seq_mean:>12.2f} | {rand_mean:>12.2f} | {strat_mean:>12.2f}")
-            print(f"{'  (diff %)':<30} | {'':>12} | {seq_diff:>11.1f}% | {rand_diff:>11.1f}% | {strat_diff:>11.1f}%")
+    samples = {name: profile_frame(df) for name, df in
+               (('Sequential', sequential), ('Random', random_sample), ('Stratified', stratified))}
+    features = [col for col in NUMERIC_FEATURES if col in full.columns and full.columns[col].moments.count]
+    ks = {name: [] for name in samples}
+    
+    for col in features:
+        full_mean = full.columns[col].moments.mean
+        means = [samples[name].columns[col].moments.mean for name in samples]
+        diffs = [abs(mean - full_mean) / full_mean * 100 for mean in means]
+        stats = [ks_statistic(full.columns[col], samples[name].columns[col]) for name in samples]
+        for name, stat in zip(samples, stats):
+            ks[name].append(stat)
+        
+        print(f"{col:<30} | {full_mean:>12.2f} | " + " | ".join(f"{mean:>12.2f}" for mean in means))
+        print(f"{'  (diff %)':<30} | {'':>12} | " + " | ".join(f"{diff:>11.1f}%" for diff in diffs))
+        print(f"{'  (KS distance)':<30} | {'':>12} | " + " | ".join(f"{stat:>12.3f}" for stat in stats))
     
     # Summary
     print(f"\n" + "=" * 70)
@@ -101,14 +119,19 @@ def compare_sampling_strategies(dataset_file):
     print("=" * 70)
     
     print(f"\nChurn Rate Accuracy:")
-    print(f"   Sequential: {abs(seq_churn_rate - df['Churned'].mean()*100):.2f}% difference")
-    print(f"   Random:     {abs(rand_churn_rate - df['Churned'].mean()*100):.2f}% difference")
-    print(f"   Stratified: {abs(strat_churn_rate - df['Churned'].mean()*100):.2f}% difference ✅ BEST")
+    print(f"   Sequential: {abs(seq_churn_rate - full_rate):.2f}% difference")
+    print(f"   Random:     {abs(rand_churn_rate - full_rate):.2f}% difference")
+    print(f"   Stratified: {abs(strat_churn_rate - full_rate):.2f}% difference ✅ BEST")
+    
+    if features:
+        print(f"\nMean KS distance over {len(features)} features (0 = identical distributions):")
+        for name, stats in ks.items():
+            print(f"   {name + ':':<11} {sum(stats) / len(stats):.3f}")
     
     print(f"\n🎯 Recommendation:")
-    if abs(strat_churn_rate - df['Churned'].mean()*100) < 0.1:
+    if abs(strat_churn_rate - full_rate) < 0.1:
         print(f"   ✅ Use STRATIFIED sampling - maintains exact churn rate")
-    elif abs(rand_churn_rate - df['Churned'].mean()*100) < 1.0:
+    elif abs(rand_churn_rate - full_rate) < 1.0:
         print(f"   ✅ Use RANDOM sampling - good representation")
     else:
         print(f"   ⚠️  Sequential may have bias - consider random or stratified")
@@ -120,13 +143,17 @@ def compare_sampling_strategies(dataset_file):
     }
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        dataset_file = "data/processed/churn_dataset_cleaned.csv"
-    else:
-        dataset_file = sys.argv[1]
-    
-    if not Path(dataset_file).exists():
-        print(f"❌ ERROR: File not found: {dataset_file}")
+    parser = argparse.ArgumentParser(description='Compare sequential, random and stratified sampling')
+    parser.add_argument('dataset_file', nargs='?', default="data/processed/churn_dataset_cleaned.csv")
+    parser.add_argument('--size', type=int, default=4142, help='Sample size')
+    parser.add_argument('--strata', nargs='+', help='Stratification columns (default: Churned)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Sampling seed')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='CSV rows per chunk')
+    args = parser.parse_args()
+    
+    if not Path(args.dataset_file).exists():
+        print(f"❌ ERROR: File not found: {args.dataset_file}")
         sys.exit(1)
     
-    compare_sampling_strategies(dataset_file)
+    compare_sampling_strategies(args.dataset_file, target_size=args.size, strata=args.strata,
+                                seed=args.seed, chunk_rows=args.chunk_rows)
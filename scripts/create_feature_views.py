@@ -5,6 +5,9 @@ Task 2.7: Create feature engineering views in OML schema
 
 Usage:
     python scripts/create_feature_views.py
+    python scripts/create_feature_views.py --write-sql   # Regenerate sql/create_feature_views.sql only
+
+The view definitions are generated from scripts/shared/feature_schema.py.
 
 Creates views:
     - CHURN_TRAINING_FEATURES - Features for training (excludes target)
@@ -12,8 +15,8 @@ Creates views:
     - CHURN_USER_FEATURES - Features for scoring actual users
 """
 
-import os
 import sys
+import argparse
 from pathlib import Path
 
 script_dir = Path(__file__).parent
@@ -28,94 +31,22 @@ try:
 except ImportError:
     pass
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set")
-        sys.exit(1)
-    
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    try:
-        import glob
-        oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
+from feature_schema import FEATURE_VIEWS, view_statements, generate_feature_views_sql
 
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    return oracledb.connect(user=username, password=password, dsn=connection_string)
+def write_sql_file(sql_file):
+    """Regenerate the SQL file from the feature schema"""
+    sql_file.parent.mkdir(exist_ok=True)
+    with open(sql_file, 'w', encoding='utf-8') as f:
+        f.write(generate_feature_views_sql())
+    print(f"✓ Wrote {sql_file}")
 
-def execute_sql_file(connection, sql_file):
-    """Execute SQL file"""
-    if not sql_file.exists():
-        print(f"❌ ERROR: SQL file not found: {sql_file}")
-        sys.exit(1)
-    
-    print(f"\nReading SQL file: {sql_file}")
-    with open(sql_file, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
-    
-    # Better SQL parsing
-    lines = sql_content.split('\n')
-    cleaned_lines = []
-    for line in lines:
-        if '--' in line:
-            comment_pos = line.find('--')
-            if comment_pos >= 0:
-                line = line[:comment_pos].rstrip()
-        cleaned_lines.append(line)
+def execute_view_statements(connection):
+    """Create the feature views from the feature schema"""
+    statements = view_statements()
     
-    full_text = '\n'.join(cleaned_lines)
-    raw_statements = [s.strip() + ';' for s in full_text.split(';') if s.strip()]
-    
-    statements = []
-    for stmt in raw_statements:
-        stmt = stmt.strip()
-        if stmt.endswith(';'):
-            stmt = stmt[:-1].strip()
-        if not stmt or stmt.startswith('--'):
-            continue
-        if stmt.strip().upper().startswith('SELECT'):
-            continue
-        statements.append(stmt)
-    
-    print(f"✓ Found {len(statements)} SQL statements to execute")
+    print(f"\n✓ Generated {len(statements)} view statements from the feature schema")
     
     cursor = connection.cursor()
     success_count = 0
@@ -160,11 +91,7 @@ def verify_views(connection):
     print("Verifying Views")
     print("=" * 60)
     
-    expected_views = [
-        'CHURN_TRAINING_FEATURES',
-        'CHURN_TRAINING_DATA',
-        'CHURN_USER_FEATURES'
-    ]
+    expected_views = [view.split('.')[-1] for view, _, _, _, _ in FEATURE_VIEWS]
     
     cursor = connection.cursor()
     all_exist = True
@@ -187,14 +114,19 @@ def main():
     print("Create Feature Engineering Views")
     print("=" * 60)
     
-    if not sql_file.exists():
-        print(f"❌ ERROR: SQL file not found: {sql_file}")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Create feature engineering views')
+    parser.add_argument('--write-sql', action='store_true',
+                        help='Regenerate sql/create_feature_views.sql from the feature schema and exit')
+    args = parser.parse_args()
+    
+    if args.write_sql:
+        write_sql_file(sql_file)
+        return
     
     connection = get_connection()
     
     try:
-        success = execute_sql_file(connection, sql_file)
+        success = execute_view_statements(connection)
         
         if success:
             views_exist = verify_views(connection)
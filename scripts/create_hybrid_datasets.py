@@ -3,106 +3,36 @@
 Create hybrid datasets:
 1. Mapped dataset (5,003 rows) - for API/demo with real USER_IDs (all users)
 2. Training dataset (remaining rows) - for model training without user mapping
+
+Both come out of one streaming pass of the shared stratified reservoir sampler
+(stream_sampler.py): the sample is held in memory (one row per user), the
+remainder is written to the training CSV as the file is read, so input files
+larger than RAM work. Deterministic for a given --seed.
 """
 
-import os
 import sys
-import pandas as pd
+import argparse
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
 script_dir = Path(__file__).parent
 project_root = script_dir.parent
 env_file = project_root / '.env'
-load_dotenv(dotenv_path=env_file)
 
-import oracledb
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
 
-def get_user_ids(limit=None):
-    """Get list of USER_IDs from ADMIN.USERS table"""
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not all([wallet_path, connection_string, password]):
-        print("❌ ERROR: Missing required environment variables")
-        return None
-    
-    # Set TNS_ADMIN
-    os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Initialize Oracle client (simplified)
-    import platform
-    import subprocess
-    import glob
-    
-    python_arch = platform.machine()
-    lib_dir = None
-    
-    if python_arch == 'arm64':
-        oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                for lib_name in ['libclntsh.dylib', 'libclntsh.so']:
-                    lib_path = os.path.join(match, lib_name) if os.path.isdir(match) else match
-                    if os.path.exists(lib_path) or os.path.islink(lib_path):
-                        try:
-                            result = subprocess.run(['file', lib_path], 
-                                                   capture_output=True, text=True, timeout=2)
-                            lib_arch_info = result.stdout.lower()
-                            if 'arm64' in lib_arch_info and 'x86_64' not in lib_arch_info:
-                                lib_dir = os.path.dirname(lib_path) if os.path.isfile(lib_path) else match
-                                break
-                        except Exception:
-                            pass
-                if lib_dir:
-                    break
-            if lib_dir:
-                break
-    
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    try:
-        if lib_dir:
-            oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    try:
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        
-        cursor = connection.cursor()
-        # Get ALL users (not just active) to map all 5,003 users
-        query = """
-            SELECT ID 
-            FROM ADMIN.USERS 
-            ORDER BY ID
-        """
-        cursor.execute(query)
-        user_ids = [row[0] for row in cursor.fetchall()]
-        
-        cursor.close()
-        connection.close()
-        return user_ids
-        
-    except Exception as e:
-        print(f"❌ ERROR: Could not fetch user IDs: {e}")
-        return None
+sys.path.insert(0, str(script_dir / 'shared'))
+from stream_sampler import split_csv, DEFAULT_SEED, DEFAULT_CHUNK_ROWS
+from map_dataset_to_users import get_user_ids, order_columns, LABEL
 
-def create_hybrid_datasets(dataset_file, mapped_output, training_output):
+def create_hybrid_datasets(dataset_file, mapped_output, training_output, strata=None,
+                           seed=DEFAULT_SEED, chunk_rows=DEFAULT_CHUNK_ROWS):
     """
-    Create two datasets:
+    Create two datasets in one streaming pass:
     1. Mapped dataset (stratified sample for API)
     2. Training dataset (remaining rows for training)
     """
@@ -111,125 +41,125 @@ def create_hybrid_datasets(dataset_file, mapped_output, training_output):
     print("Creating Hybrid Datasets")
     print("=" * 70)
     
-    # Load dataset
-    print(f"\n📥 Loading dataset: {dataset_file}")
-    df = pd.read_csv(dataset_file)
-    print(f"   Total rows: {len(df):,}")
-    
-    # Get user IDs
+    # Get user IDs (ALL users, not just active, to map all 5,003 users)
     print(f"\n🔑 Fetching USER_IDs from ADMIN.USERS...")
-    user_ids = get_user_ids()
+    user_ids = get_user_ids(active_only=False)
     
-    if not user_ids:
+    if user_ids is None or len(user_ids) == 0:
         print("❌ ERROR: Could not fetch user IDs")
         return False
     
-    print(f"   Found {len(user_ids):,} active users")
-    
-    # Step 1: Create mapped dataset (stratified sample)
-    print(f"\n" + "=" * 70)
-    print("Step 1: Creating Mapped Dataset (for API/Demo)")
-    print("=" * 70)
+    print(f"   Found {len(user_ids):,} users")
     
+    strata = strata or [LABEL]
     n_users = len(user_ids)
+    print(f"\n📥 Streaming dataset: {dataset_file} (chunks of {chunk_rows:,} rows)")
+    print(f"   Stratified sampling {n_users:,} rows by {' × '.join(strata)} (seed {seed})")
+    print(f"   Remaining rows are written to the training dataset during the pass")
     
-    # Stratified sampling to maintain churn rate
-    churned = df[df['Churned']==1]
-    not_churned = df[df['Churned']==0]
-    full_churn_rate = len(churned) / len(df)
+    training_path = Path(training_output)
+    training_path.parent.mkdir(parents=True, exist_ok=True)
+    training = {'rows': 0, 'churned': 0}
+    
+    with open(training_path, 'w', newline='') as training_file:
+        def write_training(rows):
+            # Placeholder USER_IDs for reference, not mapped to real users
+            rows = rows.drop(columns=['USER_ID'], errors='ignore')
+            start = training['rows'] + 1
+            rows.insert(0, 'USER_ID', [f'TRAIN_{i}' for i in range(start, start + len(rows))])
+            order_columns(rows).to_csv(training_file, header=training['rows'] == 0, index=False)
+            training['rows'] += len(rows)
+            training['churned'] += int(rows[LABEL].sum())
+        
+        mapped_sample, sampler = split_csv(
+            dataset_file, n_users, strata=strata, seed=seed, chunk_rows=chunk_rows,
+            on_remainder=write_training
+        )
     
-    n_churned = int(n_users * full_churn_rate)
-    n_not_churned = n_users - n_churned
+    total_rows = sampler.rows_seen
+    print(f"   Total rows: {total_rows:,} ({len(sampler.counts):,} strata)")
     
-    print(f"   Stratified sampling {n_users:,} rows:")
-    print(f"   - {n_churned:,} churned rows")
-    print(f"   - {n_not_churned:,} not churned rows")
+    # Step 1: Mapped dataset (stratified sample)
+    print(f"\n" + "=" * 70)
+    print("Step 1: Mapped Dataset (for API/Demo)")
+    print("=" * 70)
     
-    mapped_sample = pd.concat([
-        churned.sample(n=min(n_churned, len(churned)), random_state=42),
-        not_churned.sample(n=min(n_not_churned, len(not_churned)), random_state=42)
-    ]).sample(frac=1, random_state=42).reset_index(drop=True)
+    for entry in sampler.summary()[:10]:
+        label = ' × '.join(str(v) for v in entry['stratum'])
+        print(f"   - {label:<40} {entry['sampled']:>7,} of {entry['rows']:>9,} rows")
+    if len(sampler.counts) > 10:
+        print(f"   ... {len(sampler.counts) - 10:,} more strata")
     
     # Map to real users
-    mapped_sample['USER_ID'] = user_ids[:len(mapped_sample)]
+    mapped_sample = mapped_sample.drop(columns=['USER_ID'], errors='ignore')
+    mapped_sample.insert(0, 'USER_ID', user_ids[:len(mapped_sample)])
     
-    churn_rate = mapped_sample['Churned'].mean() * 100
+    churn_rate = mapped_sample[LABEL].mean() * 100
+    full_churn_rate = (mapped_sample[LABEL].sum() + training['churned']) / total_rows * 100
     print(f"   ✅ Created mapped dataset: {len(mapped_sample):,} rows")
-    print(f"   ✅ Churn rate: {churn_rate:.2f}% (maintains exact rate)")
+    print(f"   ✅ Churn rate: {churn_rate:.2f}% (full dataset: {full_churn_rate:.2f}%)")
     
-    # Step 2: Create training dataset (remaining rows)
+    # Step 2: Training dataset (remaining rows)
     print(f"\n" + "=" * 70)
-    print("Step 2: Creating Training Dataset (for Model Training)")
+    print("Step 2: Training Dataset (for Model Training)")
     print("=" * 70)
     
-    # Get indices of mapped rows
-    mapped_indices = set(mapped_sample.index)
-    
-    # Get remaining rows
-    training_df = df[~df.index.isin(mapped_indices)].copy()
-    
-    # Add placeholder USER_ID (or leave empty - not needed for training)
-    # Using sequential IDs for reference, but not mapped to real users
-    training_df['USER_ID'] = [f'TRAIN_{i+1}' for i in range(len(training_df))]
-    
-    training_churn_rate = training_df['Churned'].mean() * 100
-    print(f"   ✅ Created training dataset: {len(training_df):,} rows")
+    training_churn_rate = training['churned'] / training['rows'] * 100 if training['rows'] else 0.0
+    print(f"   ✅ Created training dataset: {training['rows']:,} rows")
     print(f"   ✅ Churn rate: {training_churn_rate:.2f}%")
     
-    # Reorder columns (USER_ID first, Churned last)
-    for df_to_save in [mapped_sample, training_df]:
-        cols = [col for col in df_to_save.columns if col not in ['USER_ID', 'Churned']]
-        df_to_save = df_to_save[['USER_ID'] + cols + ['Churned']]
-    
     # Save datasets
     print(f"\n" + "=" * 70)
     print("Saving Datasets")
     print("=" * 70)
     
-    # Save mapped dataset
+    # Save mapped dataset (USER_ID first, Churned last)
     mapped_path = Path(mapped_output)
     mapped_path.parent.mkdir(parents=True, exist_ok=True)
-    mapped_sample.to_csv(mapped_path, index=False)
+    order_columns(mapped_sample).to_csv(mapped_path, index=False)
     print(f"✅ Mapped dataset saved: {mapped_path}")
     print(f"   Rows: {len(mapped_sample):,}")
     print(f"   Purpose: API responses, demo, real user predictions")
     
-    # Save training dataset
-    training_path = Path(training_output)
-    training_path.parent.mkdir(parents=True, exist_ok=True)
-    training_df.to_csv(training_path, index=False)
     print(f"✅ Training dataset saved: {training_path}")
-    print(f"   Rows: {len(training_df):,}")
+    print(f"   Rows: {training['rows']:,}")
     print(f"   Purpose: Model training, testing, validation")
     
     # Summary
     print(f"\n" + "=" * 70)
     print("Summary")
     print("=" * 70)
-    print(f"✅ Total rows used: {len(mapped_sample) + len(training_df):,} / {len(df):,}")
-    print(f"✅ Data utilization: 100%")
+    used = len(mapped_sample) + training['rows']
+    print(f"✅ Total rows used: {used:,} / {total_rows:,}")
+    print(f"✅ Data utilization: {used / total_rows * 100 if total_rows else 0:.0f}%")
     print(f"✅ Mapped dataset: {len(mapped_sample):,} rows (real users)")
-    print(f"✅ Training dataset: {len(training_df):,} rows (for model)")
+    print(f"✅ Training dataset: {training['rows']:,} rows (for model)")
     
     return True
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python create_hybrid_datasets.py <input_file.csv> <mapped_output.csv> <training_output.csv>")
-        print("\nExample:")
-        print("  python create_hybrid_datasets.py \\")
-        print("    data/processed/churn_dataset_cleaned.csv \\")
-        print("    data/processed/churn_dataset_mapped.csv \\")
-        print("    data/processed/churn_dataset_training.csv")
-        sys.exit(1)
-    
-    dataset_file = sys.argv[1]
-    mapped_output = sys.argv[2]
-    training_output = sys.argv[3]
-    
-    if not Path(dataset_file).exists():
-        print(f"❌ ERROR: File not found: {dataset_file}")
+    parser = argparse.ArgumentParser(
+        description='Split a dataset into a user-mapped sample and a training remainder',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Example:
+  python create_hybrid_datasets.py \\
+    data/processed/churn_dataset_cleaned.csv \\
+    data/processed/churn_dataset_mapped.csv \\
+    data/processed/churn_dataset_training.csv"""
+    )
+    parser.add_argument('input_file', help='Dataset CSV')
+    parser.add_argument('mapped_output', help='Mapped sample CSV (real USER_IDs)')
+    parser.add_argument('training_output', help='Remaining rows CSV (TRAIN_n IDs)')
+    parser.add_argument('--strata', nargs='+',
+                        help='Stratification columns (default: Churned; e.g. Churned Country Signup_Quarter)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Sampling seed')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='CSV rows per chunk')
+    args = parser.parse_args()
+    
+    if not Path(args.input_file).exists():
+        print(f"❌ ERROR: File not found: {args.input_file}")
         sys.exit(1)
     
-    success = create_hybrid_datasets(dataset_file, mapped_output, training_output)
+    success = create_hybrid_datasets(args.input_file, args.mapped_output, args.training_output,
+                                     strata=args.strata, seed=args.seed, chunk_rows=args.chunk_rows)
     sys.exit(0 if success else 1)
@@ -6,7 +6,6 @@ Task 3.10: Model Versioning and Performance Tracking
 Creates the MODEL_REGISTRY table for tracking model versions and performance.
 """
 
-import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -24,81 +23,8 @@ try:
 except ImportError:
     pass
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not connection_string:
-        print("❌ ERROR: ADB_CONNECTION_STRING not set in environment")
-        sys.exit(1)
-    
-    if not password:
-        print("❌ ERROR: ADB_PASSWORD not set in environment")
-        sys.exit(1)
-    
-    try:
-        return oracledb.connect(user=username, password=password, dsn=connection_string)
-    except Exception as e:
-        print(f"❌ ERROR: Failed to connect to database: {e}")
-        sys.exit(1)
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def execute_sql_file(connection, sql_file):
     """Execute SQL file"""
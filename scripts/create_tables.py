@@ -13,7 +13,6 @@ Prerequisites:
     - Environment variables set (.env file)
 """
 
-import os
 import sys
 from pathlib import Path
 
@@ -37,99 +36,8 @@ except ImportError:
     print("   Install with: pip install python-dotenv")
     print("   Using system environment variables only.")
 
-def initialize_oracle_client():
-    """Initialize Oracle client with wallet support"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        print(f"   Check .env file at: {env_file}")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-                print(f"✓ Oracle client initialized: {lib_dir} (thick mode)")
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                    print(f"✓ Oracle client initialized: {lib_dir} (thick mode)")
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-                    print(f"✓ Oracle client initialized (thick mode)")
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-            print(f"✓ Oracle client initialized (thick mode)")
-    except Exception as e:
-        print(f"⚠️  WARNING: Could not initialize Oracle client: {e}")
-        print("   Attempting thin mode (limited wallet support)...")
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not connection_string:
-        print("❌ ERROR: ADB_CONNECTION_STRING not set in environment")
-        sys.exit(1)
-    
-    if not password:
-        print("❌ ERROR: ADB_PASSWORD not set in environment")
-        sys.exit(1)
-    
-    try:
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        print(f"✓ Connected to ADB as {username}")
-        return connection
-    except Exception as e:
-        print(f"❌ ERROR: Could not connect to database: {e}")
-        print("\nTroubleshooting:")
-        print("1. Verify ADB instance is running in Oracle Cloud Console")
-        print("2. Check ADB_CONNECTION_STRING format in .env")
-        print("3. Verify ADB_USERNAME and ADB_PASSWORD are correct")
-        print("4. Ensure wallet files are accessible")
-        sys.exit(1)
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def execute_sql_file(connection, sql_file):
     """Execute SQL file"""
@@ -232,7 +140,10 @@ def verify_tables(connection):
     expected_tables = [
         'CHURN_DATASET_TRAINING',
         'USER_PROFILES',
-        'CHURN_PREDICTIONS'
+        'CHURN_PREDICTIONS',
+        'INGEST_LOAD_LOG',
+        'USER_ORDER_AGGREGATES',
+        'FEATURE_REFRESH_STATE'
     ]
     
     cursor = connection.cursor()
@@ -14,7 +14,8 @@ project_root = script_dir.parent
 env_file = project_root / '.env'
 load_dotenv(dotenv_path=env_file)
 
-import oracledb
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def examine_users_table():
     """Connect to ADB and examine ADMIN.USERS table"""
@@ -23,80 +24,10 @@ def examine_users_table():
     print("Examining ADMIN.USERS Table")
     print("=" * 60)
     
-    # Get connection parameters
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not all([wallet_path, connection_string, password]):
-        print("❌ ERROR: Missing required environment variables")
-        print("   Required: ADB_WALLET_PATH, ADB_CONNECTION_STRING, ADB_PASSWORD")
-        return False
-    
-    # Set TNS_ADMIN
-    os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Initialize Oracle client (same logic as test-python-connection.py)
-    import platform
-    import subprocess
-    import glob
-    
-    python_arch = platform.machine()
-    lib_dir = None
-    use_thin_mode = False
-    
-    # Try to find ARM64 Instant Client
-    if python_arch == 'arm64':
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                for lib_name in ['libclntsh.dylib', 'libclntsh.so']:
-                    lib_path = os.path.join(match, lib_name) if os.path.isdir(match) else match
-                    if os.path.exists(lib_path) or os.path.islink(lib_path):
-                        try:
-                            result = subprocess.run(['file', lib_path], 
-                                                   capture_output=True, text=True, timeout=2)
-                            lib_arch_info = result.stdout.lower()
-                            if 'arm64' in lib_arch_info and 'x86_64' not in lib_arch_info:
-                                lib_dir = os.path.dirname(lib_path) if os.path.isfile(lib_path) else match
-                                break
-                        except Exception:
-                            pass
-                if lib_dir:
-                    break
-            if lib_dir:
-                break
-    
-    # Set TNS_ADMIN before initializing client
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Only try thick mode if we have a compatible library
-    if lib_dir and not use_thin_mode:
-        try:
-            oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            print(f"✓ Oracle client initialized: {lib_dir} (thick mode)")
-        except Exception as e:
-            print(f"⚠️  WARNING: Could not initialize Oracle client: {e}")
-            print("   Trying thin mode...")
-            use_thin_mode = True
-    else:
-        print("⚠️  No compatible Oracle Instant Client found, using thin mode")
-        use_thin_mode = True
-    
     # Connect to database
     try:
-        print(f"\n🔌 Connecting to ADB as {username}...")
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
+        print(f"\n🔌 Connecting to ADB as {os.getenv('ADB_USERNAME', 'OML')}...")
+        connection = get_connection()
         print(f"✓ Connected successfully")
         
         cursor = connection.cursor()
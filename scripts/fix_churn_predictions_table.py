@@ -10,7 +10,6 @@ WARNING: This will DROP the existing table and recreate it.
 Make sure to backup any data if needed.
 """
 
-import os
 import sys
 from pathlib import Path
 
@@ -27,39 +26,8 @@ try:
 except ImportError:
     pass
 
-def get_connection():
-    """Get database connection"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        return None
-    
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    
-    if not password or not connection_string:
-        print("❌ ERROR: ADB_PASSWORD and ADB_CONNECTION_STRING must be set")
-        return None
-    
-    try:
-        wallet_path = os.getenv('ADB_WALLET_PATH')
-        if wallet_path and Path(wallet_path).exists():
-            try:
-                oracledb.init_oracle_client(lib_dir=os.getenv('ORACLE_CLIENT_LIB_DIR'))
-            except Exception:
-                pass
-        
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        return connection
-    except Exception as e:
-        print(f"❌ ERROR: Failed to connect: {e}")
-        return None
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def recreate_table(connection):
     """Recreate CHURN_PREDICTIONS table with correct schema"""
@@ -215,8 +183,6 @@ def main():
     print()
     
     connection = get_connection()
-    if not connection:
-        sys.exit(1)
     
     try:
         success = recreate_table(connection)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic churn dataset of any size
+
+Fits a Gaussian copula with empirical marginals (shared/synthetic_data.py) to
+a small realistic file and writes arbitrarily many rows with UUID USER_IDs, in
+parallel chunks, straight to CSV or Parquet. The output has the columns of the
+source file, so it feeds ingest_churn_data.py, training and scoring at scale.
+
+Usage:
+    python scripts/generate_synthetic_dataset.py --rows 10000000
+    python scripts/generate_synthetic_dataset.py --rows 10000000 --output data/synthetic/churn_10m --format parquet
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(script_dir / 'shared'))
+from synthetic_data import GaussianCopulaModel, generate, DEFAULT_SEED, DEFAULT_CHUNK_ROWS, LABEL
+
+DEFAULT_SOURCE = project_root / 'data' / 'processed' / 'churn_dataset_mapped.csv'
+DEFAULT_OUTPUT = project_root / 'data' / 'synthetic' / 'churn_dataset_synthetic.csv'
+CHECK_ROWS = 100000
+
+def check_fidelity(model, source_df, seed):
+    """Compare a synthetic sample with the source: churn rate, KS distances, rank correlations"""
+    from stream_profile import profile_frame, ks_statistic
+
+    synthetic = model.sample(CHECK_ROWS, seed=seed + 1)
+    numeric = [c for c in model.latent if model.marginals[c]['kind'] != 'categorical' and c != LABEL]
+    source_profile, synthetic_profile = profile_frame(source_df[numeric]), profile_frame(synthetic[numeric])
+    ks = {c: ks_statistic(source_profile.columns[c], synthetic_profile.columns[c]) for c in numeric}
+    corr_diff = (source_df[numeric].corr('spearman') - synthetic[numeric].corr('spearman')).abs().to_numpy().max()
+
+    print(f"\n🔍 Fidelity check ({CHECK_ROWS:,} synthetic rows vs {len(source_df):,} source rows)")
+    if LABEL in source_df.columns:
+        print(f"   Churn rate: {synthetic[LABEL].mean() * 100:.2f}% (source {source_df[LABEL].mean() * 100:.2f}%)")
+    worst = max(ks, key=ks.get)
+    print(f"   KS distance: mean {sum(ks.values()) / len(ks):.3f}, max {ks[worst]:.3f} ({worst})")
+    print(f"   Max Spearman correlation difference: {corr_diff:.3f}")
+
+def generate_synthetic_dataset(source_file, rows, output, fmt='csv', workers=None,
+                               chunk_rows=DEFAULT_CHUNK_ROWS, seed=DEFAULT_SEED, check=True):
+    """Fit on source_file and write `rows` synthetic rows"""
+    print("=" * 60)
+    print("Synthetic Churn Dataset Generation")
+    print("=" * 60)
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("❌ ERROR: pyarrow is required")
+        print("   Install with: pip install pyarrow")
+        return None
+
+    print(f"\n📥 Fitting Gaussian copula on: {source_file}")
+    source_df = pd.read_csv(source_file)
+    model = GaussianCopulaModel.fit(source_df, seed=seed)
+    kinds = [m['kind'] for m in model.marginals.values()]
+    print(f"   ✓ {len(source_df):,} rows, {len(model.latent)} copula dimensions "
+          f"({kinds.count('continuous')} continuous, {kinds.count('discrete')} discrete, "
+          f"{kinds.count('categorical')} categorical)")
+    for col, spec in model.derived.items():
+        print(f"   ✓ {col} derived from {spec['from']}")
+
+    if check:
+        check_fidelity(model, source_df, seed)
+
+    workers = workers or os.cpu_count() or 1
+    print(f"\n⚙️  Generating {rows:,} rows ({workers} workers, chunks of {chunk_rows:,}, seed {seed})")
+
+    def progress(done, seconds):
+        print(f"   {done:,} rows ({done / seconds:,.0f} rows/sec)")
+
+    stats = generate(model, rows, output, fmt=fmt, workers=workers, chunk_rows=chunk_rows, seed=seed,
+                     on_chunk=progress)
+
+    print(f"\n💾 Saved to: {stats['output']} ({stats['files']} file{'s' if stats['files'] > 1 else ''})")
+    print(f"\n" + "=" * 60)
+    print("Generation Summary")
+    print("=" * 60)
+    print(f"✅ Rows: {stats['rows']:,}")
+    print(f"✅ Time: {stats['seconds']:.1f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic churn dataset (Gaussian copula)')
+    parser.add_argument('--source', default=str(DEFAULT_SOURCE), help='Realistic CSV to fit on')
+    parser.add_argument('--rows', type=int, default=1000000, help='Rows to generate')
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT),
+                        help='Output .csv file, or a directory of part files')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='Part file format for directory outputs')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='Rows per chunk')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed')
+    parser.add_argument('--no-check', action='store_true', help='Skip the fidelity check')
+    args = parser.parse_args()
+
+    if not Path(args.source).exists():
+        print(f"❌ ERROR: File not found: {args.source}")
+        sys.exit(1)
+
+    stats = generate_synthetic_dataset(args.source, args.rows, args.output, fmt=args.format, workers=args.workers,
+                                       chunk_rows=args.chunk_rows, seed=args.seed, check=not args.no_check)
+    sys.exit(0 if stats else 1)
@@ -3,12 +3,30 @@
 Data Ingestion Script for Churn Prediction Model
 Loads CSV files into Oracle ADB OML schema tables
 
+Each table is a declared TableLoad (table_loader.py: source CSV, target table,
+column map, truncate / append / merge policy). The loads are independent and
+run concurrently, one pooled connection each, so the total time is close to
+the slowest single load. CSVs are streamed through the shared Arrow ingestion
+engine (csv_ingest.py): multithreaded parsing with the declared column types,
+batched binds with a commit per batch, optional direct-path loading.
+Truncate loads stream into a stage table and replace the target in one
+transaction, so a failed load leaves the table unchanged. Memory
+stays constant in the file size; rows/sec and peak memory are reported per table.
+
+Daily deltas: --upsert bulk-loads the file into a session-private stage table
+and MERGEs it on USER_ID (inserted / updated / unchanged counts); every applied
+file is recorded in OML.INGEST_LOAD_LOG, so re-running with the same or an
+older file is a no-op. Refresh time scales with the delta, not the table.
+
 Usage:
-    python scripts/ingest_churn_data.py
+    python scripts/ingest_churn_data.py [--batch-size 50000] [--block-size-mb 16]
+                                        [--threads N] [--direct-path]
+                                        [--policy truncate|append|merge] [--workers N]
+    python scripts/ingest_churn_data.py --upsert --tables profiles --profiles-csv data/delta/profiles_2026-10-19.csv
 
 Prerequisites:
     - Oracle Instant Client installed
-    - oracledb package installed (pip install oracledb)
+    - oracledb and pyarrow packages installed (pip install oracledb pyarrow)
     - ADB wallet configured
     - Environment variables set (.env file)
     - Tables created (run sql/create_churn_tables.sql first)
@@ -16,7 +34,7 @@ Prerequisites:
 
 import os
 import sys
-import pandas as pd
+import argparse
 from pathlib import Path
 from datetime import datetime
 
@@ -39,369 +57,131 @@ except ImportError:
     print("   Install with: pip install python-dotenv")
     print("   Using system environment variables only.")
 
-def initialize_oracle_client():
-    """Initialize Oracle client with wallet support"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        print(f"   Check .env file at: {env_file}")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        # Try common ARM64 paths first (for Apple Silicon)
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-                print(f"✓ Oracle client initialized: {lib_dir} (thick mode)")
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                    print(f"✓ Oracle client initialized: {lib_dir} (thick mode)")
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-                    print(f"✓ Oracle client initialized (thick mode)")
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-            print(f"✓ Oracle client initialized (thick mode)")
-    except Exception as e:
-        print(f"⚠️  WARNING: Could not initialize Oracle client: {e}")
-        print("   Attempting thin mode (limited wallet support)...")
-    
-    return oracledb
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection, get_pool, close_pool, print_timings
+from csv_ingest import print_ingest_stats, DEFAULT_BATCH_ROWS, DEFAULT_BLOCK_MB
+from table_loader import TableLoad, POLICIES, run_table_loads
 
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not connection_string:
-        print("❌ ERROR: ADB_CONNECTION_STRING not set in environment")
-        sys.exit(1)
-    
-    if not password:
-        print("❌ ERROR: ADB_PASSWORD not set in environment")
-        sys.exit(1)
-    
-    try:
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        print(f"✓ Connected to ADB as {username}")
-        return connection
-    except Exception as e:
-        print(f"❌ ERROR: Could not connect to database: {e}")
-        print("\nTroubleshooting:")
-        print("1. Verify ADB instance is running in Oracle Cloud Console")
-        print("2. Check ADB_CONNECTION_STRING format in .env")
-        print("3. Verify ADB_USERNAME and ADB_PASSWORD are correct")
-        print("4. Ensure wallet files are accessible")
-        sys.exit(1)
+# Declared loads: independent tables, run concurrently on pooled connections
+TABLE_LOADS = {
+    'training': TableLoad('Training Data', project_root / 'data' / 'processed' / 'churn_dataset_training.csv',
+                          'OML.CHURN_DATASET_TRAINING'),
+    'profiles': TableLoad('User Profiles', project_root / 'data' / 'processed' / 'churn_dataset_mapped.csv',
+                          'OML.USER_PROFILES'),
+}
 
-def map_column_names(df):
-    """Map CSV column names to Oracle table column names"""
-    column_mapping = {
-        'Age': 'AGE',
-        'Gender': 'GENDER',
-        'Country': 'COUNTRY',
-        'City': 'CITY',
-        'Membership_Years': 'MEMBERSHIP_YEARS',
-        'Login_Frequency': 'LOGIN_FREQUENCY',
-        'Session_Duration_Avg': 'SESSION_DURATION_AVG',
-        'Pages_Per_Session': 'PAGES_PER_SESSION',
-        'Cart_Abandonment_Rate': 'CART_ABANDONMENT_RATE',
-        'Wishlist_Items': 'WISHLIST_ITEMS',
-        'Total_Purchases': 'TOTAL_PURCHASES',
-        'Average_Order_Value': 'AVERAGE_ORDER_VALUE',
-        'Days_Since_Last_Purchase': 'DAYS_SINCE_LAST_PURCHASE',
-        'Discount_Usage_Rate': 'DISCOUNT_USAGE_RATE',
-        'Returns_Rate': 'RETURNS_RATE',
-        'Email_Open_Rate': 'EMAIL_OPEN_RATE',
-        'Customer_Service_Calls': 'CUSTOMER_SERVICE_CALLS',
-        'Product_Reviews_Written': 'PRODUCT_REVIEWS_WRITTEN',
-        'Social_Media_Engagement_Score': 'SOCIAL_MEDIA_ENGAGEMENT_SCORE',
-        'Mobile_App_Usage': 'MOBILE_APP_USAGE',
-        'Payment_Method_Diversity': 'PAYMENT_METHOD_DIVERSITY',
-        'Lifetime_Value': 'LIFETIME_VALUE',
-        'Credit_Balance': 'CREDIT_BALANCE',
-        'Signup_Quarter': 'SIGNUP_QUARTER',
-        'Churned': 'CHURNED',
-        'USER_ID': 'USER_ID',  # Already uppercase in CSV
-    }
-    
-    # Rename columns
-    df_renamed = df.rename(columns=column_mapping)
-    
-    # Ensure all expected columns exist
-    expected_cols = list(column_mapping.values())
-    missing_cols = [col for col in expected_cols if col not in df_renamed.columns]
-    if missing_cols:
-        print(f"⚠️  WARNING: Missing columns in CSV: {missing_cols}")
-    
-    return df_renamed
-
-def prepare_data_for_oracle(df):
-    """Prepare DataFrame for Oracle insertion"""
-    # Replace NaN with None (Oracle NULL)
-    df = df.where(pd.notna(df), None)
-    
-    # Ensure CHURNED is integer (0 or 1)
-    if 'CHURNED' in df.columns:
-        df['CHURNED'] = df['CHURNED'].fillna(0).astype(int)
-        # Validate CHURNED values
-        invalid = df[~df['CHURNED'].isin([0, 1])]
-        if len(invalid) > 0:
-            print(f"⚠️  WARNING: Found {len(invalid)} rows with invalid CHURNED values")
-            print("   Setting invalid values to 0")
-            df.loc[~df['CHURNED'].isin([0, 1]), 'CHURNED'] = 0
-    
-    # Ensure USER_ID is string
-    if 'USER_ID' in df.columns:
-        df['USER_ID'] = df['USER_ID'].astype(str)
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Load churn CSVs into Oracle ADB')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_ROWS,
+                        help='Rows per bound batch / commit')
+    parser.add_argument('--block-size-mb', type=float, default=DEFAULT_BLOCK_MB,
+                        help='CSV bytes parsed per Arrow block')
+    parser.add_argument('--threads', type=int, help='Arrow CSV parser threads (default: all cores)')
+    parser.add_argument('--direct-path', action='store_true',
+                        help='Use python-oracledb direct-path loading when available (append loads only)')
+    parser.add_argument('--policy', choices=POLICIES,
+                        help='Override the declared load policy of every table')
+    parser.add_argument('--workers', type=int,
+                        help='Concurrent table loads (default: one per table; 1 = sequential)')
+    parser.add_argument('--tables', nargs='+', choices=list(TABLE_LOADS), default=list(TABLE_LOADS),
+                        help='Tables to load (default: all)')
+    parser.add_argument('--training-csv', type=str, help='Source CSV for CHURN_DATASET_TRAINING (e.g. a daily delta)')
+    parser.add_argument('--profiles-csv', type=str, help='Source CSV for USER_PROFILES (e.g. a daily delta)')
+    parser.add_argument('--upsert', action='store_true',
+                        help='Delta mode: MERGE the files on USER_ID (same as --policy merge)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-apply delta files already recorded in OML.INGEST_LOAD_LOG')
+    args = parser.parse_args()
+    if args.upsert:
+        args.policy = 'merge'
     
-    return df
-
-def load_training_data(connection, csv_path):
-    """Load training data into CHURN_DATASET_TRAINING table"""
-    print("\n" + "=" * 60)
-    print("Loading Training Data")
     print("=" * 60)
+    print("Churn Data Ingestion Script")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    if not csv_path.exists():
-        print(f"❌ ERROR: CSV file not found: {csv_path}")
-        return False
-    
-    print(f"Reading CSV: {csv_path}")
-    df = pd.read_csv(csv_path)
-    print(f"✓ Loaded {len(df):,} rows from CSV")
-    
-    # Map column names
-    df = map_column_names(df)
-    print("✓ Mapped column names to Oracle schema")
-    
-    # Prepare data
-    df = prepare_data_for_oracle(df)
-    print("✓ Prepared data for Oracle")
+    sources = {'training': args.training_csv, 'profiles': args.profiles_csv}
+    loads = []
+    for key in args.tables:
+        load = TABLE_LOADS[key]
+        if sources[key]:
+            load = load._replace(source=Path(sources[key]).resolve())
+        if args.policy:
+            load = load._replace(policy=args.policy)
+        loads.append(load)
     
-    # Get column order matching table schema
-    columns = [
-        'USER_ID', 'AGE', 'GENDER', 'COUNTRY', 'CITY',
-        'MEMBERSHIP_YEARS', 'LOGIN_FREQUENCY', 'SESSION_DURATION_AVG',
-        'PAGES_PER_SESSION', 'CART_ABANDONMENT_RATE', 'WISHLIST_ITEMS',
-        'TOTAL_PURCHASES', 'AVERAGE_ORDER_VALUE', 'DAYS_SINCE_LAST_PURCHASE',
-        'DISCOUNT_USAGE_RATE', 'RETURNS_RATE', 'EMAIL_OPEN_RATE',
-        'CUSTOMER_SERVICE_CALLS', 'PRODUCT_REVIEWS_WRITTEN',
-        'SOCIAL_MEDIA_ENGAGEMENT_SCORE', 'MOBILE_APP_USAGE',
-        'PAYMENT_METHOD_DIVERSITY', 'LIFETIME_VALUE', 'CREDIT_BALANCE',
-        'SIGNUP_QUARTER', 'CHURNED'
-    ]
+    # Check if CSV files exist
+    for load in loads:
+        if not load.source.exists():
+            print(f"❌ ERROR: {load.name} CSV not found: {load.source}")
+            sys.exit(1)
+        size_mb = load.source.stat().st_size / (1024 * 1024)
+        print(f"  {load.name}: {load.source.name} ({size_mb:,.1f} MB) → {load.table} [{load.policy}]")
     
-    # Select only columns that exist
-    available_cols = [col for col in columns if col in df.columns]
-    df = df[available_cols]
+    print(f"  Batch size: {args.batch_size:,} rows, block size: {args.block_size_mb} MB"
+          f"{', direct path' if args.direct_path else ''}")
     
-    # Clear existing data (optional - comment out if you want to append)
-    cursor = connection.cursor()
     try:
-        cursor.execute("TRUNCATE TABLE OML.CHURN_DATASET_TRAINING")
-        print("✓ Cleared existing training data")
-    except Exception as e:
-        print(f"⚠️  WARNING: Could not truncate table: {e}")
-        print("   Attempting to continue...")
-    
-    # Insert data using executemany for performance
-    print(f"\nInserting {len(df):,} rows into OML.CHURN_DATASET_TRAINING...")
-    
-    placeholders = ', '.join([':' + str(i+1) for i in range(len(available_cols))])
-    insert_sql = f"""
-        INSERT INTO OML.CHURN_DATASET_TRAINING ({', '.join(available_cols)})
-        VALUES ({placeholders})
-    """
+        import pyarrow
+    except ImportError:
+        print("❌ ERROR: pyarrow not installed")
+        print("   Install with: pip install pyarrow")
+        sys.exit(1)
     
-    # Convert DataFrame to list of tuples
-    data_tuples = [tuple(row) for row in df[available_cols].values]
+    # Create the session pool before the worker threads acquire from it
+    workers = args.workers or len(loads)
+    get_pool(max_sessions=max(workers, int(os.getenv('ADB_POOL_MAX', '4'))))
+    print_timings()
     
-    try:
-        cursor.executemany(insert_sql, data_tuples)
-        connection.commit()
-        print(f"✓ Successfully inserted {len(df):,} rows")
-        
-        # Verify row count
-        cursor.execute("SELECT COUNT(*) FROM OML.CHURN_DATASET_TRAINING")
-        count = cursor.fetchone()[0]
-        print(f"✓ Verified: {count:,} rows in table")
-        return True
-    except Exception as e:
-        connection.rollback()
-        print(f"❌ ERROR: Failed to insert data: {e}")
-        return False
-    finally:
-        cursor.close()
-
-def load_user_profiles(connection, csv_path):
-    """Load user profiles into USER_PROFILES table"""
     print("\n" + "=" * 60)
-    print("Loading User Profiles")
+    print(f"Loading {len(loads)} Tables ({min(workers, len(loads))} concurrent)")
     print("=" * 60)
     
-    if not csv_path.exists():
-        print(f"❌ ERROR: CSV file not found: {csv_path}")
-        return False
-    
-    print(f"Reading CSV: {csv_path}")
-    df = pd.read_csv(csv_path)
-    print(f"✓ Loaded {len(df):,} rows from CSV")
-    
-    # Map column names
-    df = map_column_names(df)
-    print("✓ Mapped column names to Oracle schema")
+    results, wall_seconds = run_table_loads(
+        loads, get_connection, workers=workers,
+        batch_rows=args.batch_size,
+        block_mb=args.block_size_mb,
+        threads=args.threads,
+        direct_path=args.direct_path,
+        force=args.force
+    )
     
-    # Prepare data
-    df = prepare_data_for_oracle(df)
-    print("✓ Prepared data for Oracle")
-    
-    # Get column order matching table schema
-    columns = [
-        'USER_ID', 'AGE', 'GENDER', 'COUNTRY', 'CITY',
-        'MEMBERSHIP_YEARS', 'LOGIN_FREQUENCY', 'SESSION_DURATION_AVG',
-        'PAGES_PER_SESSION', 'CART_ABANDONMENT_RATE', 'WISHLIST_ITEMS',
-        'TOTAL_PURCHASES', 'AVERAGE_ORDER_VALUE', 'DAYS_SINCE_LAST_PURCHASE',
-        'DISCOUNT_USAGE_RATE', 'RETURNS_RATE', 'EMAIL_OPEN_RATE',
-        'CUSTOMER_SERVICE_CALLS', 'PRODUCT_REVIEWS_WRITTEN',
-        'SOCIAL_MEDIA_ENGAGEMENT_SCORE', 'MOBILE_APP_USAGE',
-        'PAYMENT_METHOD_DIVERSITY', 'LIFETIME_VALUE', 'CREDIT_BALANCE',
-        'SIGNUP_QUARTER', 'CHURNED'
-    ]
-    
-    # Select only columns that exist
-    available_cols = [col for col in columns if col in df.columns]
-    df = df[available_cols]
-    
-    # Clear existing data (optional - comment out if you want to append)
-    cursor = connection.cursor()
-    try:
-        cursor.execute("TRUNCATE TABLE OML.USER_PROFILES")
-        print("✓ Cleared existing user profiles")
-    except Exception as e:
-        print(f"⚠️  WARNING: Could not truncate table: {e}")
-        print("   Attempting to continue...")
-    
-    # Insert data using executemany for performance
-    print(f"\nInserting {len(df):,} rows into OML.USER_PROFILES...")
-    
-    placeholders = ', '.join([':' + str(i+1) for i in range(len(available_cols))])
-    insert_sql = f"""
-        INSERT INTO OML.USER_PROFILES ({', '.join(available_cols)})
-        VALUES ({placeholders})
-    """
-    
-    # Convert DataFrame to list of tuples
-    data_tuples = [tuple(row) for row in df[available_cols].values]
-    
-    try:
-        cursor.executemany(insert_sql, data_tuples)
-        connection.commit()
-        print(f"✓ Successfully inserted {len(df):,} rows")
-        
-        # Verify row count
-        cursor.execute("SELECT COUNT(*) FROM OML.USER_PROFILES")
-        count = cursor.fetchone()[0]
-        print(f"✓ Verified: {count:,} rows in table")
-        return True
-    except Exception as e:
-        connection.rollback()
-        print(f"❌ ERROR: Failed to insert data: {e}")
-        return False
-    finally:
-        cursor.close()
-
-def main():
-    """Main function"""
-    print("=" * 60)
-    print("Churn Data Ingestion Script")
+    # Summary
+    print("\n" + "=" * 60)
+    print("Ingestion Summary")
     print("=" * 60)
-    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    # Define CSV file paths
-    training_csv = project_root / 'data' / 'processed' / 'churn_dataset_training.csv'
-    user_profiles_csv = project_root / 'data' / 'processed' / 'churn_dataset_mapped.csv'
-    
-    # Check if CSV files exist
-    if not training_csv.exists():
-        print(f"❌ ERROR: Training CSV not found: {training_csv}")
-        sys.exit(1)
-    
-    if not user_profiles_csv.exists():
-        print(f"❌ ERROR: User profiles CSV not found: {user_profiles_csv}")
+    for load in loads:
+        stats = results.get(load.name)
+        if stats and stats.get('skipped'):
+            print(f"\n{load.name + ':':<18}⚠️  SKIPPED ({stats['skipped']})")
+            continue
+        print(f"\n{load.name + ':':<18}{'✓ SUCCESS' if stats else '❌ FAILED'}")
+        if stats:
+            print_ingest_stats(stats)
+            if stats['policy'] == 'merge':
+                print(f"  MERGE in {stats['merge_seconds']:.1f}s: {stats['inserted']:,} inserted, "
+                      f"{stats['updated']:,} updated, {stats['unchanged']:,} unchanged")
+            print(f"✓ Verified: {stats['table_rows']:,} rows in {load.table}")
+    
+    load_seconds = [stats['total_seconds'] for stats in results.values() if stats and not stats.get('skipped')]
+    if load_seconds:
+        print(f"\nWall time: {wall_seconds:.1f}s (sum of loads {sum(load_seconds):.1f}s, "
+              f"longest {max(load_seconds):.1f}s)")
+    
+    close_pool()
+    print(f"\n✓ Connection pool closed")
+    print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    if all(results.get(load.name) for load in loads):
+        print("\n✓ All data loaded successfully!")
+        print("\nNext steps:")
+        print("1. Validate data (Task 2.6)")
+        print("2. Create feature engineering views (Task 2.7)")
+        print("3. Train model (Task 3.x)")
+    else:
+        print("\n⚠️  Some data failed to load. Check errors above.")
         sys.exit(1)
-    
-    # Connect to database
-    connection = get_connection()
-    
-    try:
-        # Load training data
-        training_success = load_training_data(connection, training_csv)
-        
-        # Load user profiles
-        profiles_success = load_user_profiles(connection, user_profiles_csv)
-        
-        # Summary
-        print("\n" + "=" * 60)
-        print("Ingestion Summary")
-        print("=" * 60)
-        print(f"Training Data:    {'✓ SUCCESS' if training_success else '❌ FAILED'}")
-        print(f"User Profiles:    {'✓ SUCCESS' if profiles_success else '❌ FAILED'}")
-        
-        if training_success and profiles_success:
-            print("\n✓ All data loaded successfully!")
-            print("\nNext steps:")
-            print("1. Validate data (Task 2.6)")
-            print("2. Create feature engineering views (Task 2.7)")
-            print("3. Train model (Task 3.x)")
-        else:
-            print("\n⚠️  Some data failed to load. Check errors above.")
-            sys.exit(1)
-    
-    finally:
-        connection.close()
-        print(f"\n✓ Connection closed")
-        print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == '__main__':
     main()
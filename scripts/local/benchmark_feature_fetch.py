@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Feature Fetch Benchmark: Arrow (oracledb DataFrame) vs. pd.read_sql
+Compares wall time, throughput and peak RSS for loading CHURN_TRAINING_DATA into
+a float32 feature matrix at several row counts.
+
+Row counts larger than the view are produced server-side by cross joining the
+view with a row generator, so no extra tables are needed.
+
+Usage:
+    python scripts/local/benchmark_feature_fetch.py [--rows 100000,1000000,10000000]
+                                                    [--paths arrow,pandas]
+"""
+
+import sys
+import time
+import argparse
+import resource
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent.parent
+env_file = project_root / '.env'
+
+try:
+    from dotenv import load_dotenv
+    if env_file.exists():
+        load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
+
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from db import get_connection
+from feature_fetch import fetch_feature_matrix_arrow, fetch_feature_matrix_pandas
+
+SOURCE_VIEW = 'OML.CHURN_TRAINING_DATA'
+
+def build_query(rows, view_rows):
+    """Query returning exactly `rows` rows of the view, replicated if necessary"""
+    copies = max(1, -(-rows // view_rows))
+    return f"""
+        SELECT t.*
+        FROM {SOURCE_VIEW} t
+        CROSS JOIN (SELECT LEVEL AS COPY_NO FROM DUAL CONNECT BY LEVEL <= {copies})
+        FETCH FIRST {rows} ROWS ONLY
+    """
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+def run_once(path, rows, view_rows, queue):
+    """Run one fetch in a fresh process so peak RSS is not shared between runs"""
+    connection = get_connection(pooled=False)
+    try:
+        query = build_query(rows, view_rows)
+        start = time.perf_counter()
+        if path == 'arrow':
+            _, X, y, _ = fetch_feature_matrix_arrow(connection, query, label_col='CHURNED')
+        else:
+            _, X, y, _ = fetch_feature_matrix_pandas(connection, query, label_col='CHURNED')
+        elapsed = time.perf_counter() - start
+        queue.put({
+            'path': path,
+            'rows': int(X.shape[0]),
+            'seconds': elapsed,
+            'rows_per_sec': X.shape[0] / elapsed if elapsed > 0 else 0,
+            'peak_rss_mb': peak_rss_mb(),
+            'matrix_mb': X.nbytes / 1024 / 1024
+        })
+    finally:
+        connection.close()
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description='Benchmark Arrow vs pd.read_sql feature fetch')
+    parser.add_argument('--rows', type=str, default='100000,1000000,10000000',
+                        help='Comma-separated row counts (default: 100k, 1M, 10M)')
+    parser.add_argument('--paths', type=str, default='arrow,pandas',
+                        help='Fetch paths to compare (default: arrow,pandas)')
+    args = parser.parse_args()
+
+    row_counts = [int(r) for r in args.rows.split(',')]
+    paths = [p.strip() for p in args.paths.split(',')]
+
+    print("=" * 80)
+    print("Feature Fetch Benchmark")
+    print("=" * 80)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    connection = get_connection(pooled=False)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {SOURCE_VIEW}")
+        view_rows = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        connection.close()
+    print(f"✓ {SOURCE_VIEW}: {view_rows:,} rows (replicated for larger runs)")
+
+    results = []
+    ctx = multiprocessing.get_context('spawn')
+    for rows in row_counts:
+        for path in paths:
+            print(f"\nFetching {rows:,} rows via {path}...")
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_once, args=(path, rows, view_rows, queue))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0 or queue.empty():
+                print(f"  ❌ {path} failed for {rows:,} rows (exit code {proc.exitcode})")
+                continue
+            r = queue.get()
+            results.append(r)
+            print(f"  ✓ {r['seconds']:.2f} s, {r['rows_per_sec']:,.0f} rows/s, peak RSS {r['peak_rss_mb']:,.0f} MB")
+
+    print("\n" + "=" * 80)
+    print("Results")
+    print("=" * 80)
+    print(f"\n{'Rows':<12} {'Path':<8} {'Seconds':<10} {'Rows/s':<14} {'Peak RSS MB':<13} {'Matrix MB':<10}")
+    print("-" * 70)
+    for r in results:
+        print(f"{r['rows']:<12,} {r['path']:<8} {r['seconds']:<10.2f} {r['rows_per_sec']:<14,.0f} "
+              f"{r['peak_rss_mb']:<13,.0f} {r['matrix_mb']:<10,.1f}")
+
+    for rows in row_counts:
+        by_path = {r['path']: r for r in results if r['rows'] == rows}
+        if 'arrow' in by_path and 'pandas' in by_path:
+            speedup = by_path['pandas']['seconds'] / by_path['arrow']['seconds']
+            print(f"\n{rows:,} rows: Arrow is {speedup:.1f}x faster than pd.read_sql")
+
+    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == '__main__':
+    main()
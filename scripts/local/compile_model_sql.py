@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+In-Database Scoring: Tree Ensemble → SQL
+Compiles a trained XGBoost / CatBoost / GradientBoosting model into a SQL view
+(nested CASE per tree, summed, sigmoid) over OML.CHURN_USER_FEATURES, so
+CHURN_PREDICTIONS can be refreshed with one INSERT ... SELECT inside ADB
+instead of pulling every user to the client.
+
+Steps:
+    1. Resolve the model like the local scorer (MODEL_REGISTRY production model,
+       SHA-256 verified, restored from the artifact store; newest file in models/
+       only when the MODEL_REGISTRY table does not exist) and load the pickle +
+       metadata (feature order, fill values, threshold)
+    2. Compile the trees (compiled_trees.py export, reused from <model>.trees.npz)
+    3. Exactness check: the generated SQL runs on in-memory SQLite (or DuckDB)
+       against predict_proba on split-threshold probe rows with NULL cells
+    4. Optional: create the scoring view in ADB (--deploy) and refresh
+       CHURN_PREDICTIONS from it (--refresh)
+
+Usage:
+    python scripts/local/compile_model_sql.py [--model-path PATH | --model-id ID] [--check sqlite|duckdb|none]
+                                              [--write-sql PATH] [--deploy] [--refresh]
+                                              [--view OML.CHURN_SCORES_V]
+"""
+
+import sys
+import json
+import time
+import pickle
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent.parent
+env_file = project_root / '.env'
+
+try:
+    from dotenv import load_dotenv
+    if env_file.exists():
+        load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
+
+sys.path.insert(0, str(script_dir))
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+
+from score_churn_model_local import resolve_model_paths
+from compiled_trees import CompiledTreeEnsemble, export_model, threshold_probe_matrix
+from preprocessing import FeaturePreprocessor
+from tree_sql import create_score_view_sql, refresh_predictions_sql, check_sql_exactness
+from artifact_store import ensure_local
+from db import get_connection, print_timings
+
+SCORE_VIEW = 'OML.CHURN_SCORES_V'
+SOURCE_VIEW = 'OML.CHURN_USER_FEATURES'
+
+def load_compiled(model, model_path, feature_cols):
+    """Compiled trees from <model>.trees.npz, else exported from the pickle"""
+    compiled_path = model_path.with_suffix('.trees.npz')
+    if ensure_local(compiled_path):
+        print(f"✓ Compiled trees loaded: {compiled_path.name}")
+        return CompiledTreeEnsemble.load(compiled_path)
+    compiled = export_model(model, feature_cols)
+    print(f"✓ Trees exported from pickle ({compiled.source})")
+    return compiled
+
+def deploy_view(connection, ddl, view):
+    """Create or replace the scoring view in ADB"""
+    cursor = connection.cursor()
+    try:
+        start = time.perf_counter()
+        cursor.execute(ddl)
+        print(f"✓ View created: {view} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    finally:
+        cursor.close()
+
+def refresh_predictions(connection, view, threshold, model_version):
+    """
+    Replace CHURN_PREDICTIONS with the view's scores (DELETE + INSERT ... SELECT in ADB).
+
+    Both statements run in one transaction, so a failed refresh rolls back to
+    the previous predictions (TRUNCATE would auto-commit the empty table).
+    """
+    print("\n" + "=" * 60)
+    print("Refreshing Predictions In-Database")
+    print("=" * 60)
+
+    cursor = connection.cursor()
+    try:
+        start = time.perf_counter()
+        cursor.execute("DELETE FROM OML.CHURN_PREDICTIONS")
+        deleted = cursor.rowcount
+        cursor.execute(refresh_predictions_sql(view), threshold=threshold, model_version=model_version)
+        inserted = cursor.rowcount
+        connection.commit()
+        elapsed = time.perf_counter() - start
+        print(f"✓ Replaced {deleted:,} predictions with {inserted:,} in one transaction ({elapsed:.1f}s, "
+              f"{inserted / elapsed if elapsed else 0:,.0f} rows/sec, no client round trip)")
+
+        cursor.execute("""
+            SELECT COUNT(*), SUM(PREDICTED_CHURN_LABEL), AVG(RISK_SCORE)
+            FROM OML.CHURN_PREDICTIONS
+        """)
+        total, at_risk, avg_risk = cursor.fetchone()
+        if total:
+            print(f"  At-risk users: {at_risk:,} ({at_risk / total * 100:.2f}%)")
+            print(f"  Average risk score: {avg_risk:.1f}%")
+        return True
+    except Exception as e:
+        connection.rollback()
+        print(f"❌ ERROR: Failed to refresh predictions: {e}")
+        print("   Rolled back, the previous predictions are unchanged")
+        return False
+    finally:
+        cursor.close()
+
+def main():
+    """Compile the model to SQL, check exactness and optionally score in ADB"""
+    parser = argparse.ArgumentParser(description='Compile a tree model to SQL for in-database scoring')
+    parser.add_argument('--model-path', type=str, help='Path to model pickle file (default: from MODEL_REGISTRY)')
+    parser.add_argument('--model-id', type=str,
+                        help='MODEL_ID / MODEL_VERSION / MODEL_NAME in MODEL_REGISTRY (default: production model)')
+    parser.add_argument('--view', type=str, default=SCORE_VIEW, help='Scoring view to create')
+    parser.add_argument('--source', type=str, default=SOURCE_VIEW, help='Feature view/table to score')
+    parser.add_argument('--check', choices=['sqlite', 'duckdb', 'none'], default='sqlite',
+                        help='Local SQL engine for the exactness check against predict_proba')
+    parser.add_argument('--rows', type=int, default=5000, help='Probe rows for the exactness check')
+    parser.add_argument('--atol', type=float, default=1e-6, help='Max allowed |Δp| vs predict_proba')
+    parser.add_argument('--write-sql', type=str, help='Write the CREATE VIEW statement to this file')
+    parser.add_argument('--deploy', action='store_true', help='Create the scoring view in ADB')
+    parser.add_argument('--refresh', action='store_true', help='Refresh CHURN_PREDICTIONS from the view')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Tree Ensemble → SQL Compiler")
+    print("=" * 60)
+
+    connection = None
+    if args.model_path:
+        model_path = Path(args.model_path)
+        metadata_path = model_path.parent / model_path.name.replace('.pkl', '_metadata.json')
+    else:
+        # Same model as score_churn_model_local.py: registry first, verified by SHA-256
+        connection = get_connection()
+        print_timings()
+        model_path, metadata_path, _ = resolve_model_paths(connection, args.model_id)
+        if model_path is None:
+            sys.exit(1)
+    if not ensure_local(model_path):
+        print(f"❌ ERROR: Model file not found: {model_path}")
+        sys.exit(1)
+
+    if not metadata_path.exists():
+        print(f"❌ ERROR: Metadata not found: {metadata_path}")
+        sys.exit(1)
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    print(f"✓ Model loaded: {model_path.name}")
+
+    if metadata.get('preprocessing'):
+        preprocessor = FeaturePreprocessor.from_dict(metadata['preprocessing'])
+    else:
+        preprocessor = FeaturePreprocessor().fit(None, metadata['feature_cols'])
+    feature_cols, fill_values = preprocessor.feature_cols, preprocessor.fill_values
+
+    try:
+        compiled = load_compiled(model, model_path, feature_cols)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+    ddl = create_score_view_sql(args.view, compiled, args.source, feature_cols, fill_values)
+    print(f"✓ SQL generated: {compiled.n_trees:,} trees, {compiled.n_nodes:,} nodes, "
+          f"{len(ddl) / 1024:,.0f} KB")
+
+    if args.check != 'none':
+        X = threshold_probe_matrix(compiled, len(feature_cols), n_rows=args.rows)
+        X[np.random.default_rng(0).random(X.shape) < 0.02] = np.nan
+        try:
+            report = check_sql_exactness(model, compiled, feature_cols, fill_values, X,
+                                         engine=args.check, atol=args.atol)
+        except ImportError as e:
+            print(f"❌ ERROR: {e}")
+            print("   Install with: pip install duckdb (or use --check sqlite)")
+            sys.exit(1)
+        status = "✓" if report['passed'] else "❌"
+        print(f"{status} Exactness on {report['engine']}: max |Δp| = {report['max_abs_diff']:.2e} "
+              f"over {report['rows']:,} rows, {report['null_cells']:,} NULL cells (atol {args.atol:g})")
+        if not report['passed']:
+            print("   Not deploying a view that disagrees with predict_proba")
+            sys.exit(1)
+
+    if args.write_sql:
+        with open(args.write_sql, 'w') as f:
+            f.write(ddl + "\n")
+        print(f"✓ SQL written: {args.write_sql}")
+
+    if not (args.deploy or args.refresh):
+        if connection is not None:
+            connection.close()
+        return
+
+    if connection is None:
+        connection = get_connection()
+        print_timings()
+
+    try:
+        if args.deploy:
+            deploy_view(connection, ddl, args.view)
+        if args.refresh:
+            ok = refresh_predictions(
+                connection, args.view,
+                threshold=float(metadata.get('optimal_threshold', 0.5)),
+                model_version=metadata.get('timestamp', 'unknown')
+            )
+            if not ok:
+                sys.exit(1)
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Compiled Tree Model Export and Parity Check
+Converts a saved XGBoost / CatBoost / GradientBoosting pickle into flat NumPy
+tree arrays (<model>.trees.npz), checks parity against predict_proba and
+compares load time and batch throughput of both runtimes.
+
+Models trained by train_churn_model_local.py are exported automatically; this
+script is for older pickles or for re-checking an existing export.
+
+Parity rows are synthetic: each feature is drawn from the model's own split
+thresholds (just below / at / just above), so every branch direction is
+exercised without a database connection.
+
+Usage:
+    python scripts/local/export_compiled_model.py [--model-path PATH] [--rows 20000] [--atol 1e-5]
+"""
+
+import sys
+import time
+import json
+import pickle
+import argparse
+from pathlib import Path
+
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+
+from score_churn_model_local import find_latest_model
+from compiled_trees import CompiledTreeEnsemble, export_model, check_parity, threshold_probe_matrix
+from artifact_store import project_relative
+
+def time_call(fn, repeats=3):
+    """Best wall time of fn() in milliseconds, and its last result"""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def load_pickle(path):
+    """Unpickle a model file"""
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def main():
+    """Export a pickled model and verify the compiled evaluator"""
+    parser = argparse.ArgumentParser(description='Export a tree model to flat NumPy arrays')
+    parser.add_argument('--model-path', type=str, help='Path to model pickle file (default: latest)')
+    parser.add_argument('--rows', type=int, default=20000, help='Synthetic rows for parity/throughput')
+    parser.add_argument('--atol', type=float, default=1e-5, help='Max allowed |Δp| vs predict_proba')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Compiled Tree Model Export")
+    print("=" * 60)
+
+    if args.model_path:
+        model_path = Path(args.model_path)
+        metadata_path = model_path.parent / model_path.name.replace('.pkl', '_metadata.json')
+    else:
+        model_path, metadata_path = find_latest_model()
+        if model_path is None:
+            sys.exit(1)
+
+    metadata = {}
+    if metadata_path.exists():
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+    pickle_ms, model = time_call(lambda: load_pickle(model_path), repeats=1)
+    print(f"✓ Pickle loaded: {model_path.name} ({pickle_ms:.1f} ms, includes library import)")
+
+    feature_cols = metadata.get('feature_cols')
+    try:
+        compiled = export_model(model, feature_cols)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+    print(f"✓ Exported {compiled.source}: {compiled.n_trees:,} trees, "
+          f"{compiled.n_nodes:,} nodes, max depth {compiled.max_depth}")
+
+    n_features = len(feature_cols) if feature_cols else int(compiled.feature.max()) + 1
+    X = threshold_probe_matrix(compiled, n_features, n_rows=args.rows)
+    parity = check_parity(model, compiled, X, atol=args.atol)
+    status = "✓" if parity['passed'] else "❌"
+    print(f"{status} Parity: max |Δp| = {parity['max_abs_diff']:.2e} over {parity['rows']:,} rows (atol {args.atol:g})")
+    if not parity['passed']:
+        sys.exit(1)
+
+    compiled_path = model_path.with_suffix('.trees.npz')
+    if compiled_path.exists():
+        # May be a hard link into the artifact store: replace, never rewrite in place
+        compiled_path.unlink()
+    compiled.save(compiled_path)
+    load_ms, compiled = time_call(lambda: CompiledTreeEnsemble.load(compiled_path))
+    print(f"✓ Compiled model saved: {compiled_path.name} ({compiled_path.stat().st_size:,} bytes, load {load_ms:.1f} ms)")
+
+    # Batch throughput on the same synthetic rows
+    X_model = X
+    if feature_cols:
+        import pandas as pd
+        X_model = pd.DataFrame(X, columns=feature_cols)
+    model_ms, _ = time_call(lambda: model.predict_proba(X_model))
+    compiled_ms, _ = time_call(lambda: compiled.predict_proba(X))
+
+    print("\n" + "=" * 60)
+    print("Runtime Comparison")
+    print("=" * 60)
+    print(f"{'Runtime':<12} {'Load (ms)':>12} {'Batch (ms)':>12} {'Rows/sec':>14}")
+    print("-" * 52)
+    print(f"{'pickle':<12} {pickle_ms:>12.1f} {model_ms:>12.1f} {len(X) / (model_ms / 1000):>14,.0f}")
+    print(f"{'compiled':<12} {load_ms:>12.1f} {compiled_ms:>12.1f} {len(X) / (compiled_ms / 1000):>14,.0f}")
+
+    if metadata:
+        metadata['compiled_model'] = {
+            'path': project_relative(compiled_path),
+            'source': compiled.source,
+            'n_trees': compiled.n_trees,
+            'n_nodes': compiled.n_nodes,
+            'parity': parity
+        }
+        with open(metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        print(f"\n✓ Metadata updated: {metadata_path.name}")
+
+if __name__ == '__main__':
+    main()
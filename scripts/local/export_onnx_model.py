@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+ONNX Pipeline Export and Benchmark
+Converts a saved XGBoost / CatBoost / GradientBoosting pickle plus its
+FeaturePreprocessor into one ONNX graph (<model>.pipeline.onnx), checks parity
+against preprocessing + predict_proba and compares batch throughput of
+onnxruntime (1 thread / all cores) with the native predict_proba path.
+
+Models trained by train_churn_model_local.py are exported automatically; this
+script is for older pickles or for re-benchmarking an existing export.
+
+Parity rows are synthetic (split-threshold probes from the compiled tree
+export, with a share of NaN / ±inf cells), so no database connection is needed.
+
+Usage:
+    python scripts/local/export_onnx_model.py [--model-path PATH] [--rows 50000] [--atol 1e-4] [--threads 1 0]
+    python scripts/local/export_onnx_model.py --self-check
+"""
+
+import sys
+import json
+import pickle
+import argparse
+from pathlib import Path
+
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+
+from score_churn_model_local import find_latest_model
+from compiled_trees import export_model, threshold_probe_matrix
+from preprocessing import FeaturePreprocessor
+from onnx_export import (export_onnx_pipeline, save_onnx_pipeline, load_onnx_pipeline, onnx_path_for,
+                         check_pipeline_parity, benchmark_onnx_pipeline)
+from artifact_store import project_relative
+
+def _self_check_models():
+    """Small classifiers for each supported converter that is installed: [(name, model or None)]"""
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    models = []
+    try:
+        from xgboost import XGBClassifier
+        models.append(('XGBoost', XGBClassifier(n_estimators=30, max_depth=4, eval_metric='logloss')))
+    except ImportError:
+        models.append(('XGBoost', None))
+    try:
+        from catboost import CatBoostClassifier
+        models.append(('CatBoost', CatBoostClassifier(iterations=30, depth=4, verbose=0)))
+    except ImportError:
+        models.append(('CatBoost', None))
+    models.append(('GradientBoosting', GradientBoostingClassifier(n_estimators=30, max_depth=3)))
+    return models
+
+def self_check(rows=5000, atol=1e-4, n_features=8, random_state=42):
+    """Fit, export and reload a pipeline per model type; True when every available one is within atol"""
+    import numpy as np
+
+    rng = np.random.default_rng(random_state)
+    X = rng.normal(size=(rows, n_features)).astype(np.float32)
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 2] + rng.normal(scale=0.5, size=rows) > 0).astype(int)
+    feature_cols = [f'F{i}' for i in range(n_features)]
+    preprocessor = FeaturePreprocessor().fit(X, feature_cols)
+
+    print(f"\n🔍 Round-trip parity ({rows:,} rows, {n_features} features, atol {atol:g})")
+    ok = True
+    for name, model in _self_check_models():
+        if model is None:
+            print(f"   ⚠️  {name}: not installed, skipped")
+            continue
+        try:
+            model.fit(preprocessor.transform(X.copy()), y)
+            onnx_model = export_onnx_pipeline(model, preprocessor, 0.5, name)
+            runtime, _ = load_onnx_pipeline(onnx_model.SerializeToString(), threads=1)
+            parity = check_pipeline_parity(model, runtime, preprocessor, X, atol=atol)
+        except ImportError as e:
+            print(f"   ⚠️  {name}: converter not installed ({e}), skipped")
+            continue
+        except Exception as e:
+            print(f"   ❌ {name}: export failed: {e}")
+            ok = False
+            continue
+        status = "✓" if parity['passed'] else "❌"
+        print(f"   {status} {name}: max |Δp| = {parity['max_abs_diff']:.2e} "
+              f"(IR {onnx_model.ir_version}, {parity['non_finite_cells']:,} NaN/inf cells)")
+        ok = ok and parity['passed']
+    return ok
+
+def main():
+    """Export a pickled model to an ONNX pipeline and benchmark onnxruntime"""
+    parser = argparse.ArgumentParser(description='Export a churn model to ONNX and benchmark onnxruntime')
+    parser.add_argument('--model-path', type=str, help='Path to model pickle file (default: latest)')
+    parser.add_argument('--rows', type=int, default=50000, help='Synthetic rows for parity/throughput')
+    parser.add_argument('--atol', type=float, default=1e-4, help='Max allowed |Δp| vs predict_proba')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 0],
+                        help='onnxruntime intra-op thread counts to benchmark (0 = all cores)')
+    parser.add_argument('--self-check', action='store_true',
+                        help='Round-trip parity of small XGBoost / CatBoost / GradientBoosting models, no pickle needed')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("ONNX Pipeline Export")
+    print("=" * 60)
+
+    if args.self_check:
+        sys.exit(0 if self_check(rows=min(args.rows, 5000), atol=args.atol) else 1)
+
+    if args.model_path:
+        model_path = Path(args.model_path)
+        metadata_path = model_path.parent / model_path.name.replace('.pkl', '_metadata.json')
+    else:
+        model_path, metadata_path = find_latest_model()
+        if model_path is None:
+            sys.exit(1)
+
+    metadata = {}
+    if metadata_path.exists():
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    print(f"✓ Pickle loaded: {model_path.name}")
+
+    if metadata.get('preprocessing'):
+        preprocessor = FeaturePreprocessor.from_dict(metadata['preprocessing'])
+    elif metadata.get('feature_cols'):
+        preprocessor = FeaturePreprocessor().fit(None, metadata['feature_cols'])
+    else:
+        print("❌ ERROR: Metadata has no feature columns, cannot build the input signature")
+        sys.exit(1)
+
+    threshold = metadata.get('optimal_threshold', 0.5)
+    try:
+        onnx_model = export_onnx_pipeline(model, preprocessor, threshold, metadata.get('model_name'))
+    except ImportError as e:
+        print(f"❌ ERROR: {e}")
+        print("   Install with: pip install onnx onnxruntime onnxmltools skl2onnx")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        sys.exit(1)
+
+    onnx_path = onnx_path_for(model_path)
+    if onnx_path.exists():
+        # May be a hard link into the artifact store: replace, never rewrite in place
+        onnx_path.unlink()
+    save_onnx_pipeline(onnx_model, onnx_path)
+    print(f"✓ ONNX pipeline saved: {onnx_path.name} ({onnx_path.stat().st_size:,} bytes)")
+
+    # Synthetic rows on the model's split thresholds
+    compiled = export_model(model, preprocessor.feature_cols)
+    X = threshold_probe_matrix(compiled, len(preprocessor.feature_cols), n_rows=args.rows)
+
+    runtime, _ = load_onnx_pipeline(onnx_path)
+    parity = check_pipeline_parity(model, runtime, preprocessor, X, atol=args.atol)
+    status = "✓" if parity['passed'] else "❌"
+    print(f"{status} Parity: max |Δp| = {parity['max_abs_diff']:.2e} over {parity['rows']:,} rows, "
+          f"{parity['non_finite_cells']:,} NaN/inf cells (atol {args.atol:g})")
+    if not parity['passed']:
+        sys.exit(1)
+
+    benchmark = benchmark_onnx_pipeline(model, onnx_path, preprocessor, X, thread_counts=args.threads)
+
+    print("\n" + "=" * 60)
+    print("Runtime Comparison")
+    print("=" * 60)
+    print(f"{'Runtime':<28} {'Load (ms)':>10} {'Batch (ms)':>11} {'Rows/sec':>13}")
+    print("-" * 65)
+    for result in benchmark:
+        label = result['runtime'] if result['threads'] is None else \
+            f"{result['runtime']} ({result['threads'] or 'all'} threads)"
+        load = f"{result['load_ms']:.1f}" if result['load_ms'] is not None else "-"
+        print(f"{label:<28} {load:>10} {result['batch_ms']:>11.1f} {result['rows_per_sec']:>13,.0f}")
+
+    if metadata:
+        metadata['onnx_model'] = {
+            'path': project_relative(onnx_path),
+            'opset': max(o.version for o in onnx_model.opset_import if o.domain in ('', 'ai.onnx')),
+            'preprocessing_baked': True,
+            'size_bytes': onnx_path.stat().st_size,
+            'parity': parity,
+            'benchmark': benchmark
+        }
+        with open(metadata_path, 'w') as f:
+            json.dump(metadata, f, indent=2)
+        print(f"\n✓ Metadata updated: {metadata_path.name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Model Artifact Store Management
+Imports existing model files into the content-addressed store (models/store/),
+garbage-collects unreferenced versions/blobs and reports deduplication stats.
+
+A version is kept when MODEL_REGISTRY still references it (any row that is not
+ARCHIVED, or IS_PRODUCTION = 1) or when it is among the newest --keep versions.
+Blobs that no kept version points to are deleted. Working files in models/ are
+only deleted with --prune-files.
+
+Usage:
+    python scripts/local/manage_model_store.py import [--models-dir DIR] [--compress]
+    python scripts/local/manage_model_store.py gc [--keep 5] [--dry-run] [--offline] [--prune-files]
+    python scripts/local/manage_model_store.py stats
+"""
+
+import re
+import sys
+import argparse
+from pathlib import Path
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent.parent
+env_file = project_root / '.env'
+
+try:
+    from dotenv import load_dotenv
+    if env_file.exists():
+        load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
+
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from artifact_store import ArtifactStore, DEFAULT_MODEL_DIR, compression_default
+
+# churn_model_<name>_<YYYYMMDD_HHMMSS><suffix>
+MODEL_FILE_PATTERN = re.compile(r'^churn_model_([a-z0-9]+)_(\d{8}_\d{6})(.*)$')
+
+ROLE_BY_SUFFIX = {
+    '.pkl': 'model',
+    '_metadata.json': 'metadata',
+    '.manifest.json': 'native_manifest',
+    '.trees.npz': 'compiled',
+    '.pipeline.onnx': 'onnx',
+    '.ubj': 'native',
+    '.cbm': 'native',
+    '.onnx': 'native',
+}
+
+def format_bytes(n):
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:,.1f} {unit}" if unit != 'B' else f"{n:,} B"
+        n /= 1024
+
+def group_model_files(models_dir):
+    """{version: (model_name, {role: path})} for churn_model_* files in a directory"""
+    versions = {}
+    for path in sorted(Path(models_dir).glob('churn_model_*')):
+        match = MODEL_FILE_PATTERN.match(path.name)
+        if not match or match.group(3) not in ROLE_BY_SUFFIX:
+            continue
+        model_name, version, suffix = match.groups()
+        versions.setdefault(version, (model_name, {}))[1][ROLE_BY_SUFFIX[suffix]] = path
+    return versions
+
+def cmd_import(store, args):
+    """Store every model version found in --models-dir"""
+    print("=" * 60)
+    print("Import Model Files into Artifact Store")
+    print("=" * 60)
+
+    versions = group_model_files(args.models_dir)
+    if not versions:
+        print(f"⚠️  WARNING: No model files found in {args.models_dir}")
+        return
+
+    compression = 'zstd' if args.compress else compression_default()
+    for version, (model_name, files) in sorted(versions.items()):
+        if store.read_manifest(version) is not None:
+            print(f"  {version}: already stored, skipped")
+            continue
+        manifest = store.store_version(version, files, model_name=model_name, compression=compression)
+        print(f"✓ {version} ({model_name}): {len(manifest['artifacts'])} file(s), "
+              f"{format_bytes(manifest['new_bytes'])} new")
+
+    print_stats(store)
+
+def referenced_versions():
+    """Model versions (and IDs) MODEL_REGISTRY still references"""
+    from db import get_connection
+
+    connection = get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT MODEL_ID, MODEL_VERSION FROM OML.MODEL_REGISTRY
+            WHERE STATUS <> 'ARCHIVED' OR IS_PRODUCTION = 1
+        """)
+        referenced = set()
+        for model_id, model_version in cursor:
+            referenced.update(v for v in (model_id, model_version) if v)
+        cursor.close()
+        return referenced
+    finally:
+        connection.close()
+
+def cmd_gc(store, args):
+    """Delete versions/blobs no registry row or retention policy keeps"""
+    print("=" * 60)
+    print("Artifact Store Garbage Collection")
+    print("=" * 60)
+
+    if args.offline:
+        referenced = set()
+        print(f"⚠️  Offline: keeping only the newest {args.keep} version(s)")
+    else:
+        try:
+            referenced = referenced_versions()
+        except Exception as e:
+            print(f"❌ ERROR: Could not read MODEL_REGISTRY ({e})")
+            print("   Use --offline to collect with the retention policy only")
+            sys.exit(1)
+        print(f"✓ MODEL_REGISTRY references {len(referenced)} model version(s)")
+
+    manifests = {m['version']: m for m in store.list_manifests()}
+    report = store.gc(referenced, keep_latest=args.keep, dry_run=args.dry_run)
+    prefix = "Would remove" if args.dry_run else "Removed"
+
+    for version in report['versions_removed']:
+        print(f"  {prefix} version {version}")
+        if args.prune_files and not args.dry_run:
+            for artifact in manifests[version]['artifacts']:
+                working_file = Path(args.models_dir) / artifact['file']
+                if working_file.exists():
+                    working_file.unlink()
+
+    print(f"\n✓ Versions kept: {report['versions_kept']}, "
+          f"{prefix.lower()}: {len(report['versions_removed'])}")
+    print(f"✓ Blobs {prefix.lower()}: {report['blobs_removed']} ({format_bytes(report['bytes_freed'])})")
+
+def print_stats(store):
+    """Version/blob counts and deduplication ratio"""
+    stats = store.stats()
+    print("\n" + "=" * 60)
+    print("Artifact Store")
+    print("=" * 60)
+    print(f"Location:      {store.root}")
+    print(f"Versions:      {stats['versions']}")
+    print(f"Blobs:         {stats['blobs']}")
+    print(f"Logical size:  {format_bytes(stats['logical_bytes'])}")
+    print(f"Stored size:   {format_bytes(stats['stored_bytes'])}")
+    if stats['stored_bytes']:
+        print(f"Dedup ratio:   {stats['logical_bytes'] / stats['stored_bytes']:.2f}x")
+
+def main():
+    """Artifact store CLI"""
+    parser = argparse.ArgumentParser(description='Manage the content-addressed model artifact store')
+    parser.add_argument('--models-dir', type=Path, default=DEFAULT_MODEL_DIR,
+                        help='Directory holding the working model files (default: models/)')
+    parser.add_argument('--store-dir', type=Path, default=None,
+                        help='Artifact store root (default: <models-dir>/store)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Store existing model files')
+    import_parser.add_argument('--compress', action='store_true', help='zstd-compress new blobs')
+
+    gc_parser = subparsers.add_parser('gc', help='Prune unreferenced versions and blobs')
+    gc_parser.add_argument('--keep', type=int, default=5, help='Always keep the newest N versions')
+    gc_parser.add_argument('--dry-run', action='store_true', help='Report only, delete nothing')
+    gc_parser.add_argument('--offline', action='store_true', help='Skip MODEL_REGISTRY (retention policy only)')
+    gc_parser.add_argument('--prune-files', action='store_true',
+                           help='Also delete working files of removed versions from --models-dir')
+
+    subparsers.add_parser('stats', help='Show store size and deduplication ratio')
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.store_dir or Path(args.models_dir) / 'store')
+
+    if args.command == 'import':
+        cmd_import(store, args)
+    elif args.command == 'gc':
+        cmd_gc(store, args)
+    else:
+        print_stats(store)
+
+if __name__ == '__main__':
+    main()
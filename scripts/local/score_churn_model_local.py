@@ -4,24 +4,33 @@ Churn Model Scoring Script (Local Model)
 Task 3.8: Implement model scoring (batch prediction for all customers)
 
 This script:
-    1. Loads trained model from pickle file (local model)
+    1. Loads trained model (compiled NumPy trees, then native format, then the pickle)
     2. Connects to ADB as OML user
     3. Loads user features from CHURN_USER_FEATURES view (SQL query)
     4. Scores all users using local model (batch prediction)
     5. Stores predictions in CHURN_PREDICTIONS table
 
 Usage:
-    python scripts/local/score_churn_model_local.py [--model-path PATH]
+    python scripts/local/score_churn_model_local.py [--model-path PATH | --model-id ID] [--engine auto|compiled|native|onnxruntime|pickle]
+
+Without --model-path the model is resolved from OML.MODEL_REGISTRY (IS_PRODUCTION = 1,
+else the newest ACTIVE model) and its file is verified by SHA-256. A missing or
+mismatching registered file is an error; the newest file in models/ is only used
+when the MODEL_REGISTRY table does not exist.
+
+The compiled engine evaluates the flat-array trees written by the trainer
+(<model>.trees.npz) with NumPy only, so xgboost/catboost/sklearn are not imported.
+The native engine loads <model>.ubj / .cbm / .onnx via <model>.manifest.json.
+The onnxruntime engine runs <model>.pipeline.onnx (preprocessing baked into the
+graph) with multithreaded CPU execution (CHURN_ONNX_THREADS, default all cores).
 """
 
-import os
 import sys
+import time
 import pickle
 import json
-import glob
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
 import numpy as np
 import argparse
 
@@ -42,83 +51,16 @@ except ImportError:
 # ADB Connection (as OML user)
 # ============================================================================
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection as OML user"""
-    oracledb = initialize_oracle_client()
-    
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')  # Default to OML user
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not connection_string:
-        print("❌ ERROR: ADB_CONNECTION_STRING not set in environment")
-        sys.exit(1)
-    
-    if not password:
-        print("❌ ERROR: ADB_PASSWORD not set in environment")
-        sys.exit(1)
-    
-    print(f"✓ Connecting as {username} user...")
-    
-    try:
-        return oracledb.connect(user=username, password=password, dsn=connection_string)
-    except Exception as e:
-        print(f"❌ ERROR: Failed to connect to database: {e}")
-        sys.exit(1)
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from db import get_connection, print_timings
+from feature_fetch import fetch_feature_matrix
+from feature_schema import FEATURES_BY_NAME, feature_names, projection_query
+from preprocessing import FeaturePreprocessor
+from compiled_trees import CompiledTreeEnsemble
+from model_formats import load_native_model, manifest_path_for
+from onnx_export import load_onnx_pipeline, onnx_path_for
+from model_registry import resolve_model, registry_available, MODEL_CACHE
+from artifact_store import ArtifactStore, resolve_project_path, ensure_local, file_sha256
 
 # ============================================================================
 # Model Loading (from pickle file)
@@ -136,6 +78,13 @@ def find_latest_model(model_dir=None):
     # Find all pickle files
     model_files = list(model_dir.glob('churn_model_*.pkl'))
     
+    # Compressed artifact stores keep no working copies: restore the newest version
+    if not model_files:
+        store = ArtifactStore(model_dir / 'store')
+        for manifest in store.list_manifests()[:1]:
+            store.restore_version(manifest['version'], model_dir)
+            model_files = list(model_dir.glob('churn_model_*.pkl'))
+    
     if not model_files:
         print(f"❌ ERROR: No model files found in {model_dir}")
         return None, None
@@ -149,30 +98,187 @@ def find_latest_model(model_dir=None):
     
     return latest_model, metadata_file
 
-def load_model_from_pickle(model_path=None):
-    """Load trained model from pickle file"""
+def _newest_model_paths(reason):
+    """Fallback without the registry: newest model file in models/ (not hash-verified)"""
+    print(f"⚠️  WARNING: {reason}, using the newest model file in models/ (not registry-verified)")
+    model_path, metadata_path = find_latest_model()
+    return model_path, metadata_path, None
+
+def resolve_model_paths(connection=None, model_ref=None):
+    """
+    Resolve model/metadata paths from MODEL_REGISTRY.
+
+    The newest file in models/ is only used when there is no database
+    connection or no MODEL_REGISTRY table. A registry model whose file is
+    missing or does not match its recorded hash is an error, not a fallback.
+    """
+    if connection is None:
+        return _newest_model_paths("No database connection, MODEL_REGISTRY not consulted")
+    
+    if not registry_available(connection):
+        if model_ref:
+            print(f"❌ ERROR: Cannot resolve '{model_ref}': MODEL_REGISTRY table does not exist")
+            print("   Run: python scripts/create_model_registry_table.py")
+            return None, None, None
+        return _newest_model_paths("MODEL_REGISTRY table does not exist")
+    
+    try:
+        resolved = resolve_model(connection, model_ref)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ ERROR: {e}")
+        return None, None, None
+    
+    if not resolved:
+        if model_ref:
+            print(f"❌ ERROR: Model '{model_ref}' not found in MODEL_REGISTRY")
+        else:
+            print("❌ ERROR: No ACTIVE model in MODEL_REGISTRY")
+            print("   Train one with scripts/local/train_churn_model_local.py or pass --model-path")
+        return None, None, None
+    
+    status = "production" if resolved['is_production'] else "registry"
+    print(f"✓ Resolved {status} model: {resolved['model_id']} ({resolved['model_name']})")
+    if resolved['verified']:
+        print(f"✓ Artifact verified: sha256 {resolved['sha256'][:12]}")
+    return resolved['model_path'], resolved['metadata_path'], resolved['sha256']
+
+def load_model(model_path=None, engine='auto', connection=None, model_ref=None):
+    """Load trained model: compiled NumPy trees, native format or pickle (auto tries them in that order)"""
     print("\n" + "=" * 60)
-    print("Loading Model from Pickle File")
+    print("Loading Model")
     print("=" * 60)
     
+    sha256 = None
     if model_path is None:
-        model_path, metadata_path = find_latest_model()
+        model_path, metadata_path, sha256 = resolve_model_paths(connection, model_ref)
         if model_path is None:
             return None, None
     else:
         model_path = Path(model_path)
         metadata_path = model_path.parent / model_path.name.replace('.pkl', '_metadata.json')
     
-    # Load model
+    if not ensure_local(model_path):
+        print(f"❌ ERROR: Model file not found: {model_path}")
+        return None, None
+    
+    metadata = load_metadata(metadata_path)
+    
+    # Loaded models are cached by content hash, so repeat loads skip deserialization
+    cache_key = (sha256 or file_sha256(model_path), engine)
+    if cache_key in MODEL_CACHE:
+        print(f"✓ Model served from in-process cache (sha256 {cache_key[0][:12]})")
+    
+    start = time.perf_counter()
+    model = MODEL_CACHE.get_or_load(cache_key, lambda: load_with_engine(model_path, metadata, engine))
+    if model is None:
+        return None, None
+    
+    print(f"✓ Model load time: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return model, metadata
+
+def load_with_engine(model_path, metadata, engine):
+    """Deserialize the model with the requested runtime"""
+    if engine == 'onnxruntime':
+        model = load_onnx(model_path, metadata)
+        if model is None:
+            print("❌ ERROR: No ONNX pipeline available (retrain or run scripts/local/export_onnx_model.py)")
+        return model
+    
+    model = None
+    if engine in ('auto', 'compiled'):
+        model = load_compiled_model(model_path, metadata)
+        if model is None and engine == 'compiled':
+            print("❌ ERROR: No compiled model available (retrain to export one)")
+            return None
+    
+    if model is None and engine in ('auto', 'native'):
+        model = load_native(model_path, metadata)
+        if model is None and engine == 'native':
+            print("❌ ERROR: No native model available (retrain to export one)")
+            return None
+    
+    if model is None:
+        model = load_model_from_pickle(model_path)
+    
+    return model
+
+def load_compiled_model(model_path, metadata):
+    """Load the flat-array tree export written by the trainer (None if unavailable)"""
+    compiled_info = (metadata or {}).get('compiled_model') or {}
+    compiled_path = resolve_project_path(compiled_info.get('path')) or model_path.with_suffix('.trees.npz')
+    if not compiled_path.exists():
+        compiled_path = model_path.with_suffix('.trees.npz')
+    if not ensure_local(compiled_path):
+        return None
+    
+    try:
+        model = CompiledTreeEnsemble.load(compiled_path)
+    except Exception as e:
+        print(f"⚠️  WARNING: Failed to load compiled model, using pickle: {e}")
+        return None
+    
+    print(f"✓ Compiled model loaded: {compiled_path.name} "
+          f"({model.source}, {model.n_trees:,} trees, {model.n_nodes:,} nodes)")
+    return model
+
+def load_onnx(model_path, metadata):
+    """Load the ONNX pipeline artifact into an onnxruntime session (None if unavailable)"""
+    onnx_info = (metadata or {}).get('onnx_model') or {}
+    onnx_path = resolve_project_path(onnx_info.get('path')) or onnx_path_for(model_path)
+    if not onnx_path.exists():
+        onnx_path = onnx_path_for(model_path)
+    if not ensure_local(onnx_path):
+        return None
+    
+    try:
+        model, load_ms = load_onnx_pipeline(onnx_path)
+    except Exception as e:
+        print(f"⚠️  WARNING: Failed to load ONNX pipeline: {e}")
+        return None
+    
+    threads = model.session.get_session_options().intra_op_num_threads
+    print(f"✓ ONNX pipeline loaded: {onnx_path.name} "
+          f"(onnxruntime, {threads or 'all'} threads, {load_ms:.1f} ms)")
+    return model
+
+def load_native(model_path, metadata):
+    """Load the native-format model via its manifest (None if unavailable)"""
+    native_info = (metadata or {}).get('native_model') or {}
+    manifest_path = resolve_project_path(native_info.get('manifest')) or manifest_path_for(model_path)
+    if not manifest_path.exists():
+        manifest_path = manifest_path_for(model_path)
+    if not ensure_local(manifest_path):
+        return None
+    if native_info.get('file'):
+        ensure_local(manifest_path.parent / native_info['file'])
+    
+    try:
+        model, manifest, load_ms = load_native_model(manifest_path)
+    except Exception as e:
+        print(f"⚠️  WARNING: Failed to load native model: {e}")
+        return None
+    
+    if metadata is not None and manifest.get('feature_cols') != metadata.get('feature_cols'):
+        print("⚠️  WARNING: Manifest feature order differs from metadata, using manifest")
+        metadata['feature_cols'] = manifest['feature_cols']
+    
+    print(f"✓ Native model loaded: {manifest['file']} ({manifest['format']}, "
+          f"{manifest['library']} {manifest['library_version']}, {load_ms:.1f} ms)")
+    return model
+
+def load_model_from_pickle(model_path):
+    """Load trained model from pickle file"""
     try:
         with open(model_path, 'rb') as f:
             model = pickle.load(f)
         print(f"✓ Model loaded: {model_path.name}")
+        return model
     except Exception as e:
         print(f"❌ ERROR: Failed to load model: {e}")
-        return None, None
-    
-    # Load metadata
+        return None
+
+def load_metadata(metadata_path):
+    """Load model metadata JSON (None if missing)"""
     metadata = None
     if metadata_path.exists():
         try:
@@ -185,42 +291,46 @@ def load_model_from_pickle(model_path=None):
         except Exception as e:
             print(f"⚠️  WARNING: Failed to load metadata: {e}")
     
-    return model, metadata
+    return metadata
 
 # ============================================================================
 # User Feature Loading (from ADB view)
 # ============================================================================
 
-def load_user_features_from_db(connection):
-    """Load user features from CHURN_USER_FEATURES view"""
+def load_user_features_from_db(connection, feature_cols=None, preprocessor=None):
+    """Load the model's feature columns from CHURN_USER_FEATURES view"""
     print("\n" + "=" * 60)
     print("Loading User Features from Database")
     print("=" * 60)
     
-    # Load from view
+    # Project only the columns the model needs, cast to compact types
+    requested = feature_cols or feature_names()
+    unknown = [f for f in requested if f not in FEATURES_BY_NAME]
+    if unknown:
+        print(f"⚠️  WARNING: Features not in feature schema (skipped): {unknown}")
+    feature_cols = [f for f in requested if f in FEATURES_BY_NAME]
+    
     print("Loading data from OML.CHURN_USER_FEATURES view...")
-    query = "SELECT * FROM OML.CHURN_USER_FEATURES"
+    query = projection_query('OML.CHURN_USER_FEATURES', feature_cols, id_col='USER_ID')
     
     try:
-        df = pd.read_sql(query, connection)
-        print(f"✓ Loaded {len(df):,} user profiles")
+        user_ids, X, _, feature_cols = fetch_feature_matrix(
+            connection, query, feature_cols=feature_cols, id_col='USER_ID'
+        )
+        print(f"✓ Loaded {len(X):,} user profiles")
     except Exception as e:
         print(f"❌ ERROR: Failed to load user features: {e}")
         return None, None, None
     
-    # Get USER_ID and features
-    user_ids = df['USER_ID'].copy()
-    feature_cols = [col for col in df.columns if col != 'USER_ID']
-    X_users = df[feature_cols].copy()
-    
     print(f"✓ Features: {len(feature_cols)}")
     
-    # Clean data
+    # Clean data in place with the training-time transform (single vectorized pass)
     print("\nCleaning data...")
-    for col in feature_cols:
-        if pd.api.types.is_numeric_dtype(X_users[col]):
-            X_users[col] = X_users[col].replace([np.inf, -np.inf], np.nan)
-            X_users[col] = pd.to_numeric(X_users[col], errors='coerce').fillna(0)
+    if preprocessor is None or preprocessor.feature_cols != feature_cols:
+        if preprocessor is not None:
+            print("⚠️  WARNING: Saved preprocessing does not match fetched features, using schema defaults")
+        preprocessor = FeaturePreprocessor().fit(X, feature_cols)
+    X_users = preprocessor.transform(X)
     
     print("✓ Data cleaned")
     
@@ -236,8 +346,11 @@ def score_users_local(model, X_users, feature_cols):
     print("Scoring Users (Local Model)")
     print("=" * 60)
     
-    # Ensure feature order matches training
-    X_users_aligned = X_users[feature_cols].copy()
+    # Ensure feature order matches training (no copy when already aligned)
+    if list(X_users.columns) == list(feature_cols):
+        X_users_aligned = X_users
+    else:
+        X_users_aligned = X_users[feature_cols]
     
     print(f"✓ Features aligned: {X_users_aligned.shape}")
     
@@ -284,8 +397,12 @@ def score_users_local(model, X_users, feature_cols):
 def main():
     """Main scoring function"""
     parser = argparse.ArgumentParser(description='Score users with local churn model')
-    parser.add_argument('--model-path', type=str, help='Path to model pickle file (default: latest)')
+    parser.add_argument('--model-path', type=str, help='Path to model pickle file (default: from MODEL_REGISTRY)')
+    parser.add_argument('--model-id', type=str, help='MODEL_ID / MODEL_VERSION / MODEL_NAME in MODEL_REGISTRY (default: production model)')
     parser.add_argument('--threshold', type=float, default=None, help='Churn threshold (default: from metadata)')
+    parser.add_argument('--engine', choices=['auto', 'compiled', 'native', 'onnxruntime', 'pickle'], default='auto',
+                        help='Model runtime: compiled NumPy trees, native format, ONNX pipeline, pickle, '
+                             'or auto (compiled → native → pickle)')
     args = parser.parse_args()
     
     print("=" * 60)
@@ -295,20 +412,27 @@ def main():
     
     # Connect to database as OML user
     connection = get_connection()
+    print_timings()
     if connection is None:
         sys.exit(1)
     
     try:
         # Load model
-        model, metadata = load_model_from_pickle(args.model_path)
+        model, metadata = load_model(
+            args.model_path, engine=args.engine, connection=connection, model_ref=args.model_id
+        )
         if model is None:
             print("❌ ERROR: Failed to load model")
             sys.exit(1)
         
         # Get feature columns and threshold from metadata
+        preprocessor = None
         if metadata:
             feature_cols = metadata.get('feature_cols', None)
             optimal_threshold = metadata.get('optimal_threshold', 0.5)
+            if metadata.get('preprocessing'):
+                preprocessor = FeaturePreprocessor.from_dict(metadata['preprocessing'])
+                print("✓ Using preprocessing saved with the model")
         else:
             feature_cols = None
             optimal_threshold = 0.5
@@ -317,7 +441,7 @@ def main():
         threshold = args.threshold if args.threshold is not None else optimal_threshold
         
         # Load user features from database
-        user_ids, X_users, feature_cols_from_db = load_user_features_from_db(connection)
+        user_ids, X_users, feature_cols_from_db = load_user_features_from_db(connection, feature_cols, preprocessor)
         if user_ids is None:
             print("❌ ERROR: Failed to load user features")
             sys.exit(1)
@@ -13,7 +13,6 @@ Usage:
     python scripts/local/test_pipeline_end_to_end.py
 """
 
-import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -32,70 +31,8 @@ try:
 except ImportError:
     pass
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path or not os.path.exists(wallet_path):
-        print("❌ ERROR: ADB_WALLET_PATH not set or invalid")
-        sys.exit(1)
-    
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    try:
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not connection_string or not password:
-        print("❌ ERROR: ADB connection credentials not set")
-        sys.exit(1)
-    
-    try:
-        return oracledb.connect(user=username, password=password, dsn=connection_string)
-    except Exception as e:
-        print(f"❌ ERROR: Failed to connect: {e}")
-        sys.exit(1)
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from db import get_connection
 
 def test_data_availability(connection):
     """Test 1: Verify training data is available"""
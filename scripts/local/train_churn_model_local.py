@@ -7,17 +7,27 @@ This script implements the complete ML pipeline using LOCAL training:
 - Task 3.1: ADB connection (oracledb, not OML4Py)
 - Task 3.2: Data loading and preprocessing
 - Task 3.3: Feature selection and validation
-- Task 3.4: Model training (XGBoost - best performing model, AUC 0.9269)
-- Task 3.5: Model evaluation
+- Task 3.4: Model training (XGBoost/CatBoost/GradientBoosting, best validation AUC
+            within a single-row latency and artifact size budget)
+- Task 3.5: Model evaluation (held-out test split)
 - Task 3.6: Threshold optimization
 - Task 3.7: Model saving (pickle file + database metadata)
 
 Usage:
-    python scripts/train_churn_model_local.py
+    python scripts/train_churn_model_local.py [--max-p99-ms MS] [--max-artifact-mb MB]
+                                              [--sample-rows N|auto]
+                                              [--dedup] [--dedup-decimals N]
+                                              [--refresh-snapshot] [--compress-artifacts]
+                                              [--as-of YYYY-MM-DD|latest] [--replay-model MODEL_ID]
+
+--as-of trains from the feature store snapshot of CHURN_TRAINING_DATA
+(snapshot_feature_views.py) instead of the live view; the snapshot's content
+hash is saved in the metadata and MODEL_REGISTRY.TRAINING_PARAMETERS.
+--replay-model re-trains on exactly the snapshot a registered model used.
 """
 
-import os
 import sys
+import argparse
 import pickle
 import json
 from pathlib import Path
@@ -30,6 +40,9 @@ script_dir = Path(__file__).parent
 project_root = script_dir.parent.parent
 env_file = project_root / '.env'
 
+# Written by train_learning_curve.py, read by --sample-rows auto
+LEARNING_CURVE_FILE = project_root / 'models' / 'learning_curve.json'
+
 # Load environment variables
 try:
     from dotenv import load_dotenv
@@ -38,118 +51,59 @@ try:
 except ImportError:
     pass
 
-# ============================================================================
-# Task 3.1: ADB Connection (oracledb)
-# ============================================================================
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from model_benchmark import benchmark_model, select_model, print_benchmark_table
+from db import get_connection, print_timings
+from feature_fetch import tables_to_feature_matrix
+from feature_schema import feature_names, projection_query, ID_COLUMN, LABEL_COLUMN
+from preprocessing import FeaturePreprocessor
+from imputation import ImputationProfile
+from compiled_trees import export_model, check_parity, threshold_probe_matrix
+from model_formats import save_native_model, manifest_path_for
+from onnx_export import (export_onnx_pipeline, save_onnx_pipeline, load_onnx_pipeline, onnx_path_for,
+                         check_pipeline_parity, benchmark_onnx_pipeline)
+from model_registry import registry_entry
+from artifact_store import ArtifactStore, project_relative, compression_default, file_sha256
+from snapshot_cache import load_view_snapshot, TRAINING_VIEW
+from feature_store import load_snapshot, resolve_snapshot, snapshot_reference
+from dedup import deduplicate_training_rows
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    return oracledb.connect(user=username, password=password, dsn=connection_string)
+# Task 3.1 (ADB connection) lives in shared/db.py (get_connection)
 
 # ============================================================================
 # Task 3.2: Data Loading and Preprocessing
 # ============================================================================
 
-def load_training_data(connection):
-    """Load training data from view and preprocess"""
+def load_training_data(connection, refresh_snapshot=False, imputation=None, feature_snapshot=None):
+    """Load training data from view (via local snapshot cache) or a feature store snapshot and preprocess"""
     print("\n" + "=" * 60)
     print("Task 3.2: Data Loading and Preprocessing")
     print("=" * 60)
     
-    # Load from view
-    print("Loading data from CHURN_TRAINING_DATA view...")
-    query = "SELECT * FROM OML.CHURN_TRAINING_DATA"
-    df = pd.read_sql(query, connection)
-    
-    print(f"✓ Loaded {len(df):,} rows")
-    print(f"✓ Columns: {len(df.columns)}")
-    
-    # Identify feature columns (exclude USER_ID and CHURNED)
-    exclude_cols = ['USER_ID', 'CHURNED']
-    feature_cols = [col for col in df.columns if col not in exclude_cols]
+    if feature_snapshot:
+        # Point-in-time snapshot: one local partition, feature and label columns only
+        print(f"Loading CHURN_TRAINING_DATA snapshot {feature_snapshot['snapshot_date']} from the feature store...")
+        table, _ = load_snapshot(TRAINING_VIEW, as_of=feature_snapshot['snapshot_date'],
+                                 columns=feature_names() + [LABEL_COLUMN],
+                                 expected_sha256=feature_snapshot['content_sha256'])
+        print(f"✓ Snapshot verified (content hash {feature_snapshot['content_sha256'][:12]})")
+    else:
+        # Load from view (local Arrow snapshot when unchanged) into a float32 matrix
+        print("Loading data from CHURN_TRAINING_DATA view...")
+        query = projection_query(TRAINING_VIEW, feature_names(), label_col=LABEL_COLUMN)
+        table = load_view_snapshot(connection, refresh=refresh_snapshot, query=query)
+    _, X, y_pd, feature_cols = tables_to_feature_matrix(
+        table, feature_cols=feature_names(), id_col=ID_COLUMN, label_col=LABEL_COLUMN
+    )
     
+    print(f"✓ Loaded {len(X):,} rows")
     print(f"✓ Feature columns: {len(feature_cols)}")
     
-    # Prepare X and y
-    X_pd = df[feature_cols].copy()
-    y_pd = df['CHURNED'].copy()
-    
-    # Clean data - replace NaN and infinity
+    # Clean data - replace NaN and infinity in place (single vectorized pass)
     print("\nCleaning data...")
-    for col in feature_cols:
-        if pd.api.types.is_numeric_dtype(X_pd[col]):
-            X_pd[col] = X_pd[col].replace([np.inf, -np.inf], np.nan)
-            # Use robust type conversion
-            X_pd[col] = pd.to_numeric(X_pd[col], errors='coerce').fillna(0)
-    
-    print("✓ Data cleaned (NaN and infinity handled)")
-    
-    # Check for any remaining issues
-    null_count = X_pd.isna().sum().sum()
-    if null_count > 0:
-        print(f"⚠️  WARNING: {null_count} NULL values still present")
-    else:
-        print("✓ No NULL values remaining")
+    fill_values = imputation.feature_fill_values(feature_cols) if imputation else None
+    X_pd = FeaturePreprocessor(fill_values=fill_values).fit_transform(X, feature_cols)
+    print(f"✓ Data cleaned (NaN and infinity handled{', fitted medians' if imputation else ''})")
     
     return X_pd, y_pd, feature_cols
 
@@ -175,6 +129,48 @@ def split_data(X_pd, y_pd, test_size=0.2, random_state=42):
     
     return X_train, X_test, y_train, y_test
 
+def stratified_subsample(X_train, y_train, sample_rows, random_state=42):
+    """Draw a stratified subsample of the training split (test split is left untouched)"""
+    from sklearn.model_selection import train_test_split
+    
+    if sample_rows is None or sample_rows >= len(X_train):
+        return X_train, y_train
+    
+    X_sample, _, y_sample, _ = train_test_split(
+        X_train, y_train,
+        train_size=sample_rows,
+        random_state=random_state,
+        stratify=y_train
+    )
+    
+    print(f"✓ Training on stratified sample: {len(X_sample):,} of {len(X_train):,} rows")
+    print(f"✓ Sample churn rate: {y_sample.mean() * 100:.2f}%")
+    
+    return X_sample, y_sample
+
+def resolve_sample_rows(value):
+    """Resolve --sample-rows: an integer, or 'auto' for the learning-curve recommendation"""
+    if value is None:
+        return None
+    
+    if value != 'auto':
+        return int(value)
+    
+    if not LEARNING_CURVE_FILE.exists():
+        print(f"⚠️  WARNING: No learning-curve recommendation at {LEARNING_CURVE_FILE}")
+        print("   Run: python scripts/local/train_learning_curve.py")
+        print("   Training on all rows")
+        return None
+    
+    with open(LEARNING_CURVE_FILE, 'r') as f:
+        recommendation = json.load(f)
+    
+    sample_rows = recommendation.get('recommended_rows')
+    print(f"✓ Learning-curve recommendation: {sample_rows:,} rows "
+          f"({recommendation.get('target_fraction', 0) * 100:.1f}% of asymptotic AUC "
+          f"{recommendation.get('asymptotic_auc', 0):.4f})")
+    return sample_rows
+
 # ============================================================================
 # Task 3.3: Feature Selection and Validation
 # ============================================================================
@@ -218,23 +214,17 @@ def validate_features(X_train_pd, feature_cols):
     return valid_features
 
 # ============================================================================
-# Task 3.4: Model Training (CatBoost - Best Performing Model)
+# Task 3.4: Model Training (latency-aware model selection)
 # ============================================================================
 
-def train_model(X_train, y_train, feature_cols):
-    """Train XGBoost model (best performing model from comparison)"""
-    print("\n" + "=" * 60)
-    print("Task 3.4: Model Training (XGBoost)")
-    print("=" * 60)
+def build_candidate_models():
+    """Build candidate models (XGBoost, CatBoost, GradientBoosting) that are available"""
+    candidates = []
     
-    # Try models in order of performance (from comparison results)
-    model = None
-    model_name = None
-    
-    # 1. Try XGBoost (best: AUC 0.9269)
+    # 1. XGBoost (comparison: AUC 0.9269)
     try:
         from xgboost import XGBClassifier
-        model = XGBClassifier(
+        candidates.append(("XGBoost", XGBClassifier(
             n_estimators=100,
             max_depth=6,
             learning_rate=0.1,
@@ -247,48 +237,106 @@ def train_model(X_train, y_train, feature_cols):
             random_state=42,
             eval_metric='logloss',
             use_label_encoder=False
-        )
-        model_name = "XGBoost"
+        )))
     except (ImportError, Exception) as e:
         print(f"⚠️  XGBoost not available: {e}")
-        print("   Trying CatBoost...")
-        
-        # 2. Try CatBoost (AUC 0.9255)
-        try:
-            import catboost as cb
-            model = cb.CatBoostClassifier(
-                iterations=100,
-                depth=6,
-                learning_rate=0.1,
-                random_seed=42,
-                verbose=False
-            )
-            model_name = "CatBoost"
-        except ImportError:
-            print("⚠️  CatBoost not available")
-            print("   Falling back to GradientBoosting...")
-            
-            # 3. Fallback to GradientBoosting (AUC 0.9247)
-            from sklearn.ensemble import GradientBoostingClassifier
-            model = GradientBoostingClassifier(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
-                subsample=0.8,
-                random_state=42
-            )
-            model_name = "GradientBoosting"
     
-    print(f"Training {model_name} model...")
+    # 2. CatBoost (comparison: AUC 0.9255)
+    try:
+        import catboost as cb
+        candidates.append(("CatBoost", cb.CatBoostClassifier(
+            iterations=100,
+            depth=6,
+            learning_rate=0.1,
+            random_seed=42,
+            verbose=False
+        )))
+    except ImportError:
+        print("⚠️  CatBoost not available")
+    
+    # 3. GradientBoosting (comparison: AUC 0.9247, always available with sklearn)
+    from sklearn.ensemble import GradientBoostingClassifier
+    candidates.append(("GradientBoosting", GradientBoostingClassifier(
+        n_estimators=100,
+        max_depth=6,
+        learning_rate=0.1,
+        subsample=0.8,
+        random_state=42
+    )))
+    
+    return candidates
+
+def train_model(X_train, y_train, feature_cols, max_p99_ms=None, max_artifact_mb=None,
+                sample_weight=None, validation_size=0.2, random_state=42):
+    """
+    Train candidate models, benchmark inference and select best validation AUC within budget
+
+    Candidates are compared on a stratified validation split carved from the
+    training data (the test split is kept for the final metrics); the selected
+    candidate is then refitted on the full training data.
+    """
+    print("\n" + "=" * 60)
+    print("Task 3.4: Model Training (Latency-Aware Selection)")
+    print("=" * 60)
+    
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+    
     print(f"  Training samples: {len(X_train):,}")
     print(f"  Features: {len(feature_cols)}")
-    print(f"  Churn rate: {y_train.mean() * 100:.2f}%")
+    if sample_weight is not None:
+        print(f"  Weighted rows: {sample_weight.sum():,.0f}")
+        print(f"  Churn rate: {np.average(y_train, weights=sample_weight) * 100:.2f}%")
+    else:
+        print(f"  Churn rate: {y_train.mean() * 100:.2f}%")
+    
+    weights = np.ones(len(y_train)) if sample_weight is None else np.asarray(sample_weight)
+    X_fit, X_val, y_fit, y_val, w_fit, w_val = train_test_split(
+        X_train[feature_cols], y_train, weights,
+        test_size=validation_size,
+        random_state=random_state,
+        stratify=y_train
+    )
+    fit_weight = None if sample_weight is None else w_fit
+    val_weight = None if sample_weight is None else w_val
+    print(f"  Selection split: {len(X_fit):,} fit / {len(X_val):,} validation rows")
+    
+    results = []
+    for name, candidate in build_candidate_models():
+        print(f"\nTraining {name} model...")
+        try:
+            candidate.fit(X_fit, y_fit, sample_weight=fit_weight)
+        except Exception as e:
+            print(f"⚠️  {name} failed: {e}")
+            continue
+        
+        y_pred_proba = candidate.predict_proba(X_val)[:, 1]
+        results.append({
+            'model': candidate,
+            'model_name': name,
+            'auc': roc_auc_score(y_val, y_pred_proba, sample_weight=val_weight),
+            'benchmark': benchmark_model(candidate, X_val)
+        })
+        print(f"✓ {name}: validation AUC {results[-1]['auc']:.4f}, "
+              f"p99 {results[-1]['benchmark']['single_row_p99_ms']:.3f} ms")
     
-    # Train model
-    model.fit(X_train[feature_cols], y_train)
+    if not results:
+        print("❌ ERROR: No candidate model trained successfully")
+        sys.exit(1)
+    
+    print_benchmark_table(results)
+    
+    selected, fits_budget = select_model(results, max_p99_ms=max_p99_ms, max_artifact_mb=max_artifact_mb)
+    if not fits_budget:
+        print("\n⚠️  WARNING: No candidate fits the latency/size budget")
+        print("   Using the lowest p99 latency model")
+    
+    print(f"\n✓ Selected model: {selected['model_name']} (validation AUC {selected['auc']:.4f})")
+    print(f"Refitting {selected['model_name']} on all {len(X_train):,} training rows...")
+    selected['model'].fit(X_train[feature_cols], y_train, sample_weight=sample_weight)
     print("✓ Training completed!")
     
-    return model, model_name
+    return selected['model'], selected['model_name'], selected['benchmark']
 
 # ============================================================================
 # Task 3.5: Model Evaluation
@@ -400,7 +448,12 @@ def register_model_in_db(connection, model_id, model_name, model_type, model_pat
         training_params = json.dumps({
             'model_type': model_type,
             'feature_count': len(metadata.get('feature_cols', [])),
-            'optimal_threshold': metadata.get('optimal_threshold', 0.5)
+            'optimal_threshold': metadata.get('optimal_threshold', 0.5),
+            'benchmark': metadata.get('benchmark'),
+            'dedup': metadata.get('dedup'),
+            'preprocessing': metadata.get('preprocessing'),
+            'artifact_sha256': metadata.get('artifact_sha256'),
+            'feature_snapshot': metadata.get('feature_snapshot')
         })
         
         # Insert into registry
@@ -425,8 +478,8 @@ def register_model_in_db(connection, model_id, model_name, model_type, model_pat
             model_name,  # MODEL_NAME
             metadata.get('timestamp', model_id),  # MODEL_VERSION
             model_type,  # MODEL_TYPE
-            str(model_path),  # MODEL_FILE_PATH
-            str(metadata_path),  # METADATA_FILE_PATH
+            project_relative(model_path),  # MODEL_FILE_PATH
+            project_relative(metadata_path),  # METADATA_FILE_PATH
             perf.get('auc'),  # AUC_SCORE
             perf.get('accuracy'),  # ACCURACY
             perf.get('precision'),  # PRECISION_SCORE
@@ -452,9 +505,78 @@ def register_model_in_db(connection, model_id, model_name, model_type, model_pat
         # Don't fail the entire process if registration fails
         return False
 
+def compile_model(model, feature_cols, X_test, atol=1e-5):
+    """Export the model to flat NumPy tree arrays and check parity with predict_proba"""
+    print("\n" + "=" * 60)
+    print("Compiling Model (NumPy tree evaluator)")
+    print("=" * 60)
+    
+    try:
+        compiled = export_model(model, feature_cols)
+    except Exception as e:
+        print(f"⚠️  WARNING: Model cannot be compiled, scorer will use the pickle: {e}")
+        return None, None
+    
+    print(f"✓ Trees: {compiled.n_trees:,}, nodes: {compiled.n_nodes:,}, max depth: {compiled.max_depth}")
+    
+    # Parity on held-out rows plus synthetic rows sitting on split thresholds
+    parity_test = check_parity(model, compiled, X_test[feature_cols], atol=atol)
+    parity_probe = check_parity(model, compiled, threshold_probe_matrix(compiled, len(feature_cols)), atol=atol)
+    parity = {
+        'rows': parity_test['rows'] + parity_probe['rows'],
+        'max_abs_diff': max(parity_test['max_abs_diff'], parity_probe['max_abs_diff']),
+        'atol': atol,
+        'passed': parity_test['passed'] and parity_probe['passed']
+    }
+    
+    if parity['passed']:
+        print(f"✓ Parity with predict_proba: max |Δp| = {parity['max_abs_diff']:.2e} over {parity['rows']:,} rows")
+        return compiled, parity
+    
+    print(f"⚠️  WARNING: Parity check failed (max |Δp| = {parity['max_abs_diff']:.2e} > {atol:g})")
+    print("   Compiled model will not be used for scoring")
+    return None, parity
+
+def export_onnx_model(model, model_name, preprocessor, optimal_threshold, X_test, atol=1e-4):
+    """Export preprocessing + model to one ONNX graph, check parity and benchmark onnxruntime"""
+    print("\n" + "=" * 60)
+    print("Exporting ONNX Pipeline (onnxruntime)")
+    print("=" * 60)
+    
+    try:
+        onnx_model = export_onnx_pipeline(model, preprocessor, optimal_threshold, model_name)
+        payload = onnx_model.SerializeToString()
+        runtime, _ = load_onnx_pipeline(payload)
+    except ImportError as e:
+        print(f"⚠️  WARNING: ONNX export skipped ({e})")
+        print("   Install with: pip install onnx onnxruntime onnxmltools skl2onnx")
+        return None, None
+    except Exception as e:
+        print(f"⚠️  WARNING: Model cannot be exported to ONNX: {e}")
+        return None, None
+    
+    X_eval = X_test[preprocessor.feature_cols]
+    parity = check_pipeline_parity(model, runtime, preprocessor, X_eval, atol=atol)
+    if not parity['passed']:
+        print(f"⚠️  WARNING: ONNX parity check failed (max |Δp| = {parity['max_abs_diff']:.2e} > {atol:g})")
+        print("   ONNX pipeline will not be saved")
+        return None, {'parity': parity}
+    print(f"✓ Parity with predict_proba: max |Δp| = {parity['max_abs_diff']:.2e} over {parity['rows']:,} rows "
+          f"({parity['non_finite_cells']:,} NaN/inf cells)")
+    
+    benchmark = benchmark_onnx_pipeline(model, payload, preprocessor, X_eval)
+    for result in benchmark:
+        label = result['runtime'] if result['threads'] is None else \
+            f"{result['runtime']} ({result['threads'] or 'all'} threads)"
+        print(f"  {label:<28} {result['batch_ms']:>9.1f} ms  {result['rows_per_sec']:>12,.0f} rows/sec")
+    
+    return onnx_model, {'parity': parity, 'benchmark': benchmark}
+
 def save_model(model, model_name, feature_cols, eval_results, optimal_threshold, 
                model_dir=None, connection=None, train_samples=None, test_samples=None, 
-               training_start_time=None):
+               training_start_time=None, benchmark=None, dedup_report=None, preprocessor=None,
+               compiled=None, parity=None, compression=None, onnx_model=None, onnx_report=None,
+               feature_snapshot=None):
     """Save model to disk and store metadata in database"""
     print("\n" + "=" * 60)
     print("Task 3.7: Model Saving")
@@ -484,10 +606,22 @@ def save_model(model, model_name, feature_cols, eval_results, optimal_threshold,
         print(f"❌ ERROR: Failed to save model: {e}")
         return None
     
-    # Save metadata
+    # Save native format (UBJSON / CBM / ONNX) with a manifest of feature order and threshold
+    native_manifest = None
+    try:
+        native_manifest = save_native_model(model, model_path, feature_cols, optimal_threshold, model_name)
+        if native_manifest:
+            print(f"✓ Native model saved: {native_manifest['file']} ({native_manifest['format']}, "
+                  f"{native_manifest['size_bytes']:,} bytes)")
+    except Exception as e:
+        print(f"⚠️  WARNING: Failed to save native model: {e}")
+    
+    # Save metadata (paths are project-relative so they survive a checkout elsewhere)
+    store = ArtifactStore()
     metadata = {
         'model_name': model_name,
-        'model_path': str(model_path),
+        'model_path': project_relative(model_path),
+        'artifact_sha256': file_sha256(model_path),
         'feature_cols': feature_cols,
         'timestamp': timestamp,
         'performance': {
@@ -497,9 +631,53 @@ def save_model(model, model_name, feature_cols, eval_results, optimal_threshold,
             'recall': float(eval_results['recall']),
             'f1': float(eval_results['f1'])
         },
-        'optimal_threshold': float(optimal_threshold)
+        'optimal_threshold': float(optimal_threshold),
+        'benchmark': benchmark,
+        'dedup': dedup_report,
+        'preprocessing': preprocessor.to_dict() if preprocessor else None,
+        'feature_snapshot': feature_snapshot,
+        'compiled_model': None,
+        'onnx_model': None,
+        'native_model': {
+            'manifest': project_relative(manifest_path_for(model_path)),
+            'format': native_manifest['format'],
+            'file': native_manifest['file']
+        } if native_manifest else None,
+        'artifact_manifest': project_relative(store.manifest_path(model_id))
     }
     
+    # Save the compiled (NumPy-only) model next to the pickle
+    if compiled is not None:
+        compiled_path = model_path.with_suffix('.trees.npz')
+        try:
+            compiled.save(compiled_path)
+            metadata['compiled_model'] = {
+                'path': project_relative(compiled_path),
+                'source': compiled.source,
+                'n_trees': compiled.n_trees,
+                'n_nodes': compiled.n_nodes,
+                'parity': parity
+            }
+            print(f"✓ Compiled model saved: {compiled_path}")
+        except Exception as e:
+            print(f"⚠️  WARNING: Failed to save compiled model: {e}")
+    
+    # Save the ONNX pipeline (preprocessing baked in) next to the pickle
+    if onnx_model is not None:
+        onnx_path = onnx_path_for(model_path)
+        try:
+            save_onnx_pipeline(onnx_model, onnx_path)
+            metadata['onnx_model'] = dict(
+                path=project_relative(onnx_path),
+                opset=max(o.version for o in onnx_model.opset_import if o.domain in ('', 'ai.onnx')),
+                preprocessing_baked=True,
+                size_bytes=onnx_path.stat().st_size,
+                **(onnx_report or {})
+            )
+            print(f"✓ ONNX pipeline saved: {onnx_path}")
+        except Exception as e:
+            print(f"⚠️  WARNING: Failed to save ONNX pipeline: {e}")
+    
     metadata_filename = f'churn_model_{model_name.lower()}_{timestamp}_metadata.json'
     metadata_path = model_dir / metadata_filename
     
@@ -510,6 +688,26 @@ def save_model(model, model_name, feature_cols, eval_results, optimal_threshold,
     except Exception as e:
         print(f"⚠️  WARNING: Failed to save metadata: {e}")
     
+    # Content-addressed store: identical artifacts are kept once, working files link to the blobs
+    try:
+        version_manifest = store.store_version(
+            model_id,
+            {
+                'model': model_path,
+                'native': model_dir / native_manifest['file'] if native_manifest else None,
+                'native_manifest': manifest_path_for(model_path) if native_manifest else None,
+                'compiled': model_path.with_suffix('.trees.npz') if metadata['compiled_model'] else None,
+                'onnx': onnx_path_for(model_path) if metadata['onnx_model'] else None,
+                'metadata': metadata_path
+            },
+            model_name=model_name,
+            compression=compression
+        )
+        print(f"✓ Artifacts stored: {len(version_manifest['artifacts'])} file(s), "
+              f"{version_manifest['new_bytes']:,} new bytes ({metadata['artifact_manifest']})")
+    except Exception as e:
+        print(f"⚠️  WARNING: Failed to write artifact store: {e}")
+    
     # Register in database (Task 3.10)
     if connection:
         register_model_in_db(
@@ -531,6 +729,29 @@ def save_model(model, model_name, feature_cols, eval_results, optimal_threshold,
 
 def main():
     """Main training pipeline"""
+    parser = argparse.ArgumentParser(description='Train churn model locally')
+    parser.add_argument('--max-p99-ms', type=float, default=None,
+                        help='Single-row p99 latency budget in milliseconds')
+    parser.add_argument('--max-artifact-mb', type=float, default=None,
+                        help='Pickled model size budget in megabytes')
+    parser.add_argument('--sample-rows', type=str, default=None,
+                        help="Train on a stratified sample of N rows ('auto' = learning-curve recommendation)")
+    parser.add_argument('--dedup', action='store_true',
+                        help='Collapse duplicate training rows into weighted rows (sample_weight)')
+    parser.add_argument('--dedup-decimals', type=int, default=None,
+                        help='With --dedup, also collapse rows whose features match after rounding')
+    parser.add_argument('--refresh-snapshot', action='store_true',
+                        help='Re-fetch CHURN_TRAINING_DATA even if the local snapshot is fresh')
+    parser.add_argument('--compress-artifacts', action='store_true',
+                        help='zstd-compress new blobs in the artifact store (default: CHURN_ARTIFACT_COMPRESSION)')
+    parser.add_argument('--imputation', type=str, default=None,
+                        help='Imputation profile JSON (prepare_dataset_for_oml.py): fill with its medians, saved with the model')
+    parser.add_argument('--as-of', type=str, default=None,
+                        help="Train from the feature store snapshot on or before YYYY-MM-DD ('latest' = newest)")
+    parser.add_argument('--replay-model', type=str, default=None,
+                        help='Re-train on the feature snapshot recorded for this MODEL_ID in MODEL_REGISTRY')
+    args = parser.parse_args()
+    
     training_start_time = datetime.now()
     
     print("=" * 80)
@@ -538,19 +759,68 @@ def main():
     print("=" * 80)
     print(f"Started at: {training_start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
+    imputation = None
+    if args.imputation:
+        imputation = ImputationProfile.load(args.imputation)
+        print(f"✓ Imputation profile: {args.imputation} ({len(imputation.numeric)} medians)")
+    
     # Connect to database
     connection = get_connection()
+    print_timings()
     
     try:
+        # Point-in-time training data: a dated snapshot, or the one a registered model used
+        feature_snapshot = None
+        if args.replay_model:
+            entry = registry_entry(connection, args.replay_model)
+            if not entry or not entry.get('feature_snapshot'):
+                print(f"❌ ERROR: No feature snapshot recorded for '{args.replay_model}' in MODEL_REGISTRY")
+                sys.exit(1)
+            feature_snapshot = entry['feature_snapshot']
+            print(f"✓ Replaying {entry['model_id']}: snapshot {feature_snapshot['snapshot_date']} "
+                  f"({feature_snapshot['content_sha256'][:12]})")
+        elif args.as_of:
+            try:
+                feature_snapshot = snapshot_reference(
+                    resolve_snapshot(TRAINING_VIEW, None if args.as_of == 'latest' else args.as_of)
+                )
+            except FileNotFoundError as e:
+                print(f"❌ ERROR: {e}")
+                print("   Run: python scripts/snapshot_feature_views.py")
+                sys.exit(1)
+            print(f"✓ Feature snapshot as of {args.as_of}: {feature_snapshot['snapshot_date']} "
+                  f"({feature_snapshot['rows']:,} rows)")
+        
         # Task 3.2: Load and preprocess data
-        X_pd, y_pd, all_feature_cols = load_training_data(connection)
+        X_pd, y_pd, all_feature_cols = load_training_data(connection, refresh_snapshot=args.refresh_snapshot,
+                                                          imputation=imputation,
+                                                          feature_snapshot=feature_snapshot)
         X_train, X_test, y_train, y_test = split_data(X_pd, y_pd)
+        X_train, y_train = stratified_subsample(X_train, y_train, resolve_sample_rows(args.sample_rows))
         
         # Task 3.3: Validate features
         feature_cols = validate_features(X_train, all_feature_cols)
         
+        # Preprocessing transform saved with the model and re-applied at scoring time
+        preprocessor = FeaturePreprocessor(
+            fill_values=imputation.feature_fill_values(feature_cols) if imputation else None
+        ).fit(X_train, feature_cols)
+        
+        # Optional: collapse duplicate rows into weighted rows
+        sample_weight = None
+        dedup_report = None
+        if args.dedup or args.dedup_decimals is not None:
+            X_train, y_train, sample_weight, dedup_report = deduplicate_training_rows(
+                X_train, y_train, feature_cols, quantize_decimals=args.dedup_decimals
+            )
+        
         # Task 3.4: Train model
-        model, model_name = train_model(X_train, y_train, feature_cols)
+        model, model_name, benchmark = train_model(
+            X_train, y_train, feature_cols,
+            max_p99_ms=args.max_p99_ms,
+            max_artifact_mb=args.max_artifact_mb,
+            sample_weight=sample_weight
+        )
         
         # Task 3.5: Evaluate model
         eval_results = evaluate_model(model, X_test, y_test, feature_cols)
@@ -558,6 +828,12 @@ def main():
         # Task 3.6: Optimize threshold
         optimal_threshold = optimize_threshold(eval_results['y_test'], eval_results['y_pred_proba'])
         
+        # Flat-array export for the NumPy-only scorer
+        compiled, parity = compile_model(model, feature_cols, X_test)
+        
+        # ONNX pipeline for the onnxruntime scorer (and in-database scoring)
+        onnx_model, onnx_report = export_onnx_model(model, model_name, preprocessor, optimal_threshold, X_test)
+        
         # Task 3.7: Save model (with registry registration)
         save_info = save_model(
             model,
@@ -566,9 +842,18 @@ def main():
             eval_results,
             optimal_threshold,
             connection=connection,
-            train_samples=len(X_train),
+            train_samples=dedup_report['original_rows'] if dedup_report else len(X_train),
             test_samples=len(X_test),
-            training_start_time=training_start_time
+            training_start_time=training_start_time,
+            benchmark=benchmark,
+            dedup_report=dedup_report,
+            preprocessor=preprocessor,
+            compiled=compiled,
+            parity=parity,
+            onnx_model=onnx_model,
+            onnx_report=onnx_report,
+            compression='zstd' if args.compress_artifacts else compression_default(),
+            feature_snapshot=feature_snapshot
         )
         
         # Summary
@@ -576,11 +861,15 @@ def main():
         print("Training Pipeline Summary")
         print("=" * 80)
         print(f"Model: {model_name}")
+        if feature_snapshot:
+            print(f"Training data: {TRAINING_VIEW} snapshot {feature_snapshot['snapshot_date']} "
+                  f"({feature_snapshot['content_sha256'][:12]})")
         print(f"Model Performance:")
         print(f"  AUC-ROC:     {eval_results['auc']:.4f}")
         print(f"  Accuracy:    {eval_results['accuracy']:.4f}")
         print(f"  F1 Score:    {eval_results['f1']:.4f}")
         print(f"  Optimal Threshold: {optimal_threshold:.3f}")
+        print(f"  p50/p99 latency: {benchmark['single_row_p50_ms']:.3f} / {benchmark['single_row_p99_ms']:.3f} ms")
         if save_info:
             print(f"\nModel Files:")
             print(f"  Model: {save_info['model_path']}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Learning-Curve Training Data Budget
+Trains the churn model on stratified subsamples of increasing size (in parallel),
+fits a saturation curve to AUC vs. training rows and recommends the smallest
+sample that reaches a target fraction of the asymptotic AUC.
+
+The recommendation is written to models/learning_curve.json and picked up by:
+    python scripts/local/train_churn_model_local.py --sample-rows auto
+
+Saturation curve (inverse power law):
+    AUC(n) = a - b * n^(-c)
+    a = asymptotic AUC, recommended rows = smallest n with AUC(n) >= target * a
+
+Usage:
+    python scripts/local/train_learning_curve.py [--target 0.995] [--repeats 3] [--n-jobs -1]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+import numpy as np
+
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir))
+
+from train_churn_model_local import (
+    get_connection, load_training_data, split_data, validate_features,
+    stratified_subsample, build_candidate_models, LEARNING_CURVE_FILE
+)
+
+DEFAULT_MIN_ROWS = 500
+DEFAULT_POINTS = 8
+
+def default_sample_sizes(total_rows, min_rows=DEFAULT_MIN_ROWS, points=DEFAULT_POINTS):
+    """Geometrically spaced sample sizes from min_rows up to all training rows"""
+    min_rows = min(min_rows, total_rows)
+    sizes = np.unique(np.geomspace(min_rows, total_rows, num=points).astype(int))
+    return [int(s) for s in sizes]
+
+def score_sample(estimator, X_train, y_train, X_test, y_test, feature_cols, sample_rows, seed):
+    """Fit a fresh copy of the estimator on one stratified subsample and return test AUC"""
+    from sklearn.base import clone
+    from sklearn.metrics import roc_auc_score
+
+    X_sample, y_sample = stratified_subsample(X_train, y_train, sample_rows, random_state=seed)
+    model = clone(estimator)
+    model.fit(X_sample[feature_cols], y_sample)
+    y_pred_proba = model.predict_proba(X_test[feature_cols])[:, 1]
+
+    return sample_rows, seed, roc_auc_score(y_test, y_pred_proba)
+
+def saturation_curve(n, a, b, c):
+    """Inverse power law learning curve"""
+    return a - b * np.power(n, -c)
+
+def fit_saturation_curve(sizes, aucs):
+    """Fit AUC(n) = a - b * n^(-c); falls back to the best observed AUC if the fit fails"""
+    try:
+        from scipy.optimize import curve_fit
+        params, _ = curve_fit(
+            saturation_curve, sizes, aucs,
+            p0=[max(aucs), 1.0, 0.5],
+            bounds=([0.0, 0.0, 1e-3], [1.0, np.inf, 3.0]),
+            maxfev=10000
+        )
+        return tuple(float(p) for p in params)
+    except Exception as e:
+        print(f"⚠️  WARNING: Saturation curve fit failed: {e}")
+        print("   Using best observed AUC as the asymptote")
+        return float(max(aucs)), 0.0, 1.0
+
+def recommend_rows(params, target_fraction, max_rows, round_to=500):
+    """Smallest row count whose fitted AUC reaches target_fraction of the asymptote"""
+    a, b, c = params
+    gap = a * (1 - target_fraction)
+    if b <= 0 or gap <= 0:
+        return max_rows
+
+    n = (b / gap) ** (1 / c)
+    n = int(np.ceil(n / round_to) * round_to)
+    return int(min(max(n, round_to), max_rows))
+
+def run_learning_curve(X_train, y_train, X_test, y_test, feature_cols, sizes, repeats=3, n_jobs=-1):
+    """Train all (size, seed) combinations in parallel and return mean AUC per size"""
+    from joblib import Parallel, delayed
+
+    name, estimator = build_candidate_models()[0]
+    print(f"\nModel: {name}")
+    print(f"Sample sizes: {', '.join(f'{s:,}' for s in sizes)}")
+    print(f"Repeats per size: {repeats}")
+
+    jobs = [
+        delayed(score_sample)(estimator, X_train, y_train, X_test, y_test, feature_cols, size, seed)
+        for size in sizes
+        for seed in range(repeats)
+    ]
+    results = Parallel(n_jobs=n_jobs)(jobs)
+
+    aucs_by_size = {}
+    for size, _, auc in results:
+        aucs_by_size.setdefault(size, []).append(auc)
+
+    return name, {size: (float(np.mean(v)), float(np.std(v))) for size, v in sorted(aucs_by_size.items())}
+
+def main():
+    """Main learning-curve function"""
+    parser = argparse.ArgumentParser(description='Learning-curve driven training data budget')
+    parser.add_argument('--target', type=float, default=0.995,
+                        help='Target fraction of asymptotic AUC (default: 0.995)')
+    parser.add_argument('--sizes', type=str, default=None,
+                        help='Comma-separated sample sizes (default: geometric from 500 to all rows)')
+    parser.add_argument('--repeats', type=int, default=3, help='Seeds per sample size (default: 3)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel workers (default: all cores)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Learning-Curve Training Data Budget")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    connection = get_connection()
+
+    try:
+        X_pd, y_pd, all_feature_cols = load_training_data(connection)
+    finally:
+        connection.close()
+        print("\n✓ Connection closed")
+
+    X_train, X_test, y_train, y_test = split_data(X_pd, y_pd)
+    feature_cols = validate_features(X_train, all_feature_cols)
+
+    if args.sizes:
+        sizes = sorted({min(int(s), len(X_train)) for s in args.sizes.split(',')})
+    else:
+        sizes = default_sample_sizes(len(X_train))
+
+    print("\n" + "=" * 60)
+    print("Training on Stratified Subsamples")
+    print("=" * 60)
+    model_name, curve = run_learning_curve(
+        X_train, y_train, X_test, y_test, feature_cols,
+        sizes, repeats=args.repeats, n_jobs=args.n_jobs
+    )
+
+    sizes_arr = np.array(list(curve.keys()), dtype=float)
+    aucs_arr = np.array([m for m, _ in curve.values()])
+    params = fit_saturation_curve(sizes_arr, aucs_arr)
+    recommended = recommend_rows(params, args.target, max_rows=len(X_train))
+
+    print("\n" + "=" * 60)
+    print("Learning Curve")
+    print("=" * 60)
+    print(f"\n{'Rows':<12} {'Mean AUC':<10} {'Std':<10} {'Fitted':<10}")
+    print("-" * 44)
+    for size, (mean_auc, std_auc) in curve.items():
+        print(f"{size:<12,} {mean_auc:<10.4f} {std_auc:<10.4f} {saturation_curve(size, *params):<10.4f}")
+
+    a, b, c = params
+    print(f"\n✓ Asymptotic AUC: {a:.4f}")
+    print(f"✓ Target: {args.target * 100:.1f}% of asymptote = {a * args.target:.4f}")
+    print(f"✓ Recommended sample: {recommended:,} of {len(X_train):,} training rows "
+          f"({recommended / len(X_train) * 100:.1f}%)")
+
+    recommendation = {
+        'model_name': model_name,
+        'timestamp': datetime.now().strftime('%Y%m%d_%H%M%S'),
+        'total_train_rows': int(len(X_train)),
+        'target_fraction': args.target,
+        'asymptotic_auc': a,
+        'curve_params': {'a': a, 'b': b, 'c': c},
+        'recommended_rows': recommended,
+        'points': [
+            {'rows': int(size), 'auc_mean': mean_auc, 'auc_std': std_auc}
+            for size, (mean_auc, std_auc) in curve.items()
+        ]
+    }
+
+    LEARNING_CURVE_FILE.parent.mkdir(exist_ok=True)
+    with open(LEARNING_CURVE_FILE, 'w') as f:
+        json.dump(recommendation, f, indent=2)
+    print(f"✓ Recommendation saved: {LEARNING_CURVE_FILE}")
+    print("\nUse for fast retrains:")
+    print("  python scripts/local/train_churn_model_local.py --sample-rows auto")
+
+    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == '__main__':
+    main()
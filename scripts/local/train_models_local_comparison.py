@@ -4,22 +4,21 @@ Local Model Training and Comparison
 Trains multiple models locally with proper hyperparameters and compares performance
 
 Usage:
-    python scripts/train_models_local_comparison.py
+    python scripts/train_models_local_comparison.py [--max-p99-ms MS] [--max-artifact-mb MB]
 
 This script:
     1. Loads training data from CHURN_TRAINING_DATA view
     2. Splits into train/validation sets
     3. Trains multiple models (XGBoost, RandomForest, GradientBoosting, etc.)
     4. Compares performance (AUC, Accuracy, Precision, Recall, F1)
-    5. Recommends best model
+    5. Benchmarks inference (single-row p50/p99, batch throughput, load time, size)
+    6. Recommends the best-AUC model within the latency/size budget
 """
 
-import os
 import sys
+import argparse
 from pathlib import Path
 from datetime import datetime
-import pandas as pd
-import numpy as np
 
 # Find project root
 script_dir = Path(__file__).parent
@@ -34,69 +33,11 @@ try:
 except ImportError:
     pass
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        print("   Install with: pip install oracledb")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
-        sys.exit(1)
-    
-    if not os.path.exists(wallet_path):
-        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
-        sys.exit(1)
-    
-    # Set TNS_ADMIN if not already set
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Try to initialize Oracle client (thick mode)
-    try:
-        import glob
-        oracle_opt_paths = [
-            '/opt/oracle/instantclient_*/lib',
-            '/opt/oracle/instantclient_*',
-        ]
-        
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    return oracledb.connect(user=username, password=password, dsn=connection_string)
+sys.path.insert(0, str(Path(__file__).parent.parent / 'shared'))
+from model_benchmark import benchmark_model, select_model, print_benchmark_table
+from db import get_connection
+from snapshot_cache import load_view_dataframe
+from preprocessing import FeaturePreprocessor
 
 def load_data_from_view(connection):
     """Load training data from view"""
@@ -104,11 +45,8 @@ def load_data_from_view(connection):
     print("Loading Training Data from View")
     print("=" * 60)
     
-    query = """
-        SELECT * FROM OML.CHURN_TRAINING_DATA
-    """
-    
-    df = pd.read_sql(query, connection)
+    # Local snapshot cache avoids re-pulling the view when it is unchanged
+    df = load_view_dataframe(connection)
     print(f"✓ Loaded {len(df):,} rows from CHURN_TRAINING_DATA view")
     
     # Separate features and target
@@ -128,12 +66,8 @@ def clean_data(X, feature_cols):
     """Clean and prepare data"""
     print("\nCleaning data...")
     
-    # Replace infinity and NaN
-    X = X.replace([np.inf, -np.inf], np.nan)
-    
-    # Ensure numeric
-    for col in feature_cols:
-        X[col] = pd.to_numeric(X[col], errors='coerce').fillna(0)
+    # Replace infinity and NaN (single vectorized pass over a float32 matrix)
+    X = FeaturePreprocessor().fit_transform(X, feature_cols)
     
     print("✓ Data cleaned")
     return X
@@ -158,6 +92,9 @@ def train_model(model_name, model, X_train, y_train, X_val, y_val):
     recall = recall_score(y_val, y_pred, zero_division=0)
     f1 = f1_score(y_val, y_pred, zero_division=0)
     
+    # Inference microbenchmarks on validation rows
+    benchmark = benchmark_model(model, X_val)
+    
     return {
         'model': model,
         'model_name': model_name,
@@ -166,6 +103,7 @@ def train_model(model_name, model, X_train, y_train, X_val, y_val):
         'precision': precision,
         'recall': recall,
         'f1': f1,
+        'benchmark': benchmark,
         'y_pred_proba': y_pred_proba,
         'y_pred': y_pred
     }
@@ -279,8 +217,8 @@ def train_all_models(X_train, y_train, X_val, y_val, feature_cols):
     
     return results
 
-def display_comparison(results):
-    """Display model comparison"""
+def display_comparison(results, max_p99_ms=None, max_artifact_mb=None):
+    """Display model comparison and select best model within budget"""
     print("\n" + "=" * 80)
     print("Model Performance Comparison")
     print("=" * 80)
@@ -295,8 +233,20 @@ def display_comparison(results):
     for r in results_sorted:
         print(f"{r['model_name']:<20} {r['auc']:<10.4f} {r['accuracy']:<12.4f} {r['precision']:<12.4f} {r['recall']:<12.4f} {r['f1']:<10.4f}")
     
-    # Best model
-    best = results_sorted[0]
+    # Inference benchmark table
+    print("\n" + "=" * 80)
+    print("Inference Benchmark")
+    print("=" * 80)
+    print_benchmark_table(results_sorted)
+    
+    # Best model within latency/size budget
+    best, fits_budget = select_model(results, max_p99_ms=max_p99_ms, max_artifact_mb=max_artifact_mb)
+    if not fits_budget:
+        print("\n⚠️  WARNING: No model fits the latency/size budget")
+        print("   Falling back to the lowest p99 latency model")
+    elif best is not results_sorted[0]:
+        print(f"\nℹ️  {results_sorted[0]['model_name']} has the highest AUC but exceeds the budget")
+    
     print("\n" + "=" * 80)
     print(f"🏆 Best Model: {best['model_name']}")
     print("=" * 80)
@@ -305,11 +255,19 @@ def display_comparison(results):
     print(f"Precision:    {best['precision']:.4f} ({best['precision']*100:.2f}%)")
     print(f"Recall:       {best['recall']:.4f} ({best['recall']*100:.2f}%)")
     print(f"F1 Score:     {best['f1']:.4f}")
+    print(f"p99 latency:  {best['benchmark']['single_row_p99_ms']:.3f} ms (single row)")
     
     return best
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Train and compare local churn models')
+    parser.add_argument('--max-p99-ms', type=float, default=None,
+                        help='Single-row p99 latency budget in milliseconds')
+    parser.add_argument('--max-artifact-mb', type=float, default=None,
+                        help='Pickled model size budget in megabytes')
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("Local Model Training and Comparison")
     print("=" * 80)
@@ -349,7 +307,11 @@ def main():
             sys.exit(1)
         
         # Display comparison
-        best_model = display_comparison(results)
+        best_model = display_comparison(
+            results,
+            max_p99_ms=args.max_p99_ms,
+            max_artifact_mb=args.max_artifact_mb
+        )
         
         # Summary
         print("\n" + "=" * 80)
@@ -2,261 +2,273 @@
 """
 Map dataset rows to ADMIN.USERS.ID
 Supports multiple mapping strategies
+
+Streaming strategies (constant memory in the dataset size):
+    multiple    row i → user i mod N (vectorized index arithmetic per chunk)
+    hash        row → user (stable 64-bit hash of the row key) mod N, so re-runs
+                assign the same rows to the same users, independent of row order
+                and chunk size
+    sequential  first N rows → N users (1:1)
+
+The CSV is read and written in chunks; USER_IDs are fetched with a server-side
+cursor in batches into one NumPy array (ORDER BY ID, so N and the index → ID
+mapping are stable between runs).
+
+random / stratified sample rows 1:1 with the shared one-pass reservoir sampler
+(stream_sampler.py): deterministic for a given --seed, stratified by the churn
+label or any --strata columns (e.g. Churned Country Signup_Quarter).
+
+Usage:
+    python scripts/map_dataset_to_users.py <dataset.csv> <output.csv> [strategy]
+                                           [--chunk-rows 500000] [--key-columns COL ...]
+                                           [--strata COL ...] [--seed 42]
 """
 
-import os
 import sys
-import pandas as pd
+import argparse
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
+import numpy as np
+import pandas as pd
+
 script_dir = Path(__file__).parent
 project_root = script_dir.parent
 env_file = project_root / '.env'
-load_dotenv(dotenv_path=env_file)
-
-import oracledb
-
-def get_user_ids(limit=None):
-    """Get list of USER_IDs from ADMIN.USERS table"""
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    if not all([wallet_path, connection_string, password]):
-        print("❌ ERROR: Missing required environment variables")
-        return None
-    
-    # Set TNS_ADMIN
-    os.environ['TNS_ADMIN'] = wallet_path
-    
-    # Initialize Oracle client (simplified - reuse from test script logic)
-    import platform
-    import subprocess
-    import glob
-    
-    python_arch = platform.machine()
-    lib_dir = None
-    
-    if python_arch == 'arm64':
-        oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                for lib_name in ['libclntsh.dylib', 'libclntsh.so']:
-                    lib_path = os.path.join(match, lib_name) if os.path.isdir(match) else match
-                    if os.path.exists(lib_path) or os.path.islink(lib_path):
-                        try:
-                            result = subprocess.run(['file', lib_path], 
-                                                   capture_output=True, text=True, timeout=2)
-                            lib_arch_info = result.stdout.lower()
-                            if 'arm64' in lib_arch_info and 'x86_64' not in lib_arch_info:
-                                lib_dir = os.path.dirname(lib_path) if os.path.isfile(lib_path) else match
-                                break
-                        except Exception:
-                            pass
-                if lib_dir:
-                    break
-            if lib_dir:
-                break
-    
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    try:
-        if lib_dir:
-            oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass  # Try thin mode
-    
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
+
+sys.path.insert(0, str(script_dir / 'shared'))
+from stream_sampler import split_csv, DEFAULT_SEED
+
+STREAMING_STRATEGIES = ('multiple', 'hash', 'sequential')
+SAMPLING_STRATEGIES = ('random', 'stratified')
+DEFAULT_CHUNK_ROWS = 500000
+DEFAULT_FETCH_BATCH = 100000
+LABEL = 'Churned'
+
+def fetch_user_ids(connection, limit=None, batch_size=DEFAULT_FETCH_BATCH, active_only=True):
+    """ADMIN.USERS IDs (ORDER BY ID) as a NumPy string array, fetched in batches"""
+    query = f"""
+        SELECT ID
+        FROM ADMIN.USERS
+        {'WHERE IS_ACTIVE = 1' if active_only else ''}
+        ORDER BY ID
+    """
+    if limit:
+        query += f"\n        FETCH FIRST {int(limit)} ROWS ONLY"
+
+    cursor = connection.cursor()
+    cursor.arraysize = batch_size
+    cursor.prefetchrows = batch_size + 1
     try:
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        
-        cursor = connection.cursor()
-        
-        # Get user IDs (prefer active users)
-        if limit:
-            query = f"""
-                SELECT ID 
-                FROM ADMIN.USERS 
-                WHERE IS_ACTIVE = 1
-                ORDER BY ID
-                FETCH FIRST {limit} ROWS ONLY
-            """
-        else:
-            query = """
-                SELECT ID 
-                FROM ADMIN.USERS 
-                WHERE IS_ACTIVE = 1
-                ORDER BY ID
-            """
-        
         cursor.execute(query)
-        user_ids = [row[0] for row in cursor.fetchall()]
-        
+        batches = []
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            batches.append(np.array([row[0] for row in rows], dtype=str))
+    finally:
         cursor.close()
-        connection.close()
-        
-        return user_ids
-        
+
+    return np.concatenate(batches) if batches else np.empty(0, dtype=str)
+
+def get_user_ids(limit=None, batch_size=DEFAULT_FETCH_BATCH, active_only=True):
+    """Fetch USER_IDs over the shared connection pool"""
+    from db import get_connection
+
+    connection = get_connection()
+    try:
+        return fetch_user_ids(connection, limit=limit, batch_size=batch_size, active_only=active_only)
     except Exception as e:
         print(f"❌ ERROR: Could not fetch user IDs: {e}")
         return None
+    finally:
+        connection.close()
+
+def row_key_hash(chunk, key_columns):
+    """
+    Stable uint64 hash per row of key_columns.
 
-def map_dataset_to_users(dataset_file, output_file, strategy='multiple'):
+    Numeric columns are hashed as float64 and others as strings, so a value
+    hashes the same whatever dtype pandas inferred for its chunk.
+    """
+    keys = pd.DataFrame({
+        col: chunk[col].astype('float64') if pd.api.types.is_numeric_dtype(chunk[col]) else chunk[col].astype(str)
+        for col in key_columns
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+def assign_user_index(chunk, row_offset, n_users, strategy, key_columns=None):
+    """User index per row of a chunk (vectorized)"""
+    if strategy == 'hash':
+        return (row_key_hash(chunk, key_columns) % np.uint64(n_users)).astype(np.int64)
+    # multiple / sequential: global row number mod N
+    return (np.arange(row_offset, row_offset + len(chunk), dtype=np.int64)) % n_users
+
+def order_columns(df):
+    """USER_ID first, Churned last"""
+    cols = [col for col in df.columns if col not in ['USER_ID', LABEL]]
+    return df[['USER_ID'] + cols + ([LABEL] if LABEL in df.columns else [])]
+
+def map_streaming(dataset_file, output_path, user_ids, strategy, chunk_rows=DEFAULT_CHUNK_ROWS,
+                  key_columns=None):
+    """Map and write the CSV chunk by chunk; returns summary counts"""
+    n_users = len(user_ids)
+    rows_per_user = np.zeros(n_users, dtype=np.int64)
+    rows = churned = 0
+
+    with open(output_path, 'w', newline='') as out, pd.read_csv(dataset_file, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            if strategy == 'sequential':
+                chunk = chunk.iloc[:max(0, n_users - rows)]
+                if chunk.empty:
+                    break
+            if strategy == 'hash' and key_columns is None:
+                key_columns = [c for c in chunk.columns if c not in ('USER_ID', LABEL)]
+                print(f"   Row key: {len(key_columns)} columns")
+
+            user_index = assign_user_index(chunk, rows, n_users, strategy, key_columns)
+            chunk = chunk.drop(columns=['USER_ID'], errors='ignore')
+            chunk.insert(0, 'USER_ID', user_ids[user_index])
+            order_columns(chunk).to_csv(out, header=rows == 0, index=False)
+
+            rows_per_user += np.bincount(user_index, minlength=n_users)
+            rows += len(chunk)
+            if LABEL in chunk.columns:
+                churned += int(chunk[LABEL].sum())
+            print(f"   {rows:,} rows mapped")
+
+    return {
+        'rows': rows,
+        'unique_users': int(np.count_nonzero(rows_per_user)),
+        'max_rows_per_user': int(rows_per_user.max()) if n_users else 0,
+        'churn_rate': churned / rows * 100 if rows else 0.0
+    }
+
+def map_sampled(dataset_file, output_path, user_ids, strategy, chunk_rows=DEFAULT_CHUNK_ROWS,
+                strata=None, seed=DEFAULT_SEED):
+    """random / stratified 1:1 mapping: one streaming pass of the shared reservoir sampler"""
+    strata = (strata or [LABEL]) if strategy == 'stratified' else None
+    if strata:
+        print(f"   Strata: {' × '.join(strata)}")
+    sample, sampler = split_csv(dataset_file, len(user_ids), strata=strata, seed=seed, chunk_rows=chunk_rows)
+    print(f"   Sampled {len(sample):,} of {sampler.rows_seen:,} rows "
+          f"({len(sampler.counts):,} strata, seed {seed})")
+
+    sample = sample.drop(columns=['USER_ID'], errors='ignore')
+    sample.insert(0, 'USER_ID', user_ids[:len(sample)])
+    order_columns(sample).to_csv(output_path, index=False)
+
+    return {
+        'rows': len(sample),
+        'unique_users': len(sample),
+        'max_rows_per_user': 1,
+        'churn_rate': sample[LABEL].mean() * 100 if LABEL in sample.columns and len(sample) else 0.0
+    }
+
+def map_dataset_to_users(dataset_file, output_file, strategy='multiple', chunk_rows=DEFAULT_CHUNK_ROWS,
+                         key_columns=None, fetch_batch=DEFAULT_FETCH_BATCH, strata=None, seed=DEFAULT_SEED):
     """
     Map dataset rows to USER_IDs
-    
+
     Args:
         dataset_file: Path to dataset CSV
         output_file: Path to output CSV
-        strategy: 'multiple' (10 rows per user) or 'sequential' (1:1 mapping)
+        strategy: 'multiple' (~10 rows per user), 'hash' (stable row-key hash),
+                  'sequential' (1:1), 'random' or 'stratified' (1:1 samples)
+        chunk_rows: CSV rows per chunk for the streaming strategies
+        key_columns: row key for 'hash' (default: all columns except USER_ID / Churned)
+        strata: stratification columns for 'stratified' (default: Churned)
+        seed: sampling seed for 'random' / 'stratified'
     """
-    
+
     print("=" * 60)
     print("Mapping Dataset to USER_IDs")
     print("=" * 60)
-    
-    # Load dataset
-    print(f"\n📥 Loading dataset: {dataset_file}")
-    df = pd.read_csv(dataset_file)
-    print(f"   Dataset rows: {len(df):,}")
-    
+
+    if strategy not in STREAMING_STRATEGIES + SAMPLING_STRATEGIES:
+        print(f"❌ ERROR: Unknown strategy: {strategy}")
+        print(f"   Available: {', '.join(STREAMING_STRATEGIES + SAMPLING_STRATEGIES)}")
+        return False
+
     # Get user IDs
-    print(f"\n🔑 Fetching USER_IDs from ADMIN.USERS...")
-    user_ids = get_user_ids()
-    
-    if not user_ids:
+    print(f"\n🔑 Fetching USER_IDs from ADMIN.USERS (batches of {fetch_batch:,})...")
+    user_ids = get_user_ids(batch_size=fetch_batch)
+
+    if user_ids is None or len(user_ids) == 0:
         print("❌ ERROR: Could not fetch user IDs")
         return False
-    
+
     print(f"   Found {len(user_ids):,} active users")
-    
-    # Map dataset to users
-    print(f"\n🔗 Mapping strategy: {strategy}")
-    
-    if strategy == 'multiple':
-        # Map multiple rows per user (~10 rows per user)
-        rows_per_user = len(df) // len(user_ids)
-        print(f"   Mapping ~{rows_per_user} rows per user")
-        
-        mapped_user_ids = []
-        for i in range(len(df)):
-            user_idx = i % len(user_ids)
-            mapped_user_ids.append(user_ids[user_idx])
-        
-        df['USER_ID'] = mapped_user_ids
-        print(f"   ✅ Mapped {len(df):,} rows to {len(user_ids):,} users")
-        print(f"   Each user appears ~{rows_per_user} times")
-        
-    elif strategy == 'sequential':
-        # Map 1:1 (first N rows to N users)
-        if len(df) > len(user_ids):
-            print(f"   ⚠️  Dataset has more rows than users")
-            print(f"   Using first {len(user_ids):,} rows")
-            df = df.head(len(user_ids))
-        
-        df['USER_ID'] = user_ids[:len(df)]
-        print(f"   ✅ Mapped {len(df):,} rows to {len(df):,} users (1:1)")
-        print(f"   ⚠️  NOTE: Sequential may have bias - consider 'stratified' strategy")
-        
-    elif strategy == 'random':
-        # Random sampling (maintains overall statistics)
-        if len(df) > len(user_ids):
-            print(f"   Randomly sampling {len(user_ids):,} rows from {len(df):,}")
-            df = df.sample(n=len(user_ids), random_state=42).reset_index(drop=True)
-        
-        df['USER_ID'] = user_ids[:len(df)]
-        churn_rate = df['Churned'].mean() * 100
-        print(f"   ✅ Mapped {len(df):,} rows to {len(df):,} users (random)")
-        print(f"   Churn rate: {churn_rate:.2f}%")
-        
-    elif strategy == 'stratified':
-        # Stratified sampling (maintains exact churn rate)
-        if len(df) > len(user_ids):
-            print(f"   Stratified sampling {len(user_ids):,} rows from {len(df):,}")
-            
-            # Maintain churn rate
-            churned = df[df['Churned']==1]
-            not_churned = df[df['Churned']==0]
-            full_churn_rate = len(churned) / len(df)
-            
-            n_churned = int(len(user_ids) * full_churn_rate)
-            n_not_churned = len(user_ids) - n_churned
-            
-            print(f"   Target: {n_churned:,} churned + {n_not_churned:,} not churned")
-            
-            stratified = pd.concat([
-                churned.sample(n=min(n_churned, len(churned)), random_state=42),
-                not_churned.sample(n=min(n_not_churned, len(not_churned)), random_state=42)
-            ]).sample(frac=1, random_state=42).reset_index(drop=True)
-            
-            df = stratified
-        
-        df['USER_ID'] = user_ids[:len(df)]
-        churn_rate = df['Churned'].mean() * 100
-        print(f"   ✅ Mapped {len(df):,} rows to {len(df):,} users (stratified)")
-        print(f"   Churn rate: {churn_rate:.2f}% (maintains exact rate)")
-        
-    else:
-        print(f"❌ ERROR: Unknown strategy: {strategy}")
-        print(f"   Available: 'multiple', 'sequential', 'random', 'stratified'")
-        return False
-    
-    # Reorder columns (USER_ID first, Churned last)
-    cols = [col for col in df.columns if col not in ['USER_ID', 'Churned']]
-    df = df[['USER_ID'] + cols + ['Churned']]
-    
-    # Save mapped dataset
+
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(output_path, index=False)
-    
+
+    print(f"\n🔗 Mapping strategy: {strategy}")
+    print(f"📥 Dataset: {dataset_file}")
+    print(f"   Streaming in chunks of {chunk_rows:,} rows")
+    if strategy in STREAMING_STRATEGIES:
+        summary = map_streaming(dataset_file, output_path, user_ids, strategy, chunk_rows, key_columns)
+    else:
+        summary = map_sampled(dataset_file, output_path, user_ids, strategy, chunk_rows, strata, seed)
+
     print(f"\n💾 Saved mapped dataset to: {output_path}")
-    print(f"   Final shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    
+
     # Summary
     print(f"\n" + "=" * 60)
     print("Mapping Summary")
     print("=" * 60)
-    print(f"✅ Dataset rows: {len(df):,}")
-    print(f"✅ Unique users: {df['USER_ID'].nunique():,}")
+    print(f"✅ Dataset rows: {summary['rows']:,}")
+    print(f"✅ Unique users: {summary['unique_users']:,}")
     print(f"✅ Strategy: {strategy}")
-    
-    if strategy == 'multiple':
-        avg_rows_per_user = len(df) / df['USER_ID'].nunique()
-        print(f"✅ Average rows per user: {avg_rows_per_user:.1f}")
-    
+    print(f"✅ Churn rate: {summary['churn_rate']:.2f}%")
+
+    if strategy in ('multiple', 'hash') and summary['unique_users']:
+        avg_rows_per_user = summary['rows'] / summary['unique_users']
+        print(f"✅ Average rows per user: {avg_rows_per_user:.1f} (max {summary['max_rows_per_user']:,})")
+
     return True
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python map_dataset_to_users.py <dataset_file.csv> <output_file.csv> [strategy]")
-        print("\nStrategies:")
-        print("  multiple   - Map multiple rows per user (~10 rows per user, uses all 50k rows)")
-        print("  sequential - Map 1:1 (first N rows to N users) - ⚠️  May have bias")
-        print("  random     - Random sample 1:1 (maintains overall statistics) - ✅ Good")
-        print("  stratified - Stratified sample 1:1 (maintains exact churn rate) - ✅ BEST")
-        print("\nExample:")
-        print("  python map_dataset_to_users.py data/processed/churn_dataset_cleaned.csv data/processed/churn_dataset_mapped.csv stratified")
-        sys.exit(1)
-    
-    dataset_file = sys.argv[1]
-    output_file = sys.argv[2]
-    strategy = sys.argv[3] if len(sys.argv) > 3 else 'multiple'
-    
-    if not Path(dataset_file).exists():
-        print(f"❌ ERROR: File not found: {dataset_file}")
+    parser = argparse.ArgumentParser(
+        description='Map dataset rows to ADMIN.USERS.ID',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Strategies:
+  multiple   - Map multiple rows per user (~10 rows per user, uses all 50k rows)
+  hash       - Like multiple, but by a stable hash of the row key (re-runs map rows identically)
+  sequential - Map 1:1 (first N rows to N users) - ⚠️  May have bias
+  random     - Random sample 1:1 (maintains overall statistics) - ✅ Good
+  stratified - Stratified sample 1:1 (maintains exact churn rate) - ✅ BEST
+
+Example:
+  python map_dataset_to_users.py data/processed/churn_dataset_cleaned.csv data/processed/churn_dataset_mapped.csv stratified"""
+    )
+    parser.add_argument('dataset_file', help='Dataset CSV')
+    parser.add_argument('output_file', help='Output CSV')
+    parser.add_argument('strategy', nargs='?', default='multiple',
+                        choices=STREAMING_STRATEGIES + SAMPLING_STRATEGIES)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help='CSV rows per chunk (streaming strategies)')
+    parser.add_argument('--key-columns', nargs='+',
+                        help="Row key for 'hash' (default: all columns except USER_ID / Churned)")
+    parser.add_argument('--fetch-batch', type=int, default=DEFAULT_FETCH_BATCH,
+                        help='USER_IDs fetched per round trip')
+    parser.add_argument('--strata', nargs='+',
+                        help="Stratification columns for 'stratified' (default: Churned)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Seed for 'random' / 'stratified'")
+    args = parser.parse_args()
+
+    if not Path(args.dataset_file).exists():
+        print(f"❌ ERROR: File not found: {args.dataset_file}")
         sys.exit(1)
-    
-    success = map_dataset_to_users(dataset_file, output_file, strategy)
+
+    success = map_dataset_to_users(args.dataset_file, args.output_file, args.strategy,
+                                   chunk_rows=args.chunk_rows, key_columns=args.key_columns,
+                                   fetch_batch=args.fetch_batch, strata=args.strata, seed=args.seed)
     sys.exit(0 if success else 1)
@@ -9,17 +9,28 @@ This script:
     3. Scores all users (batch prediction)
     4. Stores predictions in CHURN_PREDICTIONS table
 
+Modes:
+    in-db (default)  Features stay in the database: cleaning view, in-database
+                     predict_proba (or embedded group_apply over hash partitions),
+                     INSERT ... SELECT into CHURN_PREDICTIONS (shared/oml_scoring.py)
+    pull             Pull all users into pandas, clean, push back, predict, store
+    --fake           No database: run the in-db path through FakeOMLAdapter (SQLite +
+                     pandas) on synthetic users and compare it with the pull path
+
 Usage:
     # In OML Notebooks (recommended):
     %python
     exec(open('scripts/score_churn_model.py').read())
     
     # Or run as standalone (requires OML4Py):
-    python scripts/score_churn_model.py
+    python scripts/score_churn_model.py [--mode in-db|pull] [--partitions 8]
+    
+    # Check the in-db path locally (no OML4Py / ADB needed):
+    python scripts/oml4py/score_churn_model.py --fake [--rows 5000] [--atol 1e-4]
 """
 
-import os
 import sys
+import argparse
 from pathlib import Path
 from datetime import datetime
 import pandas as pd
@@ -33,6 +44,10 @@ env_file = project_root / '.env'
 # Import shared store_predictions function
 sys.path.insert(0, str(script_dir.parent / 'shared'))
 from store_predictions import store_predictions
+from preprocessing import FeaturePreprocessor
+from feature_schema import FEATURES, feature_names
+from oml_scoring import OMLAdapter, FakeOMLAdapter, score_in_database, DEFAULT_PARTITIONS, PREDICTIONS_TABLE
+from db import get_connection
 
 # Load environment variables
 try:
@@ -64,7 +79,7 @@ def connect_oml():
         return oml  # Return anyway, connection may be established later
 
 def load_model(oml, model_name='churn_xgboost_v1'):
-    """Load trained model from OML datastore"""
+    """Load trained model (and saved preprocessing, if any) from OML datastore"""
     print("\n" + "=" * 60)
     print("Loading Model from OML Datastore")
     print("=" * 60)
@@ -72,6 +87,11 @@ def load_model(oml, model_name='churn_xgboost_v1'):
     try:
         loaded_dict = oml.ds.load(model_name)
         
+        preprocessor = None
+        if isinstance(loaded_dict, dict) and loaded_dict.get('preprocessing'):
+            preprocessor = FeaturePreprocessor.from_dict(loaded_dict['preprocessing'])
+            print("✓ Using preprocessing saved with the model")
+        
         # Extract model (could be dict or list)
         if isinstance(loaded_dict, dict):
             if 'model' in loaded_dict:
@@ -85,14 +105,14 @@ def load_model(oml, model_name='churn_xgboost_v1'):
             model = loaded_dict
         
         print(f"✓ Model loaded: {model_name}")
-        return model
+        return model, preprocessor
     except Exception as e:
         print(f"❌ ERROR: Failed to load model: {e}")
         print(f"   Model '{model_name}' may not exist in datastore")
         print("   Train model first using scripts/train_churn_model.py")
-        return None
+        return None, None
 
-def load_user_features(oml):
+def load_user_features(oml, preprocessor=None):
     """Load user features for scoring"""
     print("\n" + "=" * 60)
     print("Loading User Features")
@@ -107,17 +127,17 @@ def load_user_features(oml):
     
     # Get USER_ID and features
     user_ids = user_features_pd['USER_ID'].copy()
-    feature_cols = [col for col in user_features_pd.columns if col != 'USER_ID']
-    X_users = user_features_pd[feature_cols].copy()
+    if preprocessor is not None:
+        feature_cols = preprocessor.feature_cols
+    else:
+        feature_cols = [col for col in user_features_pd.columns if col != 'USER_ID']
+        preprocessor = FeaturePreprocessor().fit(user_features_pd, feature_cols)
     
     print(f"✓ Features: {len(feature_cols)}")
     
-    # Clean data
+    # Clean data with the training-time transform (single vectorized pass)
     print("\nCleaning data...")
-    for col in feature_cols:
-        if pd.api.types.is_numeric_dtype(X_users[col]):
-            X_users[col] = X_users[col].replace([np.inf, -np.inf], np.nan)
-            X_users[col] = X_users[col].fillna(0)
+    X_users = preprocessor.transform(user_features_pd)
     
     print("✓ Data cleaned")
     
@@ -159,86 +179,171 @@ def score_users(oml, model, X_users, feature_cols):
     
     return churn_probabilities
 
-# Import shared store_predictions function
-import sys
-from pathlib import Path
-script_dir = Path(__file__).parent
-sys.path.insert(0, str(script_dir.parent / 'shared'))
-from store_predictions import store_predictions
+def score_in_db(oml, model, preprocessor, model_name, partitions):
+    """Zero-pull scoring: clean, predict and store inside the database"""
+    print("\n" + "=" * 60)
+    print("Scoring Users In-Database (zero pull)")
+    print("=" * 60)
+    
+    if preprocessor is None:
+        preprocessor = FeaturePreprocessor().fit(None, feature_names())
+        print("⚠️  WARNING: No preprocessing saved with the model, using schema fills")
+    
+    try:
+        score_in_database(
+            OMLAdapter(oml), model, preprocessor,
+            threshold=0.5, model_version='v1.0',
+            ds_name=model_name, partitions=partitions
+        )
+        return True
+    except Exception as e:
+        print(f"⚠️  WARNING: In-database scoring failed ({e}), falling back to pull mode")
+        return False
+
+def synthetic_user_features(rows=5000, non_finite_fraction=0.05, random_state=42):
+    """CHURN_USER_FEATURES-shaped frame (schema columns, ~5% NULL / ±inf cells) plus churn labels"""
+    rng = np.random.default_rng(random_state)
+    data = {'USER_ID': [f"U{i:06d}" for i in range(rows)]}
+    for feature in FEATURES:
+        low, high = feature.valid_range or (None, None)
+        low = 0 if low is None else low
+        high = 1000 if high is None else high
+        if feature.dtype == 'int8':
+            values = rng.integers(low, high + 1, size=rows).astype(np.float64)
+        else:
+            values = rng.uniform(low, high, size=rows)
+        mask = rng.random(rows) < non_finite_fraction
+        values[mask] = rng.choice(np.array([np.nan, np.inf, -np.inf]), size=int(mask.sum()))
+        data[feature.name] = values
+    df = pd.DataFrame(data)
+    
+    signal = np.nan_to_num(df['DAYS_SINCE_LAST_PURCHASE'].to_numpy(), posinf=0.0, neginf=0.0) / 1000 \
+        - np.nan_to_num(df['LOGIN_FREQUENCY'].to_numpy(), posinf=0.0, neginf=0.0) / 1000
+    y = (signal + rng.normal(scale=0.3, size=rows) > 0).astype(int)
+    return df, y
 
-def get_connection():
-    """Get database connection for storing predictions"""
+def fake_check(rows=5000, partitions=DEFAULT_PARTITIONS, threshold=0.5, atol=1e-4):
+    """
+    Run score_in_database() through FakeOMLAdapter and compare the stored rows
+    with the pull path (transform + predict_proba + store_predictions rounding),
+    then re-run it with a failing INSERT and check that the stored rows survive.
+    True when row counts, labels and risk scores match, |Δp| <= atol and the
+    failed refresh rolled back.
+    """
+    print("\n" + "=" * 60)
+    print("In-Database Scoring Check (FakeOMLAdapter, no database)")
+    print("=" * 60)
+    
     try:
-        import oracledb
+        from sklearn.ensemble import GradientBoostingClassifier
     except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        return None
+        print("❌ ERROR: scikit-learn is required for --fake")
+        print("   Install with: pip install scikit-learn")
+        return False
     
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set")
-        return None
+    users, y = synthetic_user_features(rows)
+    feature_cols = feature_names()
+    preprocessor = FeaturePreprocessor().fit(users, feature_cols)
+    model = GradientBoostingClassifier(n_estimators=50, max_depth=3, random_state=42)
+    model.fit(preprocessor.transform(users), y)
+    print(f"✓ Synthetic users: {rows:,} ({len(feature_cols)} features), GradientBoosting fitted")
     
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
+    # In-db path: cleaning view, group_apply over hash partitions, INSERT ... SELECT
+    ds_name = 'churn_fake_v1'
+    adapter = FakeOMLAdapter(datastore={ds_name: {'model': model}})
+    adapter.load_table('OML.CHURN_USER_FEATURES', users)
+    adapter.execute(f"""CREATE TABLE {PREDICTIONS_TABLE} (
+        USER_ID TEXT PRIMARY KEY, PREDICTED_CHURN_PROBABILITY REAL, PREDICTED_CHURN_LABEL INTEGER,
+        RISK_SCORE INTEGER, MODEL_VERSION TEXT, PREDICTION_DATE TEXT)""")
+    inserted = score_in_database(adapter, model, preprocessor, threshold=threshold, model_version='fake',
+                                 ds_name=ds_name, partitions=partitions)
+    stored = pd.read_sql(
+        "SELECT USER_ID, PREDICTED_CHURN_PROBABILITY, PREDICTED_CHURN_LABEL, RISK_SCORE FROM CHURN_PREDICTIONS",
+        adapter.connection
+    ).set_index('USER_ID').reindex(users['USER_ID'])
     
-    try:
-        import glob
-        oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
+    # Pull path: what load_user_features + score_users + store_predictions write
+    p = np.asarray(model.predict_proba(preprocessor.transform(users)))[:, 1]
+    expected_labels = (p >= threshold).astype(int)
+    expected_risk = (p * 100).astype(int).clip(0, 100)
     
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
+    missing = int(stored['PREDICTED_CHURN_PROBABILITY'].isna().sum())
+    max_abs_diff = float(np.nanmax(np.abs(stored['PREDICTED_CHURN_PROBABILITY'].to_numpy() - p))) if rows else 0.0
+    label_mismatches = int((stored['PREDICTED_CHURN_LABEL'].to_numpy() != expected_labels).sum())
+    risk_mismatches = int((stored['RISK_SCORE'].to_numpy() != expected_risk).sum())
+    passed = inserted == rows and missing == 0 and max_abs_diff <= atol and label_mismatches == 0 \
+        and risk_mismatches == 0
     
-    return oracledb.connect(user=username, password=password, dsn=connection_string)
+    status = "✓" if passed else "❌"
+    print(f"\n{status} In-db vs pull path: {inserted:,}/{rows:,} rows stored, {missing:,} missing")
+    print(f"   max |Δp| = {max_abs_diff:.2e} (ROUND(p, 4) in SQL, atol {atol:g})")
+    print(f"   label mismatches: {label_mismatches:,}, risk score mismatches: {risk_mismatches:,}")
+    print(f"   adapter calls: {', '.join(name for name, _ in adapter.calls)}")
+    
+    # A refresh whose INSERT fails must leave the previous predictions in place
+    print("\nRe-running with an injected INSERT failure...")
+    adapter.fail_after_insert = True
+    try:
+        score_in_database(adapter, model, preprocessor, threshold=threshold, model_version='fake-failed',
+                          ds_name=ds_name, partitions=partitions)
+        failed = False
+    except Exception as e:
+        failed = True
+        print(f"   Refresh failed as injected: {e}")
+    kept = adapter.connection.execute(
+        "SELECT COUNT(*), SUM(CASE WHEN MODEL_VERSION = 'fake' THEN 1 ELSE 0 END) FROM CHURN_PREDICTIONS"
+    ).fetchone()
+    rolled_back = failed and kept[0] == rows and kept[1] == rows
+    status = "✓" if rolled_back else "❌"
+    print(f"{status} Failed refresh rolled back: {kept[0]:,} rows kept, {kept[1] or 0:,} from the previous run")
+    return passed and rolled_back
 
 def main():
     """Main scoring function"""
+    parser = argparse.ArgumentParser(description='Score users with the OML4Py churn model')
+    parser.add_argument('--mode', choices=['in-db', 'pull'], default='in-db',
+                        help='in-db keeps features in the database; pull scores in the notebook')
+    parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS,
+                        help='Hash partitions / parallel degree for embedded execution')
+    parser.add_argument('--fake', action='store_true',
+                        help='Check the in-db path on synthetic users with FakeOMLAdapter (no database)')
+    parser.add_argument('--rows', type=int, default=5000, help='Synthetic users for --fake')
+    parser.add_argument('--atol', type=float, default=1e-4, help='Max allowed |Δp| vs the pull path for --fake')
+    args, _ = parser.parse_known_args()  # tolerate notebook kernel arguments
+    
     print("=" * 60)
     print("Churn Model Scoring (Batch Prediction)")
     print("=" * 60)
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
+    if args.fake:
+        sys.exit(0 if fake_check(args.rows, args.partitions, atol=args.atol) else 1)
+    
     # Connect to OML
     oml = connect_oml()
     if oml is None:
         sys.exit(1)
     
+    # Load model
+    model_name = 'churn_xgboost_v1'
+    model, preprocessor = load_model(oml, model_name=model_name)
+    if model is None:
+        sys.exit(1)
+    
+    if args.mode == 'in-db' and score_in_db(oml, model, preprocessor, model_name, args.partitions):
+        print("\n" + "=" * 60)
+        print("✓ Scoring completed successfully!")
+        print("=" * 60)
+        print("\nPredictions stored in OML.CHURN_PREDICTIONS table")
+        print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return
+    
     # Connect to database for storing predictions
     connection = get_connection()
-    if connection is None:
-        sys.exit(1)
     
     try:
-        # Load model
-        model = load_model(oml, model_name='churn_xgboost_v1')
-        if model is None:
-            sys.exit(1)
-        
         # Load user features
-        user_ids, X_users, feature_cols, user_features_oml = load_user_features(oml)
+        user_ids, X_users, feature_cols, user_features_oml = load_user_features(oml, preprocessor)
         
         # Score users
         churn_probabilities = score_users(oml, model, X_users, feature_cols)
@@ -268,6 +373,8 @@ def main():
         print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == '__main__':
+    if '--fake' in sys.argv:
+        main()
     try:
         import oml
         if oml.isconnected():
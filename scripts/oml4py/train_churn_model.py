@@ -41,6 +41,9 @@ try:
 except ImportError:
     pass
 
+sys.path.insert(0, str(script_dir.parent / 'shared'))
+from preprocessing import FeaturePreprocessor
+
 # ============================================================================
 # Task 3.1: ADB Connection (OML4Py)
 # ============================================================================
@@ -104,12 +107,9 @@ def load_training_data(oml):
     X_pd = train_data_pd[feature_cols].copy()
     y_pd = train_data_pd['CHURNED'].copy()
     
-    # Clean data - replace NaN and infinity
+    # Clean data - replace NaN and infinity (single vectorized pass)
     print("\nCleaning data...")
-    for col in feature_cols:
-        if pd.api.types.is_numeric_dtype(X_pd[col]):
-            X_pd[col] = X_pd[col].replace([np.inf, -np.inf], np.nan)
-            X_pd[col] = X_pd[col].fillna(0)
+    X_pd = FeaturePreprocessor().fit_transform(X_pd, feature_cols)
     
     print("✓ Data cleaned (NaN and infinity handled)")
     
@@ -347,15 +347,19 @@ def optimize_threshold(y_test, y_pred_proba):
 # Task 3.7: Model Saving to OML Datastore
 # ============================================================================
 
-def save_model(oml, xgb_model, model_name='churn_xgboost_v1', description='Churn prediction XGBoost model'):
-    """Save model to OML datastore"""
+def save_model(oml, xgb_model, model_name='churn_xgboost_v1', description='Churn prediction XGBoost model',
+               preprocessor=None):
+    """Save model (and its preprocessing state) to OML datastore"""
     print("\n" + "=" * 60)
     print("Task 3.7: Model Saving to OML Datastore")
     print("=" * 60)
     
     try:
+        objects = {'model': xgb_model}
+        if preprocessor is not None:
+            objects['preprocessing'] = preprocessor.to_dict()
         oml.ds.save(
-            {'model': xgb_model},
+            objects,
             model_name,
             description=description,
             overwrite=True
@@ -391,6 +395,7 @@ def main():
         
         # Task 3.3: Validate features
         feature_cols = validate_features(X_train_pd, all_feature_cols)
+        preprocessor = FeaturePreprocessor().fit(X_train_pd, feature_cols)
         
         # Task 3.4: Train model
         xgb_model, train_oml = train_xgboost_model(oml, X_train_pd, y_train_pd, feature_cols)
@@ -406,7 +411,8 @@ def main():
             oml,
             xgb_model,
             model_name='churn_xgboost_v1',
-            description=f'Churn prediction XGBoost model - AUC: {eval_results["auc"]:.4f}'
+            description=f'Churn prediction XGBoost model - AUC: {eval_results["auc"]:.4f}',
+            preprocessor=preprocessor
         )
         
         # Summary
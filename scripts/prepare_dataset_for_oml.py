@@ -5,118 +5,160 @@ Prepare dataset for loading into OML schema
 - Fix data anomalies
 - Map to USER_ID
 - Export for database loading
+
+Runs in bounded memory: one streaming pass fits the imputation profile
+(shared/imputation.py: sketch medians / modes / p99 caps), a second pass
+imputes, fixes and writes the file chunk by chunk. The profile is saved as a
+small JSON artifact; --imputation applies a saved profile instead of refitting
+(later files, scoring batches).
+
+Usage:
+    python scripts/prepare_dataset_for_oml.py <input_file.csv> [output_file.csv]
+                                              [--imputation PATH] [--save-imputation PATH]
+                                              [--chunk-rows 200000] [--workers 4]
 """
 
-import pandas as pd
 import sys
+import argparse
+import pandas as pd
 from pathlib import Path
 
-def prepare_dataset(input_file, output_file=None, user_id_mapping=None):
+script_dir = Path(__file__).parent
+sys.path.insert(0, str(script_dir / 'shared'))
+from imputation import ImputationProfile, fit_csv, DEFAULT_IMPUTATION_PATH
+from stream_profile import DEFAULT_CHUNK_ROWS
+
+def fix_anomalies(df, imputation, counts):
+    """Vectorized anomaly fixes for one chunk (counts accumulated in place)"""
+    # Fix negative Total_Purchases
+    if 'Total_Purchases' in df.columns:
+        negative = df['Total_Purchases'] < 0
+        counts['negative_purchases'] += int(negative.sum())
+        df.loc[negative, 'Total_Purchases'] = 0
+
+    # Cap Age outliers (reasonable range: 18-100)
+    if 'Age' in df.columns:
+        counts['age_outliers'] += int(((df['Age'] < 18) | (df['Age'] > 100)).sum())
+        df['Age'] = df['Age'].clip(18, 100)
+
+    # Cap extreme Average_Order_Value (e.g., > 5000) at the fitted 99th percentile
+    if 'Average_Order_Value' in df.columns and 'Average_Order_Value' in imputation.p99:
+        extreme = df['Average_Order_Value'] > 5000
+        counts['extreme_order_values'] += int(extreme.sum())
+        df.loc[extreme, 'Average_Order_Value'] = imputation.p99['Average_Order_Value']
+    return df
+
+def prepare_dataset(input_file, output_file=None, user_id_mapping=None, imputation_path=None,
+                    save_imputation=DEFAULT_IMPUTATION_PATH, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1):
     """
     Prepare dataset for OML schema loading
-    
+
     Args:
         input_file: Path to input CSV file
         output_file: Path to output CSV file (optional)
         user_id_mapping: Dictionary mapping dataset index to USER_ID (optional)
+        imputation_path: Saved imputation profile to apply (default: fit on input_file)
+        save_imputation: Where to save a newly fitted profile (None to skip)
+        chunk_rows: CSV rows per chunk
+        workers: Worker processes for fitting
+
+    Returns a summary dict (rows, columns, filled, anomaly counts, churn_rate).
     """
     print("=" * 60)
     print("Dataset Preparation for OML Schema")
     print("=" * 60)
-    
-    # Load dataset
-    print(f"\n📥 Loading dataset: {input_file}")
-    df = pd.read_csv(input_file)
-    print(f"   Original shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    
-    # Step 1: Handle missing values
+
+    print(f"\n📥 Dataset: {input_file}")
+    print(f"   Streaming in chunks of {chunk_rows:,} rows")
+
+    # Step 1: Imputation profile (fitted in one pass, or loaded)
     print(f"\n🔧 Step 1: Handling Missing Values")
-    original_missing = df.isnull().sum().sum()
-    print(f"   Original missing values: {original_missing:,}")
-    
-    # For numeric columns: use median imputation
-    numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    numeric_cols = [col for col in numeric_cols if col != 'Churned']  # Don't impute target
-    
-    for col in numeric_cols:
-        missing_count = df[col].isnull().sum()
-        if missing_count > 0:
-            median_val = df[col].median()
-            df.loc[:, col] = df[col].fillna(median_val)
-            print(f"   ✓ Filled {missing_count:,} missing values in '{col}' with median: {median_val:.2f}")
-    
-    # For categorical columns: use mode imputation
-    categorical_cols = df.select_dtypes(include=['object']).columns
-    for col in categorical_cols:
-        missing_count = df[col].isnull().sum()
-        if missing_count > 0:
-            mode_val = df[col].mode()[0] if len(df[col].mode()) > 0 else 'Unknown'
-            df.loc[:, col] = df[col].fillna(mode_val)
-            print(f"   ✓ Filled {missing_count:,} missing values in '{col}' with mode: {mode_val}")
-    
-    remaining_missing = df.isnull().sum().sum()
-    print(f"   Remaining missing values: {remaining_missing:,}")
-    
-    # Step 2: Fix data anomalies
+    if imputation_path:
+        imputation = ImputationProfile.load(imputation_path)
+        print(f"   ✓ Loaded imputation profile: {imputation_path}")
+        print(f"      Fitted on {imputation.rows:,} rows of {imputation.source} ({imputation.fitted_at})")
+    else:
+        imputation = fit_csv(input_file, chunk_rows=chunk_rows, workers=workers)
+        print(f"   ✓ Fitted imputation profile on {imputation.rows:,} rows "
+              f"({len(imputation.numeric)} numeric medians, {len(imputation.categorical)} categorical modes)")
+        if save_imputation:
+            path = imputation.save(save_imputation)
+            print(f"   💾 Saved imputation profile to: {path}")
+
+    # Step 2-5: impute, fix anomalies, map USER_ID and write, chunk by chunk
+    filled = {}
+    counts = {'negative_purchases': 0, 'age_outliers': 0, 'extreme_order_values': 0}
+    rows = churned = 0
+    columns = None
+    has_label = False
+
+    out = None
+    if output_file:
+        output_path = Path(output_file)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        out = open(output_path, 'w', newline='')
+    try:
+        with pd.read_csv(input_file, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                chunk, chunk_filled = imputation.apply(chunk)
+                for col, count in chunk_filled.items():
+                    filled[col] = filled.get(col, 0) + count
+
+                chunk = fix_anomalies(chunk, imputation, counts)
+
+                # USER_ID: provided mapping, or 1-indexed placeholder
+                index = pd.RangeIndex(rows, rows + len(chunk))
+                chunk['USER_ID'] = index.map(user_id_mapping) if user_id_mapping else index + 1
+
+                # Reorder columns (USER_ID first, Churned last)
+                cols = [col for col in chunk.columns if col not in ['USER_ID', 'Churned']]
+                chunk = chunk[['USER_ID'] + cols + (['Churned'] if 'Churned' in chunk.columns else [])]
+
+                if out is not None:
+                    chunk.to_csv(out, header=rows == 0, index=False)
+                rows += len(chunk)
+                columns = len(chunk.columns)
+                if 'Churned' in chunk.columns:
+                    has_label = True
+                    churned += int(chunk['Churned'].sum())
+    finally:
+        if out is not None:
+            out.close()
+
+    for col, count in filled.items():
+        value = imputation.fills[col]
+        kind = 'median' if col in imputation.numeric else 'mode'
+        shown = f"{value:.2f}" if kind == 'median' else value
+        print(f"   ✓ Filled {count:,} missing values in '{col}' with {kind}: {shown}")
+    print(f"   Missing values filled: {sum(filled.values()):,}")
+
     print(f"\n🔧 Step 2: Fixing Data Anomalies")
-    
-    # Fix negative Total_Purchases
-    if 'Total_Purchases' in df.columns:
-        negative_count = (df['Total_Purchases'] < 0).sum()
-        if negative_count > 0:
-            df.loc[df['Total_Purchases'] < 0, 'Total_Purchases'] = 0
-            print(f"   ✓ Fixed {negative_count:,} negative Total_Purchases (set to 0)")
-    
-    # Cap Age outliers (reasonable range: 18-100)
-    if 'Age' in df.columns:
-        outliers = ((df['Age'] < 18) | (df['Age'] > 100)).sum()
-        if outliers > 0:
-            df.loc[df['Age'] < 18, 'Age'] = 18
-            df.loc[df['Age'] > 100, 'Age'] = 100
-            print(f"   ✓ Capped {outliers:,} Age outliers (set to 18-100 range)")
-    
-    # Cap extreme Average_Order_Value (e.g., > 5000)
-    if 'Average_Order_Value' in df.columns:
-        extreme_count = (df['Average_Order_Value'] > 5000).sum()
-        if extreme_count > 0:
-            p99 = df['Average_Order_Value'].quantile(0.99)
-            df.loc[df['Average_Order_Value'] > 5000, 'Average_Order_Value'] = p99
-            print(f"   ✓ Capped {extreme_count:,} extreme Average_Order_Value values (99th percentile: {p99:.2f})")
-    
-    # Step 3: Add USER_ID mapping
+    if counts['negative_purchases']:
+        print(f"   ✓ Fixed {counts['negative_purchases']:,} negative Total_Purchases (set to 0)")
+    if counts['age_outliers']:
+        print(f"   ✓ Capped {counts['age_outliers']:,} Age outliers (set to 18-100 range)")
+    if counts['extreme_order_values']:
+        print(f"   ✓ Capped {counts['extreme_order_values']:,} extreme Average_Order_Value values "
+              f"(99th percentile: {imputation.p99['Average_Order_Value']:.2f})")
+
     print(f"\n🔧 Step 3: Adding USER_ID Mapping")
-    
     if user_id_mapping:
-        # Use provided mapping
-        df['USER_ID'] = df.index.map(user_id_mapping)
         print(f"   ✓ Mapped to USER_ID using provided mapping")
     else:
-        # Create placeholder USER_ID (will be mapped later)
-        df['USER_ID'] = df.index + 1  # 1-indexed
-        print(f"   ✓ Created placeholder USER_ID (1 to {len(df)})")
+        print(f"   ✓ Created placeholder USER_ID (1 to {rows})")
         print(f"   ⚠️  NOTE: Will need to map to actual ADMIN.USERS.ID later")
-    
-    # Step 4: Ensure Churned column is properly named
-    if 'Churned' in df.columns:
+
+    churn_rate = churned / rows * 100 if rows else 0.0
+    if has_label:
         print(f"   ✓ Churn label found: 'Churned'")
-        churn_rate = df['Churned'].mean() * 100
         print(f"      Churn rate: {churn_rate:.1f}%")
-    
-    # Step 5: Reorder columns (USER_ID first, Churned last)
-    cols = [col for col in df.columns if col not in ['USER_ID', 'Churned']]
-    df = df[['USER_ID'] + cols + ['Churned']]
-    
-    # Step 6: Save prepared dataset
+
     if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_path, index=False)
-        print(f"\n💾 Saved prepared dataset to: {output_path}")
-        print(f"   Final shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
+        print(f"\n💾 Saved prepared dataset to: {output_file}")
     else:
         print(f"\n📊 Prepared dataset (not saved)")
-        print(f"   Final shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    
+    print(f"   Final shape: {rows:,} rows × {columns or 0} columns")
+
     # Summary
     print(f"\n" + "=" * 60)
     print("Preparation Summary")
@@ -125,21 +167,38 @@ def prepare_dataset(input_file, output_file=None, user_id_mapping=None):
     print(f"✅ Data anomalies fixed")
     print(f"✅ USER_ID mapping added")
     print(f"✅ Dataset ready for OML schema loading")
-    
-    return df
+
+    return {
+        'rows': rows,
+        'columns': columns or 0,
+        'filled': filled,
+        'anomalies': counts,
+        'churn_rate': churn_rate
+    }
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python prepare_dataset_for_oml.py <input_file.csv> [output_file.csv]")
-        print("\nExample:")
-        print("  python prepare_dataset_for_oml.py data/raw/ecommerce_customer_churn_dataset.csv data/processed/churn_dataset_cleaned.csv")
+    parser = argparse.ArgumentParser(
+        description='Prepare dataset for loading into OML schema',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""Example:
+  python prepare_dataset_for_oml.py data/raw/ecommerce_customer_churn_dataset.csv data/processed/churn_dataset_cleaned.csv
+  python prepare_dataset_for_oml.py new_batch.csv new_batch_clean.csv --imputation data/processed/imputation_profile.json"""
+    )
+    parser.add_argument('input_file', help='Input CSV')
+    parser.add_argument('output_file', nargs='?', help='Output CSV (optional)')
+    parser.add_argument('--imputation', help='Apply a saved imputation profile instead of fitting one')
+    parser.add_argument('--save-imputation', default=str(DEFAULT_IMPUTATION_PATH),
+                        help='Where to save the fitted imputation profile')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help='CSV rows per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes for fitting')
+    args = parser.parse_args()
+
+    if not Path(args.input_file).exists():
+        print(f"❌ ERROR: File not found: {args.input_file}")
         sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    
-    if not Path(input_file).exists():
-        print(f"❌ ERROR: File not found: {input_file}")
+    if args.imputation and not Path(args.imputation).exists():
+        print(f"❌ ERROR: Imputation profile not found: {args.imputation}")
         sys.exit(1)
-    
-    prepare_dataset(input_file, output_file)
+
+    prepare_dataset(args.input_file, args.output_file, imputation_path=args.imputation,
+                    save_imputation=args.save_imputation, chunk_rows=args.chunk_rows, workers=args.workers)
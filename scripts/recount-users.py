@@ -3,7 +3,6 @@
 Comprehensive recount of users in the database
 """
 
-import os
 import sys
 from pathlib import Path
 
@@ -20,49 +19,14 @@ except ImportError:
     print("❌ python-dotenv not installed")
     sys.exit(1)
 
-try:
-    import oracledb
-except ImportError:
-    print("❌ oracledb not installed")
-    sys.exit(1)
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def recount_users():
     """Do a comprehensive user count"""
     
-    # Get connection parameters
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    os.environ['TNS_ADMIN'] = wallet_path
-    
     try:
-        # Initialize client
-        import glob
-        lib_dir = None
-        for pattern in ['/opt/oracle/instantclient_*', '/opt/homebrew/lib']:
-            matches = glob.glob(pattern) if '*' in pattern else [pattern]
-            for match in matches:
-                if os.path.exists(match):
-                    for lib_name in ['libclntsh.dylib', 'libclntsh.so']:
-                        if os.path.exists(os.path.join(match, lib_name)):
-                            lib_dir = match
-                            break
-                if lib_dir:
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            oracledb.init_oracle_client(lib_dir=lib_dir)
-        
-        # Connect
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
+        connection = get_connection()
         print("✓ Connected to database\n")
         
         cursor = connection.cursor()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Refresh the RFM purchase features of USER_PROFILES from real orders
+
+Recomputes TOTAL_PURCHASES, AVERAGE_ORDER_VALUE, LIFETIME_VALUE and
+DAYS_SINCE_LAST_PURCHASE from ADMIN.ORDERS_PROFILE_V incrementally
+(shared/rfm_features.py): only orders newer than the ORDER_CREATED_AT
+watermark are read, per-user running aggregates are kept in
+OML.USER_ORDER_AGGREGATES, and the changed users are bulk-MERGEd into
+USER_PROFILES. Run it on a schedule (e.g. hourly); the first run, or
+--rebuild, replays every order.
+
+Usage:
+    python scripts/refresh_rfm_features.py
+    python scripts/refresh_rfm_features.py --dry-run
+    python scripts/refresh_rfm_features.py --rebuild
+    python scripts/refresh_rfm_features.py --order-column ORDER_ID --amount-column LINE_TOTAL --line-amounts
+
+Prerequisites:
+    - ADB wallet configured and environment variables set (.env file)
+    - Tables created (run sql/create_churn_tables.sql first)
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+env_file = project_root / '.env'
+
+try:
+    from dotenv import load_dotenv
+    if env_file.exists():
+        load_dotenv(dotenv_path=env_file)
+    else:
+        load_dotenv()
+except ImportError:
+    print("⚠️  WARNING: python-dotenv not installed.")
+    print("   Install with: pip install python-dotenv")
+    print("   Using system environment variables only.")
+
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection, close_pool, print_timings
+from rfm_features import (OrderSource, refresh_rfm_features, JOB_NAME, STATE_TABLE, AGGREGATE_TABLE,
+                          PROFILE_TABLE, DEFAULT_SETTLE_MINUTES)
+
+def main():
+    """Main function"""
+    defaults = OrderSource()
+    parser = argparse.ArgumentParser(description='Incrementally refresh RFM features in USER_PROFILES')
+    parser.add_argument('--view', default=defaults.view, help='Order source view')
+    parser.add_argument('--user-column', default=defaults.user_column, help='User id column')
+    parser.add_argument('--order-column', default=defaults.order_column, help='Order id column')
+    parser.add_argument('--created-column', default=defaults.created_column, help='Order timestamp (watermark) column')
+    parser.add_argument('--amount-column', default=defaults.amount_column, help='Order amount column')
+    parser.add_argument('--line-amounts', action='store_true',
+                        help='Amount is per order line (summed), not an order total repeated on every line')
+    parser.add_argument('--status-column', default=defaults.status_column,
+                        help='Order status column (orders with an excluded status are skipped)')
+    parser.add_argument('--exclude-status', nargs='+', default=list(defaults.excluded_statuses),
+                        help='Statuses to skip when --status-column is set')
+    parser.add_argument('--settle-minutes', type=int, default=DEFAULT_SETTLE_MINUTES,
+                        help='Leave orders newer than this for the next run (in-flight commits)')
+    parser.add_argument('--rebuild', action='store_true', help='Reset the aggregates and replay every order')
+    parser.add_argument('--dry-run', action='store_true', help='Count the pending orders, change nothing')
+    args = parser.parse_args()
+
+    source = OrderSource(args.view, args.user_column, args.order_column, args.created_column,
+                         args.amount_column, 'SUM' if args.line_amounts else 'MAX',
+                         args.status_column, tuple(args.exclude_status))
+
+    print("=" * 60)
+    print("RFM Feature Refresh")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"  Orders: {source.view} ({source.order_column}, {source.amount_column} "
+          f"[{source.amount_aggregate} per order], watermark {source.created_column})")
+    print(f"  Aggregates: {AGGREGATE_TABLE} → {PROFILE_TABLE}")
+    if args.rebuild:
+        print(f"  ⚠️  Rebuild: replaying every order")
+    if args.dry_run:
+        print(f"  🔍 Dry run: nothing is written")
+
+    connection = get_connection()
+    print_timings()
+
+    try:
+        stats = refresh_rfm_features(connection, source, settle_minutes=args.settle_minutes,
+                                     rebuild=args.rebuild, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"\n❌ ERROR: Refresh failed (rolled back): {e}")
+        print(f"   Check the order source columns (--order-column / --amount-column / --created-column)")
+        connection.close()
+        close_pool()
+        sys.exit(1)
+
+    connection.close()
+    close_pool()
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("Refresh Summary")
+    print("=" * 60)
+    print(f"Previous watermark: {stats['watermark'] or 'none (full build)'}")
+    if stats['high'] is None:
+        print(f"✓ No new orders")
+    else:
+        print(f"{'Pending' if stats['dry_run'] else 'New'} orders: {stats['orders']:,} (up to {stats['high']})")
+    if not stats['dry_run']:
+        print(f"✓ Users with new orders: {stats['users_changed']:,}")
+        print(f"✓ Profiles updated: {stats['profiles_updated']:,}")
+        if stats['users_without_profile']:
+            print(f"⚠️  {stats['users_without_profile']:,} users have orders but no row in {PROFILE_TABLE}")
+        if stats['recency_updated']:
+            print(f"✓ Recency rolled forward: {stats['recency_updated']:,} profiles")
+        print(f"✓ Watermark saved in {STATE_TABLE} ({JOB_NAME}, run {stats['run_id']})")
+    print(f"Time: {stats['seconds']:.1f}s")
+    print(f"Completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+if __name__ == '__main__':
+    main()
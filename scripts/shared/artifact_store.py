@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Shared content-addressed model artifact store
+Used by the local training script (save), the model resolver (restore) and
+scripts/local/manage_model_store.py (import / gc / stats)
+
+Layout (under models/store/):
+    blobs/<aa>/<sha256>          artifact content, named by the SHA-256 of the raw bytes
+    blobs/<aa>/<sha256>.zst      same, zstd-compressed (optional, needs `zstandard`)
+    versions/<model_id>.json     per-version manifest: role → file name, sha256, size
+
+Identical artifacts (e.g. retraining on unchanged data) are stored once. When
+blobs are uncompressed, the binary working files in models/ (pickle, native
+model, compiled trees, ONNX pipeline) are replaced by hard links to the blob, so the loaders
+keep reading ordinary paths at no extra disk cost. With compression those
+files are removed and restored on demand by ensure_local(). JSON files
+(metadata, native manifest) are snapshotted into the store but left as
+ordinary, editable copies.
+
+Blobs are read-only; a linked working file must be replaced (unlink + write),
+never rewritten in place.
+
+Paths recorded in metadata and MODEL_REGISTRY are project-relative
+(models/churn_model_...pkl), see project_relative() / resolve_project_path().
+
+Environment variables:
+    CHURN_ARTIFACT_COMPRESSION   'zstd' to compress blobs (default: none)
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from datetime import datetime
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_MODEL_DIR = project_root / 'models'
+DEFAULT_STORE_DIR = DEFAULT_MODEL_DIR / 'store'
+
+STORE_FORMAT_VERSION = 1
+ZSTD_LEVEL = 10
+LINKED_ROLES = ('model', 'native', 'compiled', 'onnx')
+
+def project_relative(path):
+    """Path relative to the project root when it lies inside it (else unchanged)"""
+    path = Path(path)
+    try:
+        return str(path.resolve().relative_to(project_root.resolve()))
+    except ValueError:
+        return str(path)
+
+def resolve_project_path(value):
+    """Absolute path for a project-relative (or absolute) recorded path"""
+    if not value:
+        return None
+    path = Path(value)
+    return path if path.is_absolute() else project_root / path
+
+def compression_default():
+    """Blob compression from CHURN_ARTIFACT_COMPRESSION ('zstd' or None)"""
+    value = os.getenv('CHURN_ARTIFACT_COMPRESSION', '').lower()
+    return 'zstd' if value == 'zstd' else None
+
+_hash_memo = {}
+
+def file_sha256(path):
+    """SHA-256 of a file, memoized by (path, size, mtime)"""
+    path = Path(path)
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+class ArtifactStore:
+    """SHA-256 addressed blob store with per-version manifests"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.blob_dir = self.root / 'blobs'
+        self.version_dir = self.root / 'versions'
+
+    # ------------------------------------------------------------------ blobs
+
+    def blob_path(self, sha256, compression=None):
+        suffix = '.zst' if compression == 'zstd' else ''
+        return self.blob_dir / sha256[:2] / f"{sha256}{suffix}"
+
+    def find_blob(self, sha256):
+        """(path, compression) of a stored blob, or (None, None)"""
+        for compression in (None, 'zstd'):
+            path = self.blob_path(sha256, compression)
+            if path.exists():
+                return path, compression
+        return None, None
+
+    def put_file(self, path, compression=None):
+        """Store a file's content; returns (sha256, blob_path, compression, newly_stored)"""
+        sha256 = file_sha256(path)
+        existing, existing_compression = self.find_blob(sha256)
+        if existing is not None:
+            return sha256, existing, existing_compression, False
+
+        if compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                print("⚠️  WARNING: zstandard not installed, storing blob uncompressed")
+                print("   Install with: pip install zstandard")
+                compression = None
+
+        blob = self.blob_path(sha256, compression)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(blob.name + '.tmp')
+        with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+            if compression == 'zstd':
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, dst)
+            else:
+                for chunk in iter(lambda: src.read(1 << 20), b''):
+                    dst.write(chunk)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, blob)
+        return sha256, blob, compression, True
+
+    def materialize(self, sha256, dest):
+        """Write (or hard-link) a blob's content to dest"""
+        blob, compression = self.find_blob(sha256)
+        if blob is None:
+            raise FileNotFoundError(f"Blob not in store: {sha256}")
+
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + '.tmp')
+        if tmp.exists():
+            tmp.unlink()
+
+        if compression == 'zstd':
+            import zstandard
+            with open(blob, 'rb') as src, open(tmp, 'wb') as dst:
+                zstandard.ZstdDecompressor().copy_stream(src, dst)
+        else:
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                with open(blob, 'rb') as src, open(tmp, 'wb') as dst:
+                    for chunk in iter(lambda: src.read(1 << 20), b''):
+                        dst.write(chunk)
+        os.replace(tmp, dest)
+        return dest
+
+    def iter_blobs(self):
+        """Yield (sha256, path) for every stored blob"""
+        if not self.blob_dir.exists():
+            return
+        for path in self.blob_dir.glob('*/*'):
+            if path.name.endswith('.tmp'):
+                continue
+            yield path.name.split('.')[0], path
+
+    # --------------------------------------------------------------- versions
+
+    def manifest_path(self, version):
+        return self.version_dir / f"{version}.json"
+
+    def read_manifest(self, version):
+        path = self.manifest_path(version)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def list_manifests(self):
+        """All version manifests, newest first (versions are YYYYMMDD_HHMMSS model IDs)"""
+        manifests = []
+        if self.version_dir.exists():
+            for path in self.version_dir.glob('*.json'):
+                with open(path, 'r') as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m['version'], reverse=True)
+
+    def store_version(self, version, files, model_name=None, compression=None, link_roles=LINKED_ROLES):
+        """
+        Store a model version's files (role → path) and write its manifest.
+
+        Files of link_roles become hard links to uncompressed blobs, or are
+        removed when their blob is compressed (ensure_local() restores them).
+        """
+        artifacts = []
+        new_bytes = 0
+        for role, path in files.items():
+            if path is None or not Path(path).exists():
+                continue
+            path = Path(path)
+            sha256, blob, stored_compression, newly_stored = self.put_file(path, compression)
+            size = path.stat().st_size
+            if newly_stored:
+                new_bytes += blob.stat().st_size
+
+            if role in link_roles:
+                if stored_compression is None:
+                    self.materialize(sha256, path)
+                else:
+                    path.unlink()
+
+            artifacts.append({
+                'role': role,
+                'file': path.name,
+                'sha256': sha256,
+                'size_bytes': size,
+                'compression': stored_compression
+            })
+
+        manifest = {
+            'store_version': STORE_FORMAT_VERSION,
+            'version': version,
+            'model_name': model_name,
+            'created_at': datetime.now().isoformat(),
+            'artifacts': artifacts
+        }
+
+        self.version_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path(version).with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path(version))
+
+        manifest['new_bytes'] = new_bytes
+        return manifest
+
+    def restore_version(self, version, model_dir=DEFAULT_MODEL_DIR):
+        """Materialize a version's files into model_dir (skips files already present)"""
+        manifest = self.read_manifest(version)
+        if manifest is None:
+            return None
+        restored = []
+        for artifact in manifest['artifacts']:
+            dest = Path(model_dir) / artifact['file']
+            if not dest.exists():
+                self.materialize(artifact['sha256'], dest)
+                restored.append(dest)
+        return restored
+
+    def find_version_for_file(self, file_name):
+        """Newest manifest listing an artifact with this file name (None if none)"""
+        for manifest in self.list_manifests():
+            if any(a['file'] == file_name for a in manifest['artifacts']):
+                return manifest
+        return None
+
+    # --------------------------------------------------------------------- gc
+
+    def gc(self, referenced_versions, keep_latest=5, dry_run=False):
+        """
+        Delete manifests that are neither referenced nor among the newest
+        keep_latest, then delete blobs no remaining manifest points to.
+
+        Returns a report dict.
+        """
+        referenced_versions = set(referenced_versions or [])
+        manifests = self.list_manifests()
+        retained = {m['version'] for m in manifests[:keep_latest]}
+
+        kept, removed_versions = [], []
+        for manifest in manifests:
+            if manifest['version'] in referenced_versions or manifest['version'] in retained:
+                kept.append(manifest)
+            else:
+                removed_versions.append(manifest['version'])
+                if not dry_run:
+                    self.manifest_path(manifest['version']).unlink()
+
+        live = {a['sha256'] for m in kept for a in m['artifacts']}
+        removed_blobs, freed_bytes = [], 0
+        for sha256, path in self.iter_blobs():
+            if sha256 not in live:
+                removed_blobs.append(sha256)
+                freed_bytes += path.stat().st_size
+                if not dry_run:
+                    path.unlink()
+
+        return {
+            'versions_kept': len(kept),
+            'versions_removed': removed_versions,
+            'blobs_removed': len(removed_blobs),
+            'bytes_freed': freed_bytes,
+            'dry_run': dry_run
+        }
+
+    def stats(self):
+        """Blob / version counts and logical vs stored bytes"""
+        manifests = self.list_manifests()
+        logical = sum(a['size_bytes'] for m in manifests for a in m['artifacts'])
+        stored = sum(path.stat().st_size for _, path in self.iter_blobs())
+        return {
+            'versions': len(manifests),
+            'blobs': sum(1 for _ in self.iter_blobs()),
+            'logical_bytes': logical,
+            'stored_bytes': stored
+        }
+
+def ensure_local(path, store=None):
+    """Restore a missing model file (and its version siblings) from the store; True if present"""
+    if path is None:
+        return False
+    path = Path(path)
+    if path.exists():
+        return True
+    store = store or ArtifactStore(path.parent / 'store')
+    manifest = store.find_version_for_file(path.name)
+    if manifest is None:
+        return False
+    restored = store.restore_version(manifest['version'], path.parent)
+    if restored:
+        print(f"✓ Restored {len(restored)} file(s) of model version {manifest['version']} from artifact store")
+    return path.exists()
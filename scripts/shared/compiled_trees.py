@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Shared flat-array tree ensemble exporter and NumPy evaluator
+Used by the local training script (export + parity check) and the local scorer
+
+A fitted XGBoost, CatBoost or sklearn GradientBoosting binary classifier is
+converted into contiguous arrays (all trees concatenated):
+
+    feature     int32    split feature index (0 for leaves)
+    threshold   float64  split threshold (float32 values, widened losslessly)
+    left/right  int32    child node offsets (leaves point at themselves)
+    default_left bool    branch taken for NaN
+    value       float64  leaf value (learning rate already applied)
+    roots       int32    root node offset of each tree
+
+plus a base margin and the comparison rule ('lt' for XGBoost x < t, 'le' for
+CatBoost / sklearn x <= t). CatBoost oblivious trees are expanded into regular
+binary trees. Evaluation needs only NumPy: every tree is advanced one level
+per step for a whole batch of rows, then leaf values are summed and passed
+through the sigmoid.
+
+The compiled model is stored as <model>.trees.npz next to the pickle.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+COMPILED_FORMAT_VERSION = 1
+DEFAULT_BATCH_ROWS = 20000
+
+class CompiledTreeEnsemble:
+    """NumPy-only evaluator for a flat-array tree ensemble"""
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots,
+                 base_margin=0.0, comparison='lt', max_depth=None, feature_cols=None, source=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.default_left = np.ascontiguousarray(default_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.comparison = comparison
+        self.max_depth = int(max_depth) if max_depth is not None else _max_depth(self.left, self.right, self.roots)
+        self.feature_cols = list(feature_cols) if feature_cols is not None else None
+        self.source = source
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _margin_batch(self, X):
+        """Raw margin for one batch of rows"""
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[node]]
+            if self.comparison == 'lt':
+                go_left = x < self.threshold[node]
+            else:
+                go_left = x <= self.threshold[node]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.default_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.base_margin + self.value[node].sum(axis=1)
+
+    def predict_margin(self, X, batch_rows=DEFAULT_BATCH_ROWS):
+        """Raw (log-odds) scores for a float matrix or DataFrame"""
+        if hasattr(X, 'to_numpy'):
+            X = X.to_numpy(dtype=np.float32)
+        X = np.asarray(X)
+
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], batch_rows):
+            stop = min(start + batch_rows, X.shape[0])
+            out[start:stop] = self._margin_batch(X[start:stop])
+        return out
+
+    def predict_proba(self, X, batch_rows=DEFAULT_BATCH_ROWS):
+        """sklearn-style (n, 2) class probabilities"""
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X, batch_rows=batch_rows)))
+        return np.column_stack([1.0 - p, p])
+
+    def save(self, path):
+        """Write the compiled model to an .npz file"""
+        meta = {
+            'version': COMPILED_FORMAT_VERSION,
+            'base_margin': self.base_margin,
+            'comparison': self.comparison,
+            'max_depth': self.max_depth,
+            'feature_cols': self.feature_cols,
+            'source': self.source
+        }
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                feature=self.feature, threshold=self.threshold,
+                left=self.left, right=self.right, default_left=self.default_left,
+                value=self.value, roots=self.roots,
+                meta=np.array(json.dumps(meta))
+            )
+        return Path(path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a compiled model written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('version') != COMPILED_FORMAT_VERSION:
+                raise ValueError(f"Unsupported compiled model version: {meta.get('version')}")
+            return cls(
+                data['feature'], data['threshold'], data['left'], data['right'],
+                data['default_left'], data['value'], data['roots'],
+                base_margin=meta['base_margin'], comparison=meta['comparison'],
+                max_depth=meta['max_depth'], feature_cols=meta.get('feature_cols'),
+                source=meta.get('source')
+            )
+
+def _max_depth(left, right, roots):
+    """Longest root-to-leaf path over all trees"""
+    depth = 0
+    for root in roots:
+        stack = [(int(root), 0)]
+        while stack:
+            node, d = stack.pop()
+            if left[node] == node:
+                depth = max(depth, d)
+            else:
+                stack.append((int(left[node]), d + 1))
+                stack.append((int(right[node]), d + 1))
+    return depth
+
+class _TreeBuilder:
+    """Accumulates nodes of several trees into flat lists"""
+
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right = [], [], [], []
+        self.default_left, self.value, self.roots = [], [], []
+
+    def add_node(self):
+        self.feature.append(0)
+        self.threshold.append(0.0)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.default_left.append(True)
+        self.value.append(0.0)
+        return len(self.feature) - 1
+
+    def set_split(self, node, feature, threshold, left, right, default_left=True):
+        self.feature[node] = int(feature)
+        self.threshold[node] = float(threshold)
+        self.left[node] = int(left)
+        self.right[node] = int(right)
+        self.default_left[node] = bool(default_left)
+
+    def set_leaf(self, node, value):
+        self.left[node] = node
+        self.right[node] = node
+        self.value[node] = float(value)
+
+    def build(self, **kwargs):
+        return CompiledTreeEnsemble(
+            self.feature, self.threshold, self.left, self.right,
+            self.default_left, self.value, self.roots, **kwargs
+        )
+
+def _parse_float(value):
+    """Parse XGBoost scalars that may be serialized as '[5E-1]'"""
+    if isinstance(value, str):
+        value = value.strip('[]')
+    return float(value)
+
+def _export_xgboost(model):
+    """XGBoost binary:logistic model → flat arrays (x < threshold goes left)"""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    config = json.loads(bytes(booster.save_raw(raw_format='json')).decode('utf-8'))
+    learner = config['learner']
+
+    objective = learner['objective']['name']
+    if objective not in ('binary:logistic', 'reg:logistic'):
+        raise ValueError(f"Unsupported XGBoost objective: {objective}")
+
+    base_score = _parse_float(learner['learner_model_param']['base_score'])
+    base_margin = float(np.log(base_score / (1.0 - base_score)))
+
+    gbm = learner['gradient_booster']
+    if gbm.get('name') != 'gbtree':
+        raise ValueError(f"Unsupported XGBoost booster: {gbm.get('name')}")
+
+    builder = _TreeBuilder()
+    for tree in gbm['model']['trees']:
+        lefts = tree['left_children']
+        rights = tree['right_children']
+        split_idx = tree['split_indices']
+        split_cond = tree['split_conditions']
+        default_left = tree['default_left']
+        offset = len(builder.feature)
+        builder.roots.append(offset)
+
+        for i in range(len(lefts)):
+            builder.add_node()
+        for i in range(len(lefts)):
+            node = offset + i
+            if lefts[i] == -1:
+                builder.set_leaf(node, split_cond[i])
+            else:
+                builder.set_split(
+                    node, split_idx[i], np.float32(split_cond[i]),
+                    offset + lefts[i], offset + rights[i], default_left[i]
+                )
+
+    return builder.build(base_margin=base_margin, comparison='lt', source='xgboost')
+
+def _export_catboost(model):
+    """CatBoost Logloss model (oblivious trees) → flat binary trees (x <= border goes left)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'model.json'
+        model.save_model(str(path), format='json')
+        with open(path, 'r') as f:
+            config = json.load(f)
+
+    features_info = config.get('features_info', {})
+    if features_info.get('categorical_features'):
+        raise ValueError("CatBoost models with categorical features are not supported")
+    flat_index = [f['flat_feature_index'] for f in features_info.get('float_features', [])]
+
+    scale, bias = 1.0, 0.0
+    if 'scale_and_bias' in config:
+        scale, bias_values = config['scale_and_bias']
+        bias = bias_values[0] if isinstance(bias_values, list) else bias_values
+
+    builder = _TreeBuilder()
+    for tree in config['oblivious_trees']:
+        splits = tree.get('splits', [])
+        leaf_values = tree['leaf_values']
+        depth = len(splits)
+        for split in splits:
+            if split.get('split_type', 'FloatFeature') != 'FloatFeature':
+                raise ValueError(f"Unsupported CatBoost split type: {split.get('split_type')}")
+
+        # Split d decides bit d of the leaf index (1 when x > border)
+        root = builder.add_node()
+        builder.roots.append(root)
+        level = [(root, 0)]
+        for d in range(depth):
+            split = splits[d]
+            feature = flat_index[split['float_feature_index']]
+            border = np.float32(split['border'])
+            next_level = []
+            for node, leaf_index in level:
+                left = builder.add_node()
+                right = builder.add_node()
+                builder.set_split(node, feature, border, left, right, default_left=True)
+                next_level.append((left, leaf_index))
+                next_level.append((right, leaf_index | (1 << d)))
+            level = next_level
+        for node, leaf_index in level:
+            builder.set_leaf(node, scale * leaf_values[leaf_index])
+
+    return builder.build(base_margin=bias, comparison='le', source='catboost')
+
+def _export_sklearn_gbm(model):
+    """sklearn GradientBoostingClassifier (binary) → flat arrays (x <= threshold goes left)"""
+    if getattr(model, 'n_classes_', 2) != 2:
+        raise ValueError("Only binary GradientBoostingClassifier models are supported")
+
+    n_features = model.n_features_in_
+    base_margin = float(model._raw_predict_init(np.zeros((1, n_features), dtype=np.float32))[0, 0])
+    learning_rate = float(model.learning_rate)
+
+    builder = _TreeBuilder()
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        offset = len(builder.feature)
+        builder.roots.append(offset)
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+
+        for i in range(tree.node_count):
+            builder.add_node()
+        for i in range(tree.node_count):
+            node = offset + i
+            if tree.children_left[i] == -1:
+                builder.set_leaf(node, learning_rate * tree.value[i, 0, 0])
+            else:
+                builder.set_split(
+                    node, tree.feature[i], tree.threshold[i],
+                    offset + tree.children_left[i], offset + tree.children_right[i],
+                    bool(missing_left[i]) if missing_left is not None else True
+                )
+
+    return builder.build(base_margin=base_margin, comparison='le', source='sklearn')
+
+def export_model(model, feature_cols=None):
+    """Convert a fitted XGBoost / CatBoost / GradientBoosting classifier to a CompiledTreeEnsemble"""
+    module = type(model).__module__
+    if module.startswith('xgboost'):
+        compiled = _export_xgboost(model)
+    elif module.startswith('catboost'):
+        compiled = _export_catboost(model)
+    elif type(model).__name__ == 'GradientBoostingClassifier':
+        compiled = _export_sklearn_gbm(model)
+    else:
+        raise ValueError(f"Unsupported model type for tree export: {type(model).__name__}")
+
+    compiled.feature_cols = list(feature_cols) if feature_cols is not None else None
+    return compiled
+
+def threshold_probe_matrix(compiled, n_features, n_rows=2000, random_state=42):
+    """
+    Synthetic rows that exercise both sides of the model's split thresholds
+    (each feature drawn from its thresholds, nudged just below / at / above)
+    """
+    rng = np.random.default_rng(random_state)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+
+    is_split = compiled.left != np.arange(compiled.n_nodes)
+    for j in range(n_features):
+        thresholds = compiled.threshold[is_split & (compiled.feature == j)].astype(np.float32)
+        if len(thresholds) == 0:
+            continue
+        picks = rng.choice(thresholds, size=n_rows)
+        side = rng.integers(-1, 2, size=n_rows)
+        X[:, j] = np.where(
+            side < 0, np.nextafter(picks, np.float32(-np.inf)),
+            np.where(side > 0, np.nextafter(picks, np.float32(np.inf)), picks)
+        )
+    return X
+
+def check_parity(model, compiled, X, atol=1e-5):
+    """Compare compiled probabilities against model.predict_proba; returns a report dict"""
+    if hasattr(X, 'to_numpy'):
+        X_model = X
+        X = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+    else:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        X_model = X
+        if compiled.feature_cols is not None:
+            import pandas as pd
+            X_model = pd.DataFrame(X, columns=compiled.feature_cols, copy=False)
+
+    expected = np.asarray(model.predict_proba(X_model))[:, 1]
+    actual = compiled.predict_proba(X)[:, 1]
+    max_abs_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+
+    return {
+        'rows': int(len(X)),
+        'max_abs_diff': max_abs_diff,
+        'atol': atol,
+        'passed': max_abs_diff <= atol
+    }
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Shared streaming CSV → Oracle ingestion engine
+Used by ingest_churn_data.py (through table_loader.py)
+
+Pipeline (constant memory, independent of file size):
+    1. pyarrow.csv.open_csv streams the file in blocks, parsed on Arrow's thread
+       pool with the declared column types (feature_schema.INGEST_TYPES), so no
+       pandas object-dtype frame is ever built
+    2. Each record batch is renamed to table columns and cleaned with Arrow
+       compute (CHURNED nulls / invalid values → 0, declared int8 columns cast
+       from their float64 parse); feature columns are
+       checked against feature_schema valid ranges (out-of-range values are
+       counted and reported, not altered)
+    3. Batches of batch_rows are bound column-wise:
+         - executemany() with the Arrow table when python-oracledb accepts
+           DataFrame-like objects (3.x), else tuples zipped from column lists
+         - or direct-path loading (Connection.direct_path_load, newer
+           python-oracledb) with --direct-path
+       and committed per batch, so undo and client memory stay bounded
+       (a failed load leaves the rows committed so far; table_loader.py streams
+       into a stage table so the target itself is replaced all-or-nothing)
+    4. Rows/sec, batch count and peak memory (RSS, Arrow pool) are reported
+
+Usage:
+    stats = load_csv(connection, csv_path, 'OML.CHURN_DATASET_TRAINING')
+"""
+
+import csv
+import time
+
+from feature_schema import CSV_COLUMN_MAP, INGEST_TYPES, LABEL_COLUMN, valid_ranges
+
+# Bounded features only: {column: (min, max)}, None for an open end
+VALID_RANGES = {name: bounds for name, bounds in valid_ranges().items() if bounds}
+
+DEFAULT_BATCH_ROWS = 50000
+DEFAULT_BLOCK_MB = 16
+
+def _arrow_type(name):
+    import pyarrow as pa
+    return {'string': pa.string(), 'int8': pa.int8(), 'float64': pa.float64()}[name]
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except (ImportError, AttributeError):
+        return None
+
+def csv_header(csv_path):
+    """Column names from the first CSV line"""
+    with open(csv_path, 'r', newline='') as f:
+        return next(csv.reader(f))
+
+def open_csv_stream(csv_path, block_mb=DEFAULT_BLOCK_MB, threads=None, column_map=CSV_COLUMN_MAP,
+                    types=INGEST_TYPES):
+    """
+    Streaming Arrow CSV reader over the mapped columns present in the file.
+
+    types maps table columns to 'string' / 'float64' / 'int8'; columns without
+    a declared type are inferred by Arrow.
+
+    Returns (reader, csv_columns, missing_table_columns).
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    if threads:
+        pa.set_cpu_count(threads)
+
+    header = set(csv_header(csv_path))
+    csv_columns = [c for c in column_map if c in header]
+    missing = [column_map[c] for c in column_map if c not in header]
+
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=int(block_mb * 1024 * 1024)),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=csv_columns,
+            # Integer columns are parsed as float64 ('1.0' is valid) and cast in prepare_batch
+            column_types={c: _arrow_type(types[column_map[c]].replace('int8', 'float64'))
+                          for c in csv_columns if column_map[c] in types},
+            strings_can_be_null=True
+        )
+    )
+    return reader, csv_columns, missing
+
+def out_of_range_counts(batch, ranges=VALID_RANGES):
+    """{column: non-null values outside its valid range} for the batch columns that have one"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    counts = {}
+    for name, (low, high) in ranges.items():
+        if name not in batch.schema.names:
+            continue
+        column = batch.column(batch.schema.get_field_index(name))
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            continue
+        outside = None
+        if low is not None:
+            outside = pc.less(column, low)
+        if high is not None:
+            above = pc.greater(column, high)
+            outside = above if outside is None else pc.or_(outside, above)
+        count = pc.sum(pc.cast(outside, 'int64')).as_py() if outside is not None else 0
+        if count:
+            counts[name] = count
+    return counts
+
+def prepare_batch(batch, column_map=CSV_COLUMN_MAP, label_column=LABEL_COLUMN, ranges=VALID_RANGES,
+                  types=INGEST_TYPES):
+    """
+    Rename to table columns, clean the 0/1 label, cast the other declared int8
+    columns and check valid ranges;
+    returns (batch, invalid_label_count, {column: out_of_range_count}).
+
+    Raises ValueError when a declared int8 column holds a non-integer or
+    out-of-range value.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    batch = batch.rename_columns([column_map[c] for c in batch.schema.names])
+    invalid = 0
+    if label_column and label_column in batch.schema.names:
+        index = batch.schema.get_field_index(label_column)
+        label = pc.fill_null(batch.column(index), 0)
+        valid = pc.is_in(label, value_set=pa.array([0, 1], type=label.type))
+        invalid = len(label) - pc.sum(valid).as_py() if len(label) else 0
+        label = pc.if_else(valid, label, pa.scalar(0, type=label.type))
+        label_type = pa.int8()
+        batch = batch.set_column(index, pa.field(label_column, label_type), pc.cast(label, label_type))
+    for name in batch.schema.names:
+        if name == label_column or types.get(name) != 'int8':
+            continue
+        index = batch.schema.get_field_index(name)
+        try:
+            column = pc.cast(batch.column(index), pa.int8())
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"Column {name} is declared int8 but holds other values: {e}") from e
+        batch = batch.set_column(index, pa.field(name, pa.int8()), column)
+    return batch, invalid, out_of_range_counts(batch, ranges) if ranges else {}
+
+def iter_batches(reader, batch_rows=DEFAULT_BATCH_ROWS):
+    """Re-chunk the reader's record batches into slices of at most batch_rows"""
+    for batch in reader:
+        for offset in range(0, batch.num_rows, batch_rows):
+            yield batch.slice(offset, batch_rows)
+
+class _Binder:
+    """executemany() with Arrow data when supported, column-zipped tuples otherwise"""
+
+    def __init__(self, cursor, insert_sql):
+        self.cursor = cursor
+        self.insert_sql = insert_sql
+        self.columnar = True
+
+    def __call__(self, batch):
+        import pyarrow as pa
+        if self.columnar:
+            try:
+                self.cursor.executemany(self.insert_sql, pa.Table.from_batches([batch]))
+                return
+            except (TypeError, NotImplementedError):
+                # Older python-oracledb: no DataFrame binding
+                self.columnar = False
+        rows = list(zip(*[column.to_pylist() for column in batch.columns]))
+        self.cursor.executemany(self.insert_sql, rows)
+
+    @property
+    def mode(self):
+        return 'executemany (Arrow columnar)' if self.columnar else 'executemany (column lists)'
+
+def load_csv(connection, csv_path, table, batch_rows=DEFAULT_BATCH_ROWS, block_mb=DEFAULT_BLOCK_MB,
+             threads=None, direct_path=False, truncate=True, column_map=CSV_COLUMN_MAP,
+             types=INGEST_TYPES, label_column=LABEL_COLUMN, ranges=VALID_RANGES):
+    """
+    Stream a CSV into an Oracle table.
+
+    column_map maps CSV headers to table columns (feature_schema.CSV_COLUMN_MAP
+    by default); label_column is cleaned to 0/1 when present (None to skip);
+    columns with a valid range (feature_schema) are checked (None to skip).
+
+    Batches are committed as they go: if the load fails, table keeps the rows
+    committed before the failure (after the TRUNCATE when truncate=True), so
+    load into a stage table when the target must not be left partial.
+
+    Returns a stats dict (rows, columns, seconds, rows_per_sec, batches, mode,
+    peak_rss_mb, arrow_peak_mb, invalid_labels, out_of_range), or None if the
+    load failed.
+    """
+    import pyarrow as pa
+
+    reader, csv_columns, missing = open_csv_stream(csv_path, block_mb=block_mb, threads=threads,
+                                                   column_map=column_map, types=types)
+    if missing:
+        print(f"⚠️  WARNING: Missing columns in CSV: {missing}")
+    columns = [column_map[c] for c in csv_columns]
+
+    cursor = connection.cursor()
+    if truncate:
+        try:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+            print(f"✓ Cleared existing rows in {table}")
+        except Exception as e:
+            print(f"⚠️  WARNING: Could not truncate table: {e}")
+            print("   Attempting to continue...")
+
+    schema_name, _, table_name = table.rpartition('.')
+    if direct_path and not hasattr(connection, 'direct_path_load'):
+        print("⚠️  WARNING: Direct-path loading needs a newer python-oracledb, using executemany")
+        direct_path = False
+
+    placeholders = ', '.join(f':{i + 1}' for i in range(len(columns)))
+    binder = _Binder(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})")
+
+    rows = batches = invalid_labels = 0
+    out_of_range = {}
+    arrow_peak = 0
+    start = time.perf_counter()
+    try:
+        for batch in iter_batches(reader, batch_rows):
+            batch, invalid, outside = prepare_batch(batch, column_map, label_column, ranges, types)
+            invalid_labels += invalid
+            for name, count in outside.items():
+                out_of_range[name] = out_of_range.get(name, 0) + count
+            if direct_path:
+                connection.direct_path_load(
+                    schema_name=schema_name or None, table_name=table_name,
+                    column_names=columns, data=pa.Table.from_batches([batch])
+                )
+            else:
+                binder(batch)
+                connection.commit()
+            rows += batch.num_rows
+            batches += 1
+            arrow_peak = max(arrow_peak, pa.total_allocated_bytes())
+            if batches % 20 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"  {table}: {rows:,} rows ({rows / elapsed:,.0f} rows/sec)")
+    except Exception as e:
+        connection.rollback()
+        print(f"❌ ERROR: Failed to load {table} after {rows:,} rows: {e}")
+        if rows:
+            print(f"   {table} is partial: it keeps the {rows:,} rows committed before the failure")
+        return None
+    finally:
+        cursor.close()
+
+    seconds = time.perf_counter() - start
+    if invalid_labels:
+        print(f"⚠️  WARNING: Found {invalid_labels:,} rows with invalid {label_column} values, set to 0")
+    for name, count in out_of_range.items():
+        low, high = ranges[name]
+        print(f"⚠️  WARNING: {count:,} {name} values outside the valid range "
+              f"[{'-inf' if low is None else low}, {'inf' if high is None else high}] (loaded as-is)")
+
+    return {
+        'rows': rows,
+        'columns': columns,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+        'batches': batches,
+        'mode': 'direct path' if direct_path else binder.mode,
+        'peak_rss_mb': peak_rss_mb(),
+        'arrow_peak_mb': arrow_peak / (1024 * 1024),
+        'invalid_labels': invalid_labels,
+        'out_of_range': out_of_range
+    }
+
+def print_ingest_stats(stats):
+    """One summary block per loaded table"""
+    print(f"✓ Inserted {stats['rows']:,} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec, {stats['batches']:,} batches, {stats['mode']})")
+    rss = f"{stats['peak_rss_mb']:,.0f} MB" if stats['peak_rss_mb'] is not None else "n/a"
+    print(f"  Peak memory: RSS {rss}, Arrow pool {stats['arrow_peak_mb']:,.1f} MB")
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Shared Oracle ADB data-access layer for the Python scripts
+Replaces the per-script initialize_oracle_client() / get_connection() copies
+
+Features:
+    - Instant Client discovery is cached in a small state file
+      (.cache/oracle_client.json), so the Instant Client search paths are only
+      scanned when the cached directory no longer holds libclntsh
+    - A directory only qualifies if it contains libclntsh (.dylib / .so); on
+      arm64 the library must be an arm64 build (checked with `file`)
+    - Thin mode is preferred when the wallet contains ewallet.pem and
+      ADB_WALLET_PASSWORD is set (no Instant Client load at all); thick mode
+      is a single init_oracle_client() call
+    - One process-wide session pool (oracledb.create_pool) shared by every
+      pipeline stage in the same process, with optional DRCP
+    - Client init and connect times are recorded (see print_timings())
+    - create_if_missing() runs idempotent CREATE DDL for the scripts that own
+      their tables (table_loader.py, rfm_features.py)
+
+Environment variables:
+    ADB_WALLET_PATH, ADB_CONNECTION_STRING, ADB_USERNAME, ADB_PASSWORD (required)
+    ADB_WALLET_PASSWORD     Password for ewallet.pem (thin mode, if encrypted)
+    ORACLE_CLIENT_MODE      'thin', 'thick' or 'auto' (default: auto)
+    ORACLE_CLIENT_LIB_DIR   Instant Client directory (skips discovery)
+    ADB_USE_DRCP            '1' to use Database Resident Connection Pooling
+    ADB_POOL_MIN / ADB_POOL_MAX   Session pool size (default: 1 / 4)
+
+Usage:
+    sys.path.insert(0, str(project_root / 'scripts' / 'shared'))
+    from db import get_connection
+
+    connection = get_connection()   # pooled; close() returns it to the pool
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import platform
+import subprocess
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+STATE_FILE = project_root / '.cache' / 'oracle_client.json'
+
+INSTANT_CLIENT_PATTERNS = [
+    '/opt/oracle/instantclient_*/lib',
+    '/opt/oracle/instantclient_*',
+    '/opt/homebrew/lib',                                  # Apple Silicon Homebrew
+    '/opt/homebrew/Cellar/instantclient-basic/*/lib',
+    '/opt/homebrew/opt/instantclient-basic/lib',
+    '/usr/local/lib',                                     # Intel Homebrew
+]
+
+CLIENT_LIB_NAMES = ['libclntsh.dylib', 'libclntsh.so']
+
+DRCP_CONNECTION_CLASS = 'CHURN_PIPELINE'
+
+# Process-wide state
+_client_mode = None
+_pool = None
+TIMINGS = {}
+
+def _load_state():
+    """Read the cached client discovery state"""
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state):
+    """Write the client discovery state (best effort)"""
+    try:
+        STATE_FILE.parent.mkdir(exist_ok=True)
+        with open(STATE_FILE, 'w') as f:
+            json.dump(state, f, indent=2)
+    except OSError:
+        pass
+
+def _search_patterns():
+    """Instant Client search paths, including $ORACLE_HOME/lib when set"""
+    patterns = list(INSTANT_CLIENT_PATTERNS)
+    oracle_home = os.getenv('ORACLE_HOME')
+    if oracle_home:
+        patterns.append(os.path.join(oracle_home, 'lib'))
+    return patterns
+
+def _arch_matches(lib_path):
+    """On arm64 Python, reject x86_64 (or universal) libclntsh builds"""
+    if platform.machine() != 'arm64':
+        return True
+    try:
+        result = subprocess.run(['file', '-L', lib_path],
+                                capture_output=True, text=True, timeout=2)
+    except Exception:
+        return False
+    lib_arch_info = result.stdout.lower()
+    return 'arm64' in lib_arch_info and 'x86_64' not in lib_arch_info
+
+def _client_lib(directory):
+    """Return the usable libclntsh in directory, or None"""
+    if not os.path.isdir(directory):
+        return None
+    for lib_name in CLIENT_LIB_NAMES:
+        lib_path = os.path.join(directory, lib_name)
+        if os.path.exists(lib_path) and _arch_matches(lib_path):
+            return lib_path
+    return None
+
+def discover_instant_client(state=None):
+    """Return the Instant Client lib dir, using the cached value while it still holds libclntsh"""
+    lib_dir = os.getenv('ORACLE_CLIENT_LIB_DIR')
+    if lib_dir and os.path.isdir(lib_dir):
+        return lib_dir
+
+    state = state if state is not None else _load_state()
+    cached = state.get('lib_dir')
+    if (cached and state.get('machine') == platform.machine()
+            and any(os.path.exists(os.path.join(cached, name)) for name in CLIENT_LIB_NAMES)):
+        return cached
+
+    for pattern in _search_patterns():
+        for match in sorted(glob.glob(pattern), reverse=True):
+            if _client_lib(match):
+                return match
+    return None
+
+def wallet_supports_thin(wallet_path):
+    """Thin mode needs the PEM wallet (ewallet.pem) and, for ADB wallets, its password"""
+    return (os.path.exists(os.path.join(wallet_path, 'ewallet.pem'))
+            and bool(os.getenv('ADB_WALLET_PASSWORD')))
+
+def _get_wallet_path():
+    """Validate ADB_WALLET_PATH and set TNS_ADMIN"""
+    wallet_path = os.getenv('ADB_WALLET_PATH')
+    if not wallet_path:
+        print("❌ ERROR: ADB_WALLET_PATH not set in environment")
+        sys.exit(1)
+
+    if not os.path.exists(wallet_path):
+        print(f"❌ ERROR: Wallet path does not exist: {wallet_path}")
+        sys.exit(1)
+
+    if not os.getenv('TNS_ADMIN'):
+        os.environ['TNS_ADMIN'] = wallet_path
+
+    return wallet_path
+
+def initialize_oracle_client():
+    """Initialize python-oracledb once per process (thin preferred, thick fallback)"""
+    global _client_mode
+
+    try:
+        import oracledb
+    except ImportError:
+        print("❌ ERROR: oracledb not installed")
+        print("   Install with: pip install oracledb")
+        sys.exit(1)
+
+    if _client_mode is not None:
+        return oracledb
+
+    start = time.perf_counter()
+    wallet_path = _get_wallet_path()
+    state = _load_state()
+
+    requested = os.getenv('ORACLE_CLIENT_MODE', 'auto').lower()
+    if requested == 'auto':
+        requested = 'thin' if wallet_supports_thin(wallet_path) else 'thick'
+
+    mode = 'thin'
+    lib_dir = None
+    if requested == 'thick':
+        lib_dir = discover_instant_client(state)
+        try:
+            if lib_dir:
+                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
+            else:
+                oracledb.init_oracle_client(config_dir=wallet_path)
+            mode = 'thick'
+        except Exception as e:
+            print(f"⚠️  WARNING: Could not initialize Oracle client: {e}")
+            print("   Using thin mode")
+            lib_dir = None
+
+    _client_mode = mode
+    TIMINGS['client_init_ms'] = (time.perf_counter() - start) * 1000
+
+    _save_state({
+        'wallet_path': wallet_path,
+        'mode': mode,
+        'lib_dir': lib_dir or state.get('lib_dir'),
+        'machine': platform.machine(),
+        'updated_at': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+    return oracledb
+
+def get_client_mode():
+    """Return 'thin' or 'thick' (None before initialization)"""
+    return _client_mode
+
+def _connect_params(use_drcp=False):
+    """Keyword arguments shared by connect() and create_pool()"""
+    connection_string = os.getenv('ADB_CONNECTION_STRING')
+    username = os.getenv('ADB_USERNAME', 'OML')
+    password = os.getenv('ADB_PASSWORD')
+
+    if not connection_string:
+        print("❌ ERROR: ADB_CONNECTION_STRING not set in environment")
+        sys.exit(1)
+
+    if not password:
+        print("❌ ERROR: ADB_PASSWORD not set in environment")
+        sys.exit(1)
+
+    params = {'user': username, 'password': password, 'dsn': connection_string}
+
+    if _client_mode == 'thin':
+        wallet_path = os.getenv('ADB_WALLET_PATH')
+        params['config_dir'] = wallet_path
+        params['wallet_location'] = wallet_path
+        wallet_password = os.getenv('ADB_WALLET_PASSWORD')
+        if wallet_password:
+            params['wallet_password'] = wallet_password
+
+    if use_drcp:
+        params['server_type'] = 'pooled'
+        params['cclass'] = DRCP_CONNECTION_CLASS
+
+    return params
+
+def _use_drcp(use_drcp):
+    """Resolve the DRCP flag from the argument or ADB_USE_DRCP"""
+    if use_drcp is not None:
+        return use_drcp
+    return os.getenv('ADB_USE_DRCP', '0').lower() in ('1', 'true', 'yes')
+
+def get_pool(min_sessions=None, max_sessions=None, use_drcp=None):
+    """Create (once) and return the process-wide session pool"""
+    global _pool
+
+    if _pool is not None:
+        return _pool
+
+    oracledb = initialize_oracle_client()
+    use_drcp = _use_drcp(use_drcp)
+    min_sessions = min_sessions or int(os.getenv('ADB_POOL_MIN', '1'))
+    max_sessions = max_sessions or int(os.getenv('ADB_POOL_MAX', '4'))
+
+    params = _connect_params(use_drcp)
+    if use_drcp:
+        params['purity'] = oracledb.PURITY_SELF
+
+    start = time.perf_counter()
+    try:
+        _pool = oracledb.create_pool(
+            min=min_sessions,
+            max=max_sessions,
+            increment=1,
+            getmode=oracledb.POOL_GETMODE_WAIT,
+            **params
+        )
+    except Exception as e:
+        print(f"❌ ERROR: Failed to create connection pool: {e}")
+        print("\nTroubleshooting:")
+        print("1. Verify ADB instance is running in Oracle Cloud Console")
+        print("2. Check ADB_CONNECTION_STRING format in .env")
+        print("3. Verify ADB_USERNAME and ADB_PASSWORD are correct")
+        print("4. Ensure wallet files are accessible (ewallet.pem for thin mode)")
+        sys.exit(1)
+    TIMINGS['pool_create_ms'] = (time.perf_counter() - start) * 1000
+
+    return _pool
+
+def get_connection(pooled=True):
+    """
+    Get a database connection.
+
+    pooled=True (default) acquires a session from the shared pool; calling
+    close() on it releases the session back to the pool. pooled=False opens a
+    standalone connection.
+    """
+    start = time.perf_counter()
+
+    if pooled:
+        connection = get_pool().acquire()
+    else:
+        oracledb = initialize_oracle_client()
+        try:
+            connection = oracledb.connect(**_connect_params(_use_drcp(None)))
+        except Exception as e:
+            print(f"❌ ERROR: Failed to connect to database: {e}")
+            sys.exit(1)
+
+    TIMINGS['connect_ms'] = (time.perf_counter() - start) * 1000
+    return connection
+
+def create_if_missing(connection, ddl):
+    """Run a CREATE statement, ignoring ORA-00955 (name already used); True if it was created"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(ddl)
+        return True
+    except Exception as e:
+        if 'ORA-00955' not in str(e):
+            raise
+        return False
+    finally:
+        cursor.close()
+
+def close_pool():
+    """Close the shared pool (safe to call when no pool exists)"""
+    global _pool
+
+    if _pool is not None:
+        _pool.close(force=True)
+        _pool = None
+
+def print_timings():
+    """Print client init / pool / connect timings"""
+    print(f"✓ Oracle client mode: {_client_mode or 'not initialized'}")
+    for key, label in (('client_init_ms', 'Client init'),
+                       ('pool_create_ms', 'Pool create'),
+                       ('connect_ms', 'Connect')):
+        if key in TIMINGS:
+            print(f"  {label}: {TIMINGS[key]:.1f} ms")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Shared utility for collapsing duplicate training rows into weighted rows
+Used by the local training script before model fitting
+
+Rows with identical feature vectors AND identical labels are collapsed into a
+single row whose sample weight is the number of rows it replaces. Passing the
+weights as sample_weight to XGBoost/CatBoost/sklearn gives the same loss (and,
+for deterministic learners, the same model) on fewer rows.
+
+Optionally features can be quantized (rounded) first so near-identical rows
+also collapse; the collapsed row then holds the group mean of each feature.
+"""
+
+import numpy as np
+import pandas as pd
+
+def deduplicate_training_rows(X, y, feature_cols, quantize_decimals=None):
+    """
+    Collapse duplicate (features, label) rows into weighted rows.
+
+    Returns (X_unique, y_unique, sample_weight, report).
+    """
+    print("\n" + "=" * 60)
+    print("Weighted Deduplication")
+    print("=" * 60)
+
+    X_feat = X[feature_cols]
+    key = X_feat.round(quantize_decimals) if quantize_decimals is not None else X_feat
+
+    # One 64-bit hash per row over the (quantized) features plus the label
+    key_hash = pd.util.hash_pandas_object(key, index=False).values
+    label_hash = pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).values
+    row_hash = key_hash ^ (label_hash * np.uint64(0x9E3779B97F4A7C15))
+
+    _, first_index, inverse, counts = np.unique(
+        row_hash, return_index=True, return_inverse=True, return_counts=True
+    )
+
+    # Keep collapsed rows in order of first occurrence
+    order = np.argsort(first_index, kind='stable')
+    first_index = first_index[order]
+    counts = counts[order]
+
+    if quantize_decimals is None:
+        X_unique = X_feat.iloc[first_index].reset_index(drop=True)
+    else:
+        X_unique = X_feat.groupby(inverse).mean().iloc[order].reset_index(drop=True)
+
+    y_unique = pd.Series(np.asarray(y)[first_index], name=getattr(y, 'name', None))
+    sample_weight = counts.astype(np.float64)
+
+    original_rows = len(X_feat)
+    unique_rows = len(X_unique)
+    report = {
+        'original_rows': int(original_rows),
+        'unique_rows': int(unique_rows),
+        'compression_ratio': float(original_rows / unique_rows) if unique_rows else 1.0,
+        'quantize_decimals': quantize_decimals
+    }
+
+    mode = f"quantized to {quantize_decimals} decimals" if quantize_decimals is not None else "exact"
+    print(f"✓ Mode: {mode}")
+    print(f"✓ Rows: {original_rows:,} → {unique_rows:,}")
+    print(f"✓ Compression ratio: {report['compression_ratio']:.2f}x")
+    print(f"✓ Max rows collapsed into one: {int(counts.max()) if len(counts) else 0:,}")
+
+    return X_unique, y_unique, sample_weight, report
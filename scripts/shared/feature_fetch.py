@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Shared utility for fetching churn feature views straight into a float32 NumPy matrix
+Used by the local training and scoring scripts
+
+Uses python-oracledb's DataFrame fetch (fetch_df_all / fetch_df_batches, oracledb
+>= 3.0), which fills Arrow column buffers directly from the network packets. The
+Arrow columns are then written into one preallocated, C-contiguous float32
+matrix, so no per-cell Python objects are created and no intermediate float64
+DataFrame is built.
+
+Falls back to pd.read_sql (the previous path) when the installed oracledb has
+no DataFrame support.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ARRAYSIZE = 50000
+
+def supports_arrow_fetch(connection):
+    """True if the connection offers python-oracledb DataFrame fetches"""
+    return hasattr(connection, 'fetch_df_all') and hasattr(connection, 'fetch_df_batches')
+
+def _arrow_column_to_numpy(column):
+    """Convert an Arrow (chunked) array to float32, nulls become NaN"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_decimal(column.type):
+        column = pc.cast(column, pa.float64())
+    return np.asarray(column.to_numpy(zero_copy_only=False), dtype=np.float32)
+
+def _table_to_matrix(table, feature_cols, out=None, row_offset=0):
+    """Write feature columns of an Arrow table into a float32 matrix"""
+    n_rows = table.num_rows
+    if out is None:
+        out = np.empty((n_rows, len(feature_cols)), dtype=np.float32)
+        row_offset = 0
+
+    for j, col in enumerate(feature_cols):
+        out[row_offset:row_offset + n_rows, j] = _arrow_column_to_numpy(table.column(col))
+
+    return out
+
+def _non_feature_columns(id_col, label_col):
+    """Columns that are fetched but not part of the feature matrix"""
+    return [c for c in (id_col, label_col) if c]
+
+def fetch_feature_matrix_arrow(connection, query, feature_cols=None, id_col='USER_ID',
+                               label_col=None, batch_size=None, parameters=None):
+    """
+    Fetch a feature view via oracledb DataFrames into a float32 matrix.
+
+    Returns (ids, X, y, feature_cols); ids/y are None when the column is not requested.
+    """
+    import pyarrow as pa
+
+    if batch_size is None:
+        odf = connection.fetch_df_all(statement=query, parameters=parameters, arraysize=DEFAULT_ARRAYSIZE)
+        tables = [pa.table(odf)]
+    else:
+        tables = [
+            pa.table(odf)
+            for odf in connection.fetch_df_batches(statement=query, parameters=parameters, size=batch_size)
+        ]
+
+    return tables_to_feature_matrix(tables, feature_cols=feature_cols, id_col=id_col, label_col=label_col)
+
+def tables_to_feature_matrix(tables, feature_cols=None, id_col='USER_ID', label_col=None):
+    """
+    Convert one or more Arrow tables (e.g. fetch batches or a cached snapshot)
+    into (ids, X, y, feature_cols) with X as a float32 matrix.
+    """
+    if not isinstance(tables, (list, tuple)):
+        tables = [tables]
+
+    if not tables:
+        return None, np.empty((0, len(feature_cols or [])), dtype=np.float32), None, feature_cols or []
+
+    if feature_cols is None:
+        skip = set(_non_feature_columns(id_col, label_col))
+        feature_cols = [c for c in tables[0].column_names if c not in skip]
+
+    n_rows = sum(t.num_rows for t in tables)
+    X = np.empty((n_rows, len(feature_cols)), dtype=np.float32)
+
+    ids_parts = []
+    y_parts = []
+    offset = 0
+    for table in tables:
+        _table_to_matrix(table, feature_cols, out=X, row_offset=offset)
+        offset += table.num_rows
+        if id_col and id_col in table.column_names:
+            ids_parts.append(table.column(id_col).to_numpy(zero_copy_only=False))
+        if label_col and label_col in table.column_names:
+            y_parts.append(_arrow_column_to_numpy(table.column(label_col)))
+
+    ids = pd.Series(np.concatenate(ids_parts), name=id_col) if ids_parts else None
+    y = pd.Series(np.concatenate(y_parts).astype(np.int8), name=label_col) if y_parts else None
+
+    return ids, X, y, feature_cols
+
+def fetch_feature_matrix_pandas(connection, query, feature_cols=None, id_col='USER_ID',
+                                label_col=None, parameters=None):
+    """Previous pd.read_sql path, kept as fallback and benchmark baseline"""
+    df = pd.read_sql(query, connection, params=parameters)
+
+    if feature_cols is None:
+        skip = set(_non_feature_columns(id_col, label_col))
+        feature_cols = [c for c in df.columns if c not in skip]
+
+    X = np.ascontiguousarray(df[feature_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32))
+    ids = df[id_col].reset_index(drop=True) if id_col and id_col in df.columns else None
+    y = df[label_col].astype(np.int8).reset_index(drop=True) if label_col and label_col in df.columns else None
+
+    return ids, X, y, feature_cols
+
+def fetch_feature_matrix(connection, query, feature_cols=None, id_col='USER_ID',
+                         label_col=None, batch_size=None, parameters=None):
+    """Fetch a feature view into a float32 matrix (Arrow path when available)"""
+    if supports_arrow_fetch(connection):
+        try:
+            return fetch_feature_matrix_arrow(
+                connection, query, feature_cols=feature_cols, id_col=id_col,
+                label_col=label_col, batch_size=batch_size, parameters=parameters
+            )
+        except ImportError:
+            print("⚠️  WARNING: pyarrow not installed, falling back to pd.read_sql")
+            print("   Install with: pip install pyarrow")
+    else:
+        print("⚠️  WARNING: oracledb DataFrame fetch not available (oracledb < 3.0), using pd.read_sql")
+
+    return fetch_feature_matrix_pandas(
+        connection, query, feature_cols=feature_cols, id_col=id_col,
+        label_col=label_col, parameters=parameters
+    )
+
+def as_feature_frame(X, feature_cols):
+    """Wrap the float32 matrix in a DataFrame without copying (single block)"""
+    return pd.DataFrame(X, columns=feature_cols, copy=False)
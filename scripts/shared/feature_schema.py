@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Declarative churn feature schema
+Single source of truth for the 22 model features and the raw ingestion columns
+
+Each feature declares:
+    name        Column name in the feature views and model metadata
+    source      SQL expression over CHURN_DATASET_TRAINING / USER_PROFILES
+    dtype       Compact NumPy dtype ('float32', or 'int8' for encoded categoricals)
+    fill        Value used for NULL / NaN / infinity
+    valid_range (min, max) accepted range, None for unbounded
+
+Generated from this module:
+    - sql/create_feature_views.sql and the views created by create_feature_views.py
+    - Column lists and declared CSV types used by ingest_churn_data.py
+    - Fetch projections (only the columns a model needs, cast to compact types)
+"""
+
+from collections import namedtuple
+
+Feature = namedtuple('Feature', ['name', 'source', 'dtype', 'fill', 'valid_range', 'group'])
+
+GENDER_CODE_SQL = """CASE
+        WHEN GENDER = 'Male' THEN 1
+        WHEN GENDER = 'Female' THEN 2
+        ELSE 0
+    END"""
+
+SIGNUP_QUARTER_CODE_SQL = """CASE
+        WHEN SIGNUP_QUARTER = 'Q1' THEN 1
+        WHEN SIGNUP_QUARTER = 'Q2' THEN 2
+        WHEN SIGNUP_QUARTER = 'Q3' THEN 3
+        WHEN SIGNUP_QUARTER = 'Q4' THEN 4
+        ELSE 0
+    END"""
+
+# Order matters: it is the view column order and the default model feature order
+FEATURES = [
+    # Demographics
+    Feature('AGE', 'AGE', 'float32', 0.0, (0, 120), 'Demographics'),
+    Feature('GENDER_CODE', GENDER_CODE_SQL, 'int8', 0, (0, 2), 'Demographics'),
+    Feature('SIGNUP_QUARTER_CODE', SIGNUP_QUARTER_CODE_SQL, 'int8', 0, (0, 4), 'Demographics'),
+
+    # Membership
+    Feature('MEMBERSHIP_YEARS', 'MEMBERSHIP_YEARS', 'float32', 0.0, (0, None), 'Membership'),
+
+    # Engagement metrics
+    Feature('LOGIN_FREQUENCY', 'LOGIN_FREQUENCY', 'float32', 0.0, (0, None), 'Engagement metrics'),
+    Feature('SESSION_DURATION_AVG', 'SESSION_DURATION_AVG', 'float32', 0.0, (0, None), 'Engagement metrics'),
+    Feature('PAGES_PER_SESSION', 'PAGES_PER_SESSION', 'float32', 0.0, (0, None), 'Engagement metrics'),
+    Feature('EMAIL_OPEN_RATE', 'EMAIL_OPEN_RATE', 'float32', 0.0, (0, 100), 'Engagement metrics'),
+    Feature('SOCIAL_MEDIA_ENGAGEMENT_SCORE', 'SOCIAL_MEDIA_ENGAGEMENT_SCORE', 'float32', 0.0, (0, None), 'Engagement metrics'),
+    Feature('MOBILE_APP_USAGE', 'MOBILE_APP_USAGE', 'float32', 0.0, (0, None), 'Engagement metrics'),
+
+    # Purchase behavior
+    Feature('TOTAL_PURCHASES', 'TOTAL_PURCHASES', 'float32', 0.0, (0, None), 'Purchase behavior'),
+    Feature('AVERAGE_ORDER_VALUE', 'AVERAGE_ORDER_VALUE', 'float32', 0.0, (0, None), 'Purchase behavior'),
+    Feature('DAYS_SINCE_LAST_PURCHASE', 'DAYS_SINCE_LAST_PURCHASE', 'float32', 0.0, (0, None), 'Purchase behavior'),
+    Feature('LIFETIME_VALUE', 'LIFETIME_VALUE', 'float32', 0.0, (0, None), 'Purchase behavior'),
+
+    # Cart and wishlist
+    # Source rates are not capped at 100 (up to ~118 in churn_dataset_mapped.csv)
+    Feature('CART_ABANDONMENT_RATE', 'CART_ABANDONMENT_RATE', 'float32', 0.0, (0, None), 'Cart and wishlist'),
+    Feature('WISHLIST_ITEMS', 'WISHLIST_ITEMS', 'float32', 0.0, (0, None), 'Cart and wishlist'),
+
+    # Customer service
+    Feature('CUSTOMER_SERVICE_CALLS', 'CUSTOMER_SERVICE_CALLS', 'float32', 0.0, (0, None), 'Customer service'),
+    Feature('RETURNS_RATE', 'RETURNS_RATE', 'float32', 0.0, (0, 100), 'Customer service'),
+    Feature('PRODUCT_REVIEWS_WRITTEN', 'PRODUCT_REVIEWS_WRITTEN', 'float32', 0.0, (0, None), 'Customer service'),
+
+    # Financial
+    # Source rates are not capped at 100 (up to ~115 in churn_dataset_mapped.csv)
+    Feature('DISCOUNT_USAGE_RATE', 'DISCOUNT_USAGE_RATE', 'float32', 0.0, (0, None), 'Financial'),
+    Feature('PAYMENT_METHOD_DIVERSITY', 'PAYMENT_METHOD_DIVERSITY', 'float32', 0.0, (0, None), 'Financial'),
+    Feature('CREDIT_BALANCE', 'CREDIT_BALANCE', 'float32', 0.0, (None, None), 'Financial'),
+]
+
+FEATURES_BY_NAME = {f.name: f for f in FEATURES}
+
+ID_COLUMN = 'USER_ID'
+LABEL_COLUMN = 'CHURNED'
+
+# Raw CSV column -> table column, in CHURN_DATASET_TRAINING / USER_PROFILES order
+CSV_COLUMN_MAP = {
+    'USER_ID': 'USER_ID',
+    'Age': 'AGE',
+    'Gender': 'GENDER',
+    'Country': 'COUNTRY',
+    'City': 'CITY',
+    'Membership_Years': 'MEMBERSHIP_YEARS',
+    'Login_Frequency': 'LOGIN_FREQUENCY',
+    'Session_Duration_Avg': 'SESSION_DURATION_AVG',
+    'Pages_Per_Session': 'PAGES_PER_SESSION',
+    'Cart_Abandonment_Rate': 'CART_ABANDONMENT_RATE',
+    'Wishlist_Items': 'WISHLIST_ITEMS',
+    'Total_Purchases': 'TOTAL_PURCHASES',
+    'Average_Order_Value': 'AVERAGE_ORDER_VALUE',
+    'Days_Since_Last_Purchase': 'DAYS_SINCE_LAST_PURCHASE',
+    'Discount_Usage_Rate': 'DISCOUNT_USAGE_RATE',
+    'Returns_Rate': 'RETURNS_RATE',
+    'Email_Open_Rate': 'EMAIL_OPEN_RATE',
+    'Customer_Service_Calls': 'CUSTOMER_SERVICE_CALLS',
+    'Product_Reviews_Written': 'PRODUCT_REVIEWS_WRITTEN',
+    'Social_Media_Engagement_Score': 'SOCIAL_MEDIA_ENGAGEMENT_SCORE',
+    'Mobile_App_Usage': 'MOBILE_APP_USAGE',
+    'Payment_Method_Diversity': 'PAYMENT_METHOD_DIVERSITY',
+    'Lifetime_Value': 'LIFETIME_VALUE',
+    'Credit_Balance': 'CREDIT_BALANCE',
+    'Signup_Quarter': 'SIGNUP_QUARTER',
+    'Churned': 'CHURNED',
+}
+
+# Table column order for ingestion (CHURN_DATASET_TRAINING and USER_PROFILES)
+INGEST_COLUMNS = list(CSV_COLUMN_MAP.values())
+
+# Declared CSV value types for ingestion ('string', 'float64', 'int8'); everything else is numeric
+INGEST_STRING_COLUMNS = ('USER_ID', 'GENDER', 'COUNTRY', 'CITY', 'SIGNUP_QUARTER')
+INGEST_TYPES = {
+    col: 'string' if col in INGEST_STRING_COLUMNS else 'int8' if col == LABEL_COLUMN else 'float64'
+    for col in INGEST_COLUMNS
+}
+
+# View definitions: (view, source table, include USER_ID, include CHURNED, purpose)
+FEATURE_VIEWS = [
+    ('OML.CHURN_TRAINING_FEATURES', 'OML.CHURN_DATASET_TRAINING', False, False,
+     'Feature columns only (for model training)'),
+    ('OML.CHURN_TRAINING_DATA', 'OML.CHURN_DATASET_TRAINING', True, True,
+     'Features + target label for training'),
+    ('OML.CHURN_USER_FEATURES', 'OML.USER_PROFILES', True, False,
+     'Features for scoring actual users'),
+]
+
+def feature_names():
+    """Feature names in view/model order"""
+    return [f.name for f in FEATURES]
+
+def feature_dtypes(feature_cols=None):
+    """{feature: numpy dtype name} for the given (default: all) features"""
+    return {name: FEATURES_BY_NAME[name].dtype for name in (feature_cols or feature_names())}
+
+def fill_values(feature_cols=None):
+    """Per-feature fill values, in the order of feature_cols"""
+    return [FEATURES_BY_NAME[name].fill for name in (feature_cols or feature_names())]
+
+def valid_ranges(feature_cols=None):
+    """{feature: (min, max)} for the given (default: all) features"""
+    return {name: FEATURES_BY_NAME[name].valid_range for name in (feature_cols or feature_names())}
+
+def _select_item(feature):
+    """One SELECT list entry for a feature view"""
+    if feature.source == feature.name:
+        return f"    {feature.name}"
+    return f"    {feature.source} AS {feature.name}"
+
+def view_sql(view, source_table, include_id=True, include_label=False, comments=False):
+    """CREATE OR REPLACE VIEW statement for one feature view (no trailing semicolon)"""
+    items = []
+    if include_id:
+        items.append((None, f"    {ID_COLUMN}"))
+    items.extend((f.group, _select_item(f)) for f in FEATURES)
+    if include_label:
+        items.append(('Target', f"    {LABEL_COLUMN}"))
+
+    lines = []
+    current_group = None
+    for i, (group, item) in enumerate(items):
+        if comments and group and group != current_group:
+            if current_group is not None:
+                lines.append('    ')
+            lines.append(f"    -- {group}")
+            current_group = group
+        lines.append(item + (',' if i < len(items) - 1 else ''))
+
+    select_list = '\n'.join(lines)
+    return f"CREATE OR REPLACE VIEW {view} AS\nSELECT \n{select_list}\nFROM {source_table}"
+
+def view_statements():
+    """All feature view DDL statements, in creation order"""
+    return [
+        view_sql(view, source, include_id, include_label)
+        for view, source, include_id, include_label, _ in FEATURE_VIEWS
+    ]
+
+def generate_feature_views_sql():
+    """Full text of sql/create_feature_views.sql"""
+    rule = '-- ' + '=' * 76
+    lines = [
+        rule,
+        '-- Feature Engineering Views for Churn Prediction Model',
+        rule,
+        '-- GENERATED from scripts/shared/feature_schema.py - do not edit by hand.',
+        '-- Regenerate with: python scripts/create_feature_views.py --write-sql',
+        '--',
+        '-- Purpose: Create views for model training and scoring',
+        '-- Views:',
+    ]
+    for i, (view, _, _, _, purpose) in enumerate(FEATURE_VIEWS, 1):
+        lines.append(f"--   {i}. {view.split('.')[-1]} - {purpose}")
+    lines += [
+        '--',
+        '-- Usage: Run this script as OML user in Oracle ADB Serverless',
+        rule,
+        '',
+    ]
+
+    for i, (view, source, include_id, include_label, purpose) in enumerate(FEATURE_VIEWS, 1):
+        lines += [
+            rule,
+            f"-- View {i}: {view.split('.')[-1]}",
+            rule,
+            f"-- Purpose: {purpose}",
+            f"-- Source: {source}",
+            '',
+            view_sql(view, source, include_id, include_label, comments=True) + ';',
+            '',
+        ]
+
+    lines += [
+        rule,
+        '-- Verification Queries',
+        rule,
+        '',
+        '-- Verify views created',
+        'SELECT ',
+        '    VIEW_NAME,',
+        '    TEXT_LENGTH',
+        'FROM USER_VIEWS',
+        'WHERE VIEW_NAME IN (',
+        ',\n'.join(f"    '{v.split('.')[-1]}'" for v, _, _, _, _ in FEATURE_VIEWS),
+        ')',
+        'ORDER BY VIEW_NAME;',
+        '',
+        '-- Test view row counts',
+        '\nUNION ALL\n'.join(
+            f"SELECT \n    '{v.split('.')[-1]}' AS VIEW_NAME,\n    COUNT(*) AS ROW_COUNT\nFROM {v}"
+            for v, _, _, _, _ in FEATURE_VIEWS
+        ) + ';',
+        '',
+        rule,
+        '-- End of Feature Views Creation',
+        rule,
+        '',
+    ]
+    return '\n'.join(lines)
+
+def _compact_cast(feature):
+    """SQL cast so the fetch returns the feature's compact type"""
+    if feature.dtype == 'int8':
+        return f"CAST({feature.name} AS NUMBER(3)) AS {feature.name}"
+    return f"CAST({feature.name} AS BINARY_FLOAT) AS {feature.name}"
+
+def projection_query(view, feature_cols=None, id_col=ID_COLUMN, label_col=None):
+    """
+    SELECT only the requested feature columns of a view, cast to compact types
+    (BINARY_FLOAT for float32 features, NUMBER(3) for int8 codes).
+    """
+    items = []
+    if id_col:
+        items.append(id_col)
+    items.extend(_compact_cast(FEATURES_BY_NAME[name]) for name in (feature_cols or feature_names()))
+    if label_col:
+        items.append(label_col)
+
+    return f"SELECT {', '.join(items)} FROM {view}"
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Shared point-in-time feature store (dated Parquet snapshots of the feature views)
+Used by snapshot_feature_views.py and train_churn_model_local.py (--as-of,
+--replay-model)
+
+The live views (snapshot_cache.py) always reflect the tables as they are now,
+so a model can not be re-trained or audited on its original inputs. A snapshot
+is an immutable, dated copy of one feature view:
+
+    data/feature_store/<VIEW_NAME>/snapshot_date=YYYY-MM-DD/part-00000.parquet
+                                                           _snapshot.json
+
+    - the view is fetched with the schema projection (compact float32 / int8
+      types) in batches and streamed into zstd Parquet parts, so memory stays
+      bounded by the batch size
+    - the partition is written to a hidden temp directory and renamed into
+      place, then made read-only; an existing date is never rewritten
+    - _snapshot.json records rows, schema, per-file SHA-256 and a content hash
+      (SHA-256 over the schema and the sorted per-row hashes), which does not
+      depend on row order or Parquet encoding; models trained from a snapshot
+      carry it into MODEL_REGISTRY.TRAINING_PARAMETERS
+
+load_snapshot(view, as_of) picks the newest snapshot_date <= as_of and reads it
+through a hive-partitioned pyarrow dataset with a snapshot_date filter, so
+only that partition's files (and only the requested columns) are read.
+
+Usage:
+    manifest = write_snapshot(connection, 'OML.CHURN_TRAINING_DATA')
+    table, manifest = load_snapshot('OML.CHURN_TRAINING_DATA', as_of='2026-10-01')
+"""
+
+import os
+import json
+import stat
+import shutil
+import hashlib
+from pathlib import Path
+from datetime import date, datetime
+
+import numpy as np
+
+from feature_schema import FEATURE_VIEWS, feature_names, projection_query, ID_COLUMN, LABEL_COLUMN
+from artifact_store import file_sha256
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_STORE_DIR = project_root / 'data' / 'feature_store'
+
+STORE_VERSION = 1
+PARTITION_KEY = 'snapshot_date'
+MANIFEST_NAME = '_snapshot.json'
+DEFAULT_BATCH_ROWS = 100000
+DEFAULT_PART_ROWS = 1000000
+
+def snapshot_query(view):
+    """Schema projection of a feature view (columns declared in FEATURE_VIEWS)"""
+    for name, _, include_id, include_label, _ in FEATURE_VIEWS:
+        if name == view:
+            return projection_query(view, feature_names(), id_col=ID_COLUMN if include_id else None,
+                                    label_col=LABEL_COLUMN if include_label else None)
+    raise ValueError(f"Unknown feature view: {view} (expected one of {[v[0] for v in FEATURE_VIEWS]})")
+
+def parse_date(value):
+    """date from a date, datetime or 'YYYY-MM-DD' string (None stays None)"""
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    return date.fromisoformat(str(value))
+
+def view_dir(view, store_dir=DEFAULT_STORE_DIR):
+    """Snapshot root of one view"""
+    return Path(store_dir) / view.split('.')[-1]
+
+def partition_dir(view, snapshot_date, store_dir=DEFAULT_STORE_DIR):
+    """Partition directory of one dated snapshot"""
+    return view_dir(view, store_dir) / f"{PARTITION_KEY}={parse_date(snapshot_date).isoformat()}"
+
+def row_hashes(table):
+    """uint64 hash per row (column order matters, row order does not)"""
+    import pandas as pd
+    return pd.util.hash_pandas_object(table.to_pandas(), index=False).to_numpy(dtype=np.uint64)
+
+def content_sha256(schema, hashes):
+    """Order-independent content hash from the schema and the per-row hashes"""
+    digest = hashlib.sha256(str(schema).encode('utf-8'))
+    digest.update(np.sort(np.concatenate(hashes) if hashes else np.empty(0, np.uint64)).tobytes())
+    return digest.hexdigest()
+
+def _fetch_batches(connection, query, batch_rows):
+    """Arrow tables of batch_rows rows (oracledb DataFrame fetch, pd.read_sql fallback)"""
+    import pyarrow as pa
+
+    if hasattr(connection, 'fetch_df_batches'):
+        for batch in connection.fetch_df_batches(statement=query, size=batch_rows):
+            yield pa.table(batch)
+        return
+
+    import pandas as pd
+    for chunk in pd.read_sql(query, connection, chunksize=batch_rows):
+        yield pa.Table.from_pandas(chunk, preserve_index=False)
+
+def _make_read_only(directory):
+    """Drop write permission on the snapshot files and directory"""
+    for path in list(directory.iterdir()) + [directory]:
+        mode = path.stat().st_mode
+        path.chmod(mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+def read_manifest(view, snapshot_date, store_dir=DEFAULT_STORE_DIR):
+    """Manifest of one snapshot, None if it does not exist"""
+    path = partition_dir(view, snapshot_date, store_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_snapshot(connection, view, snapshot_date=None, store_dir=DEFAULT_STORE_DIR,
+                   batch_rows=DEFAULT_BATCH_ROWS, part_rows=DEFAULT_PART_ROWS):
+    """
+    Write the dated snapshot of a feature view (today by default).
+
+    Returns the manifest; an existing snapshot for the date is never rewritten
+    and its manifest is returned with 'existing': True.
+    """
+    import pyarrow.parquet as pq
+
+    snapshot_date = parse_date(snapshot_date) or date.today()
+    final_dir = partition_dir(view, snapshot_date, store_dir)
+    existing = read_manifest(view, snapshot_date, store_dir)
+    if existing:
+        return dict(existing, existing=True)
+
+    query = snapshot_query(view)
+    tmp_dir = final_dir.parent / f".{final_dir.name}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    files, hashes = [], []
+    schema = writer = None
+    part_name, part_count = None, 0
+    try:
+        for batch in _fetch_batches(connection, query, batch_rows):
+            if schema is None:
+                schema = batch.schema
+            elif batch.schema != schema:
+                batch = batch.cast(schema)
+            if batch.num_rows == 0:
+                continue
+            if writer is not None and part_count >= part_rows:
+                writer.close()
+                files.append({'name': part_name, 'rows': part_count})
+                writer = None
+            if writer is None:
+                part_name, part_count = f"part-{len(files):05d}.parquet", 0
+                writer = pq.ParquetWriter(str(tmp_dir / part_name), schema, compression='zstd')
+            writer.write_table(batch)
+            part_count += batch.num_rows
+            hashes.append(row_hashes(batch))
+        if writer is not None:
+            writer.close()
+            files.append({'name': part_name, 'rows': part_count})
+            writer = None
+        if not files:
+            raise ValueError(f"{view} returned no rows, nothing to snapshot")
+
+        for entry in files:
+            path = tmp_dir / entry['name']
+            entry['bytes'] = path.stat().st_size
+            entry['sha256'] = file_sha256(path)
+
+        manifest = {
+            'version': STORE_VERSION,
+            'view': view,
+            'snapshot_date': snapshot_date.isoformat(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'query': query,
+            'rows': sum(entry['rows'] for entry in files),
+            'columns': [{'name': field.name, 'type': str(field.type)} for field in schema],
+            'content_sha256': content_sha256(schema, hashes),
+            'files': files
+        }
+        with open(tmp_dir / MANIFEST_NAME, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Atomic publish: readers see the whole partition or none of it
+        os.rename(tmp_dir, final_dir)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _make_read_only(final_dir)
+    return manifest
+
+def list_snapshots(view, store_dir=DEFAULT_STORE_DIR):
+    """Snapshot dates of a view, oldest first (published partitions only)"""
+    root = view_dir(view, store_dir)
+    if not root.exists():
+        return []
+    prefix = f"{PARTITION_KEY}="
+    return sorted(
+        date.fromisoformat(path.name[len(prefix):])
+        for path in root.iterdir()
+        if path.name.startswith(prefix) and (path / MANIFEST_NAME).exists()
+    )
+
+def resolve_snapshot(view, as_of=None, store_dir=DEFAULT_STORE_DIR):
+    """Manifest of the newest snapshot on or before as_of (None: newest)"""
+    as_of = parse_date(as_of)
+    dates = [d for d in list_snapshots(view, store_dir) if as_of is None or d <= as_of]
+    if not dates:
+        raise FileNotFoundError(f"No snapshot of {view}{f' on or before {as_of}' if as_of else ''} "
+                                f"in {view_dir(view, store_dir)}")
+    return read_manifest(view, dates[-1], store_dir)
+
+def verify_snapshot(manifest, store_dir=DEFAULT_STORE_DIR, content=False):
+    """
+    Check a snapshot's files against its manifest (SHA-256 per file).
+
+    content=True also re-reads the data and recomputes the content hash.
+    Raises ValueError on any mismatch.
+    """
+    import pyarrow.parquet as pq
+
+    directory = partition_dir(manifest['view'], manifest['snapshot_date'], store_dir)
+    for entry in manifest['files']:
+        path = directory / entry['name']
+        if not path.exists():
+            raise ValueError(f"Snapshot file missing: {path}")
+        if file_sha256(path) != entry['sha256']:
+            raise ValueError(f"Snapshot file {path.name} of {manifest['view']} {manifest['snapshot_date']} "
+                             f"does not match its manifest hash")
+    if content:
+        tables = [pq.read_table(directory / entry['name']) for entry in manifest['files']]
+        actual = content_sha256(tables[0].schema, [row_hashes(t) for t in tables])
+        if actual != manifest['content_sha256']:
+            raise ValueError(f"Content hash mismatch for {manifest['view']} {manifest['snapshot_date']} "
+                             f"({actual[:12]} != {manifest['content_sha256'][:12]})")
+    return True
+
+def load_snapshot(view, as_of=None, columns=None, filter=None, store_dir=DEFAULT_STORE_DIR,
+                  expected_sha256=None, verify=True):
+    """
+    Read the snapshot of a view as of a date (newest snapshot_date <= as_of).
+
+    Only that partition is read (snapshot_date filter on the hive-partitioned
+    dataset), and only `columns` when given; filter is an extra pyarrow
+    expression (e.g. ds.field('CHURNED') == 1). expected_sha256 pins the
+    content hash (e.g. the one recorded in MODEL_REGISTRY).
+    Returns (pyarrow.Table, manifest).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    manifest = resolve_snapshot(view, as_of, store_dir)
+    if expected_sha256 and manifest['content_sha256'] != expected_sha256:
+        raise ValueError(f"Snapshot {view} {manifest['snapshot_date']} has content hash "
+                         f"{manifest['content_sha256'][:12]}, expected {expected_sha256[:12]}")
+    if verify:
+        verify_snapshot(manifest, store_dir)
+
+    dataset = ds.dataset(
+        str(view_dir(view, store_dir)), format='parquet',
+        partitioning=ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor='hive')
+    )
+    predicate = ds.field(PARTITION_KEY) == manifest['snapshot_date']
+    if filter is not None:
+        predicate = predicate & filter
+    columns = list(columns) if columns else [c['name'] for c in manifest['columns']]
+    return dataset.to_table(columns=columns, filter=predicate), manifest
+
+def snapshot_reference(manifest):
+    """Compact snapshot reference for model metadata / MODEL_REGISTRY.TRAINING_PARAMETERS"""
+    return {
+        'view': manifest['view'],
+        'snapshot_date': manifest['snapshot_date'],
+        'content_sha256': manifest['content_sha256'],
+        'rows': manifest['rows']
+    }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Shared fitted imputation profile
+Used by prepare_dataset_for_oml.py (fit / apply) and train_churn_model_local.py
+(fill values saved with the model preprocessing, so scoring imputes identically)
+
+Fitted in one streaming pass with the sketch profiler (stream_profile.py):
+    numeric columns       median (exact from value counts for low-cardinality
+                          columns, t-digest otherwise; integral columns stay
+                          integral) and 99th percentile (outlier caps)
+    categorical columns   mode (exact while the column has few distinct values,
+                          else 'Unknown')
+
+The profile is a small JSON artifact. apply() fills a chunk, a whole file or a
+scoring batch with one vectorized fillna; feature_fill_values() gives the same
+medians keyed by model feature names for FeaturePreprocessor.
+
+Usage:
+    imputation = fit_csv('data/raw/ecommerce_customer_churn_dataset.csv')
+    imputation.save(DEFAULT_IMPUTATION_PATH)
+
+    imputation = ImputationProfile.load(DEFAULT_IMPUTATION_PATH)
+    chunk, filled = imputation.apply(chunk)
+"""
+
+import json
+from pathlib import Path
+from datetime import datetime
+
+from feature_schema import CSV_COLUMN_MAP, FEATURES_BY_NAME
+from stream_profile import profile_csv, DEFAULT_CHUNK_ROWS
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_IMPUTATION_PATH = project_root / 'data' / 'processed' / 'imputation_profile.json'
+
+IMPUTATION_VERSION = 1
+UNKNOWN_CATEGORY = 'Unknown'
+DEFAULT_EXCLUDE = ('Churned', 'USER_ID')
+
+class ImputationProfile:
+    """Per-column fill values (numeric medians, categorical modes) and p99 caps"""
+
+    def __init__(self, numeric=None, categorical=None, p99=None, rows=0, source=None, fitted_at=None):
+        self.numeric = dict(numeric or {})
+        self.categorical = dict(categorical or {})
+        self.p99 = dict(p99 or {})
+        self.rows = rows
+        self.source = source
+        self.fitted_at = fitted_at
+
+    @classmethod
+    def from_dataset_profile(cls, profile, exclude=DEFAULT_EXCLUDE, source=None):
+        """Fill values from a stream_profile.DatasetProfile"""
+        numeric, categorical, p99 = {}, {}, {}
+        for col, column in profile.columns.items():
+            if col in exclude:
+                continue
+            if column.kind == 'numeric':
+                if column.moments.count:
+                    numeric[col] = float(column.median())
+                    p99[col] = float(column.digest.quantile(0.99))
+            else:
+                mode = column.mode()
+                categorical[col] = mode if mode is not None else UNKNOWN_CATEGORY
+        return cls(numeric, categorical, p99, rows=profile.rows, source=str(source) if source else None,
+                   fitted_at=datetime.now().isoformat(timespec='seconds'))
+
+    @property
+    def fills(self):
+        """{column: fill value} for fillna"""
+        return {**self.numeric, **self.categorical}
+
+    def apply(self, df):
+        """Fill missing values (one vectorized fillna); returns (df, {column: filled count})"""
+        fills = {col: value for col, value in self.fills.items() if col in df.columns}
+        if not fills:
+            return df, {}
+        missing = df[list(fills)].isna().sum()
+        missing = missing[missing > 0]
+        if missing.empty:
+            return df, {}
+        return df.fillna({col: fills[col] for col in missing.index}), missing.astype(int).to_dict()
+
+    def feature_fill_values(self, feature_cols):
+        """Fill values for model features (table names), schema default where no median was fitted"""
+        by_feature = {CSV_COLUMN_MAP.get(col, col.upper()): value for col, value in self.numeric.items()}
+        return [
+            float(by_feature[c]) if c in by_feature else
+            float(FEATURES_BY_NAME[c].fill) if c in FEATURES_BY_NAME else 0.0
+            for c in feature_cols
+        ]
+
+    def to_dict(self):
+        return {
+            'version': IMPUTATION_VERSION,
+            'rows': self.rows,
+            'source': self.source,
+            'fitted_at': self.fitted_at,
+            'numeric': self.numeric,
+            'categorical': self.categorical,
+            'p99': self.p99
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['numeric'], data['categorical'], data.get('p99'), rows=data.get('rows', 0),
+                   source=data.get('source'), fitted_at=data.get('fitted_at'))
+
+    def save(self, path=DEFAULT_IMPUTATION_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path=DEFAULT_IMPUTATION_PATH):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def fit_csv(csv_path, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, exclude=DEFAULT_EXCLUDE):
+    """Fit an ImputationProfile in one streaming pass over a CSV"""
+    profile = profile_csv(csv_path, chunk_rows=chunk_rows, workers=workers)
+    return ImputationProfile.from_dataset_profile(profile, exclude=exclude, source=csv_path)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared utility for benchmarking candidate churn models at inference time
+and selecting the best model within a latency/size budget.
+Used by both the local training script and the local model comparison script
+
+Measures per candidate:
+    - Single-row latency (p50/p99, milliseconds)
+    - Batch throughput (rows/sec) at several batch sizes
+    - Model load time (unpickle, milliseconds)
+    - Artifact size (pickled bytes, same format save_model writes)
+"""
+
+import pickle
+import time
+import numpy as np
+
+DEFAULT_BATCH_SIZES = (100, 1000, 10000)
+DEFAULT_SINGLE_ROW_ITERATIONS = 200
+DEFAULT_LOAD_ITERATIONS = 5
+
+def _take_rows(X, indices):
+    """Select rows by position from a DataFrame or ndarray"""
+    if hasattr(X, 'iloc'):
+        return X.iloc[indices]
+    return X[indices]
+
+def measure_single_row_latency(model, X, iterations=DEFAULT_SINGLE_ROW_ITERATIONS):
+    """Time predict_proba on one row at a time and return p50/p99 in ms"""
+    n_rows = len(X)
+    # Warm-up call so lazy initialisation is not counted
+    model.predict_proba(_take_rows(X, [0]))
+
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        row = _take_rows(X, [i % n_rows])
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings[i] = (time.perf_counter() - start) * 1000
+
+    return {
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99))
+    }
+
+def measure_batch_throughput(model, X, batch_sizes=DEFAULT_BATCH_SIZES, repeats=3):
+    """Time predict_proba on batches and return rows/sec per batch size"""
+    n_rows = len(X)
+    throughput = {}
+
+    for batch_size in batch_sizes:
+        # Tile the sample when it is smaller than the batch
+        batch = _take_rows(X, np.arange(batch_size) % n_rows)
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.predict_proba(batch)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        throughput[str(batch_size)] = float(batch_size / best) if best > 0 else float('inf')
+
+    return throughput
+
+def measure_load(model, iterations=DEFAULT_LOAD_ITERATIONS):
+    """Return pickled artifact size and median unpickle time"""
+    payload = pickle.dumps(model)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        pickle.loads(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'artifact_size_bytes': len(payload),
+        'load_time_ms': float(np.median(timings))
+    }
+
+def benchmark_model(model, X, batch_sizes=DEFAULT_BATCH_SIZES,
+                    single_row_iterations=DEFAULT_SINGLE_ROW_ITERATIONS):
+    """Run all inference microbenchmarks for one fitted model"""
+    latency = measure_single_row_latency(model, X, iterations=single_row_iterations)
+    throughput = measure_batch_throughput(model, X, batch_sizes=batch_sizes)
+    load = measure_load(model)
+
+    return {
+        'single_row_p50_ms': latency['p50_ms'],
+        'single_row_p99_ms': latency['p99_ms'],
+        'throughput_rows_per_sec': throughput,
+        'load_time_ms': load['load_time_ms'],
+        'artifact_size_bytes': load['artifact_size_bytes']
+    }
+
+def within_budget(benchmark, max_p99_ms=None, max_artifact_mb=None, max_load_ms=None):
+    """Check a benchmark result against the latency/size budget"""
+    if max_p99_ms is not None and benchmark['single_row_p99_ms'] > max_p99_ms:
+        return False
+    if max_artifact_mb is not None and benchmark['artifact_size_bytes'] > max_artifact_mb * 1024 * 1024:
+        return False
+    if max_load_ms is not None and benchmark['load_time_ms'] > max_load_ms:
+        return False
+    return True
+
+def select_model(results, max_p99_ms=None, max_artifact_mb=None, max_load_ms=None):
+    """
+    Pick the best-AUC result whose benchmark fits the budget.
+
+    Each result is a dict with at least 'model_name', 'auc' and 'benchmark'.
+    If no candidate fits, the candidate with the lowest p99 latency is
+    returned so the pipeline can still produce a model.
+
+    Returns (selected_result, fits_budget).
+    """
+    eligible = [
+        r for r in results
+        if within_budget(r['benchmark'], max_p99_ms, max_artifact_mb, max_load_ms)
+    ]
+
+    if eligible:
+        return max(eligible, key=lambda r: r['auc']), True
+
+    fallback = min(results, key=lambda r: r['benchmark']['single_row_p99_ms'])
+    return fallback, False
+
+def format_size(num_bytes):
+    """Format a byte count for display"""
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.1f} MB"
+    return f"{num_bytes / 1024:.1f} KB"
+
+def print_benchmark_table(results, batch_sizes=DEFAULT_BATCH_SIZES):
+    """Print a latency/throughput/size table for benchmarked results"""
+    throughput_headers = ''.join(f"{'rows/s@' + str(b):<16}" for b in batch_sizes)
+    print(f"\n{'Model':<20} {'AUC':<8} {'p50 ms':<9} {'p99 ms':<9} {throughput_headers}{'Load ms':<10} {'Size':<10}")
+    print("-" * (70 + 16 * len(batch_sizes)))
+
+    for r in sorted(results, key=lambda x: x['auc'], reverse=True):
+        b = r['benchmark']
+        throughput_cells = ''.join(
+            f"{b['throughput_rows_per_sec'].get(str(size), 0):<16,.0f}" for size in batch_sizes
+        )
+        print(
+            f"{r['model_name']:<20} {r['auc']:<8.4f} {b['single_row_p50_ms']:<9.3f} "
+            f"{b['single_row_p99_ms']:<9.3f} {throughput_cells}{b['load_time_ms']:<10.1f} "
+            f"{format_size(b['artifact_size_bytes']):<10}"
+        )
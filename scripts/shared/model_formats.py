@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Shared native model formats (no pickle) with a JSON manifest
+Used by the local training script (save) and the local scorer (load)
+
+Formats:
+    XGBoost                      <model>.ubj    Universal Binary JSON (Booster.save_model)
+    CatBoost                     <model>.cbm    CatBoost binary model
+    sklearn GradientBoosting     <model>.onnx   ONNX via skl2onnx (optional dependency)
+
+Each native file is described by <model>.manifest.json: format, file, library
+version, feature order, threshold, size and SHA-256. Loading reads the manifest,
+lets the native runtime open the file directly (XGBoost, CatBoost, ONNX Runtime)
+and reports the load time.
+
+Native artifacts are independent of the Python object graph and of the exact
+library version that produced them, unlike the pickle.
+"""
+
+import json
+import time
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+from artifact_store import file_sha256
+
+MANIFEST_VERSION = 1
+
+def manifest_path_for(model_path):
+    """<model>.manifest.json for a model pickle path"""
+    return Path(model_path).with_suffix('.manifest.json')
+
+def _save_xgboost(model, base_path):
+    import xgboost
+    path = base_path.with_suffix('.ubj')
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    booster.save_model(str(path))
+    return path, 'xgboost-ubj', 'xgboost', xgboost.__version__
+
+def _save_catboost(model, base_path):
+    import catboost
+    path = base_path.with_suffix('.cbm')
+    model.save_model(str(path), format='cbm')
+    return path, 'catboost-cbm', 'catboost', catboost.__version__
+
+def _save_onnx(model, base_path, n_features):
+    import sklearn
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    path = base_path.with_suffix('.onnx')
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[('input', FloatTensorType([None, n_features]))],
+        options={id(model): {'zipmap': False}}
+    )
+    with open(path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    return path, 'onnx', 'scikit-learn', sklearn.__version__
+
+def save_native_model(model, model_path, feature_cols, threshold, model_name=None):
+    """
+    Write the native format for a fitted model next to its pickle plus a manifest.
+
+    Returns the manifest dict, or None when the model type has no native format
+    (or the optional converter is not installed).
+    """
+    base_path = Path(model_path)
+    module = type(model).__module__
+
+    try:
+        if module.startswith('xgboost'):
+            path, fmt, library, version = _save_xgboost(model, base_path)
+        elif module.startswith('catboost'):
+            path, fmt, library, version = _save_catboost(model, base_path)
+        elif module.startswith('sklearn'):
+            path, fmt, library, version = _save_onnx(model, base_path, len(feature_cols))
+        else:
+            print(f"⚠️  WARNING: No native format for {type(model).__name__}")
+            return None
+    except ImportError as e:
+        print(f"⚠️  WARNING: Native export skipped ({e})")
+        print("   Install with: pip install skl2onnx onnxruntime")
+        return None
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'model_name': model_name,
+        'format': fmt,
+        'file': path.name,
+        'library': library,
+        'library_version': version,
+        'feature_cols': list(feature_cols),
+        'threshold': float(threshold),
+        'size_bytes': path.stat().st_size,
+        'sha256': file_sha256(path),
+        'created_at': datetime.now().isoformat()
+    }
+
+    with open(manifest_path_for(model_path), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+class _XGBoostNative:
+    """Booster wrapper with an sklearn-style predict_proba"""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict_proba(self, X):
+        if hasattr(X, 'to_numpy'):
+            X = X.to_numpy(dtype=np.float32)
+        p = np.asarray(self.booster.inplace_predict(X), dtype=np.float64)
+        return np.column_stack([1.0 - p, p])
+
+class _OnnxNative:
+    """ONNX Runtime session with an sklearn-style predict_proba"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.proba_name = session.get_outputs()[-1].name
+
+    def predict_proba(self, X):
+        if hasattr(X, 'to_numpy'):
+            X = X.to_numpy(dtype=np.float32)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.asarray(self.session.run([self.proba_name], {self.input_name: X})[0])
+
+def _load_xgboost(path):
+    import xgboost
+    booster = xgboost.Booster()
+    # Let the booster read the UBJSON file itself; load_model() copies any Python buffer it is given
+    booster.load_model(str(path))
+    return _XGBoostNative(booster)
+
+def _load_catboost(path):
+    from catboost import CatBoostClassifier
+    model = CatBoostClassifier()
+    model.load_model(str(path), format='cbm')
+    return model
+
+def _load_onnx(path):
+    import onnxruntime as ort
+    return _OnnxNative(ort.InferenceSession(str(path), providers=['CPUExecutionProvider']))
+
+LOADERS = {
+    'xgboost-ubj': _load_xgboost,
+    'catboost-cbm': _load_catboost,
+    'onnx': _load_onnx,
+}
+
+def load_manifest(manifest_path):
+    """Read a model manifest (None if missing)"""
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+def load_native_model(manifest_path, verify_hash=False):
+    """
+    Load the native model described by a manifest.
+
+    Returns (model, manifest, load_ms); model exposes predict_proba(X).
+    """
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+
+    path = Path(manifest_path).parent / manifest['file']
+    if verify_hash and file_sha256(path) != manifest['sha256']:
+        raise ValueError(f"SHA-256 mismatch for {path.name}")
+
+    loader = LOADERS.get(manifest['format'])
+    if loader is None:
+        raise ValueError(f"Unsupported native model format: {manifest['format']}")
+
+    start = time.perf_counter()
+    model = loader(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    return model, manifest, load_ms
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Shared registry-driven model resolver with an in-process model cache
+Used by the local scorer (and any long-running scoring process)
+
+Resolution:
+    - resolve_model(connection) returns the ACTIVE model with IS_PRODUCTION = 1
+      from OML.MODEL_REGISTRY (newest TRAINING_DATE wins); without a production
+      model it falls back to the newest ACTIVE model, with a warning
+    - resolve_model(connection, model_ref='20260118_184459') returns a named model
+      (MODEL_ID, MODEL_VERSION or MODEL_NAME)
+    - Registry rows are re-read after REGISTRY_TTL_SECONDS, so flipping
+      IS_PRODUCTION is picked up without restarting the process
+
+Verification:
+    The model file is located via MODEL_FILE_PATH (project-relative; older rows
+    hold absolute paths, then models/<file name> is tried), restored from the
+    content-addressed artifact store when missing, and its SHA-256 is compared with
+    the artifact_sha256 recorded at training time (TRAINING_PARAMETERS JSON or
+    the metadata file). File hashes are memoized by (path, size, mtime).
+    Models trained from a feature store snapshot also carry its reference
+    (view, snapshot_date, content_sha256) in TRAINING_PARAMETERS.
+
+Caching:
+    MODEL_CACHE is an LRU of loaded models keyed by (SHA-256, engine), so
+    repeated or multi-model scoring never deserializes the same artifact twice.
+
+Environment variables:
+    CHURN_MODEL_CACHE_SIZE      Max loaded models kept in memory (default: 4)
+    CHURN_REGISTRY_TTL          Seconds a registry lookup is reused (default: 30)
+"""
+
+import os
+import json
+import time
+from pathlib import Path
+from collections import OrderedDict
+
+from artifact_store import resolve_project_path, ensure_local, file_sha256
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_MODEL_DIR = project_root / 'models'
+
+REGISTRY_TTL_SECONDS = float(os.getenv('CHURN_REGISTRY_TTL', '30'))
+
+REGISTRY_COLUMNS = """
+    MODEL_ID, MODEL_NAME, MODEL_VERSION, MODEL_TYPE, MODEL_FILE_PATH,
+    METADATA_FILE_PATH, OPTIMAL_THRESHOLD, IS_PRODUCTION, TRAINING_PARAMETERS
+"""
+
+_registry_memo = {}
+
+class ModelCache:
+    """LRU cache of loaded models keyed by content hash"""
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached model for key, calling loader() once on a miss"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        model = loader()
+        if model is not None:
+            self._entries[key] = model
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return model
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+MODEL_CACHE = ModelCache(max_entries=int(os.getenv('CHURN_MODEL_CACHE_SIZE', '4')))
+
+def _read_lob(value):
+    """CLOB columns come back as LOB objects in some oracledb modes"""
+    return value.read() if hasattr(value, 'read') else value
+
+def _row_to_entry(row):
+    """Registry row → dict"""
+    (model_id, model_name, model_version, model_type, model_file_path,
+     metadata_file_path, optimal_threshold, is_production, training_params) = row
+
+    params = {}
+    training_params = _read_lob(training_params)
+    if training_params:
+        try:
+            params = json.loads(training_params)
+        except ValueError:
+            params = {}
+
+    return {
+        'model_id': model_id,
+        'model_name': model_name,
+        'model_version': model_version,
+        'model_type': model_type,
+        'model_file_path': model_file_path,
+        'metadata_file_path': metadata_file_path,
+        'optimal_threshold': float(optimal_threshold) if optimal_threshold is not None else None,
+        'is_production': bool(is_production),
+        'artifact_sha256': params.get('artifact_sha256'),
+        'feature_snapshot': params.get('feature_snapshot')
+    }
+
+def _query_registry(connection, model_ref=None):
+    """Fetch one registry entry: production (or newest active) model, or a named model"""
+    cursor = connection.cursor()
+    try:
+        if model_ref:
+            cursor.execute(f"""
+                SELECT {REGISTRY_COLUMNS} FROM OML.MODEL_REGISTRY
+                WHERE MODEL_ID = :ref OR MODEL_VERSION = :ref OR UPPER(MODEL_NAME) = UPPER(:ref)
+                ORDER BY IS_PRODUCTION DESC, TRAINING_DATE DESC
+                FETCH FIRST 1 ROWS ONLY
+            """, {'ref': model_ref})
+            row = cursor.fetchone()
+            return _row_to_entry(row) if row else None
+
+        cursor.execute(f"""
+            SELECT {REGISTRY_COLUMNS} FROM OML.MODEL_REGISTRY
+            WHERE STATUS = 'ACTIVE'
+            ORDER BY IS_PRODUCTION DESC, TRAINING_DATE DESC
+            FETCH FIRST 1 ROWS ONLY
+        """)
+        row = cursor.fetchone()
+        return _row_to_entry(row) if row else None
+    finally:
+        cursor.close()
+
+def registry_available(connection):
+    """True when OML.MODEL_REGISTRY exists and is visible to this session"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM all_tables
+            WHERE owner = 'OML' AND table_name = 'MODEL_REGISTRY'
+        """)
+        return cursor.fetchone()[0] > 0
+    finally:
+        cursor.close()
+
+def registry_entry(connection, model_ref=None):
+    """Registry entry without locating or verifying the model file (e.g. its feature snapshot)"""
+    return _query_registry(connection, model_ref)
+
+def _locate(path_value, model_dir):
+    """Registry path if it exists, else the same file name under model_dir (restored from the store)"""
+    if not path_value:
+        return None
+    path = resolve_project_path(path_value)
+    if path.exists():
+        return path
+    local = Path(model_dir) / path.name
+    ensure_local(local)
+    return local if local.exists() else path
+
+def _expected_hash(entry, metadata_path):
+    """Recorded artifact hash from the registry, else from the metadata file"""
+    if entry.get('artifact_sha256'):
+        return entry['artifact_sha256']
+    if metadata_path and metadata_path.exists():
+        try:
+            with open(metadata_path, 'r') as f:
+                return json.load(f).get('artifact_sha256')
+        except (OSError, ValueError):
+            return None
+    return None
+
+def resolve_model(connection, model_ref=None, model_dir=DEFAULT_MODEL_DIR, ttl_seconds=None):
+    """
+    Resolve the production (or a named) model from MODEL_REGISTRY and verify its file.
+
+    Returns a dict with model_id, model_path, metadata_path, sha256, optimal_threshold,
+    is_production; None if the registry has no matching model.
+    Raises FileNotFoundError when the registered model file is missing and
+    ValueError when it does not match the recorded hash.
+    """
+    ttl_seconds = REGISTRY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    memo = _registry_memo.get(model_ref)
+    if memo and time.monotonic() - memo[0] < ttl_seconds:
+        entry = memo[1]
+    else:
+        entry = _query_registry(connection, model_ref)
+        _registry_memo[model_ref] = (time.monotonic(), entry)
+
+    if entry is None:
+        return None
+
+    if not model_ref and not entry['is_production']:
+        print(f"⚠️  WARNING: No production model in MODEL_REGISTRY, using newest active: {entry['model_id']}")
+
+    model_path = _locate(entry['model_file_path'], model_dir)
+    metadata_path = _locate(entry['metadata_file_path'], model_dir)
+    if model_path is None or not model_path.exists():
+        raise FileNotFoundError(f"Model file for {entry['model_id']} not found: {entry['model_file_path']}")
+
+    sha256 = file_sha256(model_path)
+    expected = _expected_hash(entry, metadata_path)
+    if expected and expected != sha256:
+        raise ValueError(
+            f"Model file {model_path.name} does not match registry hash for {entry['model_id']} "
+            f"({sha256[:12]} != {expected[:12]})"
+        )
+    if not expected:
+        print(f"⚠️  WARNING: No artifact hash recorded for {entry['model_id']}, file not verified")
+
+    return dict(
+        entry,
+        model_path=model_path,
+        metadata_path=metadata_path,
+        sha256=sha256,
+        verified=bool(expected)
+    )
+
+def clear_registry_memo():
+    """Force the next resolve_model() to re-read MODEL_REGISTRY"""
+    _registry_memo.clear()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Shared zero-pull OML4Py scoring path
+Used by scripts/oml4py/score_churn_model.py (--mode in-db)
+
+The user features never leave the database:
+    1. Cleaning is a view: CHURN_USER_FEATURES with the FeaturePreprocessor fills
+       applied in SQL, plus a hash partition column (ORA_HASH(USER_ID))
+    2. Prediction runs next to the data:
+         - OML in-database models (oml.xgb, ...) use predict_proba on the view
+           proxy with USER_ID as supplemental column
+         - open-source models saved in the datastore run as embedded Python via
+           oml.group_apply over the hash partitions (parallel degree = partitions)
+    3. The prediction proxy is materialized into a stage table and copied into
+       CHURN_PREDICTIONS with DELETE + INSERT ... SELECT in one transaction
+       (TRUNCATE would auto-commit, leaving the table empty if the insert fails)
+
+All OML calls go through an adapter: OMLAdapter wraps the real oml module,
+FakeOMLAdapter runs the same steps on in-memory SQLite + pandas, so the path
+can be exercised without an Autonomous Database.
+"""
+
+import json
+import zlib
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+CLEAN_VIEW = 'OML.CHURN_USER_FEATURES_CLEAN'
+SOURCE_VIEW = 'OML.CHURN_USER_FEATURES'
+STAGE_TABLE = 'OML.CHURN_SCORES_STAGE'
+PREDICTIONS_TABLE = 'OML.CHURN_PREDICTIONS'
+PARTITION_COLUMN = 'SCORE_PARTITION'
+PROBABILITY_COLUMN = 'CHURN_PROBABILITY'
+DEFAULT_PARTITIONS = 8
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+def clean_view_sql(preprocessor, source=SOURCE_VIEW, id_col='USER_ID', partitions=DEFAULT_PARTITIONS):
+    """SELECT applying the preprocessor fills in SQL, plus a hash partition column"""
+    items = [id_col]
+    for col, fill in zip(preprocessor.feature_cols, preprocessor.fill_values):
+        # ABS(x) < FLT_MAX is false for NULL, NaN and ±inf
+        items.append(f"CASE WHEN ABS({col}) < {FLOAT32_MAX!r} THEN {col} ELSE {float(fill)!r} END AS {col}")
+    items.append(f"ORA_HASH({id_col}, {partitions - 1}) AS {PARTITION_COLUMN}")
+    return "SELECT\n    " + ",\n    ".join(items) + f"\nFROM {source}"
+
+def insert_predictions_sql(stage_table, probability_column, id_col='USER_ID', predictions_table=PREDICTIONS_TABLE):
+    """INSERT ... SELECT from the stage table (binds :threshold, :model_version)"""
+    return f"""INSERT INTO {predictions_table} (
+    USER_ID,
+    PREDICTED_CHURN_PROBABILITY,
+    PREDICTED_CHURN_LABEL,
+    RISK_SCORE,
+    MODEL_VERSION,
+    PREDICTION_DATE
+)
+SELECT
+    TO_CHAR({id_col}),
+    ROUND("{probability_column}", 4),
+    CASE WHEN "{probability_column}" >= :threshold THEN 1 ELSE 0 END,
+    LEAST(GREATEST(TRUNC("{probability_column}" * 100), 0), 100),
+    :model_version,
+    CURRENT_TIMESTAMP
+FROM {stage_table}"""
+
+def score_partition(df, ds_name=None, feature_cols=None, id_col='USER_ID', model=None,
+                    probability_column=PROBABILITY_COLUMN):
+    """
+    Embedded-execution scoring function (one hash partition per call).
+
+    Runs inside the database's Python engine: the model is loaded from the OML
+    datastore there (model= is only passed by the local fake). Self-contained:
+    only its own imports are available in the embedded engine.
+    """
+    import json
+    import numpy as np
+    import pandas as pd
+
+    if model is None:
+        import oml
+        model = oml.ds.load(name=ds_name, objs=['model'], to_globals=False)['model']
+
+    feature_cols = json.loads(feature_cols) if isinstance(feature_cols, str) else feature_cols
+    X = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    X_model = pd.DataFrame(X, columns=feature_cols, copy=False)
+    p = np.asarray(model.predict_proba(X_model))[:, 1]
+    return pd.DataFrame({id_col: df[id_col].astype(str).to_numpy(), probability_column: p})
+
+def _split_name(name):
+    """'OML.VIEW' → ('OML', 'VIEW')"""
+    schema, _, table = name.rpartition('.')
+    return (schema or None), table
+
+def is_in_database_model(model):
+    """True for OML in-database models (scored with predict_proba on a proxy)"""
+    return type(model).__module__.split('.')[0] == 'oml'
+
+class OMLAdapter:
+    """Thin wrapper over the oml module (OML Notebooks / OML4Py client)"""
+
+    def __init__(self, oml):
+        self.oml = oml
+
+    def execute(self, sql, binds=None, commit=False):
+        cursor = self.oml.cursor()
+        try:
+            cursor.execute(sql, binds or {})
+            rowcount = cursor.rowcount
+            if commit:
+                cursor.execute("COMMIT")
+            return rowcount
+        finally:
+            cursor.close()
+
+    def create_view(self, name, select_sql):
+        self.execute(f"CREATE OR REPLACE VIEW {name} AS\n{select_sql}")
+
+    def replace_rows(self, table, insert_sql, binds=None):
+        """DELETE + INSERT ... SELECT in one transaction; rolled back on any error"""
+        cursor = self.oml.cursor()
+        try:
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(insert_sql, binds or {})
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.close()
+
+    def sync(self, name):
+        schema, view = _split_name(name)
+        return self.oml.sync(schema=schema, view=view) if schema else self.oml.sync(view=view)
+
+    def predict(self, model, data, feature_cols, id_col='USER_ID'):
+        """In-database predict_proba keeping id_col alongside the probabilities"""
+        return model.predict_proba(data[feature_cols], supplemental_cols=data[[id_col]])
+
+    def group_apply(self, data, index_col, func, parallel, func_value, **kwargs):
+        return self.oml.group_apply(
+            data, index=data[[index_col]], func=func, func_value=func_value,
+            parallel=parallel, oml_connect=True, **kwargs
+        )
+
+    def materialize(self, proxy, table):
+        schema, name = _split_name(table)
+        try:
+            self.oml.drop(table=name, schema=schema) if schema else self.oml.drop(table=name)
+        except Exception:
+            pass
+        return proxy.materialize(table=name, schema=schema) if schema else proxy.materialize(table=name)
+
+    def columns(self, proxy):
+        return list(proxy.columns)
+
+    def count(self, table):
+        cursor = self.oml.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+class FakeOMLAdapter:
+    """
+    Local stand-in for OMLAdapter: in-memory SQLite for SQL (the OML. schema
+    prefix is dropped), pandas DataFrames for proxies, a dict for the datastore.
+    fail_after_insert=True makes replace_rows() fail after its INSERT, to check
+    that the rollback keeps the previous rows.
+    """
+
+    def __init__(self, datastore=None, fail_after_insert=False):
+        self.connection = sqlite3.connect(':memory:')
+        self.connection.create_function('ORA_HASH', 2, lambda v, n: zlib.crc32(str(v).encode()) % (int(n) + 1))
+        self.connection.create_function('TO_CHAR', 1, lambda v: None if v is None else str(v))
+        self.connection.create_function('TRUNC', 1, lambda v: None if v is None else float(int(v)))
+        self.connection.create_function('LEAST', 2, lambda a, b: min(a, b))
+        self.connection.create_function('GREATEST', 2, lambda a, b: max(a, b))
+        self.datastore = datastore or {}
+        self.fail_after_insert = fail_after_insert
+        self.calls = []
+
+    @staticmethod
+    def _local(sql):
+        return sql.replace('OML.', '')
+
+    def execute(self, sql, binds=None, commit=False):
+        self.calls.append(('execute', sql.split()[0].upper()))
+        cursor = self.connection.execute(self._local(sql), binds or {})
+        if commit:
+            self.connection.commit()
+        return cursor.rowcount
+
+    def create_view(self, name, select_sql):
+        self.connection.execute(self._local(f"DROP VIEW IF EXISTS {name}"))
+        self.execute(f"CREATE VIEW {name} AS\n{select_sql}")
+
+    def replace_rows(self, table, insert_sql, binds=None):
+        self.calls.append(('replace_rows', table))
+        try:
+            self.connection.execute(self._local(f"DELETE FROM {table}"))
+            self.connection.execute(self._local(insert_sql), binds or {})
+            if self.fail_after_insert:
+                raise sqlite3.OperationalError("injected failure after INSERT")
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+    def load_table(self, table, df):
+        """Create/replace a table from a DataFrame (test data setup)"""
+        df.to_sql(_split_name(table)[1], self.connection, if_exists='replace', index=False)
+
+    def sync(self, name):
+        self.calls.append(('sync', name))
+        return pd.read_sql(self._local(f"SELECT * FROM {name}"), self.connection)
+
+    def predict(self, model, data, feature_cols, id_col='USER_ID'):
+        self.calls.append(('predict', len(data)))
+        p = np.asarray(model.predict_proba(data[feature_cols]))[:, 1]
+        return pd.DataFrame({id_col: data[id_col].to_numpy(), PROBABILITY_COLUMN: p})
+
+    def group_apply(self, data, index_col, func, parallel, func_value, **kwargs):
+        self.calls.append(('group_apply', parallel))
+        if 'model' not in kwargs and kwargs.get('ds_name') in self.datastore:
+            kwargs['model'] = self.datastore[kwargs['ds_name']]['model']
+        parts = [func(group, **kwargs) for _, group in data.groupby(index_col)]
+        return pd.concat(parts, ignore_index=True) if parts else func_value.iloc[:0]
+
+    def materialize(self, proxy, table):
+        self.calls.append(('materialize', table))
+        self.load_table(table, proxy)
+        return proxy
+
+    def columns(self, proxy):
+        return list(proxy.columns)
+
+    def count(self, table):
+        return self.connection.execute(self._local(f"SELECT COUNT(*) FROM {table}")).fetchone()[0]
+
+def score_in_database(adapter, model, preprocessor, threshold=0.5, model_version='v1.0',
+                      ds_name=None, partitions=DEFAULT_PARTITIONS, id_col='USER_ID',
+                      source=SOURCE_VIEW, clean_view=CLEAN_VIEW, stage_table=STAGE_TABLE):
+    """
+    Clean, score and store predictions without pulling user rows to the client.
+
+    Returns the number of rows written to CHURN_PREDICTIONS.
+    """
+    feature_cols = preprocessor.feature_cols
+
+    adapter.create_view(clean_view, clean_view_sql(preprocessor, source, id_col, partitions))
+    print(f"✓ Cleaning view: {clean_view} ({len(feature_cols)} features, {partitions} hash partitions)")
+
+    data = adapter.sync(clean_view)
+
+    if is_in_database_model(model):
+        print("Scoring with the in-database model (predict_proba on the view proxy)...")
+        scores = adapter.predict(model, data, feature_cols, id_col)
+    else:
+        if not ds_name:
+            raise ValueError("ds_name is required to score an open-source model with embedded execution")
+        print(f"Scoring with embedded Python: group_apply over {partitions} partitions...")
+        func_value = pd.DataFrame({id_col: pd.Series(dtype=str), PROBABILITY_COLUMN: pd.Series(dtype=float)})
+        scores = adapter.group_apply(
+            data, PARTITION_COLUMN, score_partition, parallel=partitions, func_value=func_value,
+            ds_name=ds_name, feature_cols=json.dumps(feature_cols), id_col=id_col
+        )
+
+    adapter.materialize(scores, stage_table)
+    probability_column = [c for c in adapter.columns(scores) if c != id_col][-1]
+
+    adapter.replace_rows(
+        PREDICTIONS_TABLE,
+        insert_predictions_sql(stage_table, probability_column, id_col),
+        {'threshold': float(threshold), 'model_version': model_version}
+    )
+    inserted = adapter.count(PREDICTIONS_TABLE)
+    print(f"✓ Stored {inserted:,} predictions in {PREDICTIONS_TABLE} (no client round trip)")
+    return inserted
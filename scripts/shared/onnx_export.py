@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Shared ONNX export of the full scoring pipeline (preprocessing + model)
+Used by the local training script, scripts/local/export_onnx_model.py and the
+local scorer (--engine onnxruntime)
+
+Converters (optional dependencies):
+    XGBoost                      onnxmltools.convert_xgboost
+    CatBoost                     CatBoost's own save_model(format='onnx')
+    sklearn GradientBoosting     skl2onnx.convert_sklearn
+
+The FeaturePreprocessor fill step is prepended to the converted graph
+(Abs → Less(FLT_MAX) → Where(x, fill)), so the artifact scores raw feature rows
+with NaN / ±inf exactly like FeaturePreprocessor.transform() + predict_proba.
+ZipMap outputs are removed: the last graph output is a float tensor [N, 2].
+Feature order, fill values and threshold are stored in the model's
+metadata_props, so the file is self-describing for other runtimes (e.g. loading
+it into the database for in-database scoring).
+
+Saved as <model>.pipeline.onnx next to the pickle.
+
+Environment variables:
+    CHURN_ONNX_THREADS     onnxruntime intra-op threads (default: 0 = all cores)
+"""
+
+import os
+import copy
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+ONNX_TARGET_OPSET = 15
+RAW_INPUT_NAME = 'raw_features'
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+def onnx_path_for(model_path):
+    """<model>.pipeline.onnx for a model pickle path"""
+    return Path(model_path).with_suffix('.pipeline.onnx')
+
+def _convert_xgboost(model, n_features):
+    from onnxmltools import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    # The converter only understands f0..fN feature names
+    model = copy.deepcopy(model)
+    model.get_booster().feature_names = [f'f{i}' for i in range(n_features)]
+    return convert_xgboost(
+        model,
+        initial_types=[('features', FloatTensorType([None, n_features]))],
+        target_opset=ONNX_TARGET_OPSET
+    )
+
+def _convert_catboost(model, n_features):
+    import onnx
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'model.onnx'
+        model.save_model(str(path), format='onnx')
+        return onnx.load(str(path))
+
+def _convert_sklearn(model, n_features):
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    return convert_sklearn(
+        model,
+        initial_types=[('features', FloatTensorType([None, n_features]))],
+        options={id(model): {'zipmap': False}},
+        target_opset=ONNX_TARGET_OPSET
+    )
+
+def _strip_zipmap(onnx_model):
+    """Replace ZipMap (sequence of maps) outputs with the probability tensor feeding them"""
+    from onnx import helper, TensorProto
+
+    graph = onnx_model.graph
+    for node in [n for n in graph.node if n.op_type == 'ZipMap']:
+        source, target = node.input[0], node.output[0]
+        graph.node.remove(node)
+        for i, output in enumerate(graph.output):
+            if output.name == target:
+                graph.output.remove(output)
+                graph.output.insert(i, helper.make_tensor_value_info(source, TensorProto.FLOAT, [None, 2]))
+                break
+
+def _bake_preprocessing(onnx_model, fill_values):
+    """Prepend the non-finite fill step so the graph accepts raw feature rows"""
+    from onnx import helper, TensorProto
+
+    graph = onnx_model.graph
+    model_input = graph.input[0].name
+    n_features = len(fill_values)
+
+    nodes = [
+        helper.make_node('Abs', [RAW_INPUT_NAME], ['pre_abs']),
+        helper.make_node('Less', ['pre_abs', 'pre_float_max'], ['pre_is_finite']),
+        helper.make_node('Where', ['pre_is_finite', RAW_INPUT_NAME, 'pre_fill_values'], [model_input]),
+    ]
+    # IR < 4 (CatBoost writes IR 3) requires every initializer to be a graph input
+    if onnx_model.ir_version < 4:
+        onnx_model.ir_version = 4
+    graph.initializer.extend([
+        helper.make_tensor('pre_float_max', TensorProto.FLOAT, [], [FLOAT32_MAX]),
+        helper.make_tensor('pre_fill_values', TensorProto.FLOAT, [n_features], list(map(float, fill_values))),
+    ])
+    for node in reversed(nodes):
+        graph.node.insert(0, node)
+
+    del graph.input[0]
+    graph.input.insert(0, helper.make_tensor_value_info(RAW_INPUT_NAME, TensorProto.FLOAT, [None, n_features]))
+
+    # Where needs opset 9; tree-only graphs (CatBoost) may declare less for the default domain
+    default = [o for o in onnx_model.opset_import if o.domain in ('', 'ai.onnx')]
+    if not default:
+        onnx_model.opset_import.append(helper.make_opsetid('', 9))
+    elif default[0].version < 9:
+        default[0].version = 9
+
+def export_onnx_pipeline(model, preprocessor, threshold=0.5, model_name=None):
+    """
+    Convert a fitted model plus its FeaturePreprocessor into one ONNX model.
+
+    Raises ValueError for unsupported model types and ImportError when the
+    converter is not installed.
+    """
+    import onnx
+
+    feature_cols = preprocessor.feature_cols
+    module = type(model).__module__
+    if module.startswith('xgboost'):
+        onnx_model = _convert_xgboost(model, len(feature_cols))
+    elif module.startswith('catboost'):
+        onnx_model = _convert_catboost(model, len(feature_cols))
+    elif module.startswith('sklearn'):
+        onnx_model = _convert_sklearn(model, len(feature_cols))
+    else:
+        raise ValueError(f"No ONNX converter for {type(model).__name__}")
+
+    _strip_zipmap(onnx_model)
+    _bake_preprocessing(onnx_model, preprocessor.fill_values)
+
+    props = {
+        'model_name': model_name or type(model).__name__,
+        'feature_cols': json.dumps(list(feature_cols)),
+        'fill_values': json.dumps(list(preprocessor.fill_values)),
+        'threshold': str(float(threshold)),
+        'positive_class_output': onnx_model.graph.output[-1].name
+    }
+    onnx.helper.set_model_props(onnx_model, props)
+    onnx.checker.check_model(onnx_model)
+    return onnx_model
+
+def save_onnx_pipeline(onnx_model, path):
+    """Write an ONNX model; returns the path"""
+    path = Path(path)
+    with open(path, 'wb') as f:
+        f.write(onnx_model.SerializeToString())
+    return path
+
+class OnnxPipelineModel:
+    """onnxruntime session over a pipeline artifact, with an sklearn-style predict_proba"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.proba_name = session.get_outputs()[-1].name
+        props = session.get_modelmeta().custom_metadata_map
+        self.feature_cols = json.loads(props['feature_cols']) if 'feature_cols' in props else None
+        self.threshold = float(props['threshold']) if 'threshold' in props else None
+
+    def predict_proba(self, X):
+        if hasattr(X, 'to_numpy'):
+            if self.feature_cols is not None:
+                X = X[self.feature_cols]
+            X = X.to_numpy(dtype=np.float32)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return np.asarray(self.session.run([self.proba_name], {self.input_name: X})[0])
+
+def load_onnx_pipeline(path, threads=None):
+    """Open a pipeline artifact (path or serialized bytes) with multithreaded CPU execution; returns (model, load_ms)"""
+    import onnxruntime as ort
+
+    if threads is None:
+        threads = int(os.getenv('CHURN_ONNX_THREADS', '0'))
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    start = time.perf_counter()
+    source = path if isinstance(path, bytes) else str(path)
+    session = ort.InferenceSession(source, sess_options=options, providers=['CPUExecutionProvider'])
+    load_ms = (time.perf_counter() - start) * 1000
+    return OnnxPipelineModel(session), load_ms
+
+def check_pipeline_parity(model, onnx_model, preprocessor, X, atol=1e-4, non_finite_fraction=0.05, random_state=42):
+    """
+    Compare the ONNX pipeline on raw rows (with injected NaN / ±inf) against
+    preprocessor.transform() + model.predict_proba; returns a report dict
+    """
+    rng = np.random.default_rng(random_state)
+    X_raw = preprocessor._to_matrix(X).copy()
+    mask = rng.random(X_raw.shape) < non_finite_fraction
+    X_raw[mask] = rng.choice(np.array([np.nan, np.inf, -np.inf], dtype=np.float32), size=int(mask.sum()))
+
+    expected = np.asarray(model.predict_proba(preprocessor.transform(X_raw.copy())))[:, 1]
+    actual = onnx_model.predict_proba(X_raw)[:, 1]
+    max_abs_diff = float(np.max(np.abs(expected - actual))) if len(X_raw) else 0.0
+
+    return {
+        'rows': int(len(X_raw)),
+        'non_finite_cells': int(mask.sum()),
+        'max_abs_diff': max_abs_diff,
+        'atol': atol,
+        'passed': max_abs_diff <= atol
+    }
+
+def _best_ms(fn, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def benchmark_onnx_pipeline(model, onnx_source, preprocessor, X, thread_counts=(1, 0), repeats=3):
+    """
+    Batch latency of preprocessing + predict_proba vs the ONNX pipeline at each
+    intra-op thread count (0 = all cores); returns a list of result dicts
+    """
+    X_raw = preprocessor._to_matrix(X).copy()
+    rows = len(X_raw)
+    results = []
+
+    batch_ms = _best_ms(lambda: model.predict_proba(preprocessor.transform(X_raw.copy())), repeats)
+    results.append({'runtime': 'predict_proba', 'threads': None, 'load_ms': None,
+                    'batch_ms': batch_ms, 'rows_per_sec': rows / (batch_ms / 1000)})
+
+    for threads in thread_counts:
+        onnx_model, load_ms = load_onnx_pipeline(onnx_source, threads=threads)
+        onnx_model.predict_proba(X_raw[:1])
+        batch_ms = _best_ms(lambda: onnx_model.predict_proba(X_raw), repeats)
+        results.append({'runtime': 'onnxruntime', 'threads': threads, 'load_ms': load_ms,
+                        'batch_ms': batch_ms, 'rows_per_sec': rows / (batch_ms / 1000)})
+    return results
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Shared preprocessing transformer for churn features
+Used by the local and OML4Py training/scoring scripts
+
+One FeaturePreprocessor is fitted at training time and saved with the model
+(metadata JSON for local models, the OML datastore for OML4Py models). Scoring
+rebuilds it from that state, so exactly the same transform is applied:
+
+    - columns selected and ordered as at training time
+    - converted once to a C-contiguous float32 matrix
+    - NaN / +inf / -inf replaced in a single vectorized pass with per-feature
+      fill values (from feature_schema, unless overridden)
+
+Usage:
+    preprocessor = FeaturePreprocessor().fit(X_train)
+    X_train = preprocessor.transform(X_train)
+    metadata['preprocessing'] = preprocessor.to_dict()
+
+    preprocessor = FeaturePreprocessor.from_dict(metadata['preprocessing'])
+    X_users = preprocessor.transform(X_users)
+"""
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import FEATURES_BY_NAME
+
+PREPROCESSOR_VERSION = 1
+
+def fill_non_finite(X, fill_values):
+    """Replace NaN/infinity in place with a per-column fill (single pass)"""
+    fills = np.asarray(fill_values, dtype=X.dtype)
+    if fills.size == 0:
+        return X
+
+    if np.all(fills == fills[0]):
+        np.nan_to_num(X, copy=False, nan=fills[0], posinf=fills[0], neginf=fills[0])
+    else:
+        np.copyto(X, np.broadcast_to(fills, X.shape), where=~np.isfinite(X))
+    return X
+
+class FeaturePreprocessor:
+    """Fitted feature cleaning transform (column order + per-feature fills)"""
+
+    def __init__(self, feature_cols=None, fill_values=None):
+        self.feature_cols = list(feature_cols) if feature_cols is not None else None
+        self.fill_values = list(fill_values) if fill_values is not None else None
+
+    def fit(self, X, feature_cols=None):
+        """Record the feature order and per-feature fill values"""
+        if feature_cols is not None:
+            self.feature_cols = list(feature_cols)
+        elif self.feature_cols is None:
+            if not isinstance(X, pd.DataFrame):
+                raise ValueError("feature_cols is required when fitting on a NumPy matrix")
+            self.feature_cols = list(X.columns)
+
+        if self.fill_values is None or len(self.fill_values) != len(self.feature_cols):
+            self.fill_values = [
+                float(FEATURES_BY_NAME[c].fill) if c in FEATURES_BY_NAME else 0.0
+                for c in self.feature_cols
+            ]
+        return self
+
+    def _to_matrix(self, X):
+        """Select feature columns and return a C-contiguous float32 matrix"""
+        if isinstance(X, pd.DataFrame):
+            missing = [c for c in self.feature_cols if c not in X.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+            X = X[self.feature_cols] if list(X.columns) != self.feature_cols else X
+            if any(dtype == object for dtype in X.dtypes):
+                X = X.apply(pd.to_numeric, errors='coerce')
+            return np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+
+        if X.shape[1] != len(self.feature_cols):
+            raise ValueError(f"Expected {len(self.feature_cols)} features, got {X.shape[1]}")
+        if X.dtype != np.float32 or not X.flags['C_CONTIGUOUS']:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+        return X
+
+    def transform_matrix(self, X):
+        """Clean features into a float32 matrix (in place for float32 input)"""
+        if self.feature_cols is None:
+            raise ValueError("FeaturePreprocessor is not fitted")
+        return fill_non_finite(self._to_matrix(X), self.fill_values)
+
+    def transform(self, X):
+        """Clean features and return a DataFrame with the training column order"""
+        return pd.DataFrame(self.transform_matrix(X), columns=self.feature_cols, copy=False)
+
+    def fit_transform(self, X, feature_cols=None):
+        """fit() then transform()"""
+        return self.fit(X, feature_cols).transform(X)
+
+    def to_dict(self):
+        """JSON-serializable state (stored with the model)"""
+        return {
+            'version': PREPROCESSOR_VERSION,
+            'feature_cols': self.feature_cols,
+            'fill_values': self.fill_values,
+            'dtype': 'float32'
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild a fitted preprocessor from to_dict() output"""
+        return cls(feature_cols=state['feature_cols'], fill_values=state['fill_values'])
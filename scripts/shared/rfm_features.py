@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Shared incremental RFM (recency / frequency / monetary) feature builder
+Used by refresh_rfm_features.py
+
+Keeps USER_PROFILES' purchase features current from the real orders in
+ADMIN.ORDERS_PROFILE_V instead of the static CSV they were loaded from:
+    TOTAL_PURCHASES            orders per user
+    LIFETIME_VALUE             sum of order values
+    AVERAGE_ORDER_VALUE        LIFETIME_VALUE / TOTAL_PURCHASES
+    DAYS_SINCE_LAST_PURCHASE   TRUNC(SYSDATE) - day of the latest order
+
+Incremental refresh (one transaction, all set-based SQL in the database):
+    1. orders with ORDER_CREATED_AT in (watermark, high] are collapsed to one
+       row per order (the view has one row per order line) and aggregated per
+       user; high is the newest order older than the settle window, so orders
+       still being committed are picked up by the next run
+    2. the per-user deltas are MERGEd into the running aggregates table
+       OML.USER_ORDER_AGGREGATES (counts and sums add, first / last order
+       extend), tagging the touched users with the run id
+    3. the changed users' features are bulk-MERGEd into USER_PROFILES
+    4. once per day the recency of every other user is rolled forward from the
+       aggregates (no order scan), updating only rows whose value changes
+    5. the watermark advances in OML.FEATURE_REFRESH_STATE
+A refresh reads only the orders since the last one; a failure rolls back the
+aggregates, the profiles and the watermark together. rebuild=True resets the
+aggregates and replays every order (e.g. after back-dated order corrections).
+
+Usage:
+    connection = get_connection()
+    stats = refresh_rfm_features(connection)
+"""
+
+import time
+from collections import namedtuple
+
+from db import create_if_missing
+
+JOB_NAME = 'RFM_FEATURES'
+STATE_TABLE = 'OML.FEATURE_REFRESH_STATE'
+AGGREGATE_TABLE = 'OML.USER_ORDER_AGGREGATES'
+PROFILE_TABLE = 'OML.USER_PROFILES'
+DEFAULT_SETTLE_MINUTES = 5
+
+# Order source columns. amount_aggregate is 'MAX' when the amount is the order
+# total repeated on every line, 'SUM' when it is a per-line amount.
+OrderSource = namedtuple(
+    'OrderSource',
+    ['view', 'user_column', 'order_column', 'created_column', 'amount_column', 'amount_aggregate',
+     'status_column', 'excluded_statuses'],
+    defaults=('ADMIN.ORDERS_PROFILE_V', 'USER_ID', 'ORDER_ID', 'ORDER_CREATED_AT', 'ORDER_TOTAL', 'MAX',
+              None, ('cancelled',))
+)
+
+def ensure_refresh_tables(connection):
+    """Create the state and aggregate tables unless they exist (also in sql/create_churn_tables.sql)"""
+    created = []
+    if create_if_missing(connection, f"""
+        CREATE TABLE {STATE_TABLE} (
+            JOB_NAME VARCHAR2(64) NOT NULL,
+            WATERMARK TIMESTAMP,
+            RECENCY_AS_OF DATE,
+            LAST_RUN_ID NUMBER(12) DEFAULT 0 NOT NULL,
+            ORDERS_PROCESSED NUMBER(12),
+            USERS_CHANGED NUMBER(12),
+            PROFILES_UPDATED NUMBER(12),
+            REFRESHED_AT TIMESTAMP,
+            CONSTRAINT PK_FEATURE_REFRESH_STATE PRIMARY KEY (JOB_NAME)
+        )"""):
+        created.append(STATE_TABLE)
+    if create_if_missing(connection, f"""
+        CREATE TABLE {AGGREGATE_TABLE} (
+            USER_ID VARCHAR2(36) NOT NULL,
+            ORDER_COUNT NUMBER(10) NOT NULL,
+            ORDER_VALUE_SUM NUMBER(14,2) NOT NULL,
+            FIRST_ORDER_AT TIMESTAMP NOT NULL,
+            LAST_ORDER_AT TIMESTAMP NOT NULL,
+            REFRESH_RUN NUMBER(12) NOT NULL,
+            UPDATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT PK_USER_ORDER_AGGREGATES PRIMARY KEY (USER_ID)
+        )"""):
+        created.append(AGGREGATE_TABLE)
+        create_if_missing(connection,
+                           f"CREATE INDEX IDX_USER_ORDER_AGG_RUN ON {AGGREGATE_TABLE}(REFRESH_RUN)")
+    return created
+
+def window_filter(source, low, high=None, settle_minutes=DEFAULT_SETTLE_MINUTES):
+    """WHERE clause and binds for orders in (low, high]
+
+    low None: no lower bound (full build); high None: up to the settle window
+    before now (used to find the next high-water mark).
+    """
+    conditions = [f"{source.user_column} IS NOT NULL"]
+    if high is None:
+        conditions.append(f"{source.created_column} <= SYSTIMESTAMP - NUMTODSINTERVAL(:settle, 'MINUTE')")
+        binds = {'settle': settle_minutes}
+    else:
+        conditions.append(f"{source.created_column} <= :high")
+        binds = {'high': high}
+    if low is not None:
+        conditions.append(f"{source.created_column} > :low")
+        binds['low'] = low
+    if source.status_column and source.excluded_statuses:
+        names = [f"status_{i}" for i in range(len(source.excluded_statuses))]
+        conditions.append(f"NVL({source.status_column}, '-') NOT IN ({', '.join(':' + n for n in names)})")
+        binds.update(zip(names, source.excluded_statuses))
+    return " AND ".join(conditions), binds
+
+def user_delta_sql(source, where):
+    """Per-user order count, value sum and first / last order time for the window"""
+    if source.amount_aggregate not in ('MAX', 'SUM'):
+        raise ValueError(f"amount_aggregate must be 'MAX' or 'SUM', got {source.amount_aggregate!r}")
+    return f"""SELECT USER_ID, COUNT(*) AS ORDER_COUNT, SUM(ORDER_VALUE) AS ORDER_VALUE_SUM,
+       MIN(CREATED_AT) AS FIRST_ORDER_AT, MAX(CREATED_AT) AS LAST_ORDER_AT
+FROM (
+    SELECT {source.user_column} AS USER_ID, {source.order_column} AS ORDER_ID,
+           MAX({source.created_column}) AS CREATED_AT,
+           NVL({source.amount_aggregate}({source.amount_column}), 0) AS ORDER_VALUE
+    FROM {source.view}
+    WHERE {where}
+    GROUP BY {source.user_column}, {source.order_column}
+)
+GROUP BY USER_ID"""
+
+def merge_aggregates_sql(delta_sql):
+    """Add the window's per-user deltas to the running aggregates, tagging touched users"""
+    return f"""MERGE INTO {AGGREGATE_TABLE} a
+USING ({delta_sql}) d
+ON (a.USER_ID = d.USER_ID)
+WHEN MATCHED THEN UPDATE SET
+    a.ORDER_COUNT = a.ORDER_COUNT + d.ORDER_COUNT,
+    a.ORDER_VALUE_SUM = a.ORDER_VALUE_SUM + d.ORDER_VALUE_SUM,
+    a.FIRST_ORDER_AT = LEAST(a.FIRST_ORDER_AT, d.FIRST_ORDER_AT),
+    a.LAST_ORDER_AT = GREATEST(a.LAST_ORDER_AT, d.LAST_ORDER_AT),
+    a.REFRESH_RUN = :run_id, a.UPDATED_AT = CURRENT_TIMESTAMP
+WHEN NOT MATCHED THEN INSERT (
+    USER_ID, ORDER_COUNT, ORDER_VALUE_SUM, FIRST_ORDER_AT, LAST_ORDER_AT, REFRESH_RUN
+) VALUES (
+    d.USER_ID, d.ORDER_COUNT, d.ORDER_VALUE_SUM, d.FIRST_ORDER_AT, d.LAST_ORDER_AT, :run_id
+)"""
+
+def merge_profiles_sql():
+    """Bulk-MERGE the RFM features of the users touched by :run_id into USER_PROFILES"""
+    return f"""MERGE INTO {PROFILE_TABLE} p
+USING (
+    SELECT USER_ID,
+           ORDER_COUNT AS TOTAL_PURCHASES,
+           ROUND(ORDER_VALUE_SUM / NULLIF(ORDER_COUNT, 0), 2) AS AVERAGE_ORDER_VALUE,
+           GREATEST(TRUNC(SYSDATE) - TRUNC(LAST_ORDER_AT), 0) AS DAYS_SINCE_LAST_PURCHASE,
+           ORDER_VALUE_SUM AS LIFETIME_VALUE
+    FROM {AGGREGATE_TABLE}
+    WHERE REFRESH_RUN = :run_id
+) a
+ON (p.USER_ID = a.USER_ID)
+WHEN MATCHED THEN UPDATE SET
+    p.TOTAL_PURCHASES = a.TOTAL_PURCHASES,
+    p.AVERAGE_ORDER_VALUE = a.AVERAGE_ORDER_VALUE,
+    p.DAYS_SINCE_LAST_PURCHASE = a.DAYS_SINCE_LAST_PURCHASE,
+    p.LIFETIME_VALUE = a.LIFETIME_VALUE"""
+
+def roll_recency_sql():
+    """Recompute DAYS_SINCE_LAST_PURCHASE for users without new orders (changed values only)"""
+    return f"""MERGE INTO {PROFILE_TABLE} p
+USING (
+    SELECT USER_ID, GREATEST(TRUNC(SYSDATE) - TRUNC(LAST_ORDER_AT), 0) AS DAYS_SINCE_LAST_PURCHASE
+    FROM {AGGREGATE_TABLE}
+    WHERE REFRESH_RUN <> :run_id
+) a
+ON (p.USER_ID = a.USER_ID)
+WHEN MATCHED THEN UPDATE SET p.DAYS_SINCE_LAST_PURCHASE = a.DAYS_SINCE_LAST_PURCHASE
+    WHERE DECODE(p.DAYS_SINCE_LAST_PURCHASE, a.DAYS_SINCE_LAST_PURCHASE, 0, 1) = 1"""
+
+def reset_state(connection):
+    """Forget the watermark and empty the aggregates (next refresh replays every order)"""
+    cursor = connection.cursor()
+    try:
+        # Watermark first: if the TRUNCATE fails the next run still starts from scratch
+        cursor.execute(f"UPDATE {STATE_TABLE} SET WATERMARK = NULL, RECENCY_AS_OF = NULL "
+                       f"WHERE JOB_NAME = :job", job=JOB_NAME)
+        connection.commit()
+        cursor.execute(f"TRUNCATE TABLE {AGGREGATE_TABLE}")
+    finally:
+        cursor.close()
+
+def lock_state(cursor):
+    """(watermark, recency as-of, last run id, today) with the job's state row locked"""
+    cursor.execute(f"""
+        MERGE INTO {STATE_TABLE} s
+        USING (SELECT :job AS JOB_NAME FROM DUAL) k
+        ON (s.JOB_NAME = k.JOB_NAME)
+        WHEN NOT MATCHED THEN INSERT (JOB_NAME, LAST_RUN_ID) VALUES (k.JOB_NAME, 0)
+    """, job=JOB_NAME)
+    # FOR UPDATE serializes concurrent refreshes
+    cursor.execute(f"""
+        SELECT WATERMARK, RECENCY_AS_OF, LAST_RUN_ID, TRUNC(SYSDATE)
+        FROM {STATE_TABLE}
+        WHERE JOB_NAME = :job
+        FOR UPDATE
+    """, job=JOB_NAME)
+    return cursor.fetchone()
+
+def refresh_rfm_features(connection, source=OrderSource(), settle_minutes=DEFAULT_SETTLE_MINUTES,
+                         rebuild=False, dry_run=False):
+    """
+    Apply the orders since the last watermark to the aggregates and USER_PROFILES.
+
+    Returns a stats dict: watermark (previous), high (new watermark or None when
+    there were no new orders), orders, users_changed, profiles_updated,
+    users_without_profile, recency_updated, run_id, dry_run and seconds.
+    dry_run counts the window and rolls everything back.
+    """
+    start = time.perf_counter()
+    ensure_refresh_tables(connection)
+    if rebuild and not dry_run:
+        reset_state(connection)
+
+    cursor = connection.cursor()
+    try:
+        watermark, recency_as_of, last_run_id, today = lock_state(cursor)
+        if rebuild:
+            watermark = recency_as_of = None
+        run_id = last_run_id + 1
+
+        # High-water mark: newest order older than the settle window
+        where, binds = window_filter(source, watermark, settle_minutes=settle_minutes)
+        cursor.execute(f"SELECT MAX({source.created_column}), COUNT(DISTINCT {source.order_column}) "
+                       f"FROM {source.view} WHERE {where}", **binds)
+        high, orders = cursor.fetchone()
+
+        stats = {
+            'watermark': watermark, 'high': high, 'orders': orders or 0, 'users_changed': 0,
+            'profiles_updated': 0, 'users_without_profile': 0, 'recency_updated': 0,
+            'run_id': run_id, 'dry_run': dry_run
+        }
+
+        if high is not None and not dry_run:
+            where, binds = window_filter(source, watermark, high)
+            cursor.execute(merge_aggregates_sql(user_delta_sql(source, where)), run_id=run_id, **binds)
+            stats['users_changed'] = cursor.rowcount
+            cursor.execute(merge_profiles_sql(), run_id=run_id)
+            stats['profiles_updated'] = cursor.rowcount
+            stats['users_without_profile'] = stats['users_changed'] - stats['profiles_updated']
+
+        # Recency drifts daily for every user, with or without new orders
+        if (recency_as_of is None or recency_as_of < today) and not dry_run:
+            cursor.execute(roll_recency_sql(), run_id=run_id)
+            stats['recency_updated'] = cursor.rowcount
+
+        if dry_run:
+            connection.rollback()
+        else:
+            advance = {'high': high} if high is not None else {}
+            cursor.execute(f"""
+                UPDATE {STATE_TABLE} SET
+                    {'WATERMARK = :high, ' if advance else ''}RECENCY_AS_OF = TRUNC(SYSDATE),
+                    LAST_RUN_ID = :run_id, ORDERS_PROCESSED = :orders, USERS_CHANGED = :users_changed,
+                    PROFILES_UPDATED = :profiles_updated, REFRESHED_AT = CURRENT_TIMESTAMP
+                WHERE JOB_NAME = :job
+            """, run_id=run_id, orders=stats['orders'], users_changed=stats['users_changed'],
+                profiles_updated=stats['profiles_updated'], job=JOB_NAME, **advance)
+            connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared local snapshot cache for feature views
+Used by the local training, comparison and validation scripts
+
+Instead of running SELECT * FROM OML.CHURN_TRAINING_DATA over the WAN on every
+invocation, the view is written once to a local Arrow IPC file and memory-mapped
+on later reads. Snapshots are keyed by a cheap freshness probe against the base
+table (row count + MAX(ORA_ROWSCN)) plus a hash of the view definition, so any
+DML on the base table or change to the view produces a new snapshot.
+
+Cache layout:
+    .cache/snapshots/<VIEW_NAME>_<key>.arrow
+
+Environment variables:
+    CHURN_SNAPSHOT_CACHE=off    Disable the cache (always fetch from ADB)
+"""
+
+import os
+import hashlib
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_DIR = project_root / '.cache' / 'snapshots'
+
+TRAINING_VIEW = 'OML.CHURN_TRAINING_DATA'
+TRAINING_SOURCE_TABLE = 'OML.CHURN_DATASET_TRAINING'
+
+# Snapshots kept per view (older ones are deleted after a new write)
+KEEP_SNAPSHOTS = 2
+
+def cache_enabled():
+    """False when CHURN_SNAPSHOT_CACHE=off"""
+    return os.getenv('CHURN_SNAPSHOT_CACHE', 'on').lower() not in ('off', '0', 'false', 'no')
+
+def probe_freshness(connection, view, source_table, query=None):
+    """
+    Return a short key identifying the current contents of a view.
+
+    Combines COUNT(*) and MAX(ORA_ROWSCN) of the base table with a hash of the
+    view text (and the fetch projection, if any), so it changes on any
+    insert/update/delete, view redefinition or projection change.
+    """
+    owner, view_name = view.split('.')
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*), MAX(ORA_ROWSCN) FROM {source_table}")
+        row_count, max_scn = cursor.fetchone()
+
+        cursor.execute(
+            "SELECT TEXT FROM ALL_VIEWS WHERE OWNER = :1 AND VIEW_NAME = :2",
+            [owner.upper(), view_name.upper()]
+        )
+        row = cursor.fetchone()
+        view_text = row[0] if row else ''
+    finally:
+        cursor.close()
+
+    digest = hashlib.sha256(f"{view}|{row_count}|{max_scn}|{view_text}|{query or ''}".encode('utf-8'))
+    return digest.hexdigest()[:16], row_count
+
+def _snapshot_path(cache_dir, view, key):
+    """Snapshot file path for a view and freshness key"""
+    return Path(cache_dir) / f"{view.split('.')[-1]}_{key}.arrow"
+
+def _fetch_table(connection, view, query=None):
+    """Fetch the view (or a projection query over it) as an Arrow table"""
+    import pyarrow as pa
+
+    query = query or f"SELECT * FROM {view}"
+    if hasattr(connection, 'fetch_df_all'):
+        return pa.table(connection.fetch_df_all(statement=query, arraysize=50000))
+
+    import pandas as pd
+    return pa.Table.from_pandas(pd.read_sql(query, connection), preserve_index=False)
+
+def _write_snapshot(table, path):
+    """Write an Arrow IPC file atomically (temp file + rename)"""
+    import pyarrow as pa
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.arrow.tmp')
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+def _read_snapshot(path):
+    """Memory-map an Arrow IPC snapshot (no copy into process memory)"""
+    import pyarrow as pa
+
+    source = pa.memory_map(str(path), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+def _prune_snapshots(cache_dir, view, keep_path):
+    """Delete older snapshots of the same view"""
+    prefix = view.split('.')[-1] + '_'
+    snapshots = sorted(
+        (p for p in Path(cache_dir).glob(f"{prefix}*.arrow") if p != keep_path),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True
+    )
+    for old in snapshots[KEEP_SNAPSHOTS - 1:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+def load_view_snapshot(connection, view=TRAINING_VIEW, source_table=TRAINING_SOURCE_TABLE,
+                       cache_dir=DEFAULT_CACHE_DIR, refresh=False, query=None):
+    """
+    Load a view as an Arrow table, from the local snapshot when it is fresh.
+
+    query optionally replaces SELECT * (e.g. feature_schema.projection_query()).
+    refresh=True forces a re-fetch. Returns a pyarrow.Table.
+    """
+    if not cache_enabled():
+        return _fetch_table(connection, view, query)
+
+    start = time.perf_counter()
+    key, row_count = probe_freshness(connection, view, source_table, query)
+    path = _snapshot_path(cache_dir, view, key)
+
+    if path.exists() and not refresh:
+        table = _read_snapshot(path)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"✓ Snapshot cache hit: {path.name} ({table.num_rows:,} rows, {elapsed_ms:.0f} ms)")
+        return table
+
+    print(f"Snapshot cache miss for {view} ({row_count:,} rows in {source_table}), fetching...")
+    table = _fetch_table(connection, view, query)
+    _write_snapshot(table, path)
+    _prune_snapshots(cache_dir, view, path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"✓ Snapshot written: {path.name} ({table.num_rows:,} rows, {elapsed_ms:.0f} ms)")
+
+    return table
+
+def load_view_dataframe(connection, view=TRAINING_VIEW, source_table=TRAINING_SOURCE_TABLE,
+                        cache_dir=DEFAULT_CACHE_DIR, refresh=False, query=None):
+    """Same as load_view_snapshot() but returns a pandas DataFrame"""
+    return load_view_snapshot(
+        connection, view=view, source_table=source_table,
+        cache_dir=cache_dir, refresh=refresh, query=query
+    ).to_pandas()
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Shared sketch-based streaming dataset profiler
+Used by examine_dataset.py and compare_sampling_strategies.py
+
+One pass over CSV chunks keeps small, mergeable sketches per column:
+    Moments        count / mean / variance (Welford, chunks combined with Chan's
+                   parallel update), min, max
+    TDigest        quantiles and CDF (merging t-digest, arcsine scale function,
+                   compressed with vectorized NumPy)
+    HyperLogLog    approximate distinct count (2^14 registers, ~0.8% error)
+    Histogram      fixed number of power-of-two-wide bins, anchored at 0 so two
+                   histograms always align after coarsening
+    Frequencies    exact value counts while a column has few distinct values
+                   (labels, categories); dropped once the cap is exceeded
+
+Every sketch has merge(), so profiles of file chunks, worker processes or
+separate files combine into the profile of the whole; DatasetProfile.save()
+/ load() persist them as JSON. ks_statistic() compares two numeric columns
+(e.g. a sample against the full dataset) from their t-digests.
+
+Usage:
+    profile = profile_csv('data/processed/churn_dataset_cleaned.csv', workers=4)
+    profile.columns['Age'].summary()
+"""
+
+import json
+import zlib
+import base64
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 200000
+DEFAULT_COMPRESSION = 200
+DEFAULT_HLL_PRECISION = 14
+DEFAULT_HISTOGRAM_BINS = 64
+DEFAULT_MAX_FREQUENCIES = 50
+
+def _hash_values(values):
+    """Stable uint64 hashes (numeric values hashed as float64)"""
+    return pd.util.hash_array(np.asarray(values))
+
+class Moments:
+    """Count, mean, M2 (sum of squared deviations), min, max"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, count, mean, m2, vmin, vmax):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    def update(self, values):
+        if len(values):
+            mean = float(values.mean())
+            self._combine(len(values), mean, float(((values - mean) ** 2).sum()),
+                          float(values.min()), float(values.max()))
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1, like pandas)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments._combine(data['count'], data['mean'], data['m2'],
+                         data['min'] if data['min'] is not None else np.inf,
+                         data['max'] if data['max'] is not None else -np.inf)
+        return moments
+
+class TDigest:
+    """Merging t-digest: weighted centroids sorted by mean"""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # Centroid position → k scale; one centroid per unit of k (small at the tails)
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1)))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def update(self, values):
+        if len(values):
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other):
+        if len(other.weights):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+
+    def _curve(self):
+        """(values, cumulative weights) through min, centroid midpoints and max"""
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return np.r_[self.min, self.means, self.max], np.r_[0.0, positions, self.weights.sum()]
+
+    def quantile(self, q):
+        """Approximate quantile(s) q in [0, 1]"""
+        if not len(self.weights):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float('nan')
+        xs, ps = self._curve()
+        return np.interp(np.asarray(q) * ps[-1], ps, xs)
+
+    def cdf(self, x):
+        """Approximate fraction of values <= x"""
+        if not len(self.weights):
+            return np.full(np.shape(x), np.nan) if np.ndim(x) else float('nan')
+        xs, ps = self._curve()
+        return np.interp(x, xs, ps) / ps[-1]
+
+    def to_dict(self):
+        return {'compression': self.compression, 'means': self.means.tolist(),
+                'weights': self.weights.tolist(),
+                'min': self.min if len(self.weights) else None, 'max': self.max if len(self.weights) else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data['compression'])
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        if len(digest.weights):
+            digest.min, digest.max = data['min'], data['max']
+        return digest
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit hashes"""
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes):
+        if not len(hashes):
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        rest = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        # Highest set bit of rest, exact (no float rounding)
+        high = np.zeros(len(rest), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            big = rest >= (np.uint64(1) << np.uint64(shift))
+            rest = np.where(big, rest >> np.uint64(shift), rest)
+            high += big * shift
+        width = 64 - self.precision
+        rank = np.where(hashes & ((np.uint64(1) << np.uint64(width)) - np.uint64(1)) == 0,
+                        width + 1, width - high).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def update(self, values):
+        self.update_hashes(_hash_values(values))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return raw
+
+    def to_dict(self):
+        packed = base64.b64encode(zlib.compress(self.registers.tobytes())).decode('ascii')
+        return {'precision': self.precision, 'registers': packed}
+
+    @classmethod
+    def from_dict(cls, data):
+        hll = cls(data['precision'])
+        hll.registers = np.frombuffer(zlib.decompress(base64.b64decode(data['registers'])),
+                                      dtype=np.uint8).copy()
+        return hll
+
+class Histogram:
+    """Counts in bins of width 2**exponent, anchored at 0 (mergeable by coarsening)"""
+
+    def __init__(self, max_bins=DEFAULT_HISTOGRAM_BINS):
+        self.max_bins = max_bins
+        self.exponent = None
+        self.counts = {}
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _exponent_for(self, vmin, vmax):
+        span = vmax - vmin
+        if span <= 0:
+            span = max(abs(vmin), 1.0)
+        return int(np.ceil(np.log2(span / self.max_bins)))
+
+    def _coarsen(self, exponent):
+        while self.exponent < exponent:
+            coarse = {}
+            for index, count in self.counts.items():
+                coarse[index // 2] = coarse.get(index // 2, 0) + count
+            self.counts = coarse
+            self.exponent += 1
+        while self.counts and max(self.counts) - min(self.counts) + 1 > self.max_bins:
+            self._coarsen(self.exponent + 1)
+
+    def update(self, values):
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        exponent = self._exponent_for(self.min, self.max)
+        if self.exponent is None:
+            self.exponent = exponent
+        self._coarsen(max(exponent, self.exponent))
+        index, counts = np.unique(np.floor(np.ldexp(values, -self.exponent)).astype(np.int64),
+                                  return_counts=True)
+        for i, c in zip(index.tolist(), counts.tolist()):
+            self.counts[i] = self.counts.get(i, 0) + c
+        self._coarsen(self.exponent)
+
+    def merge(self, other):
+        if other.exponent is None:
+            return
+        other = Histogram.from_dict(other.to_dict())
+        if self.exponent is None:
+            self.exponent = other.exponent
+        exponent = max(self.exponent, other.exponent)
+        self._coarsen(exponent)
+        other._coarsen(exponent)
+        for i, c in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + c
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._coarsen(self.exponent)
+
+    def bins(self):
+        """[(left, right, count)] in value order"""
+        if self.exponent is None:
+            return []
+        width = 2.0 ** self.exponent
+        return [(i * width, (i + 1) * width, self.counts[i]) for i in sorted(self.counts)]
+
+    def to_dict(self):
+        return {'max_bins': self.max_bins, 'exponent': self.exponent,
+                'counts': [[i, c] for i, c in sorted(self.counts.items())],
+                'min': self.min if self.exponent is not None else None,
+                'max': self.max if self.exponent is not None else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data['max_bins'])
+        histogram.exponent = data['exponent']
+        histogram.counts = {int(i): int(c) for i, c in data['counts']}
+        if histogram.exponent is not None:
+            histogram.min, histogram.max = data['min'], data['max']
+        return histogram
+
+class Frequencies:
+    """Exact value counts up to max_values distinct values (None once exceeded)"""
+
+    def __init__(self, max_values=DEFAULT_MAX_FREQUENCIES):
+        self.max_values = max_values
+        self.counts = {}
+
+    def _check(self):
+        if self.counts is not None and len(self.counts) > self.max_values:
+            self.counts = None
+
+    def update(self, values):
+        if self.counts is None or not len(values):
+            return
+        uniques, counts = np.unique(values, return_counts=True)
+        for value, count in zip(uniques.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._check()
+
+    def merge(self, other):
+        if self.counts is None or other.counts is None:
+            self.counts = None
+            return
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._check()
+
+    def most_common(self):
+        return sorted(self.counts.items(), key=lambda item: -item[1]) if self.counts is not None else None
+
+    def to_dict(self):
+        return {'max_values': self.max_values,
+                'counts': [[v, c] for v, c in self.counts.items()] if self.counts is not None else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        frequencies = cls(data['max_values'])
+        frequencies.counts = {v: c for v, c in data['counts']} if data['counts'] is not None else None
+        return frequencies
+
+class ColumnProfile:
+    """Sketches for one column: numeric (moments, digest, histogram) or categorical"""
+
+    def __init__(self, kind):
+        self.rows = 0
+        self.nulls = 0
+        self._reset(kind)
+
+    def _reset(self, kind):
+        """Empty sketches for kind (row / null counts are kept)"""
+        self.kind = kind
+        self.integral = kind == 'numeric'
+        self.distinct = HyperLogLog()
+        self.frequencies = Frequencies()
+        self.moments = Moments() if kind == 'numeric' else None
+        self.digest = TDigest() if kind == 'numeric' else None
+        self.histogram = Histogram() if kind == 'numeric' else None
+
+    @staticmethod
+    def kind_of(series):
+        return 'numeric' if pd.api.types.is_numeric_dtype(series) else 'categorical'
+
+    @property
+    def empty(self):
+        """No non-null value seen yet, so the kind is only pandas' guess (all-NaN parses as float)"""
+        return self.rows == self.nulls
+
+    def adopt_kind(self, kind):
+        """Switch an empty profile to kind (a column that was blank in the chunks seen so far)"""
+        if kind != self.kind:
+            if not self.empty:
+                raise ValueError(f"Cannot change a {self.kind} profile with values to {kind}")
+            self._reset(kind)
+        return self
+
+    def update(self, series):
+        if self.empty and series.notna().any():
+            self.adopt_kind(self.kind_of(series))
+        self.rows += len(series)
+        if self.kind == 'numeric':
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            values = values[~np.isnan(values)]
+        else:
+            values = series.dropna().astype(str).to_numpy()
+        self.nulls += len(series) - len(values)
+
+        self.distinct.update(values)
+        if self.kind == 'categorical':
+            self.frequencies.update(values)
+        else:
+            finite = values[np.isfinite(values)]
+            integral = len(finite) == len(values) and np.array_equal(finite, np.round(finite))
+            self.integral = self.integral and integral
+            # 0/1 labels count as 0 / 1, not 0.0 / 1.0 (equal keys either way)
+            self.frequencies.update(finite.astype(np.int64) if integral else values)
+            self.moments.update(finite)
+            self.digest.update(finite)
+            self.histogram.update(finite)
+
+    def merge(self, other):
+        if other.kind != self.kind:
+            if other.empty:
+                other = ColumnProfile.from_dict(other.to_dict()).adopt_kind(self.kind)
+            elif self.empty:
+                self.adopt_kind(other.kind)
+            else:
+                raise ValueError(f"Cannot merge {other.kind} profile into {self.kind} profile")
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.integral = self.integral and other.integral
+        self.distinct.merge(other.distinct)
+        self.frequencies.merge(other.frequencies)
+        if self.kind == 'numeric':
+            self.moments.merge(other.moments)
+            self.digest.merge(other.digest)
+            self.histogram.merge(other.histogram)
+
+    def median(self):
+        """Median: exact from value counts when kept, else t-digest (rounded for integral columns)"""
+        if self.kind != 'numeric' or not self.moments.count:
+            return None
+        counts = self.frequencies.most_common()
+        if counts:
+            values, weights = zip(*sorted(counts))
+            cumulative = np.cumsum(weights)
+            n = cumulative[-1]
+            lower = values[int(np.searchsorted(cumulative, (n - 1) // 2, side='right'))]
+            upper = values[int(np.searchsorted(cumulative, n // 2, side='right'))]
+            return (lower + upper) / 2
+        median = float(self.digest.quantile(0.5))
+        return float(round(median)) if self.integral else median
+
+    def mode(self):
+        """Most frequent value (None when the column has too many distinct values)"""
+        counts = self.frequencies.most_common()
+        return counts[0][0] if counts else None
+
+    def summary(self):
+        """Flat dict of the headline statistics"""
+        summary = {'kind': self.kind, 'rows': self.rows, 'nulls': self.nulls,
+                   'distinct': int(round(self.distinct.estimate()))}
+        if self.kind == 'numeric' and self.moments.count:
+            p25, p50, p75 = self.digest.quantile([0.25, 0.5, 0.75])
+            summary.update({
+                'count': self.moments.count, 'mean': self.moments.mean,
+                'std': float(np.sqrt(self.moments.variance)) if self.moments.count > 1 else float('nan'),
+                'min': self.moments.min, '25%': float(p25), '50%': float(p50), '75%': float(p75),
+                'max': self.moments.max
+            })
+        return summary
+
+    def to_dict(self):
+        data = {'kind': self.kind, 'rows': self.rows, 'nulls': self.nulls, 'integral': self.integral,
+                'distinct': self.distinct.to_dict(), 'frequencies': self.frequencies.to_dict()}
+        if self.kind == 'numeric':
+            data.update({'moments': self.moments.to_dict(), 'digest': self.digest.to_dict(),
+                         'histogram': self.histogram.to_dict()})
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        column = cls(data['kind'])
+        column.rows, column.nulls = data['rows'], data['nulls']
+        column.integral = data.get('integral', False)
+        column.distinct = HyperLogLog.from_dict(data['distinct'])
+        column.frequencies = Frequencies.from_dict(data['frequencies'])
+        if column.kind == 'numeric':
+            column.moments = Moments.from_dict(data['moments'])
+            column.digest = TDigest.from_dict(data['digest'])
+            column.histogram = Histogram.from_dict(data['histogram'])
+        return column
+
+class DatasetProfile:
+    """Column profiles of a dataset (columns in first-seen order)"""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(ColumnProfile.kind_of(chunk[col]))
+            self.columns[col].update(chunk[col])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, column in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(column)
+            else:
+                self.columns[col] = ColumnProfile.from_dict(column.to_dict())
+        return self
+
+    def to_dict(self):
+        return {'rows': self.rows, 'columns': {col: c.to_dict() for col, c in self.columns.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        profile = cls()
+        profile.rows = data['rows']
+        profile.columns = {col: ColumnProfile.from_dict(c) for col, c in data['columns'].items()}
+        return profile
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+def profile_frame(df):
+    """Profile of one DataFrame (a chunk, a sample, ...)"""
+    return DatasetProfile().update(df)
+
+def profile_csv(csv_path, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, on_chunk=None):
+    """
+    Profile a CSV in one streaming pass.
+
+    workers > 1 profiles chunks in worker processes (at most 2 * workers chunks
+    in flight) and merges the partial profiles. on_chunk(df) sees every chunk.
+    """
+    profile = DatasetProfile()
+    with pd.read_csv(csv_path, chunksize=chunk_rows) as reader:
+        if workers <= 1:
+            for chunk in reader:
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                profile.update(chunk)
+            return profile
+
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in reader:
+                if on_chunk is not None:
+                    on_chunk(chunk)
+                pending.append(executor.submit(profile_frame, chunk))
+                if len(pending) >= 2 * workers:
+                    profile.merge(pending.popleft().result())
+            while pending:
+                profile.merge(pending.popleft().result())
+    return profile
+
+def ks_statistic(a, b):
+    """Two-sample Kolmogorov-Smirnov statistic of two numeric ColumnProfiles (from t-digests)"""
+    if not (len(a.digest.weights) and len(b.digest.weights)):
+        return float('nan')
+    grid = np.union1d(a.digest.means, b.digest.means)
+    return float(np.max(np.abs(a.digest.cdf(grid) - b.digest.cdf(grid))))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Shared one-pass stratified reservoir sampler
+Used by create_hybrid_datasets.py, map_dataset_to_users.py (random / stratified)
+and compare_sampling_strategies.py
+
+Single streaming pass over CSV chunks:
+    - every row gets a deterministic uniform key from (seed, row number)
+      (SplitMix64), so the sample depends only on the seed and the file, not on
+      the chunk size
+    - per stratum (e.g. Churned × Country × Signup_Quarter) the rows with the
+      `target` smallest keys are kept in a reservoir; every other row is handed
+      back immediately as remainder, so it can be written out during the pass
+    - at the end the target is allocated to strata in proportion to their
+      final counts (largest remainder), each stratum takes its smallest keys and
+      the unused reservoir rows complete the remainder
+
+Memory is bounded by target rows per stratum (never the file size). With no
+strata this is a plain uniform reservoir sample. The sample comes back in key
+order, i.e. already shuffled.
+
+Usage:
+    sampler = StratifiedReservoirSampler(5003, strata=['Churned', 'Country'], seed=42)
+    for chunk in pd.read_csv(path, chunksize=200000):
+        write_remainder(sampler.add(chunk))
+    sample, rest = sampler.finish()
+    write_remainder(rest)
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 200000
+
+KEY = '__sample_key'
+ROW = '__row_number'
+
+def uniform_keys(row_numbers, seed=DEFAULT_SEED):
+    """Deterministic uniform [0, 1) keys for row numbers (SplitMix64 finalizer)"""
+    # uint64 arithmetic wraps modulo 2**64 by design
+    with np.errstate(over='ignore'):
+        z = np.asarray(row_numbers, dtype=np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+def _stratum_key(value):
+    """groupby key → hashable tuple (NaN → None so it matches across chunks)"""
+    values = value if isinstance(value, tuple) else (value,)
+    return tuple(None if isinstance(v, float) and v != v else v for v in values)
+
+def proportional_allocation(counts, target):
+    """Split target over strata in proportion to counts (largest remainder, capped by counts)"""
+    total = sum(counts.values())
+    target = min(target, total)
+    if total == 0:
+        return {s: 0 for s in counts}
+
+    quotas = {s: target * n / total for s, n in counts.items()}
+    allocation = {s: min(int(q), counts[s]) for s, q in quotas.items()}
+    left = target - sum(allocation.values())
+    # Deterministic order: largest fractional part first, then larger strata
+    order = sorted(counts, key=lambda s: (-(quotas[s] - int(quotas[s])), -counts[s], str(s)))
+    while left > 0:
+        for s in order:
+            if left == 0:
+                break
+            if allocation[s] < counts[s]:
+                allocation[s] += 1
+                left -= 1
+    return allocation
+
+class StratifiedReservoirSampler:
+    """Bottom-k reservoir per stratum; proportional allocation at finish()"""
+
+    def __init__(self, target, strata=None, seed=DEFAULT_SEED):
+        self.target = int(target)
+        self.strata = list(strata or [])
+        self.seed = seed
+        self.rows_seen = 0
+        self.counts = {}
+        self.reservoirs = {}
+
+    def _groups(self, chunk):
+        if not self.strata:
+            return [((), chunk)]
+        return chunk.groupby(self.strata, dropna=False, sort=False)
+
+    def add(self, chunk):
+        """Offer a chunk; returns the rows that can no longer be sampled (remainder, input order)"""
+        n = len(chunk)
+        row_numbers = np.arange(self.rows_seen, self.rows_seen + n, dtype=np.uint64)
+        self.rows_seen += n
+        chunk = chunk.assign(**{KEY: uniform_keys(row_numbers, self.seed), ROW: row_numbers.astype(np.int64)})
+
+        rejected = []
+        for value, group in self._groups(chunk):
+            stratum = _stratum_key(value)
+            self.counts[stratum] = self.counts.get(stratum, 0) + len(group)
+            reservoir = self.reservoirs.get(stratum)
+
+            if reservoir is not None and len(reservoir) >= self.target:
+                # Only keys below the current k-th smallest can enter
+                admit = group[KEY].to_numpy() < reservoir[KEY].max()
+                rejected.append(group[~admit])
+                group = group[admit]
+                if group.empty:
+                    continue
+
+            pool = group if reservoir is None else pd.concat([reservoir, group])
+            if len(pool) > self.target:
+                order = np.argpartition(pool[KEY].to_numpy(), self.target - 1) if self.target else \
+                    np.arange(len(pool))
+                rejected.append(pool.iloc[order[self.target:]])
+                pool = pool.iloc[order[:self.target]]
+            self.reservoirs[stratum] = pool
+
+        if not rejected:
+            return chunk.iloc[:0].drop(columns=[KEY, ROW])
+        return pd.concat(rejected).sort_values(ROW).drop(columns=[KEY, ROW])
+
+    def allocation(self):
+        """Sample rows per stratum for the rows seen so far"""
+        return proportional_allocation(self.counts, self.target)
+
+    def finish(self):
+        """(sample in shuffled key order, remaining reservoir rows in input order)"""
+        allocation = self.allocation()
+        sample_parts, rest_parts = [], []
+        for stratum, reservoir in self.reservoirs.items():
+            order = np.argsort(reservoir[KEY].to_numpy(), kind='stable')
+            k = allocation.get(stratum, 0)
+            sample_parts.append(reservoir.iloc[order[:k]])
+            rest_parts.append(reservoir.iloc[order[k:]])
+
+        if not sample_parts:
+            return pd.DataFrame(), pd.DataFrame()
+        sample = pd.concat(sample_parts).sort_values(KEY).drop(columns=[KEY, ROW]).reset_index(drop=True)
+        rest = pd.concat(rest_parts).sort_values(ROW).drop(columns=[KEY, ROW])
+        return sample, rest
+
+    def summary(self):
+        """Counts and allocation per stratum"""
+        allocation = self.allocation()
+        return [
+            {'stratum': stratum, 'rows': n, 'sampled': allocation.get(stratum, 0)}
+            for stratum, n in sorted(self.counts.items(), key=lambda item: -item[1])
+        ]
+
+def split_csv(csv_path, target, strata=None, seed=DEFAULT_SEED, chunk_rows=DEFAULT_CHUNK_ROWS,
+              on_remainder=None, on_chunk=None):
+    """
+    Stratified sample of target rows from a CSV in one streaming pass.
+
+    on_remainder(df) receives every non-sampled row (in pieces, during the pass
+    and once at the end); on_chunk(df) sees every input chunk (e.g. for running
+    statistics). Returns (sample, sampler).
+    """
+    sampler = StratifiedReservoirSampler(target, strata=strata, seed=seed)
+    with pd.read_csv(csv_path, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            if on_chunk is not None:
+                on_chunk(chunk)
+            rejected = sampler.add(chunk)
+            if on_remainder is not None and len(rejected):
+                on_remainder(rejected)
+
+    sample, rest = sampler.finish()
+    if on_remainder is not None and len(rest):
+        on_remainder(rest)
+    return sample, sampler
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Shared Gaussian-copula synthetic churn data generator
+Used by generate_synthetic_dataset.py
+
+Fit (on a small realistic file, e.g. data/processed/churn_dataset_mapped.csv):
+    - every column gets an empirical marginal:
+        continuous   quantile knots, sampled by interpolation
+        discrete     integral columns with few values (counts, 0/1 label):
+                     step inverse CDF, so only observed values are emitted
+        categorical  GENDER / CITY / SIGNUP_QUARTER: categories ordered by
+                     churn rate, cut points on the latent normal
+    - rows are mapped to normal scores (ranks, random position inside a
+      category's interval); their correlation matrix starts the copula and is
+      then calibrated until synthetic rows reproduce the source's Spearman
+      rank correlations (the jittered scores of discrete columns, e.g. the
+      churn label, otherwise weaken every correlation with them)
+    - columns that are a function of another one (COUNTRY of CITY) are derived
+      by lookup instead of sampled, so every city keeps its country
+
+Sample: correlated normals (Cholesky factor, float32) → each marginal, fully
+vectorized (continuous marginals through a dense lookup table on a uniform
+normal grid, discrete ones by searchsorted on the cut points); USER_IDs are
+random UUID4 strings built directly into an Arrow string array. Chunks are
+seeded from (seed, chunk index), so the output does not depend on the number
+of workers.
+
+Usage:
+    model = GaussianCopulaModel.fit(pd.read_csv('data/processed/churn_dataset_mapped.csv'))
+    stats = generate(model, 10_000_000, 'data/synthetic/churn_10m.csv', workers=8)
+"""
+
+import os
+import shutil
+import time
+from statistics import NormalDist
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_ROWS = 500000
+MAX_KNOTS = 2001
+MAX_DISCRETE_VALUES = 256
+GRID_POINTS = 8192
+CALIBRATION_ROUNDS = 6
+CALIBRATION_ROWS = 100000
+ID_COLUMN = 'USER_ID'
+LABEL = 'Churned'
+
+_NORMAL = NormalDist()
+
+def _norm_ppf(p):
+    """Standard normal quantiles of an array (stdlib, fit time only)"""
+    p = np.clip(np.asarray(p, dtype=np.float64), 1e-12, 1 - 1e-12)
+    return np.fromiter((_NORMAL.inv_cdf(x) for x in p.ravel()), dtype=np.float64, count=p.size).reshape(p.shape)
+
+def _decimals(values, coverage=0.99, max_decimals=4):
+    """Fewest decimals that represent `coverage` of the values exactly"""
+    for k in range(max_decimals + 1):
+        if np.mean(np.isclose(values, np.round(values, k))) >= coverage:
+            return k
+    return max_decimals
+
+def _nearest_correlation(corr):
+    """Clip negative eigenvalues and restore the unit diagonal"""
+    values, vectors = np.linalg.eigh(corr)
+    corr = (vectors * np.clip(values, 1e-6, None)) @ vectors.T
+    scale = np.sqrt(np.diag(corr))
+    return corr / np.outer(scale, scale)
+
+def derived_columns(df, categorical):
+    """{column: parent} for categoricals fully determined by another (e.g. Country by City)"""
+    derived = {}
+    for col in categorical:
+        for parent in categorical:
+            if parent != col and parent not in derived and df[parent].nunique() > df[col].nunique() \
+                    and df.groupby(parent)[col].nunique().max() == 1:
+                derived[col] = parent
+                break
+    return derived
+
+def uuid4_array(rng, n):
+    """n random UUID4 strings as an Arrow string array (no Python objects)"""
+    import pyarrow as pa
+
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+    hex_chars = np.empty((n, 32), dtype=np.uint8)
+    hex_chars[:, 0::2] = digits[raw >> 4]
+    hex_chars[:, 1::2] = digits[raw & 0x0F]
+
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    chars[:, np.r_[0:8, 9:13, 14:18, 19:23, 24:36]] = hex_chars
+    offsets = np.arange(0, 36 * (n + 1), 36, dtype=np.int32)
+    return pa.StringArray.from_buffers(n, pa.py_buffer(offsets), pa.py_buffer(chars))
+
+class GaussianCopulaModel:
+    """Empirical marginals + Gaussian copula over the non-derived columns"""
+
+    def __init__(self, columns, marginals, correlation, derived=None, source_rows=0):
+        self.columns = list(columns)
+        self.marginals = marginals
+        self.correlation = np.asarray(correlation, dtype=np.float64)
+        self.derived = derived or {}
+        self.source_rows = source_rows
+        self.latent = [c for c in self.columns if c not in self.derived]
+        self._prepare()
+
+    def _prepare(self):
+        """Cholesky factor, lookup tables and cut arrays for sampling"""
+        self._cholesky = np.linalg.cholesky(self.correlation).astype(np.float32)
+        self._tables = {}
+        for col in self.latent:
+            marginal = self.marginals[col]
+            if marginal['kind'] == 'continuous':
+                lo, hi = marginal['z'][0], marginal['z'][-1]
+                grid = np.linspace(lo, hi, GRID_POINTS)
+                self._tables[col] = (np.float32(lo), np.float32((GRID_POINTS - 1) / (hi - lo)),
+                                     np.interp(grid, marginal['z'], marginal['values']).astype(np.float32))
+            else:
+                self._tables[col] = np.asarray(marginal['cuts'], dtype=np.float32)
+
+    @classmethod
+    def fit(cls, df, seed=DEFAULT_SEED):
+        """Fit marginals and the copula correlation from a DataFrame"""
+        rng = np.random.default_rng(seed)
+        df = df.drop(columns=[ID_COLUMN], errors='ignore')
+        categorical = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
+        derived = {
+            col: {'from': parent, 'map': df.groupby(parent)[col].first().to_dict()}
+            for col, parent in derived_columns(df, categorical).items()
+        }
+        churn = df[LABEL] if LABEL in df.columns and pd.api.types.is_numeric_dtype(df[LABEL]) else None
+
+        marginals = {}
+        scores = []
+        for col in df.columns:
+            if col in derived:
+                continue
+            series = df[col]
+            present = series.notna().to_numpy()
+            z = np.zeros(len(df))
+
+            if col in categorical:
+                values = series.astype(str)
+                counts = values[present].value_counts()
+                rates = churn[present].groupby(values[present]).mean() if churn is not None else None
+                order = sorted(counts.index, key=lambda v: (rates[v] if rates is not None else 0.0, v))
+                marginal, z[present] = cls._fit_steps(values[present].to_numpy(), order, counts[order].to_numpy(), rng)
+                marginal['kind'] = 'categorical'
+            else:
+                values = series.to_numpy(dtype=np.float64)[present]
+                decimals = _decimals(values)
+                uniques, counts = np.unique(values, return_counts=True)
+                if decimals == 0 and len(uniques) <= MAX_DISCRETE_VALUES:
+                    marginal, z[present] = cls._fit_steps(values, uniques.tolist(), counts, rng)
+                    marginal.update({'kind': 'discrete', 'values': [float(v) for v in uniques]})
+                else:
+                    knots = min(len(values), MAX_KNOTS)
+                    p = (np.arange(knots) + 0.5) / knots
+                    marginal = {'kind': 'continuous', 'z': _norm_ppf(p).tolist(),
+                                'values': np.quantile(values, p).tolist()}
+                    ranks = pd.Series(values).rank(method='average').to_numpy()
+                    z[present] = _norm_ppf(ranks / (len(values) + 1))
+                marginal['decimals'] = decimals
+                marginal['integer'] = bool(decimals == 0)
+            marginals[col] = marginal
+            scores.append(z)
+
+        correlation = _nearest_correlation(np.corrcoef(np.column_stack(scores), rowvar=False))
+        model = cls(df.columns, marginals, correlation, derived, source_rows=len(df))
+        model.calibrate(df, seed=seed)
+        return model
+
+    def _codes(self, df):
+        """Latent columns as numbers (categoricals → their category order)"""
+        return pd.DataFrame({
+            col: pd.Index(self.marginals[col]['values']).get_indexer(df[col].astype(str)).astype(np.float64)
+            if self.marginals[col]['kind'] == 'categorical' else df[col]
+            for col in self.latent
+        })
+
+    def calibrate(self, df, rounds=CALIBRATION_ROUNDS, rows=CALIBRATION_ROWS, seed=DEFAULT_SEED):
+        """Adjust the latent correlation until sampled Spearman correlations match df's"""
+        target = self._codes(df).replace(-1, np.nan).corr('spearman').to_numpy()
+        for i in range(rounds):
+            sampled = pd.DataFrame(self.sample_arrays(rows, np.random.default_rng([seed, i])))
+            current = np.corrcoef(sampled[self.latent].rank().to_numpy(), rowvar=False)
+            error = np.nan_to_num(target - current)
+            self.correlation = _nearest_correlation(self.correlation + error)
+            self._prepare()
+        return self
+
+    @staticmethod
+    def _fit_steps(values, order, counts, rng):
+        """Cut points for ordered categories; latent scores drawn inside each category's interval"""
+        probs = counts / counts.sum()
+        upper = np.cumsum(probs)
+        lower = upper - probs
+        position = pd.Index(order).get_indexer(values)
+        u = lower[position] + rng.random(len(values)) * probs[position]
+        return {'cuts': _norm_ppf(upper[:-1]).tolist(), 'values': list(order)}, _norm_ppf(u)
+
+    def sample_arrays(self, n, rng):
+        """{column: NumPy array} of n synthetic rows (categoricals as category codes)"""
+        # (columns, rows): one contiguous latent vector per column
+        z = self._cholesky @ rng.standard_normal((len(self.latent), n), dtype=np.float32)
+        arrays = {}
+        for j, col in enumerate(self.latent):
+            marginal = self.marginals[col]
+            if marginal['kind'] == 'continuous':
+                lo, scale, table = self._tables[col]
+                position = np.clip((z[j] - lo) * scale, 0, GRID_POINTS - 1.001)
+                index = position.astype(np.int32)
+                low = table[index]
+                values = low + (position - index) * (table[index + 1] - low)
+                values = np.round(values.astype(np.float64), marginal['decimals'])
+            else:
+                codes = np.searchsorted(self._tables[col], z[j])
+                if marginal['kind'] == 'categorical':
+                    arrays[col] = codes
+                    continue
+                values = np.asarray(marginal['values'])[codes]
+            arrays[col] = values.astype(np.int64) if marginal['integer'] else values
+        return arrays
+
+    def sample_table(self, n, rng):
+        """n synthetic rows as an Arrow table (USER_ID first, source column order)"""
+        import pyarrow as pa
+
+        arrays = self.sample_arrays(n, rng)
+        columns = {ID_COLUMN: uuid4_array(rng, n)}
+        for col in self.columns:
+            if col in self.derived:
+                parent = self.marginals[self.derived[col]['from']]['values']
+                lookup = [self.derived[col]['map'][v] for v in parent]
+                columns[col] = pa.array(lookup, type=pa.string()).take(
+                    pa.array(arrays[self.derived[col]['from']]))
+            elif self.marginals[col]['kind'] == 'categorical':
+                columns[col] = pa.array(self.marginals[col]['values'], type=pa.string()).take(pa.array(arrays[col]))
+            else:
+                columns[col] = pa.array(arrays[col])
+        return pa.table(columns)
+
+    def sample(self, n, seed=DEFAULT_SEED):
+        """n synthetic rows as a DataFrame"""
+        return self.sample_table(n, np.random.default_rng(seed)).to_pandas()
+
+    def to_dict(self):
+        return {'columns': self.columns, 'marginals': self.marginals,
+                'correlation': self.correlation.tolist(), 'derived': self.derived,
+                'source_rows': self.source_rows}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['columns'], data['marginals'], data['correlation'], data.get('derived'),
+                   source_rows=data.get('source_rows', 0))
+
+_worker_model = None
+
+def _init_worker(model_state):
+    global _worker_model
+    _worker_model = GaussianCopulaModel.from_dict(model_state)
+
+def _write_chunk(index, rows, seed, path, fmt, header):
+    """Generate and write one chunk (runs in a worker process)"""
+    rng = np.random.default_rng(np.random.SeedSequence([seed, index]))
+    table = _worker_model.sample_table(rows, rng)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.csv as pacsv
+        pacsv.write_csv(table, path, write_options=pacsv.WriteOptions(include_header=header))
+    return index, rows
+
+def generate(model, rows, output, fmt='csv', workers=None, chunk_rows=DEFAULT_CHUNK_ROWS, seed=DEFAULT_SEED,
+             on_chunk=None):
+    """
+    Write `rows` synthetic rows in parallel chunks.
+
+    output ending in .csv → one CSV file (parts concatenated in chunk order);
+    otherwise a directory of part-NNNNN.csv / .parquet files.
+    Returns stats (rows, files, seconds, rows_per_sec, output).
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    output = Path(output)
+    single_csv = output.suffix == '.csv'
+    fmt = 'csv' if single_csv else fmt
+    part_dir = output.parent / f".{output.name}.parts" if single_csv else output
+    part_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = [(i, min(chunk_rows, rows - start)) for i, start in enumerate(range(0, rows, chunk_rows))]
+    paths = [part_dir / f"part-{i:05d}.{fmt}" for i, _ in chunks]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model.to_dict(),)) as executor:
+        futures = [executor.submit(_write_chunk, i, n, seed, str(paths[i]), fmt, i == 0 or not single_csv)
+                   for i, n in chunks]
+        for future in as_completed(futures):
+            _, n = future.result()
+            done += n
+            if on_chunk is not None:
+                on_chunk(done, time.perf_counter() - start)
+
+    if single_csv:
+        with open(output, 'wb') as out:
+            for path in paths:
+                with open(path, 'rb') as part:
+                    shutil.copyfileobj(part, out, 16 * 1024 * 1024)
+        shutil.rmtree(part_dir)
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'files': 1 if single_csv else len(paths),
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+        'output': output
+    }
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Shared declarative table loader
+Used by ingest_churn_data.py
+
+A TableLoad declares one file → table load:
+    name          label for progress / summary output
+    source        CSV path
+    table         target table (SCHEMA.TABLE)
+    column_map    CSV header → table column (default: feature_schema.CSV_COLUMN_MAP)
+    policy        'truncate'  replace the table contents: stream into <table>_STAGE,
+                              then DELETE + INSERT ... SELECT in one transaction
+                  'append'    insert after the existing rows
+                  'merge'     delta upsert: stream into <table>_STAGE (global
+                              temporary table), then one MERGE on key_columns
+    key_columns   merge key (default: USER_ID)
+    types         declared column types (default: feature_schema.INGEST_TYPES)
+    label_column  0/1 label cleaned during load (None to skip)
+
+run_table_loads() runs independent loads concurrently, one pooled connection
+per load, so total ingestion time is close to the slowest single load rather
+than the sum. Rows are streamed by csv_ingest.load_csv().
+
+Truncate and merge loads only touch the target table after the whole file is
+staged, and then in a single transaction, so a failed load leaves the table as
+it was. Append loads commit per batch (a failure leaves the rows appended so far).
+
+Delta loads (policy 'merge') are idempotent:
+    - every applied file is recorded in OML.INGEST_LOAD_LOG (SHA-256, mtime,
+      inserted / updated / unchanged counts)
+    - a file whose SHA-256 was already applied to the table is skipped, and so
+      is a file older than the table's high-water mark (latest FILE_MODIFIED
+      applied), unless force=True
+    - matched rows are only updated when a column actually differs, so the
+      MERGE touches (and logs redo for) the changed users only
+
+Usage:
+    loads = [TableLoad('Training Data', csv_path, 'OML.CHURN_DATASET_TRAINING')]
+    results, wall_seconds = run_table_loads(loads, get_connection)
+"""
+
+import time
+import hashlib
+from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from feature_schema import CSV_COLUMN_MAP, INGEST_TYPES, LABEL_COLUMN
+from csv_ingest import load_csv
+from db import create_if_missing
+
+POLICIES = ('truncate', 'append', 'merge')
+LOAD_LOG_TABLE = 'OML.INGEST_LOAD_LOG'
+
+TableLoad = namedtuple(
+    'TableLoad',
+    ['name', 'source', 'table', 'column_map', 'policy', 'key_columns', 'types', 'label_column'],
+    defaults=(CSV_COLUMN_MAP, 'truncate', ('USER_ID',), INGEST_TYPES, LABEL_COLUMN)
+)
+
+def stage_table_name(table):
+    """OML.USER_PROFILES → OML.USER_PROFILES_STAGE"""
+    return f"{table}_STAGE"
+
+def file_fingerprint(path):
+    """SHA-256, modification time and size of a source file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    stat = path.stat()
+    return {
+        'sha256': digest.hexdigest(),
+        'modified': datetime.fromtimestamp(stat.st_mtime).replace(microsecond=0),
+        'bytes': stat.st_size
+    }
+
+def ensure_stage_table(connection, table, stage):
+    """Create the session-private stage table (empty copy of table) unless it exists"""
+    ddl = (f"CREATE GLOBAL TEMPORARY TABLE {stage} ON COMMIT PRESERVE ROWS "
+           f"AS SELECT * FROM {table} WHERE 1 = 0")
+    if create_if_missing(connection, ddl):
+        print(f"✓ Created stage table {stage}")
+
+def ensure_load_log(connection):
+    """Create OML.INGEST_LOAD_LOG unless it exists (also in sql/create_churn_tables.sql)"""
+    create_if_missing(connection, f"""
+        CREATE TABLE {LOAD_LOG_TABLE} (
+            TABLE_NAME VARCHAR2(128) NOT NULL,
+            FILE_SHA256 VARCHAR2(64) NOT NULL,
+            FILE_NAME VARCHAR2(500) NOT NULL,
+            FILE_MODIFIED TIMESTAMP NOT NULL,
+            FILE_BYTES NUMBER(15),
+            LOAD_POLICY VARCHAR2(20) NOT NULL,
+            ROWS_STAGED NUMBER(12),
+            ROWS_INSERTED NUMBER(12),
+            ROWS_UPDATED NUMBER(12),
+            ROWS_UNCHANGED NUMBER(12),
+            APPLIED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT PK_INGEST_LOAD_LOG PRIMARY KEY (TABLE_NAME, FILE_SHA256)
+        )""")
+
+def applied_state(connection, table, sha256):
+    """(APPLIED_AT of this file or None, high-water mark FILE_MODIFIED or None)"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT MAX(CASE WHEN FILE_SHA256 = :sha256 THEN APPLIED_AT END), MAX(FILE_MODIFIED)
+            FROM {LOAD_LOG_TABLE}
+            WHERE TABLE_NAME = :table_name
+        """, sha256=sha256, table_name=table)
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+def record_load(cursor, table, source, fingerprint, policy, stats):
+    """Log an applied file (same transaction as the MERGE for delta loads)"""
+    cursor.execute(f"""
+        MERGE INTO {LOAD_LOG_TABLE} l
+        USING (SELECT :table_name AS TABLE_NAME, :sha256 AS FILE_SHA256 FROM DUAL) k
+        ON (l.TABLE_NAME = k.TABLE_NAME AND l.FILE_SHA256 = k.FILE_SHA256)
+        WHEN MATCHED THEN UPDATE SET
+            FILE_NAME = :file_name, FILE_MODIFIED = :modified, FILE_BYTES = :file_bytes,
+            LOAD_POLICY = :policy, ROWS_STAGED = :staged, ROWS_INSERTED = :inserted,
+            ROWS_UPDATED = :updated, ROWS_UNCHANGED = :unchanged, APPLIED_AT = CURRENT_TIMESTAMP
+        WHEN NOT MATCHED THEN INSERT (
+            TABLE_NAME, FILE_SHA256, FILE_NAME, FILE_MODIFIED, FILE_BYTES, LOAD_POLICY,
+            ROWS_STAGED, ROWS_INSERTED, ROWS_UPDATED, ROWS_UNCHANGED
+        ) VALUES (
+            :table_name, :sha256, :file_name, :modified, :file_bytes, :policy,
+            :staged, :inserted, :updated, :unchanged
+        )
+    """, table_name=table, sha256=fingerprint['sha256'], file_name=source.name,
+        modified=fingerprint['modified'], file_bytes=fingerprint['bytes'], policy=policy,
+        staged=stats['rows'], inserted=stats['inserted'], updated=stats['updated'],
+        unchanged=stats['unchanged'])
+
+def _changed_predicate(columns, key_columns):
+    """True when any non-key column differs (DECODE treats two NULLs as equal)"""
+    return " OR ".join(f"DECODE(t.{c}, s.{c}, 0, 1) = 1" for c in columns if c not in key_columns)
+
+def merge_counts_sql(table, stage, columns, key_columns):
+    """Stage rows split into new / changed / unchanged, plus duplicate keys in the stage"""
+    on = " AND ".join(f"t.{c} = s.{c}" for c in key_columns)
+    matched = f"t.{key_columns[0]} IS NOT NULL"
+    changed = _changed_predicate(columns, key_columns) or "1 = 0"
+    keys = " || '|' || ".join(f"s.{c}" for c in key_columns)
+    return f"""SELECT
+    COUNT(CASE WHEN NOT ({matched}) THEN 1 END),
+    COUNT(CASE WHEN {matched} AND ({changed}) THEN 1 END),
+    COUNT(CASE WHEN {matched} AND NOT ({changed}) THEN 1 END),
+    COUNT(*) - COUNT(DISTINCT {keys})
+FROM {stage} s
+LEFT JOIN {table} t ON ({on})"""
+
+def merge_sql(table, stage, columns, key_columns):
+    """MERGE stage rows into table: update changed rows on key match, insert otherwise"""
+    on = " AND ".join(f"t.{c} = s.{c}" for c in key_columns)
+    updates = ", ".join(f"t.{c} = s.{c}" for c in columns if c not in key_columns)
+    insert_cols = ", ".join(columns)
+    insert_vals = ", ".join(f"s.{c}" for c in columns)
+    matched = (f"\nWHEN MATCHED THEN UPDATE SET {updates}\n    WHERE {_changed_predicate(columns, key_columns)}"
+               if updates else "")
+    return (f"MERGE INTO {table} t\nUSING {stage} s\nON ({on})"
+            f"{matched}\nWHEN NOT MATCHED THEN INSERT ({insert_cols}) VALUES ({insert_vals})")
+
+def apply_merge(cursor, load, stage, columns):
+    """Count, then MERGE the staged delta; returns (inserted, updated, unchanged)"""
+    cursor.execute(merge_counts_sql(load.table, stage, columns, load.key_columns))
+    inserted, updated, unchanged, duplicates = cursor.fetchone()
+    if duplicates:
+        raise ValueError(f"{duplicates:,} duplicate {'/'.join(load.key_columns)} values in {load.source.name}")
+    cursor.execute(merge_sql(load.table, stage, columns, load.key_columns))
+    if cursor.rowcount != inserted + updated:
+        raise ValueError(f"MERGE touched {cursor.rowcount:,} rows, expected {inserted + updated:,}")
+    return inserted, updated, unchanged
+
+def apply_replace(cursor, load, stage, columns, staged_rows):
+    """Replace the table contents with the staged rows (uncommitted); returns (inserted, deleted)"""
+    cursor.execute(f"DELETE FROM {load.table}")
+    deleted = cursor.rowcount
+    column_list = ", ".join(columns)
+    cursor.execute(f"INSERT INTO {load.table} ({column_list}) SELECT {column_list} FROM {stage}")
+    if cursor.rowcount != staged_rows:
+        raise ValueError(f"INSERT copied {cursor.rowcount:,} rows, expected {staged_rows:,}")
+    return cursor.rowcount, deleted
+
+def run_table_load(connection, load, force=False, **options):
+    """
+    Run one TableLoad on connection.
+
+    options are passed to load_csv (batch_rows, block_mb, threads, direct_path).
+    Returns the load_csv stats plus policy, inserted (all policies), deleted (truncate),
+    updated / unchanged (merge),
+    table_rows and total_seconds; {'skipped': reason, ...} when a delta file was
+    already applied; None on failure.
+    """
+    if load.policy not in POLICIES:
+        raise ValueError(f"Unknown load policy: {load.policy} (expected one of {POLICIES})")
+    if not load.source.exists():
+        print(f"❌ ERROR: CSV file not found: {load.source}")
+        return None
+
+    start = time.perf_counter()
+    fingerprint = file_fingerprint(load.source)
+    ensure_load_log(connection)
+
+    target = load.table
+    if load.policy == 'merge':
+        applied_at, high_water_mark = applied_state(connection, load.table, fingerprint['sha256'])
+        skipped = None
+        if applied_at is not None:
+            skipped = f"already applied at {applied_at:%Y-%m-%d %H:%M:%S}"
+        elif high_water_mark is not None and fingerprint['modified'] <= high_water_mark:
+            skipped = (f"file modified {fingerprint['modified']:%Y-%m-%d %H:%M:%S} is not newer than "
+                       f"the high-water mark {high_water_mark:%Y-%m-%d %H:%M:%S}")
+        if skipped and not force:
+            print(f"⚠️  {load.name}: skipping {load.source.name}, {skipped} (use --force to re-apply)")
+            return {'skipped': skipped, 'policy': load.policy,
+                    'total_seconds': time.perf_counter() - start}
+    if load.policy != 'append':
+        target = stage_table_name(load.table)
+        ensure_stage_table(connection, load.table, target)
+        # Direct-path loads cannot target a global temporary table
+        options = dict(options, direct_path=False)
+
+    stats = load_csv(
+        connection, load.source, target,
+        truncate=load.policy != 'append',
+        column_map=load.column_map,
+        types=load.types,
+        label_column=load.label_column,
+        **options
+    )
+    if stats is None:
+        if target != load.table:
+            print(f"   {load.table} was not changed (only the stage table was loaded)")
+        return None
+
+    cursor = connection.cursor()
+    committed = False
+    try:
+        stats['inserted'] = stats['updated'] = stats['unchanged'] = None
+        if load.policy == 'merge':
+            merge_start = time.perf_counter()
+            stats['inserted'], stats['updated'], stats['unchanged'] = apply_merge(
+                cursor, load, target, stats['columns']
+            )
+            stats['merge_seconds'] = time.perf_counter() - merge_start
+        elif load.policy == 'truncate':
+            stats['inserted'], stats['deleted'] = apply_replace(
+                cursor, load, target, stats['columns'], stats['rows']
+            )
+        else:
+            # append: every streamed row is a new row
+            stats['inserted'] = stats['rows']
+        record_load(cursor, load.table, load.source, fingerprint, load.policy, stats)
+        connection.commit()
+        committed = True
+        if target != load.table:
+            # Release the session's stage rows
+            cursor.execute(f"TRUNCATE TABLE {target}")
+        cursor.execute(f"SELECT COUNT(*) FROM {load.table}")
+        stats['table_rows'] = cursor.fetchone()[0]
+    except Exception as e:
+        connection.rollback()
+        print(f"❌ ERROR: {load.name}: failed to finish {load.policy} into {load.table}: {e}")
+        if load.policy != 'append' and not committed:
+            print(f"   {load.table} was not changed (rolled back)")
+        return None
+    finally:
+        cursor.close()
+
+    stats['policy'] = load.policy
+    stats['total_seconds'] = time.perf_counter() - start
+    return stats
+
+def _run_pooled(connect, load, options):
+    """Worker: one connection per load, returned to the pool afterwards"""
+    connection = connect()
+    try:
+        return run_table_load(connection, load, **options)
+    finally:
+        connection.close()
+
+def run_table_loads(loads, connect, workers=None, **options):
+    """
+    Run loads concurrently, each on its own connection from connect().
+
+    Create the session pool before calling (connect is called from worker
+    threads). Returns ({load.name: stats or None}, wall_seconds).
+    """
+    names = [load.name for load in loads]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Load names must be unique: {names}")
+
+    workers = workers or len(loads)
+    results = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='table-load') as executor:
+        futures = {executor.submit(_run_pooled, connect, load, options): load for load in loads}
+        for future in as_completed(futures):
+            load = futures[future]
+            try:
+                results[load.name] = future.result()
+            except Exception as e:
+                print(f"❌ ERROR: {load.name}: {e}")
+                results[load.name] = None
+            if results[load.name] is not None:
+                if not results[load.name].get('skipped'):
+                    print(f"✓ {load.name} finished in {results[load.name]['total_seconds']:.1f}s")
+    return results, time.perf_counter() - start
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Shared tree ensemble → SQL compiler for in-database scoring
+Used by scripts/local/compile_model_sql.py (deploy / refresh / exactness check)
+
+Compiles a CompiledTreeEnsemble (XGBoost, CatBoost or GradientBoosting export
+from compiled_trees.py) into one SELECT:
+
+    features   each input cleaned like FeaturePreprocessor (NULL / NaN / ±inf →
+               fill value), rounded to float32 and widened to double, so split
+               decisions match the float32 model input exactly
+    trees      one nested CASE per tree, summed in chunks of trees_per_column
+               (keeps each expression small enough for the SQL parser)
+    output     base margin + sum of trees → 1 / (1 + EXP(-margin))
+
+Dialects:
+    oracle     BINARY_FLOAT / BINARY_DOUBLE casts and 'd' literals
+    duckdb     FLOAT / DOUBLE casts, exponent literals (parsed as DOUBLE)
+    sqlite     no float32 type: inputs must already be float32-representable,
+               EXP must be registered (sqlite3 create_function) if not built in
+
+Thresholds and leaf values are emitted with 17 significant digits, which
+round-trips every float64 exactly.
+"""
+
+import numpy as np
+
+DIALECTS = {
+    'oracle': {
+        'to_double': 'CAST(CAST({} AS BINARY_FLOAT) AS BINARY_DOUBLE)',
+        'literal': '{:.17e}d',
+    },
+    'duckdb': {
+        'to_double': 'CAST(CAST({} AS FLOAT) AS DOUBLE)',
+        'literal': '{:.17e}',
+    },
+    'sqlite': {
+        'to_double': '{}',
+        'literal': '{:.17e}',
+    },
+}
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+DEFAULT_TREES_PER_COLUMN = 50
+
+def _literal(value, dialect):
+    return DIALECTS[dialect]['literal'].format(float(value))
+
+def _feature_alias(index):
+    return f"F{index}"
+
+def tree_case_sql(compiled, node, dialect='oracle', indent=0):
+    """Nested CASE expression for the subtree rooted at node"""
+    pad = '    ' * indent
+    left, right = int(compiled.left[node]), int(compiled.right[node])
+    if left == node:
+        return _literal(compiled.value[node], dialect)
+
+    op = '<' if compiled.comparison == 'lt' else '<='
+    condition = f"{_feature_alias(int(compiled.feature[node]))} {op} {_literal(compiled.threshold[node], dialect)}"
+    return (
+        f"CASE WHEN {condition}\n"
+        f"{pad}    THEN {tree_case_sql(compiled, left, dialect, indent + 1)}\n"
+        f"{pad}    ELSE {tree_case_sql(compiled, right, dialect, indent + 1)}\n"
+        f"{pad}END"
+    )
+
+def feature_projection_sql(feature_cols, fill_values, dialect='oracle'):
+    """Cleaned, float32-rounded input columns F0..Fn"""
+    to_double = DIALECTS[dialect]['to_double']
+    items = []
+    for i, (col, fill) in enumerate(zip(feature_cols, fill_values)):
+        # ABS(x) < FLT_MAX is false for NULL, NaN and ±inf
+        cleaned = f"CASE WHEN ABS({col}) < {_literal(FLOAT32_MAX, dialect)} THEN {col} ELSE {_literal(fill, dialect)} END"
+        items.append(f"{to_double.format(cleaned)} AS {_feature_alias(i)}")
+    return items
+
+def compile_score_query(compiled, source, feature_cols, fill_values, id_col='USER_ID',
+                        dialect='oracle', trees_per_column=DEFAULT_TREES_PER_COLUMN):
+    """
+    SELECT <id_col>, CHURN_MARGIN, CHURN_PROBABILITY FROM <source>, scored in SQL.
+
+    feature_cols must be in model order (compiled feature indices refer to it).
+    """
+    if dialect not in DIALECTS:
+        raise ValueError(f"Unknown SQL dialect: {dialect} (expected one of {sorted(DIALECTS)})")
+
+    features = feature_projection_sql(feature_cols, fill_values, dialect)
+    chunk_items = []
+    for chunk, start in enumerate(range(0, compiled.n_trees, trees_per_column)):
+        roots = compiled.roots[start:start + trees_per_column]
+        terms = [f"({tree_case_sql(compiled, int(root), dialect, indent=3)})" for root in roots]
+        chunk_items.append("\n            + ".join(terms) + f" AS T{chunk}")
+
+    tree_sum = " + ".join(f"T{i}" for i in range(len(chunk_items))) or _literal(0.0, dialect)
+    feature_list = ",\n                ".join(features)
+    chunk_list = ",\n            ".join(chunk_items)
+
+    return f"""SELECT
+    {id_col},
+    CHURN_MARGIN,
+    1 / (1 + EXP(-CHURN_MARGIN)) AS CHURN_PROBABILITY
+FROM (
+    SELECT
+        {id_col},
+        {_literal(compiled.base_margin, dialect)} + {tree_sum} AS CHURN_MARGIN
+    FROM (
+        SELECT
+            {id_col},
+            {chunk_list}
+        FROM (
+            SELECT
+                {id_col},
+                {feature_list}
+            FROM {source}
+        )
+    )
+)"""
+
+def create_score_view_sql(view, compiled, source, feature_cols, fill_values, id_col='USER_ID',
+                          trees_per_column=DEFAULT_TREES_PER_COLUMN):
+    """CREATE OR REPLACE VIEW statement (Oracle) for the scoring query"""
+    query = compile_score_query(compiled, source, feature_cols, fill_values, id_col,
+                                dialect='oracle', trees_per_column=trees_per_column)
+    return f"CREATE OR REPLACE VIEW {view} AS\n{query}"
+
+def refresh_predictions_sql(view, predictions_table='OML.CHURN_PREDICTIONS', id_col='USER_ID'):
+    """
+    INSERT ... SELECT from the scoring view (binds :threshold, :model_version).
+
+    Conventional (no APPEND hint): it runs after a DELETE in the same
+    transaction, and only a conventional insert reuses the freed blocks.
+    """
+    return f"""INSERT INTO {predictions_table} (
+    USER_ID,
+    PREDICTED_CHURN_PROBABILITY,
+    PREDICTED_CHURN_LABEL,
+    RISK_SCORE,
+    MODEL_VERSION,
+    PREDICTION_DATE
+)
+SELECT
+    TO_CHAR({id_col}),
+    ROUND(CHURN_PROBABILITY, 4),
+    CASE WHEN CHURN_PROBABILITY >= :threshold THEN 1 ELSE 0 END,
+    LEAST(GREATEST(TRUNC(CHURN_PROBABILITY * 100), 0), 100),
+    :model_version,
+    SYSTIMESTAMP
+FROM {view}"""
+
+def check_sql_exactness(model, compiled, feature_cols, fill_values, X, engine='sqlite', atol=1e-6):
+    """
+    Score X with predict_proba and with the compiled SQL on a local engine
+    (in-memory SQLite or DuckDB); returns a report dict.
+
+    X is a float32 matrix in model feature order; NaN cells exercise the fill path.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    fills = np.asarray(fill_values, dtype=np.float32)
+    X_clean = np.where(np.isfinite(X), X, fills)
+
+    X_model = X_clean
+    if feature_cols is not None:
+        import pandas as pd
+        X_model = pd.DataFrame(X_clean, columns=feature_cols, copy=False)
+    expected = np.asarray(model.predict_proba(X_model))[:, 1]
+
+    query = compile_score_query(compiled, 'FEATURES', feature_cols, fill_values, 'ROW_ID', dialect=engine)
+    columns = ", ".join(f"{c} DOUBLE" for c in feature_cols)
+    # SQL NULL stands in for NaN / ±inf (neither SQLite nor the Oracle NUMBER source stores them)
+    rows = [
+        (i, *[float(v) if np.isfinite(v) else None for v in row])
+        for i, row in enumerate(X)
+    ]
+    placeholders = ", ".join("?" for _ in range(len(feature_cols) + 1))
+
+    if engine == 'duckdb':
+        import duckdb
+        conn = duckdb.connect()
+    elif engine == 'sqlite':
+        import math
+        import sqlite3
+        conn = sqlite3.connect(':memory:')
+        conn.create_function('EXP', 1, math.exp, deterministic=True)
+    else:
+        raise ValueError(f"Exactness check runs on sqlite or duckdb, not {engine}")
+
+    try:
+        conn.execute(f"CREATE TABLE FEATURES (ROW_ID INTEGER, {columns})")
+        conn.executemany(f"INSERT INTO FEATURES VALUES ({placeholders})", rows)
+        result = conn.execute(f"SELECT ROW_ID, CHURN_PROBABILITY FROM ({query}) ORDER BY ROW_ID").fetchall()
+    finally:
+        conn.close()
+
+    actual = np.array([r[1] for r in result], dtype=np.float64)
+    max_abs_diff = float(np.max(np.abs(expected - actual))) if len(actual) else 0.0
+    margin_expected = compiled.predict_margin(X_clean)
+    compiled_diff = float(np.max(np.abs(1.0 / (1.0 + np.exp(-margin_expected)) - actual))) if len(actual) else 0.0
+
+    return {
+        'engine': engine,
+        'rows': int(len(actual)),
+        'null_cells': int((~np.isfinite(X)).sum()),
+        'max_abs_diff': max_abs_diff,
+        'max_abs_diff_vs_compiled': compiled_diff,
+        'atol': atol,
+        'passed': len(actual) == len(X) and max_abs_diff <= atol
+    }
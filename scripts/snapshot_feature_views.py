@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Write dated, immutable Parquet snapshots of the churn feature views
+
+Each view in feature_schema.FEATURE_VIEWS is fetched once with the schema
+projection and written to data/feature_store/<VIEW>/snapshot_date=YYYY-MM-DD/
+(shared/feature_store.py) with a manifest of file hashes and a content hash.
+Training with --as-of DATE (or --replay-model MODEL_ID) reads these local
+files instead of re-running the feature SQL against ADB, and the snapshot's
+content hash is recorded in MODEL_REGISTRY.
+
+Usage:
+    python scripts/snapshot_feature_views.py                         # all views, today
+    python scripts/snapshot_feature_views.py --views CHURN_TRAINING_DATA
+    python scripts/snapshot_feature_views.py --list
+    python scripts/snapshot_feature_views.py --verify [--content]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+script_dir = Path(__file__).parent
+project_root = script_dir.parent
+env_file = project_root / '.env'
+
+try:
+    from dotenv import load_dotenv
+    if env_file.exists():
+        load_dotenv(dotenv_path=env_file)
+except ImportError:
+    pass
+
+sys.path.insert(0, str(script_dir / 'shared'))
+from feature_schema import FEATURE_VIEWS
+from feature_store import (write_snapshot, list_snapshots, read_manifest, verify_snapshot, parse_date,
+                           DEFAULT_STORE_DIR, DEFAULT_BATCH_ROWS)
+
+VIEW_NAMES = {view.split('.')[-1]: view for view, _, _, _, _ in FEATURE_VIEWS}
+
+def list_store(views, store_dir):
+    """Print the snapshots of each view"""
+    for view in views:
+        dates = list_snapshots(view, store_dir)
+        print(f"\n{view}: {len(dates)} snapshot{'s' if len(dates) != 1 else ''}")
+        for snapshot_date in dates:
+            manifest = read_manifest(view, snapshot_date, store_dir)
+            size_mb = sum(f['bytes'] for f in manifest['files']) / (1024 * 1024)
+            print(f"   {snapshot_date}  {manifest['rows']:>10,} rows  {size_mb:8.1f} MB  "
+                  f"{manifest['content_sha256'][:12]}")
+    return True
+
+def verify_store(views, store_dir, content=False):
+    """Check every snapshot's files (and optionally content) against its manifest"""
+    ok = True
+    for view in views:
+        for snapshot_date in list_snapshots(view, store_dir):
+            try:
+                verify_snapshot(read_manifest(view, snapshot_date, store_dir), store_dir, content=content)
+                print(f"✓ {view} {snapshot_date}")
+            except ValueError as e:
+                print(f"❌ {e}")
+                ok = False
+    return ok
+
+def snapshot_views(views, snapshot_date, store_dir, batch_rows):
+    """Write today's (or snapshot_date's) snapshot of each view"""
+    from db import get_connection, print_timings
+
+    connection = get_connection()
+    print_timings()
+    ok = True
+    try:
+        for view in views:
+            start = time.perf_counter()
+            print(f"\n📥 {view}")
+            try:
+                manifest = write_snapshot(connection, view, snapshot_date, store_dir=store_dir,
+                                          batch_rows=batch_rows)
+            except Exception as e:
+                print(f"   ❌ ERROR: {e}")
+                ok = False
+                continue
+            if manifest.get('existing'):
+                print(f"   ⚠️  Snapshot {manifest['snapshot_date']} already exists (immutable, not rewritten)")
+            else:
+                size_mb = sum(f['bytes'] for f in manifest['files']) / (1024 * 1024)
+                print(f"   ✓ {manifest['rows']:,} rows → {len(manifest['files'])} file(s), {size_mb:,.1f} MB "
+                      f"({time.perf_counter() - start:.1f}s)")
+            print(f"   🔑 Content hash: {manifest['content_sha256']}")
+    finally:
+        connection.close()
+    return ok
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Dated Parquet snapshots of the feature views')
+    parser.add_argument('--views', nargs='+', choices=list(VIEW_NAMES), default=list(VIEW_NAMES),
+                        help='Views to snapshot (default: all)')
+    parser.add_argument('--date', type=str, default=None, help='Snapshot date YYYY-MM-DD (default: today)')
+    parser.add_argument('--store-dir', type=str, default=str(DEFAULT_STORE_DIR), help='Feature store directory')
+    parser.add_argument('--batch-rows', type=int, default=DEFAULT_BATCH_ROWS, help='Rows per fetch batch')
+    parser.add_argument('--list', action='store_true', help='List the stored snapshots')
+    parser.add_argument('--verify', action='store_true', help='Check stored snapshots against their manifests')
+    parser.add_argument('--content', action='store_true', help='With --verify, also recompute content hashes')
+    args = parser.parse_args()
+
+    views = [VIEW_NAMES[name] for name in args.views]
+
+    print("=" * 60)
+    print("Feature View Snapshots")
+    print("=" * 60)
+    print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Store: {args.store_dir}")
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("❌ ERROR: pyarrow is required")
+        print("   Install with: pip install pyarrow")
+        sys.exit(1)
+
+    if args.list:
+        ok = list_store(views, args.store_dir)
+    elif args.verify:
+        ok = verify_store(views, args.store_dir, content=args.content)
+    else:
+        ok = snapshot_views(views, parse_date(args.date), args.store_dir, args.batch_rows)
+
+    print(f"\nCompleted at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,6 @@ Note: Requires OML4Py (typically available in OML Notebooks)
       Falls back to local sklearn/xgboost if OML4Py unavailable
 """
 
-import os
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -35,58 +34,10 @@ try:
 except ImportError:
     pass
 
-def initialize_oracle_client():
-    """Initialize Oracle client"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        sys.exit(1)
-    
-    wallet_path = os.getenv('ADB_WALLET_PATH')
-    if not wallet_path:
-        print("❌ ERROR: ADB_WALLET_PATH not set")
-        sys.exit(1)
-    
-    if not os.getenv('TNS_ADMIN'):
-        os.environ['TNS_ADMIN'] = wallet_path
-    
-    try:
-        import glob
-        oracle_opt_paths = ['/opt/oracle/instantclient_*/lib', '/opt/oracle/instantclient_*']
-        lib_dir = None
-        for pattern in oracle_opt_paths:
-            matches = glob.glob(pattern)
-            for match in matches:
-                if os.path.isdir(match):
-                    lib_dir = match
-                    break
-            if lib_dir:
-                break
-        
-        if lib_dir:
-            try:
-                oracledb.init_oracle_client(lib_dir=lib_dir, config_dir=wallet_path)
-            except Exception:
-                try:
-                    oracledb.init_oracle_client(lib_dir=lib_dir)
-                except Exception:
-                    oracledb.init_oracle_client(config_dir=wallet_path)
-        else:
-            oracledb.init_oracle_client(config_dir=wallet_path)
-    except Exception:
-        pass
-    
-    return oracledb
-
-def get_connection():
-    """Get database connection"""
-    oracledb = initialize_oracle_client()
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    return oracledb.connect(user=username, password=password, dsn=connection_string)
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
+from snapshot_cache import load_view_dataframe
+from preprocessing import FeaturePreprocessor
 
 def load_data_from_view(connection):
     """Load training data from view"""
@@ -94,14 +45,8 @@ def load_data_from_view(connection):
     print("Loading Training Data from View")
     print("=" * 60)
     
-    import pandas as pd
-    
-    # Query the view
-    query = """
-        SELECT * FROM OML.CHURN_TRAINING_DATA
-    """
-    
-    df = pd.read_sql(query, connection)
+    # Query the view (local snapshot cache avoids re-pulling unchanged data)
+    df = load_view_dataframe(connection)
     print(f"✓ Loaded {len(df):,} rows from CHURN_TRAINING_DATA view")
     
     # Separate features and target
@@ -162,20 +107,10 @@ def train_model_local(X_train, y_train, X_val, y_val, feature_cols):
             print("   Install with: pip install scikit-learn")
             sys.exit(1)
     
-    # Clean data
-    import numpy as np
-    import pandas as pd
-    
-    # Replace infinity and NaN
-    X_train = X_train.replace([np.inf, -np.inf], np.nan)
-    X_train = X_train.fillna(0)
-    X_val = X_val.replace([np.inf, -np.inf], np.nan)
-    X_val = X_val.fillna(0)
-    
-    # Ensure numeric
-    for col in feature_cols:
-        X_train[col] = pd.to_numeric(X_train[col], errors='coerce').fillna(0)
-        X_val[col] = pd.to_numeric(X_val[col], errors='coerce').fillna(0)
+    # Clean data (same transform for train and validation, single vectorized pass)
+    preprocessor = FeaturePreprocessor().fit(X_train, feature_cols)
+    X_train = preprocessor.transform(X_train)
+    X_val = preprocessor.transform(X_val)
     
     print(f"Training {model_name} model...")
     print(f"  Training samples: {len(X_train):,}")
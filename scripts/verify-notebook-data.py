@@ -24,12 +24,8 @@ except ImportError:
     print("❌ python-dotenv not installed. Run: pip install python-dotenv")
     sys.exit(1)
 
-try:
-    import oracledb
-    print("✓ oracledb module imported\n")
-except ImportError:
-    print("❌ oracledb not installed. Run: pip install oracledb")
-    sys.exit(1)
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection, get_client_mode
 
 def test_connection():
     """Test database connection and query notebook tables/views"""
@@ -38,69 +34,15 @@ def test_connection():
     print("DATABASE CONNECTION TEST")
     print("=" * 70)
     
-    # Get connection parameters
-    wallet_path = os.getenv('ADB_WALLET_PATH')
     connection_string = os.getenv('ADB_CONNECTION_STRING')
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    
-    print(f"Wallet Path: {wallet_path}")
     print(f"Connection String: {connection_string}")
-    print(f"Username: {username}")
-    print(f"Password: {'*' * 8 if password else 'NOT SET'}")
+    print(f"Username: {os.getenv('ADB_USERNAME', 'OML')}")
     print()
     
-    if not all([wallet_path, connection_string, username, password]):
-        print("❌ Missing required environment variables")
-        return False
-    
-    # Set TNS_ADMIN
-    os.environ['TNS_ADMIN'] = wallet_path
-    
     try:
-        # Try to initialize thick mode (with Instant Client)
-        try:
-            # Try common locations for Oracle Instant Client
-            import glob
-            possible_paths = [
-                '/opt/oracle/instantclient_*',
-                '/opt/homebrew/lib',
-                '/usr/local/lib',
-            ]
-            
-            lib_dir = None
-            for pattern in possible_paths:
-                matches = glob.glob(pattern) if '*' in pattern else [pattern]
-                for match in matches:
-                    if os.path.exists(match):
-                        # Check for library file
-                        for lib_name in ['libclntsh.dylib', 'libclntsh.so']:
-                            lib_path = os.path.join(match, lib_name)
-                            if os.path.exists(lib_path):
-                                lib_dir = match
-                                break
-                        if lib_dir:
-                            break
-                if lib_dir:
-                    break
-            
-            if lib_dir:
-                oracledb.init_oracle_client(lib_dir=lib_dir)
-                print(f"✓ Oracle Instant Client initialized (thick mode): {lib_dir}\n")
-            else:
-                print("⚠️  Oracle Instant Client not found, using thin mode")
-                print("   (Thin mode may have limited wallet support)\n")
-        except Exception as e:
-            print(f"⚠️  Thick mode initialization failed: {e}")
-            print("   Using thin mode\n")
-        
-        # Connect to database
         print(f"Connecting to {connection_string}...")
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
+        connection = get_connection()
+        print(f"✓ Oracle client mode: {get_client_mode()}")
         print("✓ Successfully connected to database!\n")
         
         cursor = connection.cursor()
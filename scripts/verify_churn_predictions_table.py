@@ -7,7 +7,6 @@ This script checks the actual structure of OML.CHURN_PREDICTIONS table
 and compares it with the expected schema.
 """
 
-import os
 import sys
 from pathlib import Path
 
@@ -24,39 +23,8 @@ try:
 except ImportError:
     pass
 
-def get_connection():
-    """Get database connection"""
-    try:
-        import oracledb
-    except ImportError:
-        print("❌ ERROR: oracledb not installed")
-        return None
-    
-    username = os.getenv('ADB_USERNAME', 'OML')
-    password = os.getenv('ADB_PASSWORD')
-    connection_string = os.getenv('ADB_CONNECTION_STRING')
-    
-    if not password or not connection_string:
-        print("❌ ERROR: ADB_PASSWORD and ADB_CONNECTION_STRING must be set")
-        return None
-    
-    try:
-        wallet_path = os.getenv('ADB_WALLET_PATH')
-        if wallet_path and Path(wallet_path).exists():
-            try:
-                oracledb.init_oracle_client(lib_dir=os.getenv('ORACLE_CLIENT_LIB_DIR'))
-            except Exception:
-                pass
-        
-        connection = oracledb.connect(
-            user=username,
-            password=password,
-            dsn=connection_string
-        )
-        return connection
-    except Exception as e:
-        print(f"❌ ERROR: Failed to connect: {e}")
-        return None
+sys.path.insert(0, str(script_dir / 'shared'))
+from db import get_connection
 
 def check_table_structure(connection):
     """Check actual table structure"""
@@ -187,8 +155,6 @@ def check_table_structure(connection):
 
 def main():
     connection = get_connection()
-    if not connection:
-        sys.exit(1)
     
     try:
         check_table_structure(connection)
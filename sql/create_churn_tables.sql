@@ -6,6 +6,9 @@
 --   1. CHURN_DATASET_TRAINING - Training data (45,858 rows)
 --   2. USER_PROFILES - Input features for actual users (4,142 rows)
 --   3. CHURN_PREDICTIONS - Model predictions/output (4,142 rows)
+--   4. INGEST_LOAD_LOG - Applied ingestion files (delta load high-water mark)
+--   5. USER_ORDER_AGGREGATES - Running per-user order aggregates (RFM refresh)
+--   6. FEATURE_REFRESH_STATE - Feature refresh watermarks
 --
 -- Usage: Run this script as OML user in Oracle ADB Serverless
 -- ============================================================================
@@ -130,6 +133,81 @@ COMMENT ON COLUMN OML.CHURN_PREDICTIONS.MODEL_VERSION IS 'Version of model used
 COMMENT ON COLUMN OML.CHURN_PREDICTIONS.PREDICTION_DATE IS 'When prediction was made';
 COMMENT ON COLUMN OML.CHURN_PREDICTIONS.CONFIDENCE_SCORE IS 'Model confidence (optional)';
 
+-- ============================================================================
+-- Table 4: INGEST_LOAD_LOG
+-- ============================================================================
+-- Purpose: One row per CSV applied by ingest_churn_data.py
+-- Used for: delta (MERGE) loads - a file is never applied twice (SHA-256) and
+--           never applied when it is older than the table's high-water mark
+--           (latest FILE_MODIFIED applied)
+
+CREATE TABLE OML.INGEST_LOAD_LOG (
+    TABLE_NAME VARCHAR2(128) NOT NULL,
+    FILE_SHA256 VARCHAR2(64) NOT NULL,
+    FILE_NAME VARCHAR2(500) NOT NULL,
+    FILE_MODIFIED TIMESTAMP NOT NULL,
+    FILE_BYTES NUMBER(15),
+    LOAD_POLICY VARCHAR2(20) NOT NULL,
+    ROWS_STAGED NUMBER(12),
+    ROWS_INSERTED NUMBER(12),
+    ROWS_UPDATED NUMBER(12),
+    ROWS_UNCHANGED NUMBER(12),
+    APPLIED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT PK_INGEST_LOAD_LOG PRIMARY KEY (TABLE_NAME, FILE_SHA256)
+);
+
+COMMENT ON TABLE OML.INGEST_LOAD_LOG IS 'Applied ingestion files per table (idempotency and high-water mark for delta loads)';
+
+-- Session-private stage tables for delta loads (rows survive the per-batch commits)
+CREATE GLOBAL TEMPORARY TABLE OML.CHURN_DATASET_TRAINING_STAGE
+ON COMMIT PRESERVE ROWS
+AS SELECT * FROM OML.CHURN_DATASET_TRAINING WHERE 1 = 0;
+
+CREATE GLOBAL TEMPORARY TABLE OML.USER_PROFILES_STAGE
+ON COMMIT PRESERVE ROWS
+AS SELECT * FROM OML.USER_PROFILES WHERE 1 = 0;
+
+-- ============================================================================
+-- Table 5: USER_ORDER_AGGREGATES
+-- ============================================================================
+-- Purpose: Running per-user order count / value sum / first and last order
+-- Used for: incremental RFM refresh (refresh_rfm_features.py) - each run adds
+--           only the orders since the watermark, then MERGEs the users tagged
+--           with its REFRESH_RUN into USER_PROFILES
+
+CREATE TABLE OML.USER_ORDER_AGGREGATES (
+    USER_ID VARCHAR2(36) NOT NULL,
+    ORDER_COUNT NUMBER(10) NOT NULL,
+    ORDER_VALUE_SUM NUMBER(14,2) NOT NULL,
+    FIRST_ORDER_AT TIMESTAMP NOT NULL,
+    LAST_ORDER_AT TIMESTAMP NOT NULL,
+    REFRESH_RUN NUMBER(12) NOT NULL,
+    UPDATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT PK_USER_ORDER_AGGREGATES PRIMARY KEY (USER_ID)
+);
+
+COMMENT ON TABLE OML.USER_ORDER_AGGREGATES IS 'Running per-user order aggregates from ADMIN.ORDERS_PROFILE_V (RFM features)';
+
+-- ============================================================================
+-- Table 6: FEATURE_REFRESH_STATE
+-- ============================================================================
+-- Purpose: One row per incremental feature job (ORDER_CREATED_AT watermark,
+--          day recency was last rolled forward, last run counts)
+
+CREATE TABLE OML.FEATURE_REFRESH_STATE (
+    JOB_NAME VARCHAR2(64) NOT NULL,
+    WATERMARK TIMESTAMP,
+    RECENCY_AS_OF DATE,
+    LAST_RUN_ID NUMBER(12) DEFAULT 0 NOT NULL,
+    ORDERS_PROCESSED NUMBER(12),
+    USERS_CHANGED NUMBER(12),
+    PROFILES_UPDATED NUMBER(12),
+    REFRESHED_AT TIMESTAMP,
+    CONSTRAINT PK_FEATURE_REFRESH_STATE PRIMARY KEY (JOB_NAME)
+);
+
+COMMENT ON TABLE OML.FEATURE_REFRESH_STATE IS 'Watermarks of incremental feature refresh jobs';
+
 -- ============================================================================
 -- Indexes for Performance
 -- ============================================================================
@@ -147,6 +225,9 @@ CREATE INDEX IDX_CHURN_PRED_RISK ON OML.CHURN_PREDICTIONS(RISK_SCORE);
 CREATE INDEX IDX_CHURN_PRED_DATE ON OML.CHURN_PREDICTIONS(PREDICTION_DATE);
 CREATE INDEX IDX_CHURN_PRED_MODEL ON OML.CHURN_PREDICTIONS(MODEL_VERSION);
 
+-- Indexes for USER_ORDER_AGGREGATES (users changed by a refresh run)
+CREATE INDEX IDX_USER_ORDER_AGG_RUN ON OML.USER_ORDER_AGGREGATES(REFRESH_RUN);
+
 -- ============================================================================
 -- Verification Queries
 -- ============================================================================
@@ -160,7 +241,10 @@ FROM USER_TABLES
 WHERE TABLE_NAME IN (
     'CHURN_DATASET_TRAINING',
     'USER_PROFILES',
-    'CHURN_PREDICTIONS'
+    'CHURN_PREDICTIONS',
+    'INGEST_LOAD_LOG',
+    'USER_ORDER_AGGREGATES',
+    'FEATURE_REFRESH_STATE'
 )
 ORDER BY TABLE_NAME;
 
@@ -173,7 +257,10 @@ FROM USER_CONSTRAINTS
 WHERE TABLE_NAME IN (
     'CHURN_DATASET_TRAINING',
     'USER_PROFILES',
-    'CHURN_PREDICTIONS'
+    'CHURN_PREDICTIONS',
+    'INGEST_LOAD_LOG',
+    'USER_ORDER_AGGREGATES',
+    'FEATURE_REFRESH_STATE'
 )
 ORDER BY TABLE_NAME, CONSTRAINT_NAME;
 
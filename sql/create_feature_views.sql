@@ -1,10 +1,13 @@
 -- ============================================================================
 -- Feature Engineering Views for Churn Prediction Model
 -- ============================================================================
+-- GENERATED from scripts/shared/feature_schema.py - do not edit by hand.
+-- Regenerate with: python scripts/create_feature_views.py --write-sql
+--
 -- Purpose: Create views for model training and scoring
 -- Views:
---   1. CHURN_TRAINING_FEATURES - Features for training (excludes target)
---   2. CHURN_TRAINING_DATA - Features + target for training
+--   1. CHURN_TRAINING_FEATURES - Feature columns only (for model training)
+--   2. CHURN_TRAINING_DATA - Features + target label for training
 --   3. CHURN_USER_FEATURES - Features for scoring actual users
 --
 -- Usage: Run this script as OML user in Oracle ADB Serverless
@@ -15,18 +18,17 @@
 -- ============================================================================
 -- Purpose: Feature columns only (for model training)
 -- Source: OML.CHURN_DATASET_TRAINING
--- Excludes: USER_ID, CHURNED (target label)
 
 CREATE OR REPLACE VIEW OML.CHURN_TRAINING_FEATURES AS
 SELECT 
     -- Demographics
     AGE,
-    CASE 
+    CASE
         WHEN GENDER = 'Male' THEN 1
         WHEN GENDER = 'Female' THEN 2
         ELSE 0
     END AS GENDER_CODE,
-    CASE 
+    CASE
         WHEN SIGNUP_QUARTER = 'Q1' THEN 1
         WHEN SIGNUP_QUARTER = 'Q2' THEN 2
         WHEN SIGNUP_QUARTER = 'Q3' THEN 3
@@ -64,110 +66,123 @@ SELECT
     DISCOUNT_USAGE_RATE,
     PAYMENT_METHOD_DIVERSITY,
     CREDIT_BALANCE
-    
-    -- Note: Excluding USER_ID (identifier) and CHURNED (target label)
-    -- Note: Excluding COUNTRY, CITY (categorical, would need encoding)
 FROM OML.CHURN_DATASET_TRAINING;
 
--- Note: COMMENT ON VIEW is not supported in Oracle, view purpose is documented above
-
 -- ============================================================================
 -- View 2: CHURN_TRAINING_DATA
 -- ============================================================================
 -- Purpose: Features + target label for training
 -- Source: OML.CHURN_DATASET_TRAINING
--- Includes: All features + CHURNED (target)
 
 CREATE OR REPLACE VIEW OML.CHURN_TRAINING_DATA AS
 SELECT 
     USER_ID,
-    -- All features from CHURN_TRAINING_FEATURES
+    -- Demographics
     AGE,
-    CASE 
+    CASE
         WHEN GENDER = 'Male' THEN 1
         WHEN GENDER = 'Female' THEN 2
         ELSE 0
     END AS GENDER_CODE,
-    CASE 
+    CASE
         WHEN SIGNUP_QUARTER = 'Q1' THEN 1
         WHEN SIGNUP_QUARTER = 'Q2' THEN 2
         WHEN SIGNUP_QUARTER = 'Q3' THEN 3
         WHEN SIGNUP_QUARTER = 'Q4' THEN 4
         ELSE 0
     END AS SIGNUP_QUARTER_CODE,
+    
+    -- Membership
     MEMBERSHIP_YEARS,
+    
+    -- Engagement metrics
     LOGIN_FREQUENCY,
     SESSION_DURATION_AVG,
     PAGES_PER_SESSION,
     EMAIL_OPEN_RATE,
     SOCIAL_MEDIA_ENGAGEMENT_SCORE,
     MOBILE_APP_USAGE,
+    
+    -- Purchase behavior
     TOTAL_PURCHASES,
     AVERAGE_ORDER_VALUE,
     DAYS_SINCE_LAST_PURCHASE,
     LIFETIME_VALUE,
+    
+    -- Cart and wishlist
     CART_ABANDONMENT_RATE,
     WISHLIST_ITEMS,
+    
+    -- Customer service
     CUSTOMER_SERVICE_CALLS,
     RETURNS_RATE,
     PRODUCT_REVIEWS_WRITTEN,
+    
+    -- Financial
     DISCOUNT_USAGE_RATE,
     PAYMENT_METHOD_DIVERSITY,
     CREDIT_BALANCE,
-    -- Target label
+    
+    -- Target
     CHURNED
 FROM OML.CHURN_DATASET_TRAINING;
 
--- Note: COMMENT ON VIEW is not supported in Oracle, view purpose is documented above
-
 -- ============================================================================
 -- View 3: CHURN_USER_FEATURES
 -- ============================================================================
 -- Purpose: Features for scoring actual users
 -- Source: OML.USER_PROFILES
--- Excludes: USER_ID (for joining), CHURNED (historical label, not prediction)
 
 CREATE OR REPLACE VIEW OML.CHURN_USER_FEATURES AS
 SELECT 
     USER_ID,
-    -- All features (same as training)
+    -- Demographics
     AGE,
-    CASE 
+    CASE
         WHEN GENDER = 'Male' THEN 1
         WHEN GENDER = 'Female' THEN 2
         ELSE 0
     END AS GENDER_CODE,
-    CASE 
+    CASE
         WHEN SIGNUP_QUARTER = 'Q1' THEN 1
         WHEN SIGNUP_QUARTER = 'Q2' THEN 2
         WHEN SIGNUP_QUARTER = 'Q3' THEN 3
         WHEN SIGNUP_QUARTER = 'Q4' THEN 4
         ELSE 0
     END AS SIGNUP_QUARTER_CODE,
+    
+    -- Membership
     MEMBERSHIP_YEARS,
+    
+    -- Engagement metrics
     LOGIN_FREQUENCY,
     SESSION_DURATION_AVG,
     PAGES_PER_SESSION,
     EMAIL_OPEN_RATE,
     SOCIAL_MEDIA_ENGAGEMENT_SCORE,
     MOBILE_APP_USAGE,
+    
+    -- Purchase behavior
     TOTAL_PURCHASES,
     AVERAGE_ORDER_VALUE,
     DAYS_SINCE_LAST_PURCHASE,
     LIFETIME_VALUE,
+    
+    -- Cart and wishlist
     CART_ABANDONMENT_RATE,
     WISHLIST_ITEMS,
+    
+    -- Customer service
     CUSTOMER_SERVICE_CALLS,
     RETURNS_RATE,
     PRODUCT_REVIEWS_WRITTEN,
+    
+    -- Financial
     DISCOUNT_USAGE_RATE,
     PAYMENT_METHOD_DIVERSITY,
     CREDIT_BALANCE
-    -- Note: Excluding CHURNED (historical label, not used for prediction)
 FROM OML.USER_PROFILES;
 
--- Note: COMMENT ON VIEW is not supported in Oracle, view purpose is documented above
-
 -- ============================================================================
 -- Verification Queries
 -- ============================================================================